@@ -0,0 +1,258 @@
+-- ============================================================================
+-- EVENT_HISTORY.TRANSACTION: PARTISI PER WAKTU (creDtTm)
+-- ============================================================================
+--
+-- FUNGSI:
+--   Tabel transaction dipartisi per bulan (atau per hari) berdasarkan
+--   CreDtTm, supaya query window (velocity 24 jam, history 30 hari Rule 018,
+--   stats per creDtTm) tidak makin lambat seiring data bertambah.
+--
+-- CATATAN:
+--   - Postgres tidak mengizinkan generated column sebagai partition key, jadi
+--     key-nya expression (transaction->>'CreDtTm'). Kolom creDtTm tetap ada;
+--     partition pruning hanya terjadi untuk query yang memakai expression
+--     tersebut (query API lewat credttm_condition).
+--   - Lookup history rule Tazama (901/902/006/018) memfilter kolom creDtTm,
+--     jadi TIDAK mendapat partition pruning: planner tetap membuka semua
+--     partisi. Yang mereka dapat hanya index per partisi (B-tree lebih kecil,
+--     BRIN) dan retention (partisi lama di-drop, bukan DELETE besar).
+--   - Primary key (endToEndId, txTp, tenantId) / unique (msgId, tenantId)
+--     tidak bisa global di tabel partisi (harus memuat partition key), jadi
+--     di tabel transaction menjadi index biasa. Keunikannya tetap dijaga oleh
+--     tabel transaction_key (primary key + constraint unique_msgid) yang diisi
+--     trigger trg_transaction_key: insert duplikat tetap gagal dengan
+--     unique_violation. Bedanya: INSERT ... ON CONFLICT pada transaction tidak
+--     lagi melihat key tersebut, dan TRUNCATE transaction tidak mengosongkan
+--     transaction_key.
+--   - CreDtTm NULL / di luar range masuk ke transaction_default. Saat partisi
+--     baru dibuat, row default yang masuk range-nya dipindah ke partisi itu
+--     (CREATE ... PARTITION OF gagal selama row tersebut ada di default);
+--     status partition_migrate.py melaporkan jumlah row yang tersisa.
+--   - Index: BRIN pada creDtTm, B-tree (source, creDtTm) dan
+--     (destination, creDtTm), plus index lama (non-unique).
+--
+-- FUNCTIONS:
+--   partition_transaction_table(interval, ahead)  migrasi (idempotent), tabel lama
+--                                                 disimpan sebagai transaction_unpartitioned
+--   ensure_transaction_partitions(interval, ahead) buat partisi sampai N periode ke depan
+--   drop_transaction_partitions(interval, retain)  hapus partisi lebih tua dari N periode
+--                                                 (beserta key-nya di transaction_key)
+--   ensure_transaction_keys()                      buat / isi transaction_key dan triggernya
+--
+-- File ini hanya membuat fungsi. Migrasi tidak jalan otomatis: jalankan
+-- tazama-api-client/partition_migrate.py migrate saat Tazama idle.
+
+\connect event_history;
+
+CREATE OR REPLACE FUNCTION transaction_partition_name(p_interval text, p_start date) RETURNS text AS $$
+    SELECT 'transaction_p' || to_char(p_start, CASE WHEN p_interval = 'day' THEN 'YYYYMMDD' ELSE 'YYYYMM' END);
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE OR REPLACE FUNCTION ensure_transaction_partitions(
+    p_interval text DEFAULT 'month',
+    p_ahead int DEFAULT 3,
+    p_from date DEFAULT NULL
+) RETURNS SETOF text AS $$
+DECLARE
+    step interval := CASE WHEN p_interval = 'day' THEN interval '1 day' ELSE interval '1 month' END;
+    period_start date := date_trunc(p_interval, COALESCE(p_from, current_date))::date;
+    last_start date := date_trunc(p_interval, current_date + p_ahead * step)::date;
+    partition_name text;
+    lower_bound text;
+    upper_bound text;
+    moved bigint;
+BEGIN
+    IF p_interval NOT IN ('day', 'month') THEN
+        RAISE EXCEPTION 'interval must be day or month, got %', p_interval;
+    END IF;
+    WHILE period_start <= last_start LOOP
+        partition_name := transaction_partition_name(p_interval, period_start);
+        IF to_regclass(partition_name) IS NULL THEN
+            -- Bounds compare as ISO-8601 text, the format CreDtTm is stored in
+            lower_bound := to_char(period_start, 'YYYY-MM-DD');
+            upper_bound := to_char(period_start + step, 'YYYY-MM-DD');
+
+            -- Rows of this range parked in the default partition would make CREATE ... PARTITION OF
+            -- fail: take them out first and route them into the new partition afterwards
+            moved := 0;
+            IF to_regclass('transaction_default') IS NOT NULL THEN
+                CREATE TEMP TABLE transaction_default_moved ON COMMIT DROP AS
+                SELECT source, destination, transaction FROM transaction_default
+                WHERE (transaction->>'CreDtTm') >= lower_bound AND (transaction->>'CreDtTm') < upper_bound;
+                GET DIAGNOSTICS moved = ROW_COUNT;
+                IF moved > 0 THEN
+                    DELETE FROM transaction_default
+                    WHERE (transaction->>'CreDtTm') >= lower_bound AND (transaction->>'CreDtTm') < upper_bound;
+                END IF;
+            END IF;
+
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF transaction FOR VALUES FROM (%L) TO (%L)',
+                partition_name, lower_bound, upper_bound
+            );
+
+            IF to_regclass('pg_temp.transaction_default_moved') IS NOT NULL THEN
+                INSERT INTO transaction (source, destination, transaction)
+                SELECT source, destination, transaction FROM transaction_default_moved;
+                DROP TABLE transaction_default_moved;
+            END IF;
+            IF moved > 0 THEN
+                RAISE NOTICE 'moved % row(s) from transaction_default into %', moved, partition_name;
+            END IF;
+            RETURN NEXT partition_name;
+        END IF;
+        period_start := (period_start + step)::date;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION drop_transaction_partitions(
+    p_interval text DEFAULT 'month',
+    p_retain int DEFAULT 12
+) RETURNS SETOF text AS $$
+DECLARE
+    step interval := CASE WHEN p_interval = 'day' THEN interval '1 day' ELSE interval '1 month' END;
+    cutoff date := date_trunc(p_interval, current_date - p_retain * step)::date;
+    part record;
+BEGIN
+    FOR part IN
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'transaction'::regclass
+          AND c.relname ~ '^transaction_p[0-9]+$'
+          AND transaction_partition_name(p_interval, cutoff) > c.relname
+          AND length(c.relname) = length(transaction_partition_name(p_interval, cutoff))
+        ORDER BY c.relname
+    LOOP
+        EXECUTE format('ALTER TABLE transaction DETACH PARTITION %I', part.relname);
+        -- DROP fires no row triggers: release the partition's keys explicitly
+        IF to_regclass('transaction_key') IS NOT NULL THEN
+            EXECUTE format(
+                'DELETE FROM transaction_key k USING %I p '
+                'WHERE k.endToEndId = p.endToEndId AND k.txTp = p.txTp AND k.tenantId = p.tenantId',
+                part.relname
+            );
+        END IF;
+        EXECUTE format('DROP TABLE %I', part.relname);
+        RETURN NEXT part.relname;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Keeps transaction_key in step with transaction (AFTER row trigger)
+CREATE OR REPLACE FUNCTION transaction_key_sync() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        DELETE FROM transaction_key
+        WHERE endToEndId = OLD.endToEndId AND txTp = OLD.txTp AND tenantId = OLD.tenantId;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        -- A duplicate raises unique_violation here and aborts the insert, as the old constraints did
+        INSERT INTO transaction_key (endToEndId, txTp, tenantId, msgId)
+        VALUES (NEW.endToEndId, NEW.txTp, NEW.tenantId, NEW.msgId);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION ensure_transaction_keys() RETURNS void AS $$
+BEGIN
+    IF to_regclass('transaction_key') IS NULL THEN
+        CREATE TABLE transaction_key (
+            endToEndId text not null,
+            txTp varchar not null,
+            tenantId text not null,
+            msgId varchar,
+            constraint transaction_key_pkey primary key (endToEndId, txTp, tenantId),
+            constraint unique_msgid unique (msgId, tenantId)
+        );
+        -- Fails (and rolls back) if transaction already holds duplicates
+        INSERT INTO transaction_key (endToEndId, txTp, tenantId, msgId)
+        SELECT endToEndId, txTp, tenantId, msgId FROM transaction;
+    END IF;
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_trigger
+        WHERE tgrelid = 'transaction'::regclass AND tgname = 'trg_transaction_key' AND NOT tgisinternal
+    ) THEN
+        CREATE TRIGGER trg_transaction_key AFTER INSERT OR UPDATE OR DELETE ON transaction
+            FOR EACH ROW EXECUTE FUNCTION transaction_key_sync();
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION partition_transaction_table(
+    p_interval text DEFAULT 'month',
+    p_ahead int DEFAULT 3
+) RETURNS bigint AS $$
+DECLARE
+    first_credttm text;
+    idx record;
+    copied bigint;
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = 'transaction'::regclass) THEN
+        PERFORM ensure_transaction_keys();
+        RETURN 0;
+    END IF;
+
+    -- Keep the old table (and free its index / constraint names) for rollback
+    ALTER TABLE transaction RENAME TO transaction_unpartitioned;
+    FOR idx IN
+        SELECT indexrelid::regclass::text AS name FROM pg_index
+        WHERE indrelid = 'transaction_unpartitioned'::regclass
+    LOOP
+        EXECUTE format('ALTER INDEX %I RENAME TO %I', idx.name, left(idx.name, 50) || '_unpartitioned');
+    END LOOP;
+
+    CREATE TABLE transaction (
+        source varchar not null,
+        destination varchar not null,
+        transaction jsonb not null,
+        endToEndId text generated always as (transaction->>'EndToEndId') stored,
+        amt numeric(18, 2) generated always as (
+            (transaction->>'Amt')::numeric(18, 2)
+        ) stored,
+        ccy varchar generated always as (transaction->>'Ccy') stored,
+        msgId varchar generated always as (transaction->>'MsgId') stored,
+        creDtTm text generated always as (transaction->>'CreDtTm') stored,
+        txTp varchar generated always as (transaction->>'TxTp') stored,
+        txSts varchar generated always as (transaction->>'TxSts') stored,
+        tenantId text generated always as (transaction->>'TenantId') stored,
+        foreign key (source, tenantId) references account (id, tenantId),
+        foreign key (destination, tenantId) references account (id, tenantId)
+    ) PARTITION BY RANGE ((transaction->>'CreDtTm'));
+
+    CREATE TABLE transaction_default PARTITION OF transaction DEFAULT;
+
+    SELECT min(creDtTm) INTO first_credttm FROM transaction_unpartitioned
+    WHERE creDtTm ~ '^\d{4}-\d{2}-\d{2}';
+    PERFORM ensure_transaction_partitions(p_interval, p_ahead, left(first_credttm, 10)::date);
+
+    -- Former primary key / unique constraint: lookup indexes here, enforced by transaction_key
+    CREATE INDEX idx_tr_e2e_txtp_tenant ON transaction (endToEndId, txTp, tenantId);
+    CREATE INDEX idx_tr_msgid_tenant ON transaction (msgId, tenantId);
+    CREATE INDEX idx_tr_cre_dt_tm ON transaction (creDtTm, tenantId);
+    CREATE INDEX idx_tr_cre_dt_tm_brin ON transaction USING brin (creDtTm);
+    CREATE INDEX idx_tr_source_credttm ON transaction (source, creDtTm);
+    CREATE INDEX idx_tr_destination_credttm ON transaction (destination, creDtTm);
+    CREATE INDEX idx_tr_source_txtp_credttm ON transaction (source, txtp, creDtTm, tenantId);
+    CREATE INDEX idx_tr_pacs002_accc ON transaction (endtoendid, creDtTm, tenantId)
+    WHERE
+        txtp = 'pacs.002.001.12'
+        and txsts = 'ACCC';
+    CREATE INDEX idx_tr_dest_txtp_txsts_credttm ON transaction (
+        destination,
+        txtp,
+        txsts,
+        creDtTm desc
+    ) include (source);
+
+    INSERT INTO transaction (source, destination, transaction)
+    SELECT source, destination, transaction FROM transaction_unpartitioned;
+    GET DIAGNOSTICS copied = ROW_COUNT;
+
+    -- Bulk-filled after the copy, then maintained by the trigger
+    PERFORM ensure_transaction_keys();
+    RETURN copied;
+END;
+$$ LANGUAGE plpgsql;
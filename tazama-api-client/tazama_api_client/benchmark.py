@@ -0,0 +1,355 @@
+"""
+Benchmark Suite - Hot paths of the API client, with baseline comparison
+
+Cases:
+- payload:   generate_pacs008 / generate_pacs002 / generate_pain001 / generate_pain013
+- alerts:    parse_fraud_alerts on synthetic rule-log corpora (100 / 1k / 10k lines)
+- csv:       DatabaseQueryService._parse_csv_result (1k / 10k / 100k rows)
+- tms:       TMSClient against the in-process mock TMS (single sends and run_bulk)
+- route:     full route latency through the ASGI app (mock TMS + fake rule logs)
+- startup:   `import main` in a fresh interpreter (cold start), checked against
+             COLD_START_BUDGET_MS as well as the baseline
+
+Results are written as JSON. Every case is compared on the chosen metric with
+the committed baseline (benchmark-baseline.json next to this file, or
+--baseline) and the run exits 1 if any case is slower than baseline by more
+than --threshold (relative), so regressions fail CI. Timings depend on the
+machine: refresh the baseline with --save-baseline on the reference runner.
+
+Usage (from this directory, like main.py):
+    python3 benchmark.py                                   # run all, compare with benchmark-baseline.json
+    python3 benchmark.py --only alerts,csv --quick --no-baseline
+    python3 benchmark.py --save-baseline benchmark-baseline.json
+    python3 benchmark.py --baseline other-baseline.json --threshold 0.25
+"""
+import argparse
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+# config.py reads the environment at import: point the client at the mock TMS first
+MOCK_PORT = int(os.getenv("BENCHMARK_MOCK_PORT", "0")) or _free_port()
+os.environ["TMS_BASE_URL"] = f"http://127.0.0.1:{MOCK_PORT}"
+os.environ.setdefault("MOCK_TMS_LOG_DIR", tempfile.mkdtemp(prefix="tazama-bench-logs-"))
+os.environ.setdefault("TMS_RETRY_MAX_ATTEMPTS", "1")
+
+BENCHMARK_GROUPS = ("payload", "alerts", "csv", "tms", "route", "startup")
+
+# Reasons in the mock TMS log format: alerts, filtered reasons and service noise
+_LOG_MESSAGES = [
+    "The debtor has performed three or more transactions to date",
+    "The creditor has received three or more transactions to date",
+    "Exceptionally large outgoing transfer detected",
+    "Two or more similar amounts detected in the most recent transactions from the debtor",
+    "The debtor has performed two transactions to date",
+    "Outgoing transfer within historical limits",
+    "No similar amounts detected in the most recent transactions from the debtor",
+    "Start - Handle execute request",
+    "End - Handle execute request",
+    "Connected to nats",
+]
+
+
+class Case:
+    """One benchmark: a zero-argument callable timed `iterations` times after `warmup` calls"""
+
+    def __init__(self, name: str, group: str, fn: Callable[[], Any], iterations: int, warmup: int = 1,
+                 items: int = 1):
+        self.name = name
+        self.group = group
+        self.fn = fn
+        self.iterations = iterations
+        self.warmup = warmup
+        self.items = items  # Units of work per call (lines, rows, transactions)
+
+    def run(self, scale: float = 1.0) -> Dict[str, Any]:
+        iterations = max(1, int(self.iterations * scale))
+        for _ in range(self.warmup):
+            self.fn()
+        samples = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            self.fn()
+            samples.append((time.perf_counter() - start) * 1000)
+        samples.sort()
+        median = statistics.median(samples)
+        return {
+            "group": self.group,
+            "iterations": iterations,
+            "items_per_call": self.items,
+            "min_ms": round(samples[0], 4),
+            "median_ms": round(median, 4),
+            "mean_ms": round(statistics.fmean(samples), 4),
+            "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 4),
+            "max_ms": round(samples[-1], 4),
+            "items_per_second": round(self.items / (median / 1000), 1) if median > 0 else None
+        }
+
+
+# ============ CORPORA ============
+
+def synthetic_log_corpus(lines: int, seed: int = 42) -> str:
+    """Rule-processor style log lines as written by mock_tms / the rule containers"""
+    import random
+    rng = random.Random(seed)
+    out = []
+    for i in range(lines):
+        message = rng.choice(_LOG_MESSAGES)
+        # Distinct ids keep some alert lines unique, like real multi-transaction logs
+        if rng.random() < 0.1:
+            message = f"{message} (tx {i})"
+        out.append(f"2026-01-01T00:00:{i % 60:02d}.000Z info: {{ message: '{message}', "
+                   f"serviceOperation: 'handleTransaction', id: 'bench-{i}' }}")
+    return "\n".join(out)
+
+
+def synthetic_csv_corpus(rows: int) -> str:
+    """account,tx_count,total_amount rows as returned by psql --csv"""
+    return "\n".join(f"ACC{i:08d},{i % 50 + 1},{(i % 997) * 1250.5:.2f}" for i in range(rows))
+
+
+# ============ CASES ============
+
+def payload_cases() -> List[Case]:
+    from utils.payload_generator import generate_pacs008, generate_pacs002, generate_pain001, generate_pain013
+    return [
+        Case("payload.generate_pacs008", "payload", lambda: generate_pacs008("ACC001", 150000.0), 2000, 50),
+        Case("payload.generate_pacs002", "payload", lambda: generate_pacs002("msg-1", "e2e-1", "ACCC"), 2000, 50),
+        Case("payload.generate_pain001", "payload", lambda: generate_pain001("ACC001", 150000.0), 2000, 50),
+        Case("payload.generate_pain013", "payload", lambda: generate_pain013("ACC001", 150000.0), 2000, 50),
+    ]
+
+
+def alert_cases() -> List[Case]:
+    from routers.attacks import parse_fraud_alerts
+    cases = []
+    for lines, iterations in ((100, 500), (1000, 100), (10000, 10)):
+        logs = {"status": "success", "logs": synthetic_log_corpus(lines)}
+        cases.append(Case(f"alerts.parse_fraud_alerts[{lines}]", "alerts",
+                          lambda logs=logs: parse_fraud_alerts(logs), iterations, 1, lines))
+    return cases
+
+
+def csv_cases() -> List[Case]:
+    from services.database_query_service import DatabaseQueryService, LocalPostgresStrategy
+    service = DatabaseQueryService(LocalPostgresStrategy())
+    cases = []
+    for rows, iterations in ((1000, 200), (10000, 30), (100000, 5)):
+        data = synthetic_csv_corpus(rows)
+        cases.append(Case(f"csv.parse_csv_result[{rows}]", "csv",
+                          lambda data=data: service._parse_csv_result(data), iterations, 1, rows))
+    return cases
+
+
+def tms_cases(mock_url: str) -> List[Case]:
+    from services.tms_client import TMSClient
+    from utils.payload_generator import generate_pacs008, generate_pacs002
+
+    client = TMSClient()
+    client.base_url = mock_url
+    pacs008 = generate_pacs008("BENCH_TMS", 150000.0)
+    grp = pacs008["FIToFICstmrCdtTrf"]
+    pacs002 = generate_pacs002(grp["GrpHdr"]["MsgId"], grp["CdtTrfTxInf"]["PmtId"]["EndToEndId"])
+    bulk = [lambda: client.send_pacs008(generate_pacs008("BENCH_BULK", 150000.0)) for _ in range(50)]
+    return [
+        Case("tms.send_pacs008", "tms", lambda: client.send_pacs008(pacs008), 200, 5),
+        Case("tms.send_pacs002", "tms", lambda: client.send_pacs002(pacs002), 200, 5),
+        Case("tms.run_bulk[50]", "tms", lambda: client.run_bulk(bulk), 10, 1, 50),
+    ]
+
+
+def route_cases() -> List[Case]:
+    from fastapi.testclient import TestClient
+    import main
+
+    client = TestClient(main.app)
+    geo_body = {"lat": [-6.2 - (i % 300) / 100 for i in range(1000)],
+                "long": [106.8 + (i % 900) / 100 for i in range(1000)]}
+
+    def post(path, **kwargs):
+        response = client.post(path, **kwargs)
+        if response.status_code != 200:
+            raise RuntimeError(f"{path} returned {response.status_code}")
+
+    return [
+        Case("route.GET /api/health", "route", lambda: client.get("/api/health"), 100, 3),
+        Case("route.POST /api/geo/classify[1000]", "route",
+             lambda: post("/api/geo/classify", json=geo_body), 50, 2, 1000),
+        Case("route.POST /api/test/quick-status", "route",
+             lambda: post("/api/test/quick-status", data={"status_code": "ACCC", "verbosity": "summary"}), 20, 1),
+        Case("route.POST /api/test/pacs008", "route",
+             lambda: post("/api/test/pacs008", data={"verbosity": "summary"}), 5, 1),
+        Case("route.POST /api/test/e2e-flow", "route",
+             lambda: post("/api/test/e2e-flow", data={"verbosity": "summary"}), 5, 1),
+    ]
+
+
+def startup_cases() -> List[Case]:
+    here = os.path.dirname(os.path.abspath(__file__))
+
+    def import_main():
+        proc = subprocess.run([sys.executable, "-c", "import main"], cwd=here, capture_output=True, text=True)
+        if proc.returncode != 0:
+            raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+
+    return [Case("startup.import_main", "startup", import_main, 5, 1)]
+
+
+# ============ RUN / COMPARE ============
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              timeout=5).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def run_benchmarks(groups=BENCHMARK_GROUPS, scale: float = 1.0) -> Dict[str, Any]:
+    """Run the selected groups (starting the mock TMS when tms / route cases are selected)"""
+    server = None
+    results = {}
+    try:
+        cases: List[Case] = []
+        if "payload" in groups:
+            cases += payload_cases()
+        if "alerts" in groups:
+            cases += alert_cases()
+        if "csv" in groups:
+            cases += csv_cases()
+        if "tms" in groups or "route" in groups:
+            from mock_tms import MockTMSServer
+            server = MockTMSServer(port=MOCK_PORT).start()
+            if "tms" in groups:
+                cases += tms_cases(server.url)
+            if "route" in groups:
+                cases += route_cases()
+        if "startup" in groups:
+            cases += startup_cases()
+
+        for case in cases:
+            results[case.name] = case.run(scale)
+            print(f"  {case.name:<45} median {results[case.name]['median_ms']:>10.3f} ms"
+                  f"   p95 {results[case.name]['p95_ms']:>10.3f} ms")
+    finally:
+        if server is not None:
+            server.stop()
+
+    return {
+        "meta": {
+            "timestamp": datetime.now().isoformat(),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "scale": scale
+        },
+        "results": results
+    }
+
+
+def compare_with_baseline(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float = 0.25,
+                          metric: str = "median_ms") -> Tuple[List[Dict[str, Any]], bool]:
+    """
+    Compare each case present in both runs
+
+    Returns:
+        (rows with baseline / current / change, True if any case regressed beyond threshold)
+    """
+    rows = []
+    regressed = False
+    for name, result in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if not base or not base.get(metric):
+            rows.append({"case": name, "status": "new", "current": result[metric]})
+            continue
+        change = result[metric] / base[metric] - 1
+        status = "regression" if change > threshold else "improved" if change < -threshold else "ok"
+        regressed |= status == "regression"
+        rows.append({"case": name, "status": status, "baseline": base[metric],
+                     "current": result[metric], "change_pct": round(change * 100, 1)})
+    return rows, regressed
+
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark-baseline.json")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Tazama API client benchmarks")
+    parser.add_argument("--only", default=",".join(BENCHMARK_GROUPS),
+                        help=f"Comma-separated groups ({', '.join(BENCHMARK_GROUPS)})")
+    parser.add_argument("--quick", action="store_true", help="Run 20%% of the iterations")
+    parser.add_argument("--output", default="benchmark-results.json", help="Where to write results")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE,
+                        help="Baseline results JSON to compare against (default: the committed benchmark-baseline.json)")
+    parser.add_argument("--no-baseline", action="store_true", help="Skip the baseline comparison")
+    parser.add_argument("--save-baseline", help="Also write the results to this baseline file")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Allowed relative slowdown before a case counts as a regression")
+    parser.add_argument("--metric", default="median_ms", choices=["median_ms", "mean_ms", "p95_ms", "min_ms"])
+    args = parser.parse_args(argv)
+
+    groups = [g.strip() for g in args.only.split(",") if g.strip()]
+    unknown = set(groups) - set(BENCHMARK_GROUPS)
+    if unknown:
+        parser.error(f"Unknown groups: {', '.join(sorted(unknown))}")
+
+    print(f"🏁 Running benchmarks: {', '.join(groups)}")
+    current = run_benchmarks(groups, 0.2 if args.quick else 1.0)
+
+    for path in filter(None, (args.output, args.save_baseline)):
+        with open(path, "w") as f:
+            json.dump(current, f, indent=2)
+        print(f"💾 Results written to {path}")
+
+    over_budget = False
+    startup = current["results"].get("startup.import_main")
+    if startup:
+        from config import COLD_START_BUDGET_MS
+        over_budget = startup["median_ms"] > COLD_START_BUDGET_MS
+        print(f"{'❌' if over_budget else '✅'} Cold start {startup['median_ms']:.0f} ms "
+              f"(budget {COLD_START_BUDGET_MS:.0f} ms)")
+
+    if args.no_baseline or args.save_baseline:
+        return 1 if over_budget else 0
+    if not os.path.exists(args.baseline):
+        print(f"❌ Baseline {args.baseline} not found (create it with --save-baseline, or pass --no-baseline)")
+        return 1
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    rows, regressed = compare_with_baseline(current, baseline, args.threshold, args.metric)
+    current["comparison"] = {"baseline": args.baseline, "metric": args.metric,
+                             "threshold": args.threshold, "cases": rows, "regressed": regressed}
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(current, f, indent=2)
+
+    print(f"\n📊 Compared with {args.baseline} ({args.metric}, threshold {args.threshold:.0%})")
+    icons = {"ok": "✅", "improved": "🚀", "regression": "❌", "new": "🆕"}
+    for row in rows:
+        change = f"{row['change_pct']:+.1f}%" if "change_pct" in row else "-"
+        print(f"  {icons[row['status']]} {row['case']:<45} {change:>8}")
+    if regressed:
+        print("❌ Performance regression detected")
+        return 1
+    print("✅ No regressions")
+    return 1 if over_budget else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
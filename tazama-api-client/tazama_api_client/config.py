@@ -26,6 +26,13 @@ else:
 
 SOURCE_TENANT_ID = os.getenv("SOURCE_TENANT_ID", "DEFAULT")
 
+# Multi-tenant (docker-compose.multitenant.*): daftar tenant untuk traffic multi-tenant dan
+# bearer token per tenant ("tenant-001=eyJ...,tenant-002=eyJ..."), TMS ambil tenant dari token
+TENANT_IDS = [t.strip() for t in os.getenv("TENANT_IDS", SOURCE_TENANT_ID).split(",") if t.strip()]
+TENANT_TOKENS = dict(
+    pair.split("=", 1) for pair in (p.strip() for p in os.getenv("TENANT_TOKENS", "").split(",")) if "=" in pair
+)
+
 # TMS Endpoints
 TMS_ENDPOINTS = {
     "health": "/",
@@ -42,6 +49,120 @@ SERVER_PORT = int(os.getenv("SERVER_PORT", "8091"))
 # Timeout Configuration
 REQUEST_TIMEOUT = int(os.getenv("REQUEST_TIMEOUT", "10"))
 
+# Adaptive Concurrency (AIMD) untuk pengiriman ke TMS
+TMS_ADAPTIVE_CONCURRENCY = os.getenv("TMS_ADAPTIVE_CONCURRENCY", "true").lower() == "true"
+TMS_CONCURRENCY_INITIAL = int(os.getenv("TMS_CONCURRENCY_INITIAL", "4"))
+TMS_CONCURRENCY_MIN = int(os.getenv("TMS_CONCURRENCY_MIN", "1"))
+TMS_CONCURRENCY_MAX = int(os.getenv("TMS_CONCURRENCY_MAX", "32"))
+TMS_LATENCY_TOLERANCE = float(os.getenv("TMS_LATENCY_TOLERANCE", "2.0"))  # x baseline latency
+
+# Retry / Circuit Breaker / Hedging untuk request ke TMS
+TMS_RETRY_MAX_ATTEMPTS = int(os.getenv("TMS_RETRY_MAX_ATTEMPTS", "3"))
+TMS_RETRY_BASE_DELAY_MS = int(os.getenv("TMS_RETRY_BASE_DELAY_MS", "100"))
+TMS_RETRY_MAX_DELAY_MS = int(os.getenv("TMS_RETRY_MAX_DELAY_MS", "2000"))
+# Failure classes yang aman di-retry (connect = request belum sampai ke TMS).
+# POST pacs.008/pacs.002 tidak idempotent: setelah 5xx / timeout TMS mungkin sudah menyimpan
+# pesannya, jadi tambahkan "5xx" / "timeout" hanya jika duplikat MsgId bisa ditoleransi.
+TMS_RETRY_ON = [c.strip() for c in os.getenv("TMS_RETRY_ON", "connect").split(",") if c.strip()]
+TMS_BREAKER_FAILURE_THRESHOLD = int(os.getenv("TMS_BREAKER_FAILURE_THRESHOLD", "5"))
+TMS_BREAKER_RESET_SECONDS = float(os.getenv("TMS_BREAKER_RESET_SECONDS", "10"))
+# Kirim request kedua jika yang pertama belum selesai setelah N ms (0 = nonaktif).
+# Sama seperti retry: hedge mengirim POST pacs.008/pacs.002 yang sama dua kali, dan TMS menolak
+# MsgId/EndToEndId yang berulang (unique key), jadi satu dari dua request bisa gagal atau
+# tercatat dobel. Aktifkan hanya untuk benchmark latency / mock TMS, bukan traffic yang dievaluasi.
+TMS_HEDGE_AFTER_MS = int(os.getenv("TMS_HEDGE_AFTER_MS", "0"))
+
+# Direct NATS injection (bypass TMS HTTP hop untuk benchmark pipeline)
+NATS_SERVER_URL = os.getenv("NATS_SERVER_URL", "nats://localhost:4222")
+NATS_INJECT_SUBJECT = os.getenv("NATS_INJECT_SUBJECT", "event-director")  # CONSUMER_STREAM event director
+NATS_INJECT_ENCODING = os.getenv("NATS_INJECT_ENCODING", "json")  # json | protobuf
+NATS_PROTO_MODULE = os.getenv("NATS_PROTO_MODULE", "")  # Module hasil protoc dari frms-coe-lib message.proto
+
+# Relay result collection (relay-service-integration-rest -> POST /api/relay/webhook)
+RELAY_WEBHOOK_TOKEN = os.getenv("RELAY_WEBHOOK_TOKEN", "")  # Kosong = tanpa cek Bearer token
+RELAY_AUTH_USERNAME = os.getenv("RELAY_AUTH_USERNAME", "")  # Harus sama dengan AUTH_USERNAME relay
+RELAY_AUTH_PASSWORD = os.getenv("RELAY_AUTH_PASSWORD", "")  # Harus sama dengan AUTH_PASSWORD relay
+RELAY_RESULT_TIMEOUT = float(os.getenv("RELAY_RESULT_TIMEOUT", "15"))  # Detik menunggu hasil evaluasi
+RELAY_RESULT_INDEX_SIZE = int(os.getenv("RELAY_RESULT_INDEX_SIZE", "100000"))
+
+# Kafka result consumer (relay-service-kafka -> topic tazama.evaluation.result)
+KAFKA_BOOTSTRAP_SERVERS = os.getenv("KAFKA_BOOTSTRAP_SERVERS", "localhost:29092")  # PLAINTEXT_HOST listener
+KAFKA_RESULT_TOPIC = os.getenv("KAFKA_RESULT_TOPIC", "tazama.evaluation.result")
+KAFKA_RESULT_GROUP_ID = os.getenv("KAFKA_RESULT_GROUP_ID", "tazama-api-client")
+KAFKA_RESULT_BATCH_SIZE = int(os.getenv("KAFKA_RESULT_BATCH_SIZE", "500"))
+KAFKA_RESULT_POLL_TIMEOUT = float(os.getenv("KAFKA_RESULT_POLL_TIMEOUT", "1.0"))
+KAFKA_RESULT_CONSUMER_ENABLED = os.getenv("KAFKA_RESULT_CONSUMER_ENABLED", "false").lower() == "true"
+
+# Mock TMS (mock_tms.py) - fake rule logs ditulis/dibaca di sini, bukan docker logs
+MOCK_TMS_LOG_DIR = os.getenv("MOCK_TMS_LOG_DIR", "")
+MOCK_TMS_MAX_PENDING = int(os.getenv("MOCK_TMS_MAX_PENDING", "100000"))  # pacs.008 belum dikonfirmasi (LRU)
+
+# Sliding-window velocity counters (mirror Rule 901 / 902)
+VELOCITY_WINDOW_MS = int(os.getenv("VELOCITY_WINDOW_MS", "86400000"))  # maxQueryRange 24 jam
+VELOCITY_BUCKET_MS = int(os.getenv("VELOCITY_BUCKET_MS", "60000"))  # Resolusi window 1 menit
+VELOCITY_MAX_ACCOUNTS = int(os.getenv("VELOCITY_MAX_ACCOUNTS", "1000000"))
+
+# Per-request stage timing (Server-Timing header + "timings" di JSON body)
+TIMING_ENABLED = os.getenv("TIMING_ENABLED", "true").lower() == "true"
+TIMING_IN_BODY = os.getenv("TIMING_IN_BODY", "true").lower() == "true"
+TIMING_HISTOGRAM_BUCKETS_MS = [1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000]
+
+# Prometheus /metrics (detik)
+METRICS_LATENCY_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30]
+EVENT_LOOP_LAG_INTERVAL = float(os.getenv("EVENT_LOOP_LAG_INTERVAL", "0.5"))  # Interval sampling lag
+
+# OpenTelemetry tracing (butuh opentelemetry-sdk)
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "false").lower() == "true"
+TRACING_EXPORTER = os.getenv("TRACING_EXPORTER", "otlp")  # otlp | file | console
+TRACING_OTLP_ENDPOINT = os.getenv("TRACING_OTLP_ENDPOINT", "http://localhost:4318/v1/traces")
+TRACING_FILE = os.getenv("TRACING_FILE", "traces.jsonl")
+TRACING_SERVICE_NAME = os.getenv("TRACING_SERVICE_NAME", "tazama-api-client")
+
+# Detection latency (submit pacs.002 -> hasil evaluasi via relay / evaluation DB)
+DETECTION_LATENCY_TIMEOUT = float(os.getenv("DETECTION_LATENCY_TIMEOUT", "60"))  # Detik sebelum dihitung missed
+DETECTION_DB_POLL_INTERVAL = float(os.getenv("DETECTION_DB_POLL_INTERVAL", "0.25"))  # Detik antar poll evaluation DB
+DETECTION_DB_BATCH_SIZE = int(os.getenv("DETECTION_DB_BATCH_SIZE", "500"))  # MsgId per query
+DETECTION_MAX_SAMPLES = int(os.getenv("DETECTION_MAX_SAMPLES", "100000"))
+DETECTION_LATENCY_BUCKETS = [0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 30, 60]
+
+# Cold start: target waktu dari start proses sampai app siap (ms), dan warm-up modul yang ditunda
+COLD_START_BUDGET_MS = float(os.getenv("COLD_START_BUDGET_MS", "1000"))
+STARTUP_WARMUP = os.getenv("STARTUP_WARMUP", "true").lower() == "true"
+
+# Export streaming (COPY ... TO STDOUT): ukuran chunk HTTP dan jumlah chunk yang boleh antri
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", str(64 * 1024)))  # bytes
+EXPORT_QUEUE_CHUNKS = int(os.getenv("EXPORT_QUEUE_CHUNKS", "8"))
+
+# Materialized view ringkasan debtor/creditor (event_history): dipakai dashboard bila sudah di-setup
+USE_SUMMARY_VIEWS = os.getenv("USE_SUMMARY_VIEWS", "true").lower() == "true"
+SUMMARY_REFRESH_INTERVAL = float(os.getenv("SUMMARY_REFRESH_INTERVAL", "60"))  # Detik, 0 = tidak otomatis
+SUMMARY_REFRESH_TIMEOUT = int(os.getenv("SUMMARY_REFRESH_TIMEOUT", "300"))  # Detik per view
+
+# Partisi event_history.transaction per creDtTm (init-db/07-partition-transaction.sql)
+PARTITION_INTERVAL = os.getenv("PARTITION_INTERVAL", "month")  # day / month
+PARTITION_PREMAKE = int(os.getenv("PARTITION_PREMAKE", "3"))  # Partisi yang dibuat ke depan
+PARTITION_RETENTION = int(os.getenv("PARTITION_RETENTION", "0"))  # Periode yang disimpan, 0 = semua
+PARTITION_MAINTENANCE_INTERVAL = float(os.getenv("PARTITION_MAINTENANCE_INTERVAL", "3600"))  # Detik, 0 = mati
+PARTITION_MIGRATION_TIMEOUT = int(os.getenv("PARTITION_MIGRATION_TIMEOUT", "3600"))  # Detik
+PARTITION_SQL_PATH = os.getenv("PARTITION_SQL_PATH", os.path.normpath(os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "..", "init-db", "07-partition-transaction.sql"
+)))
+
+# Graph transaksi in-memory (debtor -> creditor) untuk /api/graph
+GRAPH_COMPACT_THRESHOLD = int(os.getenv("GRAPH_COMPACT_THRESHOLD", "50000"))  # Edge delta sebelum digabung ke CSR
+GRAPH_MAX_NODES = int(os.getenv("GRAPH_MAX_NODES", "2000"))  # Batas node per respons network / reachable
+
+# Live dashboard (/ws/dashboard, /api/dashboard/stream): satu aggregator untuk semua tab browser
+DASHBOARD_PUSH_INTERVAL = float(os.getenv("DASHBOARD_PUSH_INTERVAL", "2"))  # Detik antar push stats / throughput
+DASHBOARD_SUMMARY_INTERVAL = float(os.getenv("DASHBOARD_SUMMARY_INTERVAL", "10"))  # Detik antar query top debtor/creditor
+DASHBOARD_QUEUE_SIZE = int(os.getenv("DASHBOARD_QUEUE_SIZE", "100"))  # Pesan antri per client, lebih = dibuang
+DASHBOARD_LOG_LINES = int(os.getenv("DASHBOARD_LOG_LINES", "200"))  # Baris log container yang disimpan
+DASHBOARD_DB_ALERTS = os.getenv("DASHBOARD_DB_ALERTS", "true").lower() == "true"  # Alert dari evaluation_typology_result
+
+# Scenario plan serangan (JSON / YAML) untuk /api/test/attack-scenario, fraud-simulation-flow, batch
+SCENARIO_DIR = os.getenv("SCENARIO_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "scenarios"))
+SCENARIO_MAX_MESSAGES = int(os.getenv("SCENARIO_MAX_MESSAGES", "20000"))  # Batas transaksi per plan
+
 # HTTP Status Codes yang dianggap sukses
 VALID_STATUS_CODES = [200, 201, 202]
 
@@ -56,3 +177,58 @@ RULE_006_SIMILARITY = 0.8       # Threshold similarity (80%)
 # Rule 018 Configuration
 RULE_018_MULTIPLIER = 1.5       # Alert jika > 1.5x historical average
 
+# Base Rule Configurations (static) - UPDATED TO MATCH DATABASE CONFIG
+RULE_CONFIGS = {
+    "901": {
+        "name": "Velocity Check - Debtor",
+        "rule_id": "901",
+        "trigger_condition": "Debtor melakukan 3 atau lebih transaksi dalam 1 hari",
+        "config": {
+            "threshold": "3 transaksi per hari",
+            "lowerLimit": 3,  # Band .03 (alert)
+            "maxQueryRange": "86400000 ms (24 jam)"
+        },
+        "recommendation": "Verifikasi apakah debtor adalah bisnis yang memang memiliki volume transaksi tinggi atau potensi fraud."
+    },
+    "902": {
+        "name": "Velocity Check - Creditor (Money Mule)",
+        "rule_id": "902",
+        "trigger_condition": "Creditor menerima 3 atau lebih transaksi dalam 1 hari dari debtor berbeda",
+        "config": {
+            "threshold": "3 transaksi per hari",
+            "lowerLimit": 3,  # Band .03 (alert)
+            "maxQueryRange": "86400000 ms (24 jam)"
+        },
+        "recommendation": "Investigasi apakah creditor adalah akun bisnis legitimate atau potensi pencucian uang."
+    },
+    "006": {
+        "name": "Structuring / Smurfing",
+        "rule_id": "006",
+        "trigger_condition": "5 atau lebih transaksi dengan nominal mirip dalam toleransi 20 persen",
+        "config": {
+            "maxQueryLimit": "5 transaksi terakhir",
+            "tolerance": "0.2 (20 persen)",
+            "lowerLimit": "5 transaksi mirip untuk trigger alert"
+        },
+        "recommendation": "Periksa apakah total transaksi seharusnya satu transaksi besar yang dipecah."
+    },
+    "018": {
+        "name": "High Value Transfer",
+        "rule_id": "018",
+        "trigger_condition": "Transaksi melebihi 1.5 kali rata-rata historical debtor (30 hari terakhir)",
+        "config": {
+            "maxQueryRange": "2592000000 ms (30 hari)",
+            "multiplier": "1.5x dari rata-rata historical"
+        },
+        "recommendation": "Konfirmasi dengan debtor melalui channel resmi sebelum memproses transaksi."
+    }
+}
+
+# Threshold velocity counters (services/velocity_counters.py) mengikuti RULE_CONFIGS
+RULE_901_THRESHOLD = RULE_CONFIGS["901"]["config"]["lowerLimit"]  # Debtor
+RULE_902_THRESHOLD = RULE_CONFIGS["902"]["config"]["lowerLimit"]  # Creditor
+
+# Response Compression Configuration
+# Response di bawah ukuran ini dikirim apa adanya (kompresi tidak sebanding)
+RESPONSE_COMPRESSION_MIN_SIZE = int(os.getenv("RESPONSE_COMPRESSION_MIN_SIZE", "1024"))
+RESPONSE_COMPRESSION_LEVEL = int(os.getenv("RESPONSE_COMPRESSION_LEVEL", "6"))
@@ -10,11 +10,16 @@ Refactored with proper project structure:
 
 This client acts as a pure middleware/proxy without storing any state.
 All data is retrieved directly from the Tazama database.
+
+Cold start: heavy modules (faker, numpy, jinja2) are imported on first use and
+warmed up in the background after startup; see utils/startup.py and
+GET /api/debug/startup.
 """
+from utils.startup import mark, warm_up  # First import: startup marks are relative to it
+import logging
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
-from fastapi.templating import Jinja2Templates
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, PlainTextResponse
 from fastapi import Request
 
 # Import routers
@@ -24,8 +29,23 @@ from routers.attacks import router as attacks_router
 from routers.batch import router as batch_router
 from routers.logs import router as logs_router
 from routers.e2e_flow import router as e2e_flow_router
+from routers.relay import router as relay_router, start_kafka_consumer, stop_kafka_consumer
+from routers.geo import router as geo_router
+from routers.detection import router as detection_router
+from routers.analytics import router as analytics_router
+from routers.export import router as export_router
+from routers.graph import router as graph_router
+from routers.dashboard import router as dashboard_router
+from services.summary_views import summary_refresher
+from services.partitioning import partition_maintainer
+from services.live_dashboard import dashboard_hub
 
-from config import TMS_BASE_URL
+from config import TMS_BASE_URL, KAFKA_RESULT_CONSUMER_ENABLED, STARTUP_WARMUP
+from utils.compression import CompressionMiddleware
+from utils.timing import TimingMiddleware
+from utils.metrics import MetricsMiddleware, event_loop_monitor, render_metrics
+from utils.tracing import TracingMiddleware, setup_tracing, shutdown_tracing
+from utils.tenancy import TenantMiddleware
 
 # Initialize FastAPI app with OpenAPI docs
 app = FastAPI(
@@ -37,10 +57,21 @@ app = FastAPI(
     - 📤 Send pacs.008 payment requests
     - ⚡ Quick status tests (ACCC, ACSC, RJCT)
     - 🔗 Full E2E ISO 20022 Flow (pain.001 → pain.013 → pacs.008 → pacs.002)
+    - 🏋️ E2E flow load test: thousands of concurrent chains, per-step latency / success rate
     - 🚨 Attack simulations (Velocity, Money Mule, Structuring, High Value)
+    - 📜 Declarative scenario plans (JSON / YAML) compiled ahead of time, replayed as pure I/O
     - 📊 Dashboard statistics (from Tazama database)
     - 🔄 Batch testing
     - 📡 Real-time log streaming via WebSocket
+    - 🔴 Live dashboard push (/ws/dashboard, SSE): one aggregator for all open tabs
+    - 📥 Relay webhook for pushed evaluation results
+    - 🗺️ Bulk Rule 903 geo classification
+    - 📈 Prometheus metrics at /metrics
+    - ⏲️ Detection latency (pacs.002 → evaluation) by rule and typology
+    - 🐢 Rule / typology processing-time analytics
+    - 🏢 Multi-tenant traffic and per-tenant stats (X-Tenant-Id)
+    - 📦 Streaming CSV / NDJSON export of transactions and evaluations
+    - 🕸️ In-memory transaction graph: fan-in / fan-out, k-hop networks and cycles
 
     **Note:** This client is stateless and retrieves all data from Tazama database.
     """,
@@ -49,8 +80,34 @@ app = FastAPI(
     redoc_url="/redoc"
 )
 
-# Setup templates and static files
-templates = Jinja2Templates(directory="templates")
+# Per-request stage timings; added first so compression wraps it and sees the final body
+app.add_middleware(TimingMiddleware)
+
+# Compress large responses (gzip / brotli via Accept-Encoding)
+app.add_middleware(CompressionMiddleware)
+
+# In-flight / per-route request counters for /metrics
+app.add_middleware(MetricsMiddleware)
+
+# X-Tenant-Id header selects the tenant the request's TMS sends use
+app.add_middleware(TenantMiddleware)
+
+# One span per request (outermost, so it covers the other middleware); no-op unless TRACING_ENABLED
+setup_tracing()
+app.add_middleware(TracingMiddleware)
+
+# Static files; templates (jinja2) are loaded on the first page view
+_templates = None
+
+
+def get_templates():
+    global _templates
+    if _templates is None:
+        from fastapi.templating import Jinja2Templates
+        _templates = Jinja2Templates(directory="templates")
+    return _templates
+
+
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
 # Mount routers
@@ -60,12 +117,58 @@ app.include_router(attacks_router)
 app.include_router(batch_router)
 app.include_router(logs_router)
 app.include_router(e2e_flow_router)
+app.include_router(relay_router)
+app.include_router(geo_router)
+app.include_router(detection_router)
+app.include_router(analytics_router)
+app.include_router(export_router)
+app.include_router(graph_router)
+app.include_router(dashboard_router)
+
+mark("imports_done")
+logger = logging.getLogger(__name__)
+
+
+@app.on_event("startup")
+async def startup():
+    event_loop_monitor.start()
+    if KAFKA_RESULT_CONSUMER_ENABLED:
+        # Optional dependency, like tracing: without confluent-kafka the app still starts
+        # (results then come via the REST relay or POST /api/relay/kafka/start?stand_in=true)
+        try:
+            start_kafka_consumer()
+        except ImportError as e:
+            logger.warning("Kafka result consumer not started (confluent-kafka is not installed): %s", e)
+        except Exception as e:
+            logger.warning("Kafka result consumer not started: %s", e)
+    summary_refresher.start()
+    partition_maintainer.start()
+    mark("app_ready")
+    if STARTUP_WARMUP:
+        from utils.payload_generator import get_faker
+        warm_up([get_faker, get_templates])
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    event_loop_monitor.stop()
+    stop_kafka_consumer()
+    summary_refresher.stop()
+    partition_maintainer.stop()
+    dashboard_hub.stop()
+    shutdown_tracing()
+
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    """Prometheus scrape endpoint"""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
 
 
 @app.get("/", response_class=HTMLResponse)
 async def home(request: Request):
     """Main dashboard page"""
-    return templates.TemplateResponse(
+    return get_templates().TemplateResponse(
         "index.html",
         {
             "request": request,
@@ -0,0 +1,389 @@
+"""
+Mock TMS - In-process stand-in for the Tazama TMS service
+
+Serves the same endpoints as config.TMS_ENDPOINTS (health, pain.001, pain.013,
+pacs.008, pacs.002) with the TMS response shape, so the client's throughput
+and resilience paths can be benchmarked without the Docker stack.
+
+- Latency: per-endpoint distributions (fixed / uniform / normal / lognormal / exponential, ms)
+- Errors:  injected 500s (TMS failMessage text), 400s and timeouts at configurable rates
+- Alerts:  optional fake rule logs (901/902/006/018) written to MOCK_TMS_LOG_DIR in the
+           "message: '...'" format parse_fraud_alerts() reads; point the client's
+           MOCK_TMS_LOG_DIR at the same directory to read them instead of docker logs.
+           Lines are appended by a writer thread (batched per file), off the event loop;
+           unconfirmed pacs.008 are kept for at most MOCK_TMS_MAX_PENDING (LRU)
+
+Run standalone:
+    uvicorn mock_tms:app --port 3000
+    TMS_BASE_URL=http://localhost:3000 MOCK_TMS_LOG_DIR=/tmp/mock-tms-logs python3 main.py
+
+Or in-process (benchmarks):
+    server = MockTMSServer(port=3999).start(); ...; server.stop()
+"""
+import asyncio
+import json
+import os
+import queue
+import random
+import threading
+import time
+from collections import OrderedDict, defaultdict, deque
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
+from pydantic import BaseModel
+
+from config import (
+    TMS_ENDPOINTS, MOCK_TMS_LOG_DIR, MOCK_TMS_MAX_PENDING, RULE_006_SIMILARITY, RULE_018_MULTIPLIER
+)
+
+# Message root per endpoint (mirrors the TMS schema check)
+_MESSAGE_ROOTS = {
+    "pain001": "CstmrCdtTrfInitn",
+    "pain013": "CdtrPmtActvtnReq",
+    "pacs008": "FIToFICstmrCdtTrf",
+    "pacs002": "FIToFIPmtSts",
+}
+
+
+# ============ LATENCY ============
+
+class LatencyModel:
+    """Latency distribution parsed from a spec such as "lognormal:5,0.6" (milliseconds)"""
+
+    def __init__(self, spec: str = "fixed:0"):
+        self.spec = spec
+        kind, _, args = spec.partition(":")
+        self.kind = kind.strip().lower()
+        self.args = [float(a) for a in args.split(",") if a.strip()] or [0.0]
+        if self.kind not in ("fixed", "uniform", "normal", "lognormal", "exponential"):
+            raise ValueError(f"Unknown latency distribution: {spec}")
+
+    def sample_ms(self) -> float:
+        a = self.args
+        if self.kind == "uniform":
+            return random.uniform(a[0], a[1] if len(a) > 1 else a[0])
+        if self.kind == "normal":
+            return max(0.0, random.gauss(a[0], a[1] if len(a) > 1 else 0.0))
+        if self.kind == "lognormal":
+            # median a[0] ms, shape a[1]
+            return a[0] * random.lognormvariate(0.0, a[1] if len(a) > 1 else 0.5)
+        if self.kind == "exponential":
+            return random.expovariate(1.0 / a[0]) if a[0] > 0 else 0.0
+        return a[0]
+
+
+# ============ SETTINGS ============
+
+class MockTMSSettings(BaseModel):
+    """Runtime-adjustable mock behaviour (POST /mock/config)"""
+    latency: str = os.getenv("MOCK_TMS_LATENCY", "fixed:0")
+    endpoint_latency: Dict[str, str] = {}
+    error_rate: float = float(os.getenv("MOCK_TMS_ERROR_RATE", "0"))
+    error_status: int = 500
+    reject_rate: float = 0.0
+    timeout_rate: float = 0.0
+    timeout_ms: int = 30000
+    emit_alerts: bool = os.getenv("MOCK_TMS_EMIT_ALERTS", "true").lower() == "true"
+    echo_payload: bool = True
+
+
+class MockTMSState:
+    """Settings, counters and the fake rule history"""
+
+    def __init__(self, max_pending: int = MOCK_TMS_MAX_PENDING):
+        self.max_pending = max_pending
+        self.configure(MockTMSSettings())
+        self.reset()
+
+    def configure(self, settings: MockTMSSettings):
+        self.settings = settings
+        self.latency = LatencyModel(settings.latency)
+        self.endpoint_latency = {k: LatencyModel(v) for k, v in settings.endpoint_latency.items()}
+
+    def reset(self):
+        self.started_at = time.time()
+        self.requests = defaultdict(int)
+        self.errors = defaultdict(int)
+        self.in_flight = 0
+        self.max_in_flight = 0
+        # Fake rule state: pacs.008 by EndToEndId (oldest evicted past max_pending), per-account history
+        self.pending: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.evicted_pending = 0
+        self.debtor_amounts: Dict[str, deque] = defaultdict(lambda: deque(maxlen=50))
+        self.creditor_counts: Dict[str, int] = defaultdict(int)
+
+    def remember(self, e2e_id: str, tx: Dict[str, Any]):
+        """Keep a pacs.008 until its pacs.002 arrives, dropping the oldest unconfirmed past max_pending"""
+        self.pending[e2e_id] = tx
+        self.pending.move_to_end(e2e_id)
+        while len(self.pending) > self.max_pending:
+            self.pending.popitem(last=False)
+            self.evicted_pending += 1
+
+    def stats(self) -> Dict[str, Any]:
+        elapsed = max(time.time() - self.started_at, 1e-9)
+        total = sum(self.requests.values())
+        return {
+            "requests": dict(self.requests),
+            "errors": dict(self.errors),
+            "total_requests": total,
+            "requests_per_second": round(total / elapsed, 1),
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "pending_pacs008": len(self.pending),
+            "evicted_pending": self.evicted_pending,
+            "settings": self.settings.dict()
+        }
+
+
+state = MockTMSState()
+
+
+# ============ FAKE RULE LOGS ============
+
+class RuleLogWriter:
+    """
+    Appends rule log lines on a daemon thread
+
+    Handlers only enqueue; the thread drains whatever has queued up and writes
+    it with one open/append per container file, so a pacs.002 costs no file I/O
+    on the event loop.
+    """
+
+    def __init__(self, log_dir: str = MOCK_TMS_LOG_DIR):
+        self.log_dir = log_dir
+        self._queue: "queue.Queue[tuple]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    def write(self, container: str, line: str):
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    os.makedirs(self.log_dir, exist_ok=True)
+                    self._thread = threading.Thread(target=self._run, name="mock-tms-rule-logs", daemon=True)
+                    self._thread.start()
+        self._queue.put((container, line))
+
+    def flush(self):
+        """Block until every queued line is on disk"""
+        self._queue.join()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            by_file: Dict[str, list] = defaultdict(list)
+            for container, line in batch:
+                by_file[container].append(line)
+            try:
+                for container, lines in by_file.items():
+                    with open(os.path.join(self.log_dir, f"{container}.log"), "a") as f:
+                        f.writelines(lines)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+
+rule_log_writer = RuleLogWriter()
+
+
+def _log_rule(container: str, message: str, msg_id: str):
+    """Queue one rule-processor style log line (read by parse_fraud_alerts)"""
+    if not rule_log_writer.log_dir:
+        return
+    timestamp = datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
+    line = f"{timestamp} info: {{ message: '{message}', serviceOperation: 'handleTransaction', id: '{msg_id}' }}\n"
+    rule_log_writer.write(container, line)
+
+
+def _count_reason(subject: str, verb: str, count: int) -> str:
+    if count >= 3:
+        return f"The {subject} has {verb} three or more transactions to date"
+    return f"The {subject} has {verb} {'one transaction' if count == 1 else 'two transactions'} to date"
+
+
+def _record_pacs008(payload: Dict[str, Any]):
+    tx = payload["FIToFICstmrCdtTrf"].get("CdtTrfTxInf", {})
+    e2e_id = tx.get("PmtId", {}).get("EndToEndId")
+    if e2e_id:
+        state.remember(e2e_id, {
+            "debtor": tx.get("DbtrAcct", {}).get("Id", {}).get("Othr", [{}])[0].get("Id"),
+            "creditor": tx.get("CdtrAcct", {}).get("Id", {}).get("Othr", [{}])[0].get("Id"),
+            "amount": float(tx.get("IntrBkSttlmAmt", {}).get("Amt", {}).get("Amt", 0) or 0),
+        })
+
+
+def _evaluate_pacs002(payload: Dict[str, Any]):
+    """Approximate rules 901/902/006/018 on the confirmed pacs.008 and log their reasons"""
+    status = payload["FIToFIPmtSts"].get("TxInfAndSts", {})
+    msg_id = payload["FIToFIPmtSts"].get("GrpHdr", {}).get("MsgId", "")
+    tx = state.pending.pop(status.get("OrgnlEndToEndId"), None)
+    if tx is None:
+        return
+    if status.get("TxSts") != "ACCC":
+        for rule in ("901", "902", "006", "018"):
+            _log_rule(f"tazama-rule-{rule}", "Incoming transaction is unsuccessful", msg_id)
+        return
+
+    history = state.debtor_amounts[tx["debtor"]]
+    amount = tx["amount"]
+
+    # 018: compare against the debtor's historical average (before this transaction)
+    if not history:
+        reason_018 = "Insufficient transaction history"
+    elif amount > (sum(history) / len(history)) * RULE_018_MULTIPLIER:
+        reason_018 = "Exceptionally large outgoing transfer detected"
+    else:
+        reason_018 = "Outgoing transfer within historical limits"
+
+    history.append(amount)
+    state.creditor_counts[tx["creditor"]] += 1
+
+    # 006: similar amounts among the last 5 debtor transactions
+    recent = list(history)[-5:]
+    tolerance = 1 - RULE_006_SIMILARITY
+    similar = sum(1 for a in recent if abs(a - amount) <= amount * tolerance)
+    reason_006 = ("Two or more similar amounts detected in the most recent transactions from the debtor"
+                  if similar >= 5 else
+                  "No similar amounts detected in the most recent transactions from the debtor")
+
+    _log_rule("tazama-rule-901", _count_reason("debtor", "performed", len(history)), msg_id)
+    _log_rule("tazama-rule-902", _count_reason("creditor", "received", state.creditor_counts[tx["creditor"]]), msg_id)
+    _log_rule("tazama-rule-006", reason_006, msg_id)
+    _log_rule("tazama-rule-018", reason_018, msg_id)
+
+
+# ============ APP ============
+
+app = FastAPI(title="Tazama Mock TMS", description="Benchmark stand-in for the Tazama TMS service")
+
+
+@app.get(TMS_ENDPOINTS["health"])
+@app.get("/health")
+async def health():
+    return {"status": "UP"}
+
+
+async def _handle(message_type: str, request: Request):
+    settings = state.settings
+    state.requests[message_type] += 1
+    state.in_flight += 1
+    state.max_in_flight = max(state.max_in_flight, state.in_flight)
+    try:
+        latency = state.endpoint_latency.get(message_type, state.latency).sample_ms()
+        # One roll picks the outcome band: timeout | error | reject | normal
+        roll = random.random()
+        error_band = settings.timeout_rate + settings.error_rate
+        reject_band = error_band + settings.reject_rate
+
+        if roll < settings.timeout_rate:
+            state.errors["timeout"] += 1
+            await asyncio.sleep(settings.timeout_ms / 1000)
+        elif latency > 0:
+            await asyncio.sleep(latency / 1000)
+
+        if settings.timeout_rate <= roll < error_band:
+            state.errors[str(settings.error_status)] += 1
+            return PlainTextResponse(
+                "Failed to process execution request. \nInjected mock failure",
+                status_code=settings.error_status
+            )
+
+        try:
+            payload = json.loads(await request.body())
+        except ValueError:
+            payload = None
+        if (not isinstance(payload, dict) or _MESSAGE_ROOTS[message_type] not in payload
+                or error_band <= roll < reject_band):
+            state.errors["400"] += 1
+            return JSONResponse(
+                {"statusCode": 400, "error": "Bad Request", "message": "body must match schema"},
+                status_code=400
+            )
+
+        if settings.emit_alerts:
+            if message_type == "pacs008":
+                _record_pacs008(payload)
+            elif message_type == "pacs002":
+                _evaluate_pacs002(payload)
+
+        return {"message": "Transaction is valid", "data": payload if settings.echo_payload else {}}
+    finally:
+        state.in_flight -= 1
+
+
+def _register(message_type: str, path: str):
+    async def endpoint(request: Request):
+        return await _handle(message_type, request)
+    endpoint.__name__ = f"evaluate_{message_type}"
+    app.post(path)(endpoint)
+
+
+for _message_type in _MESSAGE_ROOTS:
+    _register(_message_type, TMS_ENDPOINTS[_message_type])
+
+
+@app.get("/mock/stats")
+async def mock_stats():
+    return state.stats()
+
+
+@app.post("/mock/config")
+async def mock_config(settings: MockTMSSettings):
+    state.configure(settings)
+    return {"status": "success", "settings": settings.dict()}
+
+
+@app.post("/mock/reset")
+async def mock_reset():
+    state.reset()
+    return {"status": "success"}
+
+
+# ============ IN-PROCESS SERVER ============
+
+class MockTMSServer:
+    """Run the mock TMS on a background uvicorn thread"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 3999, settings: Optional[MockTMSSettings] = None):
+        self.host = host
+        self.port = port
+        self.url = f"http://{host}:{port}"
+        self._server = None
+        self._thread: Optional[threading.Thread] = None
+        if settings is not None:
+            state.configure(settings)
+
+    def start(self, timeout: float = 10.0) -> "MockTMSServer":
+        import uvicorn
+        config = uvicorn.Config(app, host=self.host, port=self.port, log_level="warning", access_log=False)
+        self._server = uvicorn.Server(config)
+        self._thread = threading.Thread(target=self._server.run, name="mock-tms", daemon=True)
+        self._thread.start()
+        deadline = time.monotonic() + timeout
+        while not self._server.started:
+            if time.monotonic() > deadline:
+                raise RuntimeError("Mock TMS did not start")
+            time.sleep(0.02)
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.should_exit = True
+            self._thread.join(5)
+        if rule_log_writer.log_dir:
+            rule_log_writer.flush()
+
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, host="0.0.0.0", port=int(os.getenv("MOCK_TMS_PORT", "3000")),
+                log_level="warning", access_log=False)
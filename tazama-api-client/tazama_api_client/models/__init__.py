@@ -6,6 +6,8 @@ from models.schemas import (
     # Enums
     StatusCode,
     ScenarioType,
+    Transport,
+    Verbosity,
     
     # Request Models
     Pacs008Request,
@@ -36,6 +38,8 @@ from models.schemas import (
 __all__ = [
     "StatusCode",
     "ScenarioType",
+    "Transport",
+    "Verbosity",
     "Pacs008Request",
     "QuickStatusRequest",
     "FullTransactionRequest",
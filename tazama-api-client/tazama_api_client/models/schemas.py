@@ -24,6 +24,45 @@ class ScenarioType(str, Enum):
     RULE_018 = "rule_018"  # High Value Transfer
 
 
+class Transport(str, Enum):
+    """How test messages reach the Tazama pipeline"""
+    HTTP = "http"  # POST to TMS (default, full ingestion path)
+    NATS = "nats"  # Publish directly to the event director subject
+
+
+class DetectionSource(str, Enum):
+    """Where detection latency measurements look for evaluation results"""
+    RELAY = "relay"  # Relayed results (REST relay webhook / Kafka consumer)
+    DB = "db"        # Rows appearing in evaluation.evaluation
+    BOTH = "both"    # Whichever comes first
+
+
+class AnalyticsGroup(str, Enum):
+    """Grouping for rule processing-time analytics"""
+    RULE = "rule"
+    TYPOLOGY = "typology"
+
+
+class ExportFormat(str, Enum):
+    """Output format of the streaming exports"""
+    CSV = "csv"        # Header row + one CSV line per row
+    NDJSON = "ndjson"  # One JSON object per line
+
+
+class EvaluationExport(str, Enum):
+    """Which evaluation rows to export"""
+    EVALUATIONS = "evaluations"            # One row per evaluation (report fields)
+    RULE_RESULTS = "rule_results"          # evaluation_rule_result (see /api/analytics/rule-performance/setup)
+    TYPOLOGY_RESULTS = "typology_results"  # evaluation_typology_result
+
+
+class Verbosity(str, Enum):
+    """Response detail level for test and attack endpoints"""
+    SUMMARY = "summary"    # Status, counts and alert titles only
+    STANDARD = "standard"  # Drops echoed payloads and per-alert context copies
+    FULL = "full"          # Everything (default, used by the dashboard)
+
+
 # ============ REQUEST MODELS ============
 
 class Pacs008Request(BaseModel):
@@ -73,6 +112,15 @@ class BatchTestRequest(BaseModel):
     scenarios: str = Field(..., description="Comma-separated scenario names")
 
 
+class GeoClassifyRequest(BaseModel):
+    """Request model for bulk Rule 903 geo classification (columnar)"""
+    lat: List[Optional[float]] = Field(..., description="Latitudes")
+    long: List[Optional[float]] = Field(..., description="Longitudes (same length as lat)")
+    city: Optional[List[Optional[str]]] = Field(None, description="Optional Glctn.City per point (takes precedence)")
+    region: Optional[List[Optional[str]]] = Field(None, description="Optional Glctn.Region per point")
+    include_nearest: bool = Field(False, description="Also return nearest zone centroid and distance (km)")
+
+
 # ============ RESPONSE MODELS ============
 
 class TestRecord(BaseModel):
@@ -129,6 +177,7 @@ class AttackResult(BaseModel):
     pacs002_response: Optional[Dict[str, Any]] = None
     amount: Optional[float] = None
     error: Optional[str] = None
+    error_class: Optional[str] = None  # connect / timeout / 4xx / 5xx / circuit_open
 
 
 class AttackResponse(BaseModel):
@@ -0,0 +1,76 @@
+"""
+Partition Migration - event_history.transaction -> time-partitioned table
+
+Installs the partition functions from init-db/07-partition-transaction.sql
+into event_history (through the same Full Docker / local PostgreSQL strategy
+as the API) and runs them.
+
+Usage (from this directory, like main.py):
+    python3 partition_migrate.py status
+    python3 partition_migrate.py migrate --interval month --ahead 3     # Tazama idle: copy blocks writers
+    python3 partition_migrate.py migrate --drop-old                     # also drop transaction_unpartitioned
+    python3 partition_migrate.py maintain --retention 12                # create upcoming / drop expired partitions
+
+Nothing migrates automatically (init-db only installs the functions).
+"""
+import argparse
+import json
+import sys
+
+from config import PARTITION_INTERVAL, PARTITION_PREMAKE, PARTITION_RETENTION
+from services import partitioning
+
+
+UNIQUENESS_NOTE = """\
+uniqueness: a partitioned table cannot keep the primary key (endToEndId, txTp,
+tenantId) or unique (msgId, tenantId), because they lack the partition key;
+on transaction they become plain indexes. migrate enforces both through the
+transaction_key table, filled by a trigger, so duplicate inserts still fail
+with unique_violation. INSERT ... ON CONFLICT on transaction no longer sees
+these keys, and migrate fails if transaction already holds duplicates.
+
+pruning: the partition key is the expression (transaction->>'CreDtTm'), since
+Postgres rejects generated columns as keys. Only queries repeating it are
+pruned; Tazama's rule history lookups filter on the creDtTm column and scan
+every partition (they still use the per-partition indexes).
+
+default partition: rows outside every partition go to transaction_default;
+maintain moves them into the partition created for their range, and status
+reports default_partition_rows."""
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Partition event_history.transaction by creDtTm",
+                                     epilog=UNIQUENESS_NOTE,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["status", "install", "migrate", "maintain"])
+    parser.add_argument("--interval", default=PARTITION_INTERVAL, choices=partitioning.INTERVALS,
+                        help="Partition width")
+    parser.add_argument("--ahead", type=int, default=PARTITION_PREMAKE, help="Partitions to create in advance")
+    parser.add_argument("--retention", type=int, default=PARTITION_RETENTION,
+                        help="maintain: periods to keep (0 keeps all)")
+    parser.add_argument("--drop-old", action="store_true",
+                        help="migrate: drop transaction_unpartitioned after the copy")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == "status":
+            result = partitioning.status()
+        elif args.command == "install":
+            partitioning.install()
+            result = {"installed": True}
+        elif args.command == "migrate":
+            print("⏳ Migrating transaction (writers wait until the copy commits)...", file=sys.stderr)
+            result = partitioning.migrate(args.interval, args.ahead, args.drop_old)
+        else:
+            result = partitioning.maintain(args.interval, args.ahead, args.retention)
+    except Exception as e:
+        print(f"❌ {args.command} failed: {e}", file=sys.stderr)
+        return 1
+
+    print(json.dumps(result, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
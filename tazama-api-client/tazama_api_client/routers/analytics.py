@@ -0,0 +1,110 @@
+"""
+Analytics Router
+Processing-time percentiles, throughput and error rates per rule / typology,
+from the flattened evaluation tables (see services.rule_analytics)
+"""
+import asyncio
+from fastapi import APIRouter, Form
+from typing import Optional
+
+from services import rule_analytics, summary_views, partitioning
+from models.schemas import AnalyticsGroup
+
+router = APIRouter(prefix="/api/analytics", tags=["Analytics"])
+
+
+@router.post("/rule-performance/setup")
+async def setup_rule_performance(
+    backfill: bool = Form(True, description="Flatten evaluations already in the table")
+):
+    """Create the flattened tables, indexes and insert trigger in the evaluation DB (idempotent)"""
+    try:
+        result = await asyncio.get_running_loop().run_in_executor(None, rule_analytics.setup, backfill)
+    except Exception as e:
+        return {"status": "error", "message": str(e), "tip": "Make sure PostgreSQL is running on port 5433"}
+    return {"status": "success", **result}
+
+
+@router.get("/rule-performance")
+async def get_rule_performance(
+    group_by: AnalyticsGroup = AnalyticsGroup.RULE,
+    seconds: int = 3600,
+    tenant_id: Optional[str] = None
+):
+    """
+    Rule executor / typology processor performance over the last `seconds`
+
+    Results are ordered by p95 processing time, so the first entry is the
+    pipeline bottleneck.
+    """
+    if seconds <= 0:
+        return {"status": "error", "message": "seconds must be positive"}
+    try:
+        stats = await asyncio.get_running_loop().run_in_executor(
+            None, rule_analytics.processing_time_stats, group_by.value, seconds, tenant_id
+        )
+    except Exception as e:
+        tip = "Make sure PostgreSQL is running on port 5433"
+        if "does not exist" in str(e):
+            tip = "Run POST /api/analytics/rule-performance/setup first"
+        return {"status": "error", "message": str(e), "tip": tip}
+
+    return {
+        "status": "success" if stats else "no_results",
+        "group_by": group_by.value,
+        "window_seconds": seconds,
+        "tenant_id": tenant_id,
+        "count": len(stats),
+        "bottleneck": stats[0]["id"] if stats else None,
+        "results": stats
+    }
+
+
+@router.get("/summary-views")
+async def get_summary_views():
+    """Materialized debtor / creditor summary views: existence, last refresh and errors"""
+    return {"status": "success", **summary_views.status()}
+
+
+@router.post("/summary-views/setup")
+async def setup_summary_views():
+    """Create the summary views in event_history (idempotent; the first build scans the whole table)"""
+    try:
+        result = await asyncio.get_running_loop().run_in_executor(None, summary_views.setup)
+    except Exception as e:
+        return {"status": "error", "message": str(e), "tip": "Check the event_history database connection"}
+    return {"status": "success", **result}
+
+
+@router.post("/summary-views/refresh")
+async def refresh_summary_views(
+    concurrently: bool = Form(True, description="Keep the views readable during the refresh")
+):
+    """Refresh the summary views now (otherwise every SUMMARY_REFRESH_INTERVAL seconds)"""
+    try:
+        result = await asyncio.get_running_loop().run_in_executor(None, summary_views.refresh, None, concurrently)
+    except Exception as e:
+        tip = "Run POST /api/analytics/summary-views/setup first" if "does not exist" in str(e) else \
+            "Check the event_history database connection"
+        return {"status": "error", "message": str(e), "tip": tip}
+    return {"status": "success", **result}
+
+
+@router.get("/partitions")
+async def get_partitions():
+    """event_history.transaction partitions (bounds, estimated rows, size) and maintenance state"""
+    try:
+        result = await asyncio.get_running_loop().run_in_executor(None, partitioning.status)
+    except Exception as e:
+        return {"status": "error", "message": str(e), "tip": "Check the event_history database connection"}
+    return {"status": "success", **result}
+
+
+@router.post("/partitions/maintain")
+async def maintain_partitions():
+    """Create upcoming partitions and drop expired ones now (otherwise every PARTITION_MAINTENANCE_INTERVAL)"""
+    try:
+        result = await asyncio.get_running_loop().run_in_executor(None, partitioning.maintain)
+    except Exception as e:
+        return {"status": "error", "message": str(e), "tip": "Check the event_history database connection"}
+    return result
@@ -4,15 +4,26 @@ Endpoints for velocity attacks and scenario simulations
 """
 from fastapi import APIRouter, Form
 from typing import Optional
-from datetime import datetime
+import asyncio
 import subprocess
+import json
+import os
 import random
 import string
 import re
+import time as time_module
 
 from services.tms_client import tms_client
 from utils.payload_generator import generate_pacs008, generate_pacs002
-from models.schemas import ScenarioType
+from models.schemas import ScenarioType, Transport, Verbosity
+from utils.response_projection import project_response
+from services.result_index import result_index, summarize_detection
+from services.velocity_counters import velocity_counters
+from services.scenario_plan import compile_plan, parse_scenario, scenario_library
+from utils.tenancy import run_in_executor_with_context
+from utils.timing import stage, timed
+from utils.metrics import LOG_FETCH_LATENCY, record_fraud_alerts
+from config import RELAY_RESULT_TIMEOUT, MOCK_TMS_LOG_DIR, RULE_CONFIGS
 
 router = APIRouter(prefix="/api/test", tags=["Attack Simulations"])
 
@@ -29,10 +40,22 @@ def fetch_logs_internal(container_name, tail=50, since_seconds=None):
         tail: Number of log lines to fetch
         since_seconds: Only get logs from the last N seconds (optional)
     """
+    start = time_module.perf_counter()
+    with stage("docker_logs", **{"container.name": container_name}):
+        result = _fetch_logs(container_name, tail, since_seconds)
+    LOG_FETCH_LATENCY.observe(container_name, value=time_module.perf_counter() - start)
+    return result
+
+
+def _fetch_logs(container_name, tail, since_seconds):
     try:
         if not container_name.startswith("tazama-"):
             return {"status": "error", "message": "Invalid container name"}
         
+        # Mock TMS writes fake rule logs to files instead of containers
+        if MOCK_TMS_LOG_DIR:
+            return fetch_mock_logs(container_name, tail)
+        
         cmd = ["docker", "logs", container_name, "--tail", str(tail)]
         
         # Add --since flag if specified to filter out old logs
@@ -55,50 +78,174 @@ def fetch_logs_internal(container_name, tail=50, since_seconds=None):
         return {"status": "error", "message": str(e)}
 
 
-# Base Rule Configurations (static) - UPDATED TO MATCH DATABASE CONFIG
-RULE_CONFIGS = {
-    "901": {
-        "name": "Velocity Check - Debtor",
-        "rule_id": "901",
-        "trigger_condition": "Debtor melakukan 3 atau lebih transaksi dalam 1 hari",
-        "config": {
-            "threshold": "3 transaksi per hari",
-            "maxQueryRange": "86400000 ms (24 jam)"
-        },
-        "recommendation": "Verifikasi apakah debtor adalah bisnis yang memang memiliki volume transaksi tinggi atau potensi fraud."
-    },
-    "902": {
-        "name": "Velocity Check - Creditor (Money Mule)",
-        "rule_id": "902",
-        "trigger_condition": "Creditor menerima 3 atau lebih transaksi dalam 1 hari dari debtor berbeda",
-        "config": {
-            "threshold": "3 transaksi per hari",
-            "maxQueryRange": "86400000 ms (24 jam)"
-        },
-        "recommendation": "Investigasi apakah creditor adalah akun bisnis legitimate atau potensi pencucian uang."
-    },
-    "006": {
-        "name": "Structuring / Smurfing",
-        "rule_id": "006",
-        "trigger_condition": "5 atau lebih transaksi dengan nominal mirip dalam toleransi 20 persen",
-        "config": {
-            "maxQueryLimit": "5 transaksi terakhir",
-            "tolerance": "0.2 (20 persen)",
-            "lowerLimit": "5 transaksi mirip untuk trigger alert"
-        },
-        "recommendation": "Periksa apakah total transaksi seharusnya satu transaksi besar yang dipecah."
-    },
-    "018": {
-        "name": "High Value Transfer",
-        "rule_id": "018",
-        "trigger_condition": "Transaksi melebihi 1.5 kali rata-rata historical debtor (30 hari terakhir)",
-        "config": {
-            "maxQueryRange": "2592000000 ms (30 hari)",
-            "multiplier": "1.5x dari rata-rata historical"
-        },
-        "recommendation": "Konfirmasi dengan debtor melalui channel resmi sebelum memproses transaksi."
+def fetch_mock_logs(container_name, tail=50):
+    """Tail the fake rule log written by mock_tms.py for a container"""
+    from collections import deque
+    path = os.path.join(MOCK_TMS_LOG_DIR, f"{container_name}.log")
+    if not os.path.exists(path):
+        return {"status": "success", "logs": ""}
+    with open(path) as f:
+        return {"status": "success", "logs": "".join(deque(f, maxlen=tail))}
+
+
+def send_pacs008_with_confirmation(payload, status_code="ACCC", client=None, pacs002_payload=None):
+    """Send pacs.008 followed by its pacs.002 confirmation
+    
+    Rule 901/902 expect FIToFIPmtSts (pacs.002 format), not pacs.008, so every
+    attack transaction needs both messages. Safe to run via tms_client.run_bulk().
+    client defaults to the HTTP tms_client (see tms_client.for_transport()).
+    pacs002_payload: prebuilt confirmation (scenario plans); generated if omitted.
+    
+    Returns:
+        dict with pacs.008 status/time/response, pacs.002 status/response and the
+        failure class (connect / timeout / 4xx / 5xx / circuit_open) of the first failed send
+    """
+    client = client or tms_client
+    msg_id = payload.get("FIToFICstmrCdtTrf", {}).get("GrpHdr", {}).get("MsgId")
+    e2e_id = payload.get("FIToFICstmrCdtTrf", {}).get("CdtTrfTxInf", {}).get("PmtId", {}).get("EndToEndId")
+    
+    # Submit time for detection latency of relayed results (see routers/relay.py)
+    result_index.expect(msg_id, e2e_id)
+    result_008 = client.send_pacs008(payload)
+    status_008, time_008, response_008 = result_008
+    error_class = result_008.error_class
+    
+    status_002, response_002 = None, None
+    velocity = None
+    if status_008 == 200:
+        pacs002_payload = pacs002_payload or generate_pacs002(msg_id, e2e_id, status_code)
+        result_002 = client.send_pacs002(pacs002_payload)
+        status_002, _, response_002 = result_002
+        error_class = result_002.error_class
+        
+        # Rules 901/902 only count confirmed (ACCC) transactions
+        if status_002 == 200 and status_code == "ACCC":
+            tx = payload["FIToFICstmrCdtTrf"]["CdtTrfTxInf"]
+            velocity = velocity_counters.record(
+                tx.get("DbtrAcct", {}).get("Id", {}).get("Othr", [{}])[0].get("Id"),
+                tx.get("CdtrAcct", {}).get("Id", {}).get("Othr", [{}])[0].get("Id"),
+                float(tx.get("IntrBkSttlmAmt", {}).get("Amt", {}).get("Amt", 0) or 0)
+            )
+    
+    return {
+        "status": status_008,
+        "response_time_ms": time_008,
+        "response": response_008,
+        "pacs002_status": status_002,
+        "pacs002_response": response_002,
+        "error_class": error_class,
+        "velocity": velocity
     }
-}
+
+
+def send_bulk_with_confirmation(payloads, status_code="ACCC", transport=Transport.HTTP):
+    """Send many pacs.008 + pacs.002 pairs concurrently under the TMS adaptive limit
+    
+    Returns one send_pacs008_with_confirmation() dict (or Exception) per payload, in order.
+    """
+    client = tms_client.for_transport(Transport(transport).value)
+    return client.run_bulk(
+        [lambda p=p: send_pacs008_with_confirmation(p, status_code, client) for p in payloads]
+    )
+
+
+def send_until_threshold(build, count, threshold_reached, status_code="ACCC", transport=Transport.HTTP):
+    """Send pacs.008 + pacs.002 pairs one at a time until threshold_reached() or count pairs
+    
+    build(i) returns a tuple ending with the i-th pacs.008 payload. threshold_reached() is checked before
+    every send, i.e. after each confirmed (velocity-recorded) one, so failed sends
+    don't count towards it and nothing is sent once the threshold is already crossed.
+    
+    Returns (built, outcomes) for the pairs actually sent; outcomes as send_bulk_with_confirmation().
+    """
+    client = tms_client.for_transport(Transport(transport).value)
+    built, outcomes = [], []
+    for i in range(count):
+        if threshold_reached():
+            break
+        built.append(build(i))
+        try:
+            outcomes.append(send_pacs008_with_confirmation(built[-1][-1], status_code, client))
+        except Exception as e:
+            outcomes.append(e)
+    return built, outcomes
+
+
+def send_plan_with_confirmation(plan, transport=Transport.HTTP):
+    """Replay a compiled ScenarioPlan (services.scenario_plan)
+    
+    Every message is already built and serialised, so this is pure I/O: each
+    phase's pacs.008 + pacs.002 pairs run concurrently under the TMS adaptive
+    limit, and a phase starts once the previous one has been sent.
+    
+    Returns one send_pacs008_with_confirmation() dict (or Exception) per plan transaction, in order.
+    """
+    client = tms_client.for_transport(Transport(transport).value)
+    outcomes = []
+    for phase in plan.phases:
+        outcomes += client.run_bulk(
+            [lambda tx=tx: send_pacs008_with_confirmation(tx.pacs008, tx.status, client, tx.pacs002)
+             for tx in phase["transactions"]]
+        )
+    return outcomes
+
+
+async def await_relay_results(payloads, timeout=RELAY_RESULT_TIMEOUT):
+    """Wait for the relayed evaluation results of the given pacs.008 payloads
+    
+    Results arrive via the REST relay webhook (or Kafka consumer) and are matched
+    on EndToEndId, so there is no sleep and no log scraping.
+    
+    Returns:
+        (results by EndToEndId, summary with received/missing counts and detection latency)
+    """
+    keys = [
+        p.get("FIToFICstmrCdtTrf", {}).get("CdtTrfTxInf", {}).get("PmtId", {}).get("EndToEndId")
+        for p in payloads
+    ]
+    keys = [k for k in keys if k]
+    with stage("await_results"):
+        found = await result_index.wait_for_async(keys, timeout)
+    return found, summarize_detection(keys, found)
+
+
+def relay_fraud_alerts(found, request_context=None, target_rule=None):
+    """Build fraud alerts from relayed rule results (same shape as parse_fraud_alerts)
+    
+    Rule results carry the band reason that the rule processors also log, so the
+    log-based explanations in get_alert_explanation() apply unchanged.
+    """
+    fraud_alerts = []
+    seen_evaluations = set()
+    for entry in found.values():
+        if entry["evaluation_id"] in seen_evaluations:
+            continue
+        seen_evaluations.add(entry["evaluation_id"])
+        
+        for rule in entry["rule_results"]:
+            msg_text = rule.get("reason")
+            if not msg_text or msg_text in [a["raw"] for a in fraud_alerts]:
+                continue
+            explanation = get_alert_explanation(msg_text, request_context)
+            if not explanation.get("rule_id"):
+                continue
+            if target_rule and explanation["rule_id"] != target_rule:
+                continue
+            
+            fraud_alerts.append({
+                "raw": msg_text,
+                "title": explanation["title"],
+                "desc": explanation["desc"],
+                "rule_id": explanation["rule_id"],
+                "rule_detail": explanation.get("rule_detail"),
+                "request_context": explanation.get("request_context"),
+                "sub_rule_ref": rule.get("sub_rule_ref"),
+                "detection_latency_ms": entry["detection_latency_ms"],
+                "log_snippet": f"[relay:{entry['source']}] evaluation {entry['evaluation_id']} "
+                               f"{entry['status']} {rule.get('id')} {rule.get('sub_rule_ref')}: {msg_text}"
+            })
+    record_fraud_alerts(fraud_alerts, source="relay")
+    return fraud_alerts
 
 
 def get_dynamic_explanation(rule_id, request_context):
@@ -187,6 +334,7 @@ def get_alert_explanation(msg_text, request_context=None):
     }
 
 
+@timed("parse_alerts")
 def parse_fraud_alerts(logs_data, request_context=None, target_rule=None):
     """Parse fraud alerts from container logs with detailed explanations
     
@@ -233,9 +381,24 @@ def parse_fraud_alerts(logs_data, request_context=None, target_rule=None):
                             "request_context": explanation.get('request_context'),
                             "log_snippet": line.strip()[-200:] if len(line) > 200 else line.strip()
                         })
+    record_fraud_alerts(fraud_alerts, source="logs")
     return fraud_alerts
 
 
+@router.get(
+    "/velocity-counters/{account}",
+    summary="Sliding-window velocity state for an account"
+)
+async def get_velocity_counters(account: str):
+    """Client-side 24h counts for an account as debtor (Rule 901) and creditor (Rule 902)"""
+    return {
+        "account": account,
+        "debtor": velocity_counters.debtor(account),
+        "creditor": velocity_counters.creditor(account),
+        "counters": velocity_counters.stats()
+    }
+
+
 @router.post(
     "/velocity",
     summary="Velocity Attack Test (Rule 901)",
@@ -244,7 +407,11 @@ def parse_fraud_alerts(logs_data, request_context=None, target_rule=None):
 async def test_velocity(
     debtor_account: str = Form(..., description="Target debtor account"),
     debtor_name: str = Form(..., description="Debtor name"),
-    count: int = Form(20, description="Number of transactions (1-100)", ge=1, le=100)
+    count: int = Form(20, description="Number of transactions (1-100)", ge=1, le=100),
+    stop_on_threshold: bool = Form(False, description="Send sequentially and stop once a confirmed send crosses the Rule 901 threshold"),
+    transport: Transport = Form(Transport.HTTP, description="http (via TMS) or nats (direct to event director)"),
+    await_results: bool = Form(False, description="Wait for relayed evaluation results instead of scraping rule logs"),
+    verbosity: Verbosity = Form(Verbosity.FULL, description="Response detail: summary, standard, or full")
 ):
     """Run a velocity attack simulation (multiple tx in short time)
     
@@ -255,49 +422,55 @@ async def test_velocity(
     results = []
     base_amt = 500000.0
     
-    for i in range(count):
-        try:
-            # Use varied amount to avoid triggering Rule 006 (structuring)
-            amt = base_amt + (i * 50000) + random.randint(1000, 9999)
-            
-            # Use different creditor per transaction to avoid triggering Rule 902
-            rand_cred = ''.join(random.choices(string.digits, k=6))
-            creditor_acc = f"CRED_{rand_cred}"
-            creditor_nm = f"Random Creditor {rand_cred}"
-            
-            payload = generate_pacs008(
-                debtor_account=debtor_account, 
-                amount=amt, 
-                debtor_name=debtor_name,
-                creditor_account=creditor_acc,
-                creditor_name=creditor_nm
-            )
-            status_008, time_008, response_008 = tms_client.send_pacs008(payload)
-            
-            # Send pacs.002 confirmation (REQUIRED for Rule 901/902)
-            # Rule 901/902 expect FIToFIPmtSts (pacs.002 format), not pacs.008
-            pacs002_status = None
-            if status_008 == 200:
-                msg_id = payload.get("FIToFICstmrCdtTrf", {}).get("GrpHdr", {}).get("MsgId")
-                e2e_id = payload.get("FIToFICstmrCdtTrf", {}).get("CdtTrfTxInf", {}).get("PmtId", {}).get("EndToEndId")
-                
-                pacs002_payload = generate_pacs002(msg_id, e2e_id, "ACCC")
-                pacs002_status, _, _ = tms_client.send_pacs002(pacs002_payload)
-            
-            results.append({
-                "iteration": i + 1,
-                "status": status_008,
-                "pacs002_status": pacs002_status,
-                "response_time_ms": time_008,
-                "amount": amt,
-                "creditor": creditor_acc,
-                "response": response_008 if isinstance(response_008, dict) else {}
-            })
-            
-            # test_history.append() removed - data stored in Tazama DB
-            
-        except Exception as e:
-            results.append({"iteration": i + 1, "status": "error", "error": str(e)})
+    def build(i):
+        # Use varied amount to avoid triggering Rule 006 (structuring)
+        amt = base_amt + (i * 50000) + random.randint(1000, 9999)
+        
+        # Use different creditor per transaction to avoid triggering Rule 902
+        rand_cred = ''.join(random.choices(string.digits, k=6))
+        creditor_acc = f"CRED_{rand_cred}"
+        creditor_nm = f"Random Creditor {rand_cred}"
+        
+        payload = generate_pacs008(
+            debtor_account=debtor_account, 
+            amount=amt, 
+            debtor_name=debtor_name,
+            creditor_account=creditor_acc,
+            creditor_name=creditor_nm
+        )
+        return amt, creditor_acc, payload
+    
+    if stop_on_threshold:
+        # Sequential: stop as soon as a confirmed send crosses the Rule 901 threshold
+        iterations, outcomes = await run_in_executor_with_context(
+            send_until_threshold, build, count,
+            lambda: velocity_counters.debtor(debtor_account)["rule_901_expected"], "ACCC", transport
+        )
+    else:
+        iterations = [build(i) for i in range(count)]
+        # Send pacs.008 + pacs.002 pairs concurrently (bounded by TMS adaptive limit)
+        outcomes = await run_in_executor_with_context(
+            send_bulk_with_confirmation, [payload for _, _, payload in iterations], "ACCC", transport
+        )
+    count = len(iterations)
+    amt = iterations[-1][0] if iterations else base_amt
+    
+    for i, ((amt_i, creditor_acc, _), outcome) in enumerate(zip(iterations, outcomes)):
+        if isinstance(outcome, Exception):
+            results.append({"iteration": i + 1, "status": "error", "error": str(outcome)})
+            continue
+        
+        results.append({
+            "iteration": i + 1,
+            "status": outcome["status"],
+            "pacs002_status": outcome["pacs002_status"],
+            "response_time_ms": outcome["response_time_ms"],
+            "amount": amt_i,
+            "creditor": creditor_acc,
+            "error_class": outcome["error_class"],
+            "rule_901_expected": (outcome["velocity"] or {}).get("debtor", {}).get("rule_901_expected"),
+            "response": outcome["response"] if isinstance(outcome["response"], dict) else {}
+        })
 
     # Build request context for detailed alerts
     request_context = {
@@ -309,16 +482,23 @@ async def test_velocity(
         "total_amount": amt * count
     }
     
-    logs_data = fetch_logs_internal("tazama-rule-901", tail=100)
-    fraud_alerts = parse_fraud_alerts(logs_data, request_context)
-
-    return {
+    relay_results = None
+    if await_results:
+        found, relay_results = await await_relay_results([payload for _, _, payload in iterations])
+        fraud_alerts = relay_fraud_alerts(found, request_context)
+    else:
+        logs_data = fetch_logs_internal("tazama-rule-901", tail=100)
+        fraud_alerts = parse_fraud_alerts(logs_data, request_context)
+
+    return project_response({
         "status": "completed",
         "total_sent": count,
         "results": results,
         "fraud_alerts": fraud_alerts,
+        "relay_results": relay_results,
+        "velocity_state": velocity_counters.debtor(debtor_account),
         "request_summary": request_context
-    }
+    }, verbosity)
 
 
 @router.post(
@@ -330,7 +510,11 @@ async def test_velocity_creditor(
     creditor_account: str = Form(..., description="Target creditor account"),
     creditor_name: str = Form(..., description="Creditor name"),
     count: int = Form(20, description="Number of transactions", ge=1, le=100),
-    amount: float = Form(500000.0, description="Amount per transaction", gt=0)
+    amount: float = Form(500000.0, description="Amount per transaction", gt=0),
+    stop_on_threshold: bool = Form(False, description="Send sequentially and stop once a confirmed send crosses the Rule 902 threshold"),
+    transport: Transport = Form(Transport.HTTP, description="http (via TMS) or nats (direct to event director)"),
+    await_results: bool = Form(False, description="Wait for relayed evaluation results instead of scraping rule logs"),
+    verbosity: Verbosity = Form(Verbosity.FULL, description="Response detail: summary, standard, or full")
 ):
     """Run a creditor velocity attack simulation (Money Mule Scenario)
     
@@ -341,48 +525,52 @@ async def test_velocity_creditor(
     results = []
     base_amt = amount
     
-    for i in range(count):
-        try:
-            rand_suffix = ''.join(random.choices(string.digits, k=6))
-            debtor_acc = f"DEB_{rand_suffix}"
-            debtor_nm = f"Random Sender {rand_suffix}"
-            
-            # Use varied amount to avoid triggering Rule 006 (structuring)
-            current_amt = base_amt + (i * 25000) + random.randint(1000, 5000)
-            
-            payload = generate_pacs008(
-                debtor_account=debtor_acc,
-                amount=current_amt,
-                debtor_name=debtor_nm,
-                creditor_account=creditor_account,
-                creditor_name=creditor_name
-            )
-            
-            status_008, time_008, response_008 = tms_client.send_pacs008(payload)
-            
-            pacs002_response_json = {}
-            if status_008 == 200:
-                msg_id = payload.get("FIToFICstmrCdtTrf", {}).get("GrpHdr", {}).get("MsgId")
-                e2e_id = payload.get("FIToFICstmrCdtTrf", {}).get("CdtTrfTxInf", {}).get("PmtId", {}).get("EndToEndId")
-                
-                pacs002_payload = generate_pacs002(msg_id, e2e_id, "ACCC")
-                status_002, _, response_002 = tms_client.send_pacs002(pacs002_payload)
-                pacs002_response_json = response_002 if isinstance(response_002, dict) else {}
-
-            results.append({
-                "iteration": i + 1,
-                "status": status_008,
-                "response_time_ms": time_008,
-                "amount": current_amt,
-                "debtor": debtor_acc,
-                "response": response_008 if isinstance(response_008, dict) else {},
-                "pacs002_response": pacs002_response_json
-            })
-            
-            # test_history.append() removed - data stored in Tazama DB
-            
-        except Exception as e:
-            results.append({"iteration": i + 1, "status": "error", "error": str(e)})
+    def build(i):
+        rand_suffix = ''.join(random.choices(string.digits, k=6))
+        debtor_acc = f"DEB_{rand_suffix}"
+        debtor_nm = f"Random Sender {rand_suffix}"
+        
+        # Use varied amount to avoid triggering Rule 006 (structuring)
+        current_amt = base_amt + (i * 25000) + random.randint(1000, 5000)
+        
+        payload = generate_pacs008(
+            debtor_account=debtor_acc,
+            amount=current_amt,
+            debtor_name=debtor_nm,
+            creditor_account=creditor_account,
+            creditor_name=creditor_name
+        )
+        return current_amt, debtor_acc, payload
+    
+    if stop_on_threshold:
+        # Sequential: stop as soon as a confirmed send crosses the Rule 902 threshold
+        iterations, outcomes = await run_in_executor_with_context(
+            send_until_threshold, build, count,
+            lambda: velocity_counters.creditor(creditor_account)["rule_902_expected"], "ACCC", transport
+        )
+    else:
+        iterations = [build(i) for i in range(count)]
+        outcomes = await run_in_executor_with_context(
+            send_bulk_with_confirmation, [payload for _, _, payload in iterations], "ACCC", transport
+        )
+    count = len(iterations)
+    
+    for i, ((current_amt, debtor_acc, _), outcome) in enumerate(zip(iterations, outcomes)):
+        if isinstance(outcome, Exception):
+            results.append({"iteration": i + 1, "status": "error", "error": str(outcome)})
+            continue
+        
+        results.append({
+            "iteration": i + 1,
+            "status": outcome["status"],
+            "response_time_ms": outcome["response_time_ms"],
+            "amount": current_amt,
+            "debtor": debtor_acc,
+            "error_class": outcome["error_class"],
+            "rule_902_expected": (outcome["velocity"] or {}).get("creditor", {}).get("rule_902_expected"),
+            "response": outcome["response"] if isinstance(outcome["response"], dict) else {},
+            "pacs002_response": outcome["pacs002_response"] if isinstance(outcome["pacs002_response"], dict) else {}
+        })
 
     # Build request context for detailed alerts
     request_context = {
@@ -394,16 +582,23 @@ async def test_velocity_creditor(
         "total_amount": amount * count
     }
     
-    logs_data = fetch_logs_internal("tazama-rule-902", tail=100)
-    fraud_alerts = parse_fraud_alerts(logs_data, request_context)
-
-    return {
+    relay_results = None
+    if await_results:
+        found, relay_results = await await_relay_results([payload for _, _, payload in iterations])
+        fraud_alerts = relay_fraud_alerts(found, request_context)
+    else:
+        logs_data = fetch_logs_internal("tazama-rule-902", tail=100)
+        fraud_alerts = parse_fraud_alerts(logs_data, request_context)
+
+    return project_response({
         "status": "completed",
         "total_sent": count,
         "results": results,
         "fraud_alerts": fraud_alerts,
+        "relay_results": relay_results,
+        "velocity_state": velocity_counters.creditor(creditor_account),
         "request_summary": request_context
-    }
+    }, verbosity)
 
 
 @router.post(
@@ -414,147 +609,202 @@ async def test_velocity_creditor(
 async def test_attack_scenario(
     scenario: str = Form(..., description="Scenario: rule_901, rule_902, rule_006, or rule_018"),
     count: int = Form(5, description="Number of transactions", ge=1, le=50),
-    amount: Optional[float] = Form(None, description="Custom amount (optional)", gt=0)
+    amount: Optional[float] = Form(None, description="Custom amount (optional)", gt=0),
+    transport: Transport = Form(Transport.HTTP, description="http (via TMS) or nats (direct to event director)"),
+    await_results: bool = Form(False, description="Wait for relayed evaluation results instead of scraping rule logs"),
+    verbosity: Verbosity = Form(Verbosity.FULL, description="Response detail: summary, standard, or full")
 ):
     """Run a specific attack scenario with ISOLATED TRIGGERS
     
-    Each scenario is designed to ONLY trigger its target rule:
+    Each scenario is designed to ONLY trigger its target rule (see scenarios/*.json):
     - rule_901: Uses varied amounts and different creditors
     - rule_902: Uses varied amounts with same creditor
-    - rule_006: Uses SAME amount with minimal count (3 transactions)
+    - rule_006: Uses SAME amount with minimal count (6 transactions)
     - rule_018: Uses single large transaction after small history
     """
-    results = []
-    target_container = "tazama-rule-901"
-    amt = amount or 500000.0
-    base_amt = amt
-    
-    debtor_acc = "SCENARIO_TEST_DEB"
-    creditor_acc = "SCENARIO_TEST_CRED"
-    target_amt = amt
+    try:
+        with stage("compile_plan"):
+            plan = scenario_library.compile(scenario, count=count, amount=amount)
+    except KeyError:
+        return {"status": "error", "message": f"Unknown scenario: {scenario}",
+                "tip": f"Available: {', '.join(s['name'] for s in scenario_library.list())}"}
+    except ValueError as e:
+        return {"status": "error", "message": str(e)}
     
-    # Scenario-specific configurations for ISOLATED triggers
-    if scenario == "rule_901":
-        target_container = "tazama-rule-901"
-        count = max(count, 5)
-        debtor_acc = f"VEL_{random.randint(1000,9999)}"
-        # Will use varied amounts and different creditors in loop
-        
-    elif scenario == "rule_902":
-        target_container = "tazama-rule-902"
-        count = max(count, 5)
-        creditor_acc = f"MULE_{random.randint(1000,9999)}"
-        # Will use varied amounts with different debtors in loop
+    # Send pacs.008 + pacs.002 pairs concurrently (bounded by TMS adaptive limit);
+    # phases keep their order (rule 018 history before the final huge transaction)
+    outcomes = await run_in_executor_with_context(send_plan_with_confirmation, plan, transport)
+    transactions = plan.transactions
     
-    elif scenario == "rule_006":
-        target_container = "tazama-rule-006"
-        amt = amount or 9500000.0
-        # Use 6 transactions to trigger (lowerLimit is now 5)
-        count = 6
-        debtor_acc = f"STRUCT_{random.randint(1000,9999)}"
-        # Will use SAME amount to trigger structuring
+    results = []
+    for i, (tx, outcome) in enumerate(zip(transactions, outcomes)):
+        if isinstance(outcome, Exception):
+            results.append({"error": str(outcome)})
+            continue
         
-    elif scenario == "rule_018":
-        target_container = "tazama-rule-018"
-        target_amt = amount or 500000000.0  # 500 juta sebagai transaksi besar
-        # Use 6 transactions: 5 small (history), 1 huge (trigger)
-        # Need sufficient history for rule to calculate average
-        count = 6
-        debtor_acc = f"WHALE_{random.randint(1000,9999)}"
-
-    for i in range(count):
-        try:
-            current_amt = amt
-            current_debtor = debtor_acc
-            current_creditor = creditor_acc
-            
-            # Rule 901: Varied amounts + different creditors (ONLY triggers 901)
-            if scenario == "rule_901":
-                current_amt = base_amt + (i * 100000) + random.randint(10000, 50000)
-                rand_cred = ''.join(random.choices(string.digits, k=6))
-                current_creditor = f"CRED_{rand_cred}"
-            
-            # Rule 902: Varied amounts + different debtors (ONLY triggers 902)
-            elif scenario == "rule_902":
-                current_amt = base_amt + (i * 50000) + random.randint(5000, 20000)
-                rand_suffix = ''.join(random.choices(string.digits, k=6))
-                current_debtor = f"DEB_{rand_suffix}"
-            
-            # Rule 006: SAME amount (triggers structuring)
-            elif scenario == "rule_006":
-                current_amt = amt  # Keep same amount for structuring detection
-                # Use different creditor per transaction to avoid 902
-                rand_cred = ''.join(random.choices(string.digits, k=6))
-                current_creditor = f"CRED_{rand_cred}"
-                
-            # Rule 018: Build historical average, then one huge transaction
-            elif scenario == "rule_018":
-                if i < count - 1:
-                    # Small historical transactions: Rp 500k - Rp 2jt (varied to avoid 006)
-                    current_amt = 500000.0 + (i * 300000) + random.randint(50000, 150000)
-                else:
-                    # Final huge transaction: much larger than average
-                    current_amt = target_amt
-                # Different creditor each time to avoid 902
-                rand_cred = ''.join(random.choices(string.digits, k=6))
-                current_creditor = f"CRED_{rand_cred}"
-
-            payload = generate_pacs008(
-                debtor_account=current_debtor,
-                amount=current_amt,
-                debtor_name="Scenario Actor",
-                creditor_account=current_creditor
-            )
-            
-            start_time = datetime.now()
-            status_008, time_008, response_008 = tms_client.send_pacs008(payload)
-            
-            pacs002_response_json = {}
-            if status_008 == 200:
-                msg_id = payload.get("FIToFICstmrCdtTrf", {}).get("GrpHdr", {}).get("MsgId")
-                e2e_id = payload.get("FIToFICstmrCdtTrf", {}).get("CdtTrfTxInf", {}).get("PmtId", {}).get("EndToEndId")
-                
-                pacs002_payload = generate_pacs002(msg_id, e2e_id, "ACCC")
-                status_002, _, response_002 = tms_client.send_pacs002(pacs002_payload)
-                pacs002_response_json = response_002 if isinstance(response_002, dict) else {}
-
-            duration = (datetime.now() - start_time).total_seconds() * 1000
-            
-            results.append({
-                "iteration": i + 1,
-                "status": status_008,
-                "response": response_008 if isinstance(response_008, dict) else {},
-                "amount": current_amt
-            })
-            
-            # test_history.append() removed - data stored in Tazama DB
-            
-        except Exception as e:
-            results.append({"error": str(e)})
+        results.append({
+            "iteration": i + 1,
+            "status": outcome["status"],
+            "error_class": outcome["error_class"],
+            "response": outcome["response"] if isinstance(outcome["response"], dict) else {},
+            "amount": tx.amount
+        })
 
     # Build request context for detailed alerts
     request_context = {
         "scenario": scenario,
-        "debtor_account": debtor_acc,
-        "creditor_account": creditor_acc,
-        "amount_requested": amt,
-        "target_amount": target_amt if scenario == "rule_018" else amt,
-        "total_transactions": count
+        "debtor_account": plan.params.get("debtor"),
+        "creditor_account": plan.params.get("creditor"),
+        "amount_requested": transactions[0].amount if transactions else None,
+        "target_amount": plan.params.get("amount"),
+        "total_transactions": len(transactions)
     }
     
     # Extract rule number from scenario for filtering (e.g. "rule_018" -> "018")
     target_rule = scenario.replace("rule_", "") if scenario.startswith("rule_") else None
     
-    logs_data = fetch_logs_internal(target_container, tail=100)
-    fraud_alerts = parse_fraud_alerts(logs_data, request_context, target_rule)
-
-    return {
+    relay_results = None
+    if await_results:
+        found, relay_results = await await_relay_results([tx.pacs008 for tx in transactions])
+        fraud_alerts = relay_fraud_alerts(found, request_context, target_rule)
+    else:
+        logs_data = fetch_logs_internal(plan.container or "tazama-rule-901", tail=100)
+        fraud_alerts = parse_fraud_alerts(logs_data, request_context, target_rule)
+
+    return project_response({
         "status": "completed",
-        "total_sent": count,
+        "total_sent": len(transactions),
         "results": results,
         "fraud_alerts": fraud_alerts,
+        "relay_results": relay_results,
         "request_summary": request_context
+    }, verbosity)
+
+
+def _plan_from_form(scenario, spec, params):
+    """Compile a library scenario (by name) or an inline JSON / YAML spec with JSON params"""
+    overrides = json.loads(params) if params else {}
+    if not isinstance(overrides, dict):
+        raise ValueError("params must be a JSON object")
+    if spec:
+        return compile_plan(parse_scenario(spec), overrides)
+    if not scenario:
+        raise ValueError("Give a scenario name or an inline spec")
+    return scenario_library.compile(scenario, **overrides)
+
+
+@router.get(
+    "/scenarios",
+    summary="List Scenario Plans",
+    description="Declarative attack scenarios loaded from SCENARIO_DIR (JSON / YAML)"
+)
+async def list_scenarios():
+    """Scenarios with their params (defaults, min / max) and phases"""
+    scenarios = scenario_library.list()
+    return {"status": "success", "directory": scenario_library.directory, "count": len(scenarios),
+            "scenarios": scenarios}
+
+
+@router.post("/scenarios/reload", summary="Reload Scenario Plans")
+async def reload_scenarios():
+    """Re-read SCENARIO_DIR after adding or editing scenario files"""
+    errors = scenario_library.load()
+    return {"status": "error" if errors else "success", "count": len(scenario_library.list()), "errors": errors}
+
+
+@router.post(
+    "/scenarios/compile",
+    summary="Compile Scenario Plan",
+    description="Compile a scenario into its ready-to-send messages and dependency edges without sending"
+)
+async def compile_scenario(
+    scenario: Optional[str] = Form(None, description="Scenario name from /api/test/scenarios"),
+    spec: Optional[str] = Form(None, description="Inline scenario (JSON or YAML) instead of a name"),
+    params: Optional[str] = Form(None, description='Param overrides as JSON, e.g. {"count": 10}'),
+    include_messages: bool = Form(False, description="Include the serialised pacs.008 / pacs.002 bodies")
+):
+    """Preview a plan: resolved params, phases, message count / bytes and edges"""
+    try:
+        with stage("compile_plan"):
+            plan = _plan_from_form(scenario, spec, params)
+    except KeyError:
+        return {"status": "error", "message": f"Unknown scenario: {scenario}", "tip": "See GET /api/test/scenarios"}
+    except ValueError as e:
+        return {"status": "error", "message": str(e)}
+    return {"status": "success", **plan.summary(include_messages),
+            "dependency_edges": plan.edges() if include_messages else None}
+
+
+@router.post(
+    "/scenarios/run",
+    summary="Run Scenario Plan",
+    description="Compile a scenario ahead of time, then replay its messages as pure I/O"
+)
+async def run_scenario(
+    scenario: Optional[str] = Form(None, description="Scenario name from /api/test/scenarios"),
+    spec: Optional[str] = Form(None, description="Inline scenario (JSON or YAML) instead of a name"),
+    params: Optional[str] = Form(None, description='Param overrides as JSON, e.g. {"count": 10}'),
+    transport: Transport = Form(Transport.HTTP, description="http (via TMS) or nats (direct to event director)"),
+    await_results: bool = Form(False, description="Wait for relayed evaluation results instead of scraping rule logs"),
+    verbosity: Verbosity = Form(Verbosity.FULL, description="Response detail: summary, standard, or full")
+):
+    """Run any scenario, including ones added as files or sent inline (no code change needed)"""
+    try:
+        with stage("compile_plan"):
+            plan = _plan_from_form(scenario, spec, params)
+    except KeyError:
+        return {"status": "error", "message": f"Unknown scenario: {scenario}", "tip": "See GET /api/test/scenarios"}
+    except ValueError as e:
+        return {"status": "error", "message": str(e)}
+    
+    started = time_module.perf_counter()
+    outcomes = await run_in_executor_with_context(send_plan_with_confirmation, plan, transport)
+    send_seconds = time_module.perf_counter() - started
+    
+    transactions = plan.transactions
+    results = [
+        {"error": str(outcome)} if isinstance(outcome, Exception) else {
+            "iteration": i + 1,
+            "phase": tx.phase,
+            "status": outcome["status"],
+            "pacs002_status": outcome["pacs002_status"],
+            "error_class": outcome["error_class"],
+            "amount": tx.amount
+        }
+        for i, (tx, outcome) in enumerate(zip(transactions, outcomes))
+    ]
+    request_context = {
+        "scenario": plan.name,
+        "debtor_account": plan.params.get("debtor"),
+        "creditor_account": plan.params.get("creditor"),
+        "amount_requested": transactions[0].amount if transactions else None,
+        "target_amount": plan.params.get("amount"),
+        "total_transactions": len(transactions)
     }
+    
+    relay_results = None
+    if await_results:
+        found, relay_results = await await_relay_results([tx.pacs008 for tx in transactions])
+        fraud_alerts = relay_fraud_alerts(found, request_context, plan.target_rule)
+    elif plan.container:
+        logs_data = fetch_logs_internal(plan.container, tail=100)
+        fraud_alerts = parse_fraud_alerts(logs_data, request_context, plan.target_rule)
+    else:
+        fraud_alerts = []
+    
+    confirmed = sum(1 for r in results if r.get("pacs002_status") == 200)
+    return project_response({
+        "status": "completed",
+        "total_sent": len(transactions),
+        "confirmed": confirmed,
+        "send_time_ms": round(send_seconds * 1000, 2),
+        "messages_per_sec": round(2 * confirmed / send_seconds, 2) if send_seconds else None,
+        "plan": plan.summary(),
+        "results": results,
+        "fraud_alerts": fraud_alerts,
+        "relay_results": relay_results,
+        "request_summary": request_context
+    }, verbosity)
 
 
 @router.post(
@@ -565,7 +815,8 @@ async def test_attack_scenario(
 async def fraud_simulation(
     account_id: str = Form("FRAUD_SIM_001", description="Account ID for simulation"),
     rule: str = Form("rule_006", description="Rule to trigger: rule_006, rule_018, rule_901, rule_902"),
-    attack_count: int = Form(6, description="Number of attack transactions", ge=3, le=20)
+    attack_count: int = Form(6, description="Number of attack transactions", ge=3, le=20),
+    verbosity: Verbosity = Form(Verbosity.FULL, description="Response detail: summary, standard, or full")
 ):
     """
     Full Fraud Simulation Flow - 5 Steps:
@@ -575,8 +826,6 @@ async def fraud_simulation(
     4. ❌ Block Transaction (RJCT) - Confirm blocking
     5. 📊 Summary - Return fraud details
     """
-    import time as time_module
-    
     simulation_result = {
         "overall_status": "pending",
         "steps": [],
@@ -605,14 +854,14 @@ async def fraud_simulation(
             debtor_name="Fraud Sim User",
             creditor_account="LEGIT_CREDITOR_001"
         )
-        status_t1, time_t1, resp_t1 = tms_client.send_pacs008(normal_payload)
+        status_t1, time_t1, resp_t1 = await run_in_executor_with_context(tms_client.send_pacs008, normal_payload)
         
         step1_success = status_t1 == 200
         if step1_success:
             msg_id_t1 = normal_payload.get("FIToFICstmrCdtTrf", {}).get("GrpHdr", {}).get("MsgId")
             e2e_id_t1 = normal_payload.get("FIToFICstmrCdtTrf", {}).get("CdtTrfTxInf", {}).get("PmtId", {}).get("EndToEndId")
             pacs002_t1 = generate_pacs002(msg_id_t1, e2e_id_t1, "ACCC")
-            status_002_t1, _, _ = tms_client.send_pacs002(pacs002_t1)
+            status_002_t1, _, _ = await run_in_executor_with_context(tms_client.send_pacs002, pacs002_t1)
             step1_success = status_002_t1 == 200
         
         simulation_result["steps"].append({
@@ -626,77 +875,44 @@ async def fraud_simulation(
         
         # test_history.append() removed - data stored in Tazama DB
         
-        time_module.sleep(0.2)
+        await asyncio.sleep(0.2)
         
         # === STEP 2: Trigger Fraud Pattern ===
-        attack_results = []
-        attack_amt = 9500000.0 if rule_id == "006" else 500000.0
+        # Same scenarios as /attack-scenario, aimed at this account
+        # (Money Mule fans in from many debtors to MULE_TARGET_001 instead)
+        overrides = {"count": attack_count, "actor": "Fraud Actor"}
+        if rule_id == "902":
+            overrides["creditor"] = "MULE_TARGET_001"
+        else:
+            overrides["debtor"] = account_id
+        plan = scenario_library.compile(f"rule_{rule_id}", **overrides)
+        attack_amt = plan.transactions[0].amount
         
-        for i in range(attack_count):
-            current_amt = attack_amt
-            current_debtor = account_id
-            current_creditor = f"CRED_{random.randint(1000, 9999)}"
-            
-            # Rule-specific configuration
-            if rule_id == "901":
-                # Velocity: varied amounts, same debtor, different creditors
-                current_amt = attack_amt + (i * 100000) + random.randint(10000, 50000)
-            elif rule_id == "902":
-                # Money Mule: varied amounts, different debtors, same creditor
-                current_amt = attack_amt + (i * 50000) + random.randint(5000, 20000)
-                current_debtor = f"DEB_{random.randint(1000, 9999)}"
-                current_creditor = "MULE_TARGET_001"
-            elif rule_id == "006":
-                # Structuring: SAME amount for detection
-                current_amt = attack_amt
-            elif rule_id == "018":
-                # High Value: build history then one huge tx
-                if i < attack_count - 1:
-                    current_amt = 500000.0 + (i * 100000)
-                else:
-                    current_amt = 500000000.0  # 500 juta
-            
-            attack_payload = generate_pacs008(
-                debtor_account=current_debtor,
-                amount=current_amt,
-                debtor_name="Fraud Actor",
-                creditor_account=current_creditor
-            )
-            
-            status_atk, time_atk, _ = tms_client.send_pacs008(attack_payload)
-            
-            if status_atk == 200:
-                msg_id_atk = attack_payload.get("FIToFICstmrCdtTrf", {}).get("GrpHdr", {}).get("MsgId")
-                e2e_id_atk = attack_payload.get("FIToFICstmrCdtTrf", {}).get("CdtTrfTxInf", {}).get("PmtId", {}).get("EndToEndId")
-                pacs002_atk = generate_pacs002(msg_id_atk, e2e_id_atk, "ACCC")
-                tms_client.send_pacs002(pacs002_atk)
-            
-            attack_results.append({
-                "tx": i + 1,
-                "amount": current_amt,
-                "status": status_atk
-            })
-            
-            # test_history.append() removed - data stored in Tazama DB
+        outcomes = await run_in_executor_with_context(send_plan_with_confirmation, plan)
+        attack_results = [
+            {"tx": i + 1, "amount": tx.amount,
+             "status": "error" if isinstance(outcome, Exception) else outcome["status"]}
+            for i, (tx, outcome) in enumerate(zip(plan.transactions, outcomes))
+        ]
         
         step2_success = all(r["status"] == 200 for r in attack_results)
         simulation_result["steps"].append({
             "step": 2,
             "name": f"Trigger Fraud Pattern ({RULE_CONFIGS.get(rule_id, {}).get('name', rule)})",
-            "description": f"Sent {attack_count} transactions to trigger detection",
+            "description": f"Sent {len(attack_results)} transactions to trigger detection",
             "success": step2_success,
             "transactions": len(attack_results),
             "icon": "⚠️"
         })
         
-        time_module.sleep(0.5)  # Wait for processing
+        await asyncio.sleep(0.5)  # Wait for processing
         
         # === STEP 3: Check Fraud Detection ===
         request_context = {
             "scenario": f"Rule {rule_id}",
             "debtor_account": account_id,
             "amount_per_transaction": attack_amt,
-            "total_transactions": attack_count
+            "total_transactions": len(attack_results)
         }
         
         logs_data = fetch_logs_internal(target_container, tail=100)
@@ -716,7 +932,7 @@ async def fraud_simulation(
             "icon": "🔍" if fraud_detected else "👀"
         })
         
-        time_module.sleep(0.2)
+        await asyncio.sleep(0.2)
         
         # === STEP 4: Block Transaction (RJCT) ===
         block_payload = generate_pacs008(
@@ -725,14 +941,14 @@ async def fraud_simulation(
             debtor_name="Fraud Sim User",
             creditor_account="BLOCKED_CREDITOR"
         )
-        status_blk, time_blk, _ = tms_client.send_pacs008(block_payload)
+        status_blk, time_blk, _ = await run_in_executor_with_context(tms_client.send_pacs008, block_payload)
         
         step4_success = status_blk == 200
         if step4_success:
             msg_id_blk = block_payload.get("FIToFICstmrCdtTrf", {}).get("GrpHdr", {}).get("MsgId")
             e2e_id_blk = block_payload.get("FIToFICstmrCdtTrf", {}).get("CdtTrfTxInf", {}).get("PmtId", {}).get("EndToEndId")
             pacs002_blk = generate_pacs002(msg_id_blk, e2e_id_blk, "RJCT")
-            status_002_blk, _, _ = tms_client.send_pacs002(pacs002_blk)
+            status_002_blk, _, _ = await run_in_executor_with_context(tms_client.send_pacs002, pacs002_blk)
         
         simulation_result["steps"].append({
             "step": 4,
@@ -752,7 +968,7 @@ async def fraud_simulation(
             "rule_id": rule_id,
             "trigger_condition": rule_info.get("trigger_condition", "N/A"),
             "recommendation": rule_info.get("recommendation", "N/A"),
-            "total_attack_transactions": attack_count,
+            "total_attack_transactions": len(attack_results),
             "fraud_detected": fraud_detected,
             "alerts_count": len(fraud_alerts),
             "final_status": "BLOCKED" if fraud_detected else "MONITORING"
@@ -773,7 +989,69 @@ async def fraud_simulation(
         simulation_result["overall_status"] = "error"
         simulation_result["error"] = str(e)
 
-    return simulation_result
+    return project_response(simulation_result, verbosity)
+
+
+def _query_rule_903_rows(account_id, limit):
+    """Recent Rule 903 HIGH RISK (.01) results for a debtor from the evaluation DB"""
+    import psycopg2
+    
+    conn = psycopg2.connect(
+        host="localhost",
+        port=5433,
+        database="evaluation",
+        user="postgres",
+        password="postgres"
+    )
+    cursor = conn.cursor()
+
+    # Query Rule 903 results for this account
+    cursor.execute("""
+        WITH rule_903_data AS (
+            SELECT
+                evaluation->'report'->'tadpResult'->'typologyResult'->0 as typology_result,
+                evaluation->'report'->'tadpResult'->'typologyResult'->0->'ruleResults' as rule_results,
+                evaluation->'transaction'->'FIToFICstmrCdtTrf'->'CdtTrfTxInf'->'DbtrAcct'->'Id'->'Othr'->0->>'Id' as debtor_acct,
+                evaluation->'transaction'->'FIToFICstmrCdtTrf'->'CdtTrfTxInf'->'IntrBkSttlmAmt'->'Amt'->>'Amt' as amount,
+                evaluation->'transaction'->'FIToFICstmrCdtTrf'->'CdtTrfTxInf'->'PmtId'->>'EndToEndId' as end_to_end_id,
+                evaluation->'report'->>'timestamp' as timestamp
+            FROM evaluation
+            WHERE (evaluation->'report'->>'timestamp')::timestamp >= NOW() - INTERVAL '10 seconds'
+        )
+        SELECT
+            rule->>'id' as rule_id,
+            rule->>'subRuleRef' as sub_rule_ref,
+            (rule->>'wght')::int as weight,
+            (typology_result->>'result')::int as typology_score,
+            debtor_acct,
+            timestamp,
+            amount,
+            end_to_end_id
+        FROM rule_903_data,
+            jsonb_array_elements(rule_results) as rule
+        WHERE rule->>'id' = '903@1.0.0'
+          AND debtor_acct = %s
+          AND rule->>'subRuleRef' = '.01'
+        ORDER BY timestamp DESC
+        LIMIT %s
+    """, (account_id, limit))
+
+    rows = cursor.fetchall()
+    cursor.close()
+    conn.close()
+    return rows
+
+
+def _relay_rule_903_rows(found, account_id, amounts):
+    """Same rows as _query_rule_903_rows(), built from relayed results"""
+    rows = []
+    for e2e_id, entry in found.items():
+        typology_score = entry["typologies"][0]["result"] if entry["typologies"] else None
+        for rule in entry["rule_results"]:
+            if rule["rule_id"] == "903" and rule["sub_rule_ref"] == ".01":
+                rows.append((rule["id"], rule["sub_rule_ref"], rule["weight"], typology_score,
+                             account_id, entry["timestamp"], amounts.get(e2e_id), e2e_id))
+    return rows
 
 
 @router.post(
@@ -784,7 +1062,9 @@ async def fraud_simulation(
 async def geographic_risk_simulation(
     account_id: str = Form("GEO_RISK_001", description="Account ID for simulation"),
     high_risk_city: str = Form("Jakarta", description="High risk city (Jakarta, Surabaya, Tangerang)"),
-    transaction_count: int = Form(3, description="Number of high-risk transactions", ge=2, le=10)
+    transaction_count: int = Form(3, description="Number of high-risk transactions", ge=2, le=10),
+    await_results: bool = Form(False, description="Wait for relayed Rule 903 results instead of polling the evaluation DB"),
+    verbosity: Verbosity = Form(Verbosity.FULL, description="Response detail: summary, standard, or full")
 ):
     """
     Geographic Risk Simulation Flow - 5 Steps:
@@ -794,7 +1074,7 @@ async def geographic_risk_simulation(
     4. ❌ Block Transaction (Jakarta) → RJCT
     5. 📊 Summary → Geographic risk details
     """
-    import time as time_module
+    from utils.geo_index import zone_center  # Pulls in numpy; kept out of cold start
 
     simulation_result = {
         "overall_status": "pending",
@@ -806,17 +1086,16 @@ async def geographic_risk_simulation(
         "summary": {}
     }
 
-    # Geographic coordinates
-    geo_coords = {
-        "Jakarta": {"lat": "-6.195062", "long": "106.803215"},
-        "Surabaya": {"lat": "-7.250445", "long": "112.768845"},
-        "Tangerang": {"lat": "-6.178306", "long": "106.640166"},
-        "Yogyakarta": {"lat": "-7.795580", "long": "110.369490"},  # Low risk
-        "Bandung": {"lat": "-6.917464", "long": "107.619125"}      # Medium risk
-    }
+    # Geographic coordinates (zone centroids from utils.geo_index)
+    def _coords(city):
+        lat, lon = zone_center(city)
+        return {"lat": f"{lat:.6f}", "long": f"{lon:.6f}"}
 
-    high_risk_coords = geo_coords.get(high_risk_city, geo_coords["Jakarta"])
-    low_risk_coords = geo_coords["Yogyakarta"]
+    try:
+        high_risk_coords = _coords(high_risk_city)
+    except KeyError:
+        high_risk_coords = _coords("Jakarta")
+    low_risk_coords = _coords("Yogyakarta")
 
     try:
         # === STEP 1: Normal Transaction (Low Risk Location) ===
@@ -828,14 +1107,14 @@ async def geographic_risk_simulation(
             latitude=low_risk_coords["lat"],
             longitude=low_risk_coords["long"]
         )
-        status_t1, time_t1, resp_t1 = tms_client.send_pacs008(normal_payload)
+        status_t1, time_t1, resp_t1 = await run_in_executor_with_context(tms_client.send_pacs008, normal_payload)
 
         step1_success = status_t1 == 200
         if step1_success:
             msg_id_t1 = normal_payload.get("FIToFICstmrCdtTrf", {}).get("GrpHdr", {}).get("MsgId")
             e2e_id_t1 = normal_payload.get("FIToFICstmrCdtTrf", {}).get("CdtTrfTxInf", {}).get("PmtId", {}).get("EndToEndId")
             pacs002_t1 = generate_pacs002(msg_id_t1, e2e_id_t1, "ACCC")
-            status_002_t1, _, _ = tms_client.send_pacs002(pacs002_t1)
+            status_002_t1, _, _ = await run_in_executor_with_context(tms_client.send_pacs002, pacs002_t1)
             step1_success = status_002_t1 == 200
 
         simulation_result["steps"].append({
@@ -849,10 +1128,11 @@ async def geographic_risk_simulation(
             "risk_level": "LOW"
         })
 
-        time_module.sleep(0.3)
+        await asyncio.sleep(0.3)
 
         # === STEP 2: Trigger Geographic Risk Pattern ===
         attack_results = []
+        attack_plan = []
         high_risk_amount = 1000000.0
 
         for i in range(transaction_count):
@@ -867,26 +1147,21 @@ async def geographic_risk_simulation(
                 latitude=high_risk_coords["lat"],
                 longitude=high_risk_coords["long"]
             )
+            attack_plan.append((current_amt, attack_payload))
 
-            status_tx, time_tx, resp_tx = tms_client.send_pacs008(attack_payload)
-
-            if status_tx == 200:
-                msg_id = attack_payload.get("FIToFICstmrCdtTrf", {}).get("GrpHdr", {}).get("MsgId")
-                e2e_id = attack_payload.get("FIToFICstmrCdtTrf", {}).get("CdtTrfTxInf", {}).get("PmtId", {}).get("EndToEndId")
-                pacs002_attack = generate_pacs002(msg_id, e2e_id, "ACCC")
-                status_002, _, _ = tms_client.send_pacs002(pacs002_attack)
+        outcomes = await run_in_executor_with_context(send_bulk_with_confirmation, [p for _, p in attack_plan])
 
+        for i, ((current_amt, attack_payload), outcome) in enumerate(zip(attack_plan, outcomes)):
+            if not isinstance(outcome, Exception) and outcome["status"] == 200:
                 attack_results.append({
                     "tx_num": i + 1,
                     "amount": current_amt,
-                    "status": status_tx,
-                    "msg_id": msg_id,
+                    "status": outcome["status"],
+                    "msg_id": attack_payload.get("FIToFICstmrCdtTrf", {}).get("GrpHdr", {}).get("MsgId"),
                     "location": high_risk_city,
                     "risk": "HIGH"
                 })
 
-            time_module.sleep(0.2)
-
         step2_success = len(attack_results) == transaction_count
         simulation_result["steps"].append({
             "step": 2,
@@ -900,54 +1175,20 @@ async def geographic_risk_simulation(
             "coordinates": f"{high_risk_coords['lat']}, {high_risk_coords['long']}"
         })
 
-        time_module.sleep(2)
-
         # === STEP 3: Check Fraud Detection ===
-        import psycopg2
         fraud_alerts = []
 
         try:
-            conn = psycopg2.connect(
-                host="localhost",
-                port=5433,
-                database="evaluation",
-                user="postgres",
-                password="postgres"
-            )
-            cursor = conn.cursor()
-
-            # Query Rule 903 results for this account
-            cursor.execute("""
-                WITH rule_903_data AS (
-                    SELECT
-                        evaluation->'report'->'tadpResult'->'typologyResult'->0 as typology_result,
-                        evaluation->'report'->'tadpResult'->'typologyResult'->0->'ruleResults' as rule_results,
-                        evaluation->'transaction'->'FIToFICstmrCdtTrf'->'CdtTrfTxInf'->'DbtrAcct'->'Id'->'Othr'->0->>'Id' as debtor_acct,
-                        evaluation->'transaction'->'FIToFICstmrCdtTrf'->'CdtTrfTxInf'->'IntrBkSttlmAmt'->'Amt'->>'Amt' as amount,
-                        evaluation->'transaction'->'FIToFICstmrCdtTrf'->'CdtTrfTxInf'->'PmtId'->>'EndToEndId' as end_to_end_id,
-                        evaluation->'report'->>'timestamp' as timestamp
-                    FROM evaluation
-                    WHERE (evaluation->'report'->>'timestamp')::timestamp >= NOW() - INTERVAL '10 seconds'
-                )
-                SELECT
-                    rule->>'id' as rule_id,
-                    rule->>'subRuleRef' as sub_rule_ref,
-                    (rule->>'wght')::int as weight,
-                    (typology_result->>'result')::int as typology_score,
-                    debtor_acct,
-                    timestamp,
-                    amount,
-                    end_to_end_id
-                FROM rule_903_data,
-                    jsonb_array_elements(rule_results) as rule
-                WHERE rule->>'id' = '903@1.0.0'
-                  AND debtor_acct = %s
-                  AND rule->>'subRuleRef' = '.01'
-                ORDER BY timestamp DESC
-                LIMIT %s
-            """, (account_id, transaction_count))
-
-            results = cursor.fetchall()
+            if await_results:
+                attack_payloads = [p for _, p in attack_plan]
+                found, simulation_result["relay_results"] = await await_relay_results(attack_payloads)
+                amounts = {
+                    p["FIToFICstmrCdtTrf"]["CdtTrfTxInf"]["PmtId"]["EndToEndId"]: amt for amt, p in attack_plan
+                }
+                results = _relay_rule_903_rows(found, account_id, amounts)
+            else:
+                await asyncio.sleep(2)
+                results = _query_rule_903_rows(account_id, transaction_count)
 
             for row in results:
                 risk_level = "HIGH" if row[1] == ".01" else "MEDIUM" if row[1] == ".02" else "LOW"
@@ -993,9 +1234,6 @@ Timestamp: {row[5]}
 🔍 Check: docker logs tazama-rule-903 --tail 50"""
                 })
 
-            cursor.close()
-            conn.close()
-
         except Exception as db_err:
             fraud_alerts.append({"error": f"DB Error: {str(db_err)}"})
 
@@ -1013,7 +1251,7 @@ Timestamp: {row[5]}
             "fraud_detected": fraud_detected
         })
 
-        time_module.sleep(0.5)
+        await asyncio.sleep(0.5)
 
         # === STEP 4: Block Transaction (RJCT) ===
         block_payload = generate_pacs008(
@@ -1025,13 +1263,13 @@ Timestamp: {row[5]}
             longitude=high_risk_coords["long"]
         )
 
-        status_block, time_block, resp_block = tms_client.send_pacs008(block_payload)
+        status_block, time_block, resp_block = await run_in_executor_with_context(tms_client.send_pacs008, block_payload)
 
         if status_block == 200:
             msg_id_block = block_payload.get("FIToFICstmrCdtTrf", {}).get("GrpHdr", {}).get("MsgId")
             e2e_id_block = block_payload.get("FIToFICstmrCdtTrf", {}).get("CdtTrfTxInf", {}).get("PmtId", {}).get("EndToEndId")
             pacs002_reject = generate_pacs002(msg_id_block, e2e_id_block, "RJCT")
-            status_002_reject, _, _ = tms_client.send_pacs002(pacs002_reject)
+            status_002_reject, _, _ = await run_in_executor_with_context(tms_client.send_pacs002, pacs002_reject)
 
         simulation_result["steps"].append({
             "step": 4,
@@ -1074,4 +1312,4 @@ Timestamp: {row[5]}
         simulation_result["overall_status"] = "error"
         simulation_result["error"] = str(e)
 
-    return simulation_result
+    return project_response(simulation_result, verbosity)
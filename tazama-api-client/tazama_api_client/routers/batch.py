@@ -4,12 +4,19 @@ Run multiple test scenarios in sequence
 """
 from fastapi import APIRouter, Form
 from datetime import datetime
+import asyncio
+from typing import Optional
 import random
 import string
+import time
 
 from services.tms_client import tms_client
+from services.detection_latency import percentiles
 from utils.payload_generator import generate_pacs008, generate_pacs002
-from config import VALID_STATUS_CODES
+from utils.tenancy import run_in_executor_with_context, tenant_scope, tenant_token
+from utils.timing import stage
+from models.schemas import StatusCode, Transport
+from config import TENANT_IDS
 
 router = APIRouter(prefix="/api/test", tags=["Batch Testing"])
 
@@ -44,7 +51,7 @@ async def run_batch_test(
             if scenario.startswith("quick_"):
                 # Quick status test
                 status_code = scenario.replace("quick_", "").upper()
-                if status_code in VALID_STATUS_CODES:
+                if status_code in [s.value for s in StatusCode]:
                     result = await _run_quick_status(status_code)
                     scenario_result["status"] = "success" if result.get("status") == "success" else "error"
                     scenario_result["details"] = {
@@ -118,21 +125,100 @@ async def run_batch_test(
     }
 
 
+@router.post(
+    "/multi-tenant",
+    summary="Run Multi-Tenant Traffic",
+    description="Send pacs.008 + pacs.002 pairs for several tenants concurrently and report per-tenant throughput and latency"
+)
+async def run_multi_tenant_test(
+    tenants: Optional[str] = Form(None, description="Comma-separated tenant ids (default: TENANT_IDS)"),
+    count: int = Form(20, ge=1, le=5000, description="pacs.008 + pacs.002 pairs per tenant"),
+    status_code: StatusCode = Form(StatusCode.ACCC, description="pacs.002 status"),
+    transport: Transport = Form(Transport.HTTP, description="http (via TMS) or nats (direct to event director)")
+):
+    """
+    Spread load across tenants at the same time
+
+    Sends are interleaved tenant by tenant and run through the shared adaptive
+    limiter, so every tenant has traffic in flight for the whole run. Over HTTP
+    the TMS takes the tenant from the bearer token, so tenants without an entry
+    in TENANT_TOKENS are listed under missing_tokens.
+    """
+    from routers.attacks import send_pacs008_with_confirmation
+
+    tenant_list = [t.strip() for t in tenants.split(",") if t.strip()] if tenants else list(TENANT_IDS)
+    if not tenant_list:
+        return {"status": "error", "message": "No tenants given", "tip": "Set TENANT_IDS or pass tenants"}
+    if len(tenant_list) * count > 20000:
+        return {"status": "error", "message": f"{len(tenant_list)} tenants x {count} exceeds 20000 pairs"}
+
+    client = tms_client.for_transport(transport.value)
+
+    def send_as(tenant_id, payload):
+        started = time.perf_counter()
+        with tenant_scope(tenant_id):
+            outcome = send_pacs008_with_confirmation(payload, status_code.value, client)
+        outcome["pair_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        return outcome
+
+    with stage("payload"):
+        jobs = [(tenant_id, generate_pacs008()) for _ in range(count) for tenant_id in tenant_list]
+
+    started = time.perf_counter()
+    outcomes = await run_in_executor_with_context(client.run_bulk, [lambda t=t, p=p: send_as(t, p) for t, p in jobs])
+    wall_seconds = time.perf_counter() - started
+
+    by_tenant = {t: [] for t in tenant_list}
+    for (tenant_id, _), outcome in zip(jobs, outcomes):
+        by_tenant[tenant_id].append(outcome)
+
+    results = {}
+    for tenant_id, tenant_outcomes in by_tenant.items():
+        sent = [o for o in tenant_outcomes if not isinstance(o, Exception)]
+        success = [o for o in sent if o.get("pacs002_status") == 200]
+        error_classes = {}
+        for o in tenant_outcomes:
+            error_class = type(o).__name__ if isinstance(o, Exception) else o.get("error_class")
+            if error_class:
+                error_classes[error_class] = error_classes.get(error_class, 0) + 1
+        results[tenant_id] = {
+            "sent": len(tenant_outcomes),
+            "success": len(success),
+            "failures": len(tenant_outcomes) - len(success),
+            "error_classes": error_classes,
+            "throughput_per_sec": round(len(success) / wall_seconds, 2) if wall_seconds else None,
+            "pacs008_latency_ms": percentiles(o["response_time_ms"] for o in sent if o.get("status") == 200),
+            "pair_latency_ms": percentiles(o["pair_ms"] for o in success)
+        }
+
+    total_success = sum(r["success"] for r in results.values())
+    return {
+        "status": "success" if total_success else "error",
+        "transport": transport.value,
+        "tenants": tenant_list,
+        "per_tenant": count,
+        "total_sent": len(jobs),
+        "total_success": total_success,
+        "wall_time_ms": round(wall_seconds * 1000, 2),
+        "throughput_per_sec": round(total_success / wall_seconds, 2) if wall_seconds else None,
+        "missing_tokens": [t for t in tenant_list if not tenant_token(t)] if transport == Transport.HTTP else [],
+        "results": results
+    }
+
+
 async def _run_quick_status(status_code: str):
     """Helper to run quick status test"""
-    import time
-    
     pacs008_payload = generate_pacs008(None, None)
     message_id = pacs008_payload.get("FIToFICstmrCdtTrf", {}).get("GrpHdr", {}).get("MsgId")
     end_to_end_id = pacs008_payload.get("FIToFICstmrCdtTrf", {}).get("CdtTrfTxInf", {}).get("PmtId", {}).get("EndToEndId")
     
     start_time = datetime.now()
-    status_008, _, _ = tms_client.send_pacs008(pacs008_payload)
+    status_008, _, _ = await run_in_executor_with_context(tms_client.send_pacs008, pacs008_payload)
     
     if status_008 == 200:
-        time.sleep(0.3)
+        await asyncio.sleep(0.3)
         pacs002_payload = generate_pacs002(message_id, end_to_end_id, status_code)
-        status_002, _, response_002 = tms_client.send_pacs002(pacs002_payload)
+        status_002, _, response_002 = await run_in_executor_with_context(tms_client.send_pacs002, pacs002_payload)
         total_time = (datetime.now() - start_time).total_seconds() * 1000
         
         return {
@@ -146,22 +232,16 @@ async def _run_quick_status(status_code: str):
 
 async def _run_velocity_test(count: int):
     """Helper to run velocity test (Rule 901)"""
-    from routers.attacks import fetch_logs_internal, parse_fraud_alerts
+    from routers.attacks import fetch_logs_internal, parse_fraud_alerts, send_bulk_with_confirmation
     
-    results = []
     debtor_acc = f"BATCH_VEL_{random.randint(1000,9999)}"
+    payloads = [generate_pacs008(debtor_acc, 500000.0, "Batch Tester") for _ in range(count)]
+    outcomes = await run_in_executor_with_context(send_bulk_with_confirmation, payloads)
     
-    for i in range(count):
-        payload = generate_pacs008(debtor_acc, 500000.0, "Batch Tester")
-        status_008, time_008, _ = tms_client.send_pacs008(payload)
-        
-        if status_008 == 200:
-            msg_id = payload.get("FIToFICstmrCdtTrf", {}).get("GrpHdr", {}).get("MsgId")
-            e2e_id = payload.get("FIToFICstmrCdtTrf", {}).get("CdtTrfTxInf", {}).get("PmtId", {}).get("EndToEndId")
-            pacs002_payload = generate_pacs002(msg_id, e2e_id, "ACCC")
-            tms_client.send_pacs002(pacs002_payload)
-        
-        results.append({"iteration": i + 1, "status": status_008})
+    results = [
+        {"iteration": i + 1, "status": "error" if isinstance(o, Exception) else o["status"]}
+        for i, o in enumerate(outcomes)
+    ]
     
     logs_data = fetch_logs_internal("tazama-rule-901", tail=50)
     fraud_alerts = parse_fraud_alerts(logs_data)
@@ -171,31 +251,28 @@ async def _run_velocity_test(count: int):
 
 async def _run_creditor_velocity_test(count: int):
     """Helper to run creditor velocity test (Rule 902 - Money Mule)"""
-    from routers.attacks import fetch_logs_internal, parse_fraud_alerts
+    from routers.attacks import fetch_logs_internal, parse_fraud_alerts, send_bulk_with_confirmation
     
-    results = []
     creditor_acc = f"MULE_TARGET_{random.randint(1000,9999)}"
+    payloads = []
     
     for i in range(count):
         rand_suffix = ''.join(random.choices(string.digits, k=6))
         debtor_acc = f"BATCH_DEB_{rand_suffix}"
         
-        payload = generate_pacs008(
+        payloads.append(generate_pacs008(
             debtor_account=debtor_acc,
             amount=500000.0,
             debtor_name=f"Random Sender {rand_suffix}",
             creditor_account=creditor_acc,
             creditor_name="Money Mule Target"
-        )
-        status_008, time_008, _ = tms_client.send_pacs008(payload)
-        
-        if status_008 == 200:
-            msg_id = payload.get("FIToFICstmrCdtTrf", {}).get("GrpHdr", {}).get("MsgId")
-            e2e_id = payload.get("FIToFICstmrCdtTrf", {}).get("CdtTrfTxInf", {}).get("PmtId", {}).get("EndToEndId")
-            pacs002_payload = generate_pacs002(msg_id, e2e_id, "ACCC")
-            tms_client.send_pacs002(pacs002_payload)
-        
-        results.append({"iteration": i + 1, "status": status_008})
+        ))
+    
+    outcomes = await run_in_executor_with_context(send_bulk_with_confirmation, payloads)
+    results = [
+        {"iteration": i + 1, "status": "error" if isinstance(o, Exception) else o["status"]}
+        for i, o in enumerate(outcomes)
+    ]
     
     logs_data = fetch_logs_internal("tazama-rule-902", tail=50)
     fraud_alerts = parse_fraud_alerts(logs_data)
@@ -205,32 +282,25 @@ async def _run_creditor_velocity_test(count: int):
 
 async def _run_attack_scenario(scenario: str):
     """Helper to run attack scenario"""
-    from routers.attacks import fetch_logs_internal, parse_fraud_alerts
+    from routers.attacks import fetch_logs_internal, parse_fraud_alerts, send_plan_with_confirmation
+    from services.scenario_plan import scenario_library
     
-    results = []
-    count = 8 if scenario == "rule_006" else 6
-    target_container = "tazama-rule-006" if scenario == "rule_006" else "tazama-rule-018"
+    overrides = {"debtor": f"BATCH_{scenario.upper()}_{{digits:4}}", "actor": "Batch Actor"}
+    if scenario == "rule_006":
+        overrides["count"] = 8
+    else:
+        overrides["amount"] = 900000000000.0
+    plan = scenario_library.compile(scenario, **overrides)
     
-    debtor_acc = f"BATCH_{scenario.upper()}_{random.randint(1000,9999)}"
+    # Phases keep rule 018's history stored before the final huge transaction
+    outcomes = await run_in_executor_with_context(send_plan_with_confirmation, plan)
     
-    for i in range(count):
-        if scenario == "rule_006":
-            amt = 9500000.0
-        else:
-            amt = 50000.0 if i < count - 1 else 900000000000.0
-        
-        payload = generate_pacs008(debtor_acc, amt, "Batch Actor")
-        status_008, _, _ = tms_client.send_pacs008(payload)
-        
-        if status_008 == 200:
-            msg_id = payload.get("FIToFICstmrCdtTrf", {}).get("GrpHdr", {}).get("MsgId")
-            e2e_id = payload.get("FIToFICstmrCdtTrf", {}).get("CdtTrfTxInf", {}).get("PmtId", {}).get("EndToEndId")
-            pacs002_payload = generate_pacs002(msg_id, e2e_id, "ACCC")
-            tms_client.send_pacs002(pacs002_payload)
-        
-        results.append({"iteration": i + 1, "status": status_008, "amount": amt})
+    results = [
+        {"iteration": i + 1, "status": "error" if isinstance(o, Exception) else o["status"], "amount": tx.amount}
+        for i, (tx, o) in enumerate(zip(plan.transactions, outcomes))
+    ]
     
-    logs_data = fetch_logs_internal(target_container, tail=50)
+    logs_data = fetch_logs_internal(plan.container, tail=50)
     fraud_alerts = parse_fraud_alerts(logs_data)
     
-    return {"total_sent": count, "results": results, "fraud_alerts": fraud_alerts}
+    return {"total_sent": len(results), "results": results, "fraud_alerts": fraud_alerts}
@@ -0,0 +1,93 @@
+"""
+Dashboard Router
+Live dashboard channel: stats deltas, top debtors / creditors, throughput,
+new alerts and followed container logs pushed by one server-side aggregator
+(see services.live_dashboard), over WebSocket or Server-Sent Events
+"""
+import asyncio
+import json
+from fastapi import APIRouter, Request, WebSocket
+from fastapi.responses import StreamingResponse
+from typing import Optional
+
+from services.live_dashboard import dashboard_hub
+
+router = APIRouter(tags=["Dashboard"])
+
+SSE_KEEPALIVE_SECONDS = 15
+
+
+@router.websocket("/ws/dashboard")
+async def websocket_dashboard(websocket: WebSocket):
+    """
+    Live dashboard over WebSocket
+
+    Server -> client: JSON messages with "type" snapshot | stats | db_summary |
+    throughput | alerts | logs. Client -> server:
+    {"action": "logs", "container": "tazama-rule-901"} / {"action": "unlogs", "container": ...}
+    """
+    await websocket.accept()
+    sub_id = dashboard_hub.subscribe()
+    queue = dashboard_hub.queue(sub_id)
+
+    async def send_updates():
+        while True:
+            await websocket.send_json(await queue.get())
+
+    async def receive_commands():
+        while True:
+            command = await websocket.receive_json()
+            container = str(command.get("container", ""))
+            if command.get("action") == "logs":
+                await dashboard_hub.follow_logs(sub_id, container)
+            elif command.get("action") == "unlogs":
+                dashboard_hub.unfollow_logs(sub_id, container)
+
+    tasks = [asyncio.create_task(send_updates()), asyncio.create_task(receive_commands())]
+    try:
+        # Either side ending (disconnect, bad message) closes the subscription
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            task.exception()  # Retrieved: a disconnect is the normal way out
+    finally:
+        for task in tasks:
+            task.cancel()
+        dashboard_hub.unsubscribe(sub_id)
+        try:
+            await websocket.close()
+        except Exception:
+            pass
+
+
+@router.get("/api/dashboard/stream")
+async def stream_dashboard(request: Request, logs: Optional[str] = None):
+    """
+    Live dashboard as Server-Sent Events (same messages as /ws/dashboard, event name = type)
+
+    logs: comma-separated containers to follow (e.g. tazama-rule-901-1,tazama-rule-902-1)
+    """
+    sub_id = dashboard_hub.subscribe()
+    queue = dashboard_hub.queue(sub_id)
+    for container in filter(None, (logs or "").split(",")):
+        await dashboard_hub.follow_logs(sub_id, container.strip())
+
+    async def events():
+        try:
+            while not await request.is_disconnected():
+                try:
+                    message = await asyncio.wait_for(queue.get(), SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: {message['type']}\ndata: {json.dumps(message, default=str)}\n\n"
+        finally:
+            dashboard_hub.unsubscribe(sub_id)
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@router.get("/api/dashboard/status")
+async def dashboard_status():
+    """Connected clients, push cadence, DB queries issued by the aggregator and dropped messages"""
+    return {"status": "success", **dashboard_hub.status()}
@@ -0,0 +1,92 @@
+"""
+Detection Latency Router
+Measure pacs.002 submit -> evaluation result (relay or evaluation DB)
+
+Either wrap your own traffic (POST /start, send anything, GET /report,
+POST /stop) or let POST /run send a batch of transactions and wait for
+their evaluations. See services.detection_latency.
+"""
+import asyncio
+from fastapi import APIRouter, Form
+from typing import Optional
+
+from services.detection_latency import detection_tracker
+from models.schemas import DetectionSource, StatusCode, Transport
+from utils.payload_generator import generate_pacs008
+from utils.tenancy import run_in_executor_with_context
+from utils.timing import stage
+from config import DETECTION_LATENCY_TIMEOUT
+
+router = APIRouter(prefix="/api/detection", tags=["Detection Latency"])
+
+
+@router.post("/start")
+async def start_measurement(
+    source: DetectionSource = Form(DetectionSource.RELAY, description="relay, db or both"),
+    reset: bool = Form(True, description="Drop samples from the previous measurement")
+):
+    """Start recording every submitted pacs.002 until POST /stop"""
+    detection_tracker.start(source.value, reset=reset)
+    return {"status": "started", "source": source.value}
+
+
+@router.post("/stop")
+async def stop_measurement():
+    """Stop recording and return the final report"""
+    report = await asyncio.get_running_loop().run_in_executor(None, detection_tracker.stop)
+    return {"status": "success", **report}
+
+
+@router.get("/report")
+async def get_report(include_samples: bool = False):
+    """Detection latency percentiles overall, by rule and by typology"""
+    return {"status": "success", **detection_tracker.report(include_samples)}
+
+
+@router.delete("/report")
+async def reset_report():
+    detection_tracker.reset()
+    return {"status": "success", "message": "Detection latency samples cleared"}
+
+
+@router.post("/run")
+async def run_measurement(
+    count: int = Form(20, ge=1, le=5000, description="pacs.008 + pacs.002 pairs to send"),
+    source: DetectionSource = Form(DetectionSource.RELAY, description="relay, db or both"),
+    status_code: StatusCode = Form(StatusCode.ACCC, description="pacs.002 status"),
+    transport: Transport = Form(Transport.HTTP, description="http (via TMS) or nats (direct to event director)"),
+    timeout: Optional[float] = Form(None, description=f"Seconds to wait for evaluations (default {DETECTION_LATENCY_TIMEOUT})"),
+    include_samples: bool = Form(False, description="Include per-transaction samples")
+):
+    """
+    Send `count` transactions and wait for their evaluations
+
+    Runs its own measurement (previous samples are dropped), so do not mix
+    with a measurement started via POST /start.
+    """
+    from routers.attacks import send_bulk_with_confirmation
+
+    loop = asyncio.get_running_loop()
+    detection_tracker.start(source.value)
+    try:
+        with stage("payload"):
+            payloads = [generate_pacs008() for _ in range(count)]
+        outcomes = await run_in_executor_with_context(
+            send_bulk_with_confirmation, payloads, status_code.value, transport
+        )
+        with stage("await_results"):
+            settled = await loop.run_in_executor(None, detection_tracker.wait_until_settled, timeout)
+    finally:
+        report = await loop.run_in_executor(None, detection_tracker.stop)
+
+    if include_samples:
+        report["samples"] = detection_tracker.report(include_samples=True)["samples"]
+
+    failed = sum(1 for o in outcomes if isinstance(o, Exception) or o.get("pacs002_status") != 200)
+    return {
+        "status": "success" if report["detected"] else "no_results",
+        "sent": count,
+        "send_failures": failed,
+        "settled": settled,
+        **report
+    }
@@ -4,16 +4,12 @@ Routes: pain.001 → pain.013 → pacs.008 → pacs.002
 """
 from fastapi import APIRouter, Form
 from typing import Optional
-from datetime import datetime
-import time
 
+from models.schemas import StatusCode, Transport
+from services.flow_load import run_flow, run_flow_load
 from services.tms_client import tms_client
-from utils.payload_generator import (
-    generate_pain001, 
-    generate_pain013, 
-    generate_pacs008, 
-    generate_pacs002
-)
+from utils.payload_generator import generate_pain001, generate_pain013
+from utils.tenancy import run_in_executor_with_context
 
 router = APIRouter(prefix="/api/test", tags=["E2E Flow"])
 
@@ -43,7 +39,7 @@ async def test_pain001(
             creditor_name=creditor_name
         )
         
-        status_code, response_time, response_data = tms_client.send_pain001(payload)
+        status_code, response_time, response_data = await run_in_executor_with_context(tms_client.send_pain001, payload)
 
         return {
             "status": "success" if status_code == 200 else "error",
@@ -80,7 +76,7 @@ async def test_pain013(
             creditor_name=creditor_name
         )
         
-        status_code, response_time, response_data = tms_client.send_pain013(payload)
+        status_code, response_time, response_data = await run_in_executor_with_context(tms_client.send_pain013, payload)
 
         return {
             "status": "success" if status_code == 200 else "error",
@@ -104,148 +100,40 @@ async def test_e2e_flow(
     debtor_account: Optional[str] = Form("E2E_DEBTOR_001"),
     creditor_account: Optional[str] = Form("E2E_CREDITOR_001"),
     amount: Optional[float] = Form(1000000),
-    final_status: str = Form("ACCC")
+    final_status: str = Form("ACCC"),
+    think_time_ms: float = Form(300, ge=0, le=60000, description="Pause between steps")
 ):
     """
     Execute full E2E ISO 20022 payment flow.
     Steps: pain.001 → pain.013 → pacs.008 → pacs.002
     """
-    start_time = datetime.now()
-    
-    results = {
-        "overall_status": "pending",
-        "steps": [],
-        "total_time_ms": 0,
-        "debtor_account": debtor_account,
-        "creditor_account": creditor_account,
-        "amount": amount
-    }
-    
-    try:
-        # Step 1: pain.001 - Customer Credit Transfer Initiation (OPTIONAL)
-        pain001_payload, msg_id_001, e2e_id = generate_pain001(
-            debtor_account=debtor_account,
-            creditor_account=creditor_account,
-            amount=amount
-        )
-        status_001, time_001, resp_001 = tms_client.send_pain001(pain001_payload)
-        
-        # Check if endpoint exists (404 = not supported, skip it)
-        pain001_skipped = status_001 == 404
-        step_001 = {
-            "step": 1,
-            "type": "pain.001",
-            "name": "Customer Credit Transfer Initiation",
-            "status": status_001,
-            "success": status_001 == 200,
-            "skipped": pain001_skipped,
-            "response_time_ms": time_001,
-            "message_id": msg_id_001,
-            "note": "Skipped - endpoint not available in TMS" if pain001_skipped else None
-        }
-        results["steps"].append(step_001)
-        
-        # test_history.append() removed - data stored in Tazama DB
-        
-        # Only fail if error is NOT 404 (not found)
-        if status_001 != 200 and status_001 != 404:
-            results["overall_status"] = "failed_at_pain001"
-            results["total_time_ms"] = (datetime.now() - start_time).total_seconds() * 1000
-            return results
-        
-        if not pain001_skipped:
-            time.sleep(0.3)
-        
-        # Step 2: pain.013 - Creditor Payment Activation Request (OPTIONAL)
-        pain013_payload, msg_id_013, _ = generate_pain013(
-            debtor_account=debtor_account,
-            creditor_account=creditor_account,
-            amount=amount
-        )
-        status_013, time_013, resp_013 = tms_client.send_pain013(pain013_payload)
-        
-        # Check if endpoint exists (404 = not supported, skip it)
-        pain013_skipped = status_013 == 404
-        step_013 = {
-            "step": 2,
-            "type": "pain.013",
-            "name": "Creditor Payment Activation Request",
-            "status": status_013,
-            "success": status_013 == 200,
-            "skipped": pain013_skipped,
-            "response_time_ms": time_013,
-            "message_id": msg_id_013,
-            "note": "Skipped - endpoint not available in TMS" if pain013_skipped else None
-        }
-        results["steps"].append(step_013)
-        
-        # test_history.append() removed - data stored in Tazama DB
-        
-        # Only fail if error is NOT 404 (not found)
-        if status_013 != 200 and status_013 != 404:
-            results["overall_status"] = "failed_at_pain013"
-            results["total_time_ms"] = (datetime.now() - start_time).total_seconds() * 1000
-            return results
-        
-        if not pain013_skipped:
-            time.sleep(0.3)
-        
-        # Step 3: pacs.008 - FI to FI Customer Credit Transfer
-        pacs008_payload = generate_pacs008(
-            debtor_account=debtor_account,
-            creditor_account=creditor_account,
-            amount=amount
-        )
-        msg_id_008 = pacs008_payload.get("FIToFICstmrCdtTrf", {}).get("GrpHdr", {}).get("MsgId")
-        e2e_id_008 = pacs008_payload.get("FIToFICstmrCdtTrf", {}).get("CdtTrfTxInf", {}).get("PmtId", {}).get("EndToEndId")
-        
-        status_008, time_008, resp_008 = tms_client.send_pacs008(pacs008_payload)
-        
-        step_008 = {
-            "step": 3,
-            "type": "pacs.008",
-            "name": "FI to FI Customer Credit Transfer",
-            "status": status_008,
-            "success": status_008 == 200,
-            "response_time_ms": time_008,
-            "message_id": msg_id_008
-        }
-        results["steps"].append(step_008)
-        
-        # test_history.append() removed - data stored in Tazama DB
-        
-        if status_008 != 200:
-            results["overall_status"] = "failed_at_pacs008"
-            results["total_time_ms"] = (datetime.now() - start_time).total_seconds() * 1000
-            return results
-        
-        time.sleep(0.3)
-        
-        # Step 4: pacs.002 - Payment Status Report
-        pacs002_payload = generate_pacs002(msg_id_008, e2e_id_008, final_status)
-        status_002, time_002, resp_002 = tms_client.send_pacs002(pacs002_payload)
-        
-        step_002 = {
-            "step": 4,
-            "type": "pacs.002",
-            "name": "Payment Status Report",
-            "status": status_002,
-            "success": status_002 == 200,
-            "response_time_ms": time_002,
-            "final_status": final_status
-        }
-        results["steps"].append(step_002)
+    return await run_flow(tms_client, debtor_account, creditor_account, amount, final_status, think_time_ms)
 
-        # test_history.append() removed - data stored in Tazama DB
-        
-        # Final status
-        results["total_time_ms"] = (datetime.now() - start_time).total_seconds() * 1000
-        results["overall_status"] = "completed" if status_002 == 200 else "failed_at_pacs002"
-        
-        return results
-        
-    except Exception as e:
-        results["overall_status"] = "error"
-        results["error"] = str(e)
-        results["total_time_ms"] = (datetime.now() - start_time).total_seconds() * 1000
-        return results
+
+@router.post(
+    "/e2e-flow/load",
+    summary="E2E Flow Load Test",
+    description="Run many pain.001 → pain.013 → pacs.008 → pacs.002 chains concurrently with per-step latency and success rates"
+)
+async def test_e2e_flow_load(
+    chains: int = Form(1000, ge=1, le=20000, description="Number of payment chains"),
+    concurrency: int = Form(100, ge=1, le=5000, description="Chains in flight at once"),
+    think_time_ms: float = Form(300, ge=0, le=60000, description="Pause between the steps of a chain"),
+    think_jitter: float = Form(0.2, ge=0, le=1, description="Think time varies by +/- this fraction"),
+    ramp_up_seconds: float = Form(0, ge=0, le=3600, description="Spread chain starts over this period"),
+    account_pool: int = Form(1000, ge=1, le=100000, description="Debtor / creditor pairs to draw from"),
+    final_status: StatusCode = Form(StatusCode.ACCC, description="pacs.002 status"),
+    transport: Transport = Form(Transport.HTTP, description="http (via TMS) or nats (direct to event director)")
+):
+    """
+    Production-like mix on all four TMS endpoints
+
+    Each chain keeps its order (pacs.002 confirms that chain's pacs.008);
+    chains overlap, so while some wait in think time others are sending.
+    Steps report attempted / success / skipped / failed, success_rate,
+    error_classes, latency percentiles and a latency histogram.
+    """
+    client = tms_client.for_transport(transport.value)
+    result = await run_flow_load(client, chains, concurrency, think_time_ms, think_jitter,
+                                 ramp_up_seconds, account_pool, final_status.value)
+    return {"transport": transport.value, **result}
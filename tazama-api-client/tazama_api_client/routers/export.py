@@ -0,0 +1,76 @@
+"""
+Export Router
+Stream event_history transactions and evaluation rows as CSV / NDJSON
+(chunked responses straight from COPY ... TO STDOUT, see services.export_service)
+"""
+import asyncio
+from datetime import datetime
+from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
+from typing import Iterator, Optional
+
+from services.export_service import MEDIA_TYPES, stream_export
+from models.schemas import EvaluationExport, ExportFormat
+
+router = APIRouter(prefix="/api/export", tags=["Export"])
+
+
+async def _streaming_response(kind: str, fmt: ExportFormat, **filters):
+    """
+    Start the COPY and wait for its first chunk before answering, so a bad
+    filter, missing table or unreachable DB is still a normal error response
+    """
+    loop = asyncio.get_running_loop()
+    try:
+        chunks: Iterator[bytes] = stream_export(kind, fmt.value, **filters)
+        first = await loop.run_in_executor(None, next, chunks, b"")
+    except Exception as e:
+        return {"status": "error", "message": str(e), "tip": "Check the time window / tenant filters and that PostgreSQL is running"}
+
+    def body():
+        if first:
+            yield first
+        yield from chunks
+
+    filename = f"{kind}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.{fmt.value}"
+    return StreamingResponse(
+        body(),
+        media_type=MEDIA_TYPES[fmt.value],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+@router.get("/transactions")
+async def export_transactions(
+    format: ExportFormat = ExportFormat.CSV,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    seconds: Optional[int] = None,
+    tenant_id: Optional[str] = None,
+    limit: Optional[int] = None
+):
+    """
+    event_history.transaction rows (all message types) with creDtTm in [since, until)
+
+    seconds is a shortcut for since = now - seconds; naive timestamps are UTC.
+    """
+    return await _streaming_response("transactions", format, since=since, until=until, seconds=seconds,
+                                     tenant_id=tenant_id, limit=limit)
+
+
+@router.get("/evaluations")
+async def export_evaluations(
+    table: EvaluationExport = EvaluationExport.EVALUATIONS,
+    format: ExportFormat = ExportFormat.CSV,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    seconds: Optional[int] = None,
+    tenant_id: Optional[str] = None,
+    limit: Optional[int] = None
+):
+    """
+    Flattened evaluation rows: one per evaluation, or per rule / typology result
+    (the latter need POST /api/analytics/rule-performance/setup first)
+    """
+    return await _streaming_response(table.value, format, since=since, until=until, seconds=seconds,
+                                     tenant_id=tenant_id, limit=limit)
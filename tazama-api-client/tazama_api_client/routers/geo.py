@@ -0,0 +1,85 @@
+"""
+Geo Router
+Rule 903 zone lookup: bulk lat/long classification and coordinate sampling
+
+numpy and utils.geo_index are imported inside the handlers so they stay out
+of the client's cold start (utils.startup warms them up in the background).
+"""
+from fastapi import APIRouter, Form
+
+from models.schemas import GeoClassifyRequest
+
+router = APIRouter(prefix="/api/geo", tags=["Geo"])
+
+
+@router.get("/zones")
+async def list_zones():
+    """Rule 903 zones (bounding box, centroid, risk level) and low-risk reference locations"""
+    from utils.geo_index import geo_index, REFERENCE_LOCATIONS
+    return {
+        "status": "success",
+        "zones": geo_index.zone_summary(),
+        "reference_locations": {
+            name: {"lat": lat, "long": lon} for name, (lat, lon) in REFERENCE_LOCATIONS.items()
+        }
+    }
+
+
+@router.post("/classify")
+async def classify_points(request: GeoClassifyRequest):
+    """
+    Classify points in bulk the way Rule 903 does
+
+    Body is columnar ({"lat": [...], "long": [...]}), results come back in the same order.
+    """
+    import numpy as np
+    from utils.geo_index import geo_index
+
+    n = len(request.lat)
+    for name in ("long", "city", "region"):
+        values = getattr(request, name)
+        if values is not None and len(values) != n:
+            return {"status": "error", "message": f"'{name}' must have the same length as 'lat'"}
+
+    lat = np.array([np.nan if v is None else v for v in request.lat], dtype=np.float64)
+    lon = np.array([np.nan if v is None else v for v in request.long], dtype=np.float64)
+    result = geo_index.classify(lat, lon, request.city, request.region)
+
+    levels, counts = np.unique(result["sub_rule_ref"].astype(str), return_counts=True)
+    response = {
+        "status": "success",
+        "count": n,
+        "sub_rule_counts": {str(level): int(count) for level, count in zip(levels, counts)},
+        "city": result["city"].tolist(),
+        "risk_level": result["risk_level"].tolist(),
+        "sub_rule_ref": result["sub_rule_ref"].tolist()
+    }
+    if request.include_nearest and n:
+        nearest, distance = geo_index.nearest_zone(np.nan_to_num(lat), np.nan_to_num(lon))
+        invalid = np.isnan(lat) | np.isnan(lon)
+        response["nearest_zone"] = [None if bad else zone for zone, bad in zip(nearest, invalid)]
+        response["nearest_distance_km"] = [None if bad else round(float(d), 3) for d, bad in zip(distance, invalid)]
+    return response
+
+
+@router.post("/sample")
+async def sample_points(
+    city: str = Form(..., description="Zone or reference location (e.g. Jakarta, Yogyakarta)"),
+    count: int = Form(10, ge=1, le=100000, description="Number of coordinates"),
+    spread_km: float = Form(5.0, gt=0, description="Standard deviation around the centroid (km)")
+):
+    """Generate realistic coordinates for a location (clipped to the 903 box for zones)"""
+    import numpy as np
+    from utils.geo_index import sample_coordinates
+
+    try:
+        points = sample_coordinates(city, count, spread_km=spread_km)
+    except KeyError as e:
+        return {"status": "error", "message": str(e)}
+    return {
+        "status": "success",
+        "city": city,
+        "count": count,
+        "lat": np.round(points[:, 0], 6).tolist(),
+        "long": np.round(points[:, 1], 6).tolist()
+    }
@@ -0,0 +1,108 @@
+"""
+Graph Router
+Money-flow network of event_history accounts held in memory (see
+services.transaction_graph): fan-in / fan-out, k-hop reachability, cycles
+and network expansion for flagged accounts (e.g. MULE_TARGET_*)
+"""
+import asyncio
+import time
+from fastapi import APIRouter, Form
+from typing import Optional
+
+from config import GRAPH_MAX_NODES
+
+router = APIRouter(prefix="/api/graph", tags=["Graph"])
+
+_NOT_LOADED = {"status": "error", "message": "Graph not loaded", "tip": "Run POST /api/graph/load first"}
+
+
+def _graph():
+    # numpy is deferred at startup (utils/startup.py)
+    from services.transaction_graph import transaction_graph
+    return transaction_graph
+
+
+async def _query(method, *args):
+    """Run a graph query off the event loop and time it; errors become response dicts"""
+    graph = _graph()
+    if not graph.stats()["loaded"]:
+        return _NOT_LOADED
+    start = time.perf_counter()
+    try:
+        result = await asyncio.get_running_loop().run_in_executor(None, getattr(graph, method), *args)
+    except KeyError as e:
+        return {"status": "error", "message": f"Account {e} not in graph",
+                "tip": "Check the account id or run POST /api/graph/update"}
+    except ValueError as e:
+        return {"status": "error", "message": str(e)}
+    if isinstance(result, list):
+        result = {"count": len(result), "results": result}
+    return {"status": "success", "query_ms": round((time.perf_counter() - start) * 1000, 3), **result}
+
+
+@router.post("/load")
+async def load_graph(
+    seconds: Optional[int] = Form(None, ge=1, description="Only transactions from the last N seconds (all if empty)"),
+    tenant_id: Optional[str] = Form(None, description="Only this tenant")
+):
+    """(Re)build the graph from event_history (one aggregated COPY over pacs.008 rows)"""
+    try:
+        result = await asyncio.get_running_loop().run_in_executor(None, _graph().load, seconds, tenant_id)
+    except Exception as e:
+        return {"status": "error", "message": str(e), "tip": "Make sure Tazama's event_history DB is reachable"}
+    return {"status": "success", **result}
+
+
+@router.post("/update")
+async def update_graph():
+    """Add transactions newer than the last loaded creDtTm (loads everything if the graph is empty)"""
+    try:
+        result = await asyncio.get_running_loop().run_in_executor(None, _graph().update)
+    except Exception as e:
+        return {"status": "error", "message": str(e), "tip": "Make sure Tazama's event_history DB is reachable"}
+    return {"status": "success", **result}
+
+
+@router.get("/stats")
+async def graph_stats():
+    """Accounts, edges, pending delta, array memory and load watermark"""
+    return {"status": "success", **_graph().stats()}
+
+
+@router.get("/top-fan-in")
+async def top_fan_in(limit: int = 20, prefix: Optional[str] = None):
+    """Accounts with the most distinct senders, optionally only ids starting with `prefix` (e.g. MULE_TARGET_)"""
+    return await _query("top_fan_in", limit, prefix)
+
+
+@router.get("/account/{account_id}")
+async def account_summary(account_id: str, top: int = 10):
+    """Fan-in / fan-out, transaction counts, amounts and top counterparties of one account"""
+    return await _query("account_summary", account_id, top)
+
+
+@router.get("/account/{account_id}/reachable")
+async def reachable(account_id: str, hops: int = 2, direction: str = "out", max_nodes: int = GRAPH_MAX_NODES):
+    """Accounts within `hops` hops, per hop (direction: out = where money went, in = where it came from, both)"""
+    if not 1 <= hops <= 6:
+        return {"status": "error", "message": "hops must be between 1 and 6"}
+    return await _query("reachable", account_id, hops, direction, max_nodes)
+
+
+@router.get("/account/{account_id}/network")
+async def network(account_id: str, hops: int = 2, direction: str = "both", max_nodes: int = GRAPH_MAX_NODES):
+    """
+    The account's k-hop network: nodes (hop, holders, other accounts of the
+    same holders) and the debtor -> creditor edges between them
+    """
+    if not 1 <= hops <= 6:
+        return {"status": "error", "message": "hops must be between 1 and 6"}
+    return await _query("network", account_id, hops, direction, min(max_nodes, GRAPH_MAX_NODES))
+
+
+@router.get("/account/{account_id}/cycles")
+async def cycles(account_id: str, max_length: int = 4, limit: int = 50):
+    """Payment cycles through the account (money returning to it), up to max_length hops"""
+    if not 2 <= max_length <= 8:
+        return {"status": "error", "message": "max_length must be between 2 and 8"}
+    return await _query("cycles", account_id, max_length, limit)
@@ -2,10 +2,14 @@
 Health & Stats Router
 Endpoints for system health check and statistics
 """
+import asyncio
+from typing import Optional
 from fastapi import APIRouter
 from services.tms_client import tms_client
-from services.database_query_service import create_database_service
+from services.database_query_service import create_database_service, query_evaluation_db
 from models.schemas import HealthResponse, StatsResponse
+from utils.timing import timing_registry
+from utils.startup import startup_report, importtime_report
 from config import USE_LOCAL_POSTGRES
 
 router = APIRouter(prefix="/api", tags=["Health & Stats"])
@@ -20,10 +24,102 @@ async def check_tms_health():
     return result
 
 
+@router.get("/tms/concurrency")
+async def get_tms_concurrency():
+    """Adaptive concurrency state of the TMS client (limit, in-flight, queued)"""
+    return tms_client.concurrency_stats()
+
+
+@router.get("/tms/resilience")
+async def get_tms_resilience():
+    """Circuit breaker state and retry / hedging policy of the TMS client"""
+    return tms_client.resilience_stats()
+
+
+@router.get("/timings")
+async def get_route_timings():
+    """Per-route stage histograms (tms_*, docker_logs, parse_alerts, wait, db_query, total)"""
+    return {"status": "success", "routes": timing_registry.snapshot()}
+
+
+@router.delete("/timings")
+async def reset_route_timings():
+    """Reset the per-route stage histograms"""
+    timing_registry.clear()
+    return {"status": "success"}
+
+
+@router.get("/debug/startup")
+async def get_startup_report():
+    """Cold-start milestones (imports_done, app_ready, warmup_done) against COLD_START_BUDGET_MS"""
+    return {"status": "success", **startup_report()}
+
+
+@router.get("/debug/importtime")
+async def get_importtime(module: str = "main", top: int = 25):
+    """`python -X importtime -c "import main"` breakdown from a fresh interpreter"""
+    if not module.replace(".", "").replace("_", "").isalnum():
+        return {"status": "error", "message": f"Invalid module name: {module}"}
+    return await asyncio.get_running_loop().run_in_executor(None, importtime_report, module, top)
+
+
+_EVALUATIONS_BY_TENANT = """
+SELECT
+    tenantid,
+    count(*) as evaluations,
+    count(*) FILTER (WHERE evaluation->'report'->>'status' = 'ALRT') as alerts
+FROM evaluation
+{window_filter}
+GROUP BY tenantid
+"""
+
+
+@router.get("/stats/tenants")
+async def get_tenant_stats(seconds: Optional[int] = None):
+    """
+    Per-tenant transaction counts (event_history) joined with evaluation / alert counts
+
+    seconds limits both to the last N seconds (transaction creDtTm, evaluation report timestamp).
+    Client-side throughput and latency per tenant: POST /api/test/multi-tenant or the
+    tenant label on tazama_client_tms_requests_total in /metrics.
+    """
+    loop = asyncio.get_running_loop()
+    db_service = create_database_service(use_local=USE_LOCAL_POSTGRES)
+    summary = await loop.run_in_executor(None, db_service.get_tenant_summary, seconds)
+    if summary["status"] != "success":
+        return summary
+
+    window_filter = ("WHERE (evaluation->'report'->>'timestamp')::timestamptz >= now() - make_interval(secs => %s)"
+                     if seconds else "")
+    try:
+        rows = await loop.run_in_executor(
+            None, query_evaluation_db, _EVALUATIONS_BY_TENANT.format(window_filter=window_filter),
+            (seconds,) if seconds else None
+        )
+        evaluations = {tenant_id: (count, alerts) for tenant_id, count, alerts in rows}
+        summary["evaluation_error"] = None
+    except Exception as e:
+        evaluations = {}
+        summary["evaluation_error"] = str(e)
+
+    for tenant in summary["tenants"]:
+        count, alerts = evaluations.pop(tenant["tenant_id"], (0, 0))
+        tenant["evaluations"] = count
+        tenant["alerts"] = alerts
+        tenant["alert_rate"] = round(alerts / count, 4) if count else 0.0
+        if seconds:
+            tenant["throughput_per_sec"] = round(tenant["total_transactions"] / seconds, 3)
+    # Evaluated but no stored transaction (e.g. event_history pruned)
+    for tenant_id, (count, alerts) in evaluations.items():
+        summary["tenants"].append({"tenant_id": tenant_id, "total_transactions": 0, "evaluations": count,
+                                   "alerts": alerts, "alert_rate": round(alerts / count, 4) if count else 0.0})
+    return summary
+
+
 @router.get("/stats", response_model=StatsResponse)
-async def get_stats():
+async def get_stats(tenant_id: Optional[str] = None):
     """
-    Get dashboard statistics from Tazama database
+    Get dashboard statistics from Tazama database (optionally for one tenant)
 
     This endpoint queries the actual Tazama database to retrieve:
     - Total transactions processed
@@ -32,86 +128,7 @@ async def get_stats():
     - Average transaction amounts
 
     Data is retrieved directly from the database, not from in-memory storage.
+    The dashboard UI receives the same stats pushed over /ws/dashboard.
     """
-    try:
-        # Create database service based on deployment mode
-        db_service = create_database_service(use_local=USE_LOCAL_POSTGRES)
-
-        # Query transaction statistics from database
-        query = """
-        SELECT
-            COUNT(*) as total_count,
-            COUNT(CASE WHEN txtp = 'pacs.008.001.10' THEN 1 END) as pacs008_count,
-            COUNT(CASE WHEN txtp = 'pacs.002.001.12' THEN 1 END) as pacs002_count,
-            COUNT(CASE WHEN txtp = 'pain.001.001.11' THEN 1 END) as pain001_count,
-            COUNT(CASE WHEN txtp = 'pain.013.001.09' THEN 1 END) as pain013_count,
-            AVG(amt) as avg_amount,
-            MAX(credttm) as latest_transaction
-        FROM transaction;
-        """
-
-        result = db_service.strategy.execute_query(query, format_csv=True)
-
-        if result.returncode != 0:
-            # Return empty stats on error
-            return {
-                "total_tests": 0,
-                "success_count": 0,
-                "failure_count": 0,
-                "success_rate": 0.0,
-                "avg_response_time_ms": 0.0,
-                "tests_by_type": {}
-            }
-
-        # Parse CSV result
-        output = result.stdout.strip()
-        if not output:
-            return {
-                "total_tests": 0,
-                "success_count": 0,
-                "failure_count": 0,
-                "success_rate": 0.0,
-                "avg_response_time_ms": 0.0,
-                "tests_by_type": {}
-            }
-
-        parts = output.split(',')
-        total_count = int(parts[0]) if parts[0] else 0
-        pacs008_count = int(parts[1]) if parts[1] else 0
-        pacs002_count = int(parts[2]) if parts[2] else 0
-        pain001_count = int(parts[3]) if parts[3] else 0
-        pain013_count = int(parts[4]) if parts[4] else 0
-        avg_amount = float(parts[5]) if len(parts) > 5 and parts[5] else 0.0
-
-        # Build tests_by_type structure
-        tests_by_type = {}
-        if pacs008_count > 0:
-            tests_by_type["pacs.008"] = {"count": pacs008_count, "success": pacs008_count}
-        if pacs002_count > 0:
-            tests_by_type["pacs.002"] = {"count": pacs002_count, "success": pacs002_count}
-        if pain001_count > 0:
-            tests_by_type["pain.001"] = {"count": pain001_count, "success": pain001_count}
-        if pain013_count > 0:
-            tests_by_type["pain.013"] = {"count": pain013_count, "success": pain013_count}
-
-        # For now, assume all transactions are successful since they're in the database
-        # Future enhancement: query evaluation table for actual success/failure
-        return {
-            "total_tests": total_count,
-            "success_count": total_count,
-            "failure_count": 0,
-            "success_rate": 100.0 if total_count > 0 else 0.0,
-            "avg_response_time_ms": round(avg_amount, 2),  # Repurpose as avg amount for now
-            "tests_by_type": tests_by_type
-        }
-
-    except Exception as e:
-        # Return empty stats on error
-        return {
-            "total_tests": 0,
-            "success_count": 0,
-            "failure_count": 0,
-            "success_rate": 0.0,
-            "avg_response_time_ms": 0.0,
-            "tests_by_type": {}
-        }
+    db_service = create_database_service(use_local=USE_LOCAL_POSTGRES)
+    return await asyncio.get_running_loop().run_in_executor(None, db_service.get_dashboard_stats, tenant_id)
@@ -0,0 +1,201 @@
+"""
+Relay Results Router
+Webhook receiver for relay-service-integration-rest
+
+Point the REST relay at this client:
+
+    DESTINATION_TRANSPORT_URL=http://<client>:5000/api/relay/webhook
+    AUTH_HEALTH_URL=http://<client>:5000/api/relay/health
+    AUTH_TOKEN_URL=http://<client>:5000/api/relay/token
+    AUTH_USERNAME / AUTH_PASSWORD = RELAY_AUTH_USERNAME / RELAY_AUTH_PASSWORD here
+    OUTPUT_TO_JSON=true   (or set NATS_PROTO_MODULE here for protobuf bodies)
+
+With RELAY_WEBHOOK_TOKEN set, the token endpoint only hands the token to a
+caller posting those credentials, and the webhook requires it as Bearer token.
+
+Relayed TADP results are indexed in services.result_index, where simulation
+routes called with await_results=true pick up their own transactions.
+
+The same index can be fed from Kafka (relay-service-kafka) via
+/api/relay/kafka/start; stand_in=true uses the in-memory broker instead,
+which /api/relay/kafka/produce fills with results the way the Kafka relay would.
+"""
+import hmac
+import json
+from fastapi import APIRouter, Request, HTTPException, Header, Form
+from typing import Optional
+
+from services.result_index import result_index, load_decoder, extract_result_keys
+from services.kafka_result_consumer import KafkaResultConsumer, InMemoryKafkaBroker, InMemoryKafkaBackend
+from config import (
+    RELAY_WEBHOOK_TOKEN, RELAY_AUTH_USERNAME, RELAY_AUTH_PASSWORD, KAFKA_RESULT_TOPIC, KAFKA_RESULT_GROUP_ID
+)
+
+router = APIRouter(prefix="/api/relay", tags=["Relay Results"])
+
+_decode = None
+_kafka_consumer: Optional[KafkaResultConsumer] = None
+kafka_stand_in = InMemoryKafkaBroker()
+
+
+def _get_decoder():
+    global _decode
+    if _decode is None:
+        _decode = load_decoder()
+    return _decode
+
+
+def _credentials_match(username, password) -> bool:
+    # Unset RELAY_AUTH_* never match, so the token is not handed out by accident
+    if not (RELAY_AUTH_USERNAME and RELAY_AUTH_PASSWORD):
+        return False
+    return hmac.compare_digest(str(username or ""), RELAY_AUTH_USERNAME) & \
+        hmac.compare_digest(str(password or ""), RELAY_AUTH_PASSWORD)
+
+
+@router.get("/health")
+async def relay_auth_health():
+    """Health endpoint for the relay's AUTH_HEALTH_URL (checked before each token fetch)"""
+    return {"status": "UP"}
+
+
+@router.post("/token")
+async def issue_relay_token(request: Request):
+    """Token endpoint for the relay's AUTH_TOKEN_URL
+
+    The relay posts {"username", "password"}; returns RELAY_WEBHOOK_TOKEN when
+    they match RELAY_AUTH_USERNAME / RELAY_AUTH_PASSWORD, else 401.
+    """
+    if not RELAY_WEBHOOK_TOKEN:
+        return "no-auth"
+    try:
+        credentials = await request.json()
+    except ValueError:
+        credentials = None
+    if not isinstance(credentials, dict) or \
+            not _credentials_match(credentials.get("username"), credentials.get("password")):
+        raise HTTPException(status_code=401, detail="Invalid relay credentials")
+    return RELAY_WEBHOOK_TOKEN
+
+
+@router.post("/webhook")
+async def receive_relay_result(request: Request, authorization: Optional[str] = Header(None)):
+    """Ingest one relayed evaluation result (CMSRequest, JSON or protobuf)
+
+    Errors are real HTTP statuses: the relay refetches its token on 401 and
+    logs/retries anything else that is not 2xx.
+    """
+    if RELAY_WEBHOOK_TOKEN and not hmac.compare_digest(authorization or "", f"Bearer {RELAY_WEBHOOK_TOKEN}"):
+        raise HTTPException(status_code=401, detail="Invalid relay token")
+
+    body = await request.body()
+    try:
+        result = _get_decoder()(body)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Cannot decode relayed result: {e}")
+
+    entry = result_index.ingest(result, source="webhook")
+    if entry is None:
+        return {"status": "ignored", "message": "Result carries no MsgId / EndToEndId"}
+
+    return {
+        "status": "indexed",
+        "evaluation_id": entry["evaluation_id"],
+        "keys": entry["keys"],
+        "detection_latency_ms": entry["detection_latency_ms"]
+    }
+
+
+@router.get("/results/{key}")
+async def get_relay_result(key: str):
+    """Look up a relayed result by MsgId, OrgnlMsgId or EndToEndId"""
+    entry = result_index.get(key)
+    if entry is None:
+        return {"status": "pending", "key": key, "message": "No relayed result yet"}
+    return {"status": "success", **entry}
+
+
+@router.get("/stats")
+async def get_relay_stats():
+    """Result index size and ingest counters"""
+    return result_index.stats()
+
+
+@router.delete("/results")
+async def clear_relay_results():
+    """Drop all indexed results and pending submissions"""
+    result_index.clear()
+    return {"status": "success", "message": "Result index cleared"}
+
+
+# ============ KAFKA RESULT CONSUMER ============
+
+def start_kafka_consumer(stand_in: bool = False) -> KafkaResultConsumer:
+    """Start (or return the running) Kafka result consumer"""
+    global _kafka_consumer
+    if _kafka_consumer is None or not _kafka_consumer.running:
+        backend = kafka_stand_in.consumer(KAFKA_RESULT_TOPIC, KAFKA_RESULT_GROUP_ID) if stand_in else None
+        _kafka_consumer = KafkaResultConsumer(backend=backend, index=result_index)
+        _kafka_consumer.start()
+    return _kafka_consumer
+
+
+def stop_kafka_consumer():
+    global _kafka_consumer
+    if _kafka_consumer is not None:
+        _kafka_consumer.stop()
+        _kafka_consumer = None
+
+
+@router.post("/kafka/start")
+async def start_kafka_result_consumer(
+    stand_in: bool = Form(False, description="Consume from the in-memory broker stand-in instead of Kafka")
+):
+    """Start consuming relayed results from KAFKA_RESULT_TOPIC"""
+    try:
+        consumer = start_kafka_consumer(stand_in)
+    except ImportError:
+        return {"status": "error", "message": "confluent-kafka is not installed (or use stand_in=true)"}
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
+    return {"status": "success", **consumer.stats()}
+
+
+@router.post("/kafka/produce")
+async def produce_to_kafka_stand_in(request: Request):
+    """Publish relayed results (one CMSRequest or a list) to the stand-in topic
+
+    Plays relay-service-kafka for stand_in=true runs: each result becomes one
+    record keyed by its first id, for the stand-in consumer to index and commit.
+    """
+    try:
+        body = await request.json()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Body must be a CMSRequest or a list of them")
+    results = body if isinstance(body, list) else [body]
+    if not all(isinstance(r, dict) for r in results):
+        raise HTTPException(status_code=400, detail="Body must be a CMSRequest or a list of them")
+
+    for result in results:
+        keys = extract_result_keys(result)
+        kafka_stand_in.produce(KAFKA_RESULT_TOPIC, json.dumps(result).encode("utf-8"), key=keys[0] if keys else None)
+    return {"status": "success", "produced": len(results),
+            "lag": kafka_stand_in.lag(KAFKA_RESULT_TOPIC, KAFKA_RESULT_GROUP_ID)}
+
+
+@router.post("/kafka/stop")
+async def stop_kafka_result_consumer():
+    """Stop the Kafka result consumer"""
+    stop_kafka_consumer()
+    return {"status": "success", "message": "Kafka result consumer stopped"}
+
+
+@router.get("/kafka/stats")
+async def get_kafka_consumer_stats():
+    """Batch / offset commit counters of the Kafka result consumer"""
+    if _kafka_consumer is None:
+        return {"status": "stopped"}
+    stats = _kafka_consumer.stats()
+    if isinstance(_kafka_consumer.backend, InMemoryKafkaBackend):
+        stats["lag"] = kafka_stand_in.lag(KAFKA_RESULT_TOPIC, KAFKA_RESULT_GROUP_ID)
+    return {"status": "success", **stats}
@@ -5,11 +5,14 @@ Endpoints for pacs.008, pacs.002 quick-status, and full-transaction
 from fastapi import APIRouter, Form
 from typing import Optional
 from datetime import datetime
-import time
+import asyncio
 
 from services.tms_client import tms_client
 from utils.payload_generator import generate_pacs008, generate_pacs002
-from config import VALID_STATUS_CODES
+from models.schemas import StatusCode, Verbosity
+from utils.response_projection import project_response
+from utils.tenancy import run_in_executor_with_context
+from utils.timing import stage
 from routers.attacks import fetch_logs_internal, parse_fraud_alerts
 
 
@@ -27,7 +30,8 @@ async def test_pacs008(
     creditor_name: Optional[str] = Form(None, description="Creditor name"),
     creditor_account: Optional[str] = Form(None, description="Creditor account ID"),
     amount: Optional[str] = Form(None, description="Transaction amount"),
-    currency: Optional[str] = Form("IDR", description="Currency code")
+    currency: Optional[str] = Form("IDR", description="Currency code"),
+    verbosity: Verbosity = Form(Verbosity.FULL, description="Response detail: summary, standard, or full")
 ):
     """Send test pacs.008 transaction with pacs.002 confirmation to trigger Rule 901/902"""
     try:
@@ -41,14 +45,15 @@ async def test_pacs008(
         if creditor_name and not creditor_name.strip():
             creditor_name = None
 
-        payload = generate_pacs008(
-            debtor_account,
-            amt,
-            debtor_name,
-            creditor_account=creditor_account,
-            creditor_name=creditor_name
-        )
-        status_code, response_time, response_data = tms_client.send_pacs008(payload)
+        with stage("payload"):
+            payload = generate_pacs008(
+                debtor_account,
+                amt,
+                debtor_name,
+                creditor_account=creditor_account,
+                creditor_name=creditor_name
+            )
+        status_code, response_time, response_data = await run_in_executor_with_context(tms_client.send_pacs008, payload)
         
         # Get actual values from payload for context
         actual_debtor = debtor_account or payload.get("FIToFICstmrCdtTrf", {}).get("CdtTrfTxInf", {}).get("DbtrAcct", {}).get("Id", {}).get("Othr", [{}])[0].get("Id", "UNKNOWN")
@@ -62,10 +67,12 @@ async def test_pacs008(
         # Rule 901/902 expect FIToFIPmtSts (pacs.002 format), not pacs.008
         pacs002_status = None
         if status_code == 200 and msg_id and e2e_id:
-            pacs002_payload = generate_pacs002(msg_id, e2e_id, "ACCC")
-            pacs002_status, _, _ = tms_client.send_pacs002(pacs002_payload)
+            with stage("payload"):
+                pacs002_payload = generate_pacs002(msg_id, e2e_id, "ACCC")
+            pacs002_status, _, _ = await run_in_executor_with_context(tms_client.send_pacs002, pacs002_payload)
         
-        time.sleep(0.5)
+        with stage("wait"):
+            await asyncio.sleep(0.5)
         
         request_context = {
             "scenario": "pacs.008 + pacs.002 Transaction",
@@ -93,7 +100,7 @@ async def test_pacs008(
                 seen_rules.add(alert['rule_id'])
                 unique_alerts.append(alert)
         
-        return {
+        return project_response({
             "status": "success" if status_code == 200 else "error",
             "http_code": status_code,
             "pacs002_status": pacs002_status,
@@ -102,7 +109,7 @@ async def test_pacs008(
             "tms_response": response_data,
             "fraud_alerts": unique_alerts,
             "request_summary": request_context
-        }
+        }, verbosity)
         
     except Exception as e:
         return {"status": "error", "message": str(e)}
@@ -122,10 +129,11 @@ async def test_quick_status(
     Quick Test: Send pacs.008 + pacs.002 with selectable status code.
     Supports ACCC (Accepted), ACSC (Settled), RJCT (Rejected)
     """
-    if status_code not in VALID_STATUS_CODES:
+    valid_status_codes = [s.value for s in StatusCode]
+    if status_code not in valid_status_codes:
         return {
             "status": "error",
-            "message": f"Invalid status code. Must be one of: {', '.join(VALID_STATUS_CODES)}"
+            "message": f"Invalid status code. Must be one of: {', '.join(valid_status_codes)}"
         }
     
     pacs008_payload = generate_pacs008(debtor_account, amount)
@@ -136,13 +144,14 @@ async def test_quick_status(
         start_time = datetime.now()
         
         # Send pacs.008
-        status_008, _, _ = tms_client.send_pacs008(pacs008_payload)
+        status_008, _, _ = await run_in_executor_with_context(tms_client.send_pacs008, pacs008_payload)
         
         if status_008 == 200:
-            time.sleep(0.3)
+            with stage("wait"):
+                await asyncio.sleep(0.3)
             
             pacs002_payload = generate_pacs002(message_id, end_to_end_id, status_code)
-            status_002, pacs002_time, response_002 = tms_client.send_pacs002(pacs002_payload)
+            status_002, pacs002_time, response_002 = await run_in_executor_with_context(tms_client.send_pacs002, pacs002_payload)
 
             total_time = (datetime.now() - start_time).total_seconds() * 1000
 
@@ -187,7 +196,7 @@ async def test_full_transaction(
     end_to_end_id = pacs008_payload.get("FIToFICstmrCdtTrf", {}).get("CdtTrfTxInf", {}).get("PmtId", {}).get("EndToEndId")
     
     try:
-        status_008, time_008, response_008 = tms_client.send_pacs008(pacs008_payload)
+        status_008, time_008, response_008 = await run_in_executor_with_context(tms_client.send_pacs008, pacs008_payload)
         
         results["pacs008"] = {
             "status": status_008,
@@ -196,10 +205,10 @@ async def test_full_transaction(
         }
         
         if status_008 == 200:
-            time.sleep(0.5)
+            await asyncio.sleep(0.5)
             
             pacs002_payload = generate_pacs002(message_id, end_to_end_id, "ACCC")
-            status_002, time_002, response_002 = tms_client.send_pacs002(pacs002_payload)
+            status_002, time_002, response_002 = await run_in_executor_with_context(tms_client.send_pacs002, pacs002_payload)
             
             results["pacs002"] = {
                 "status": status_002,
@@ -224,9 +233,9 @@ async def test_full_transaction(
     summary="Get Database Transaction Summary",
     description="Get summary of transactions in Tazama database (supports Full Docker and Local PostgreSQL)"
 )
-async def get_db_summary():
+async def get_db_summary(tenant_id: Optional[str] = None):
     """
-    Get transaction summary from Tazama PostgreSQL database
+    Get transaction summary from Tazama PostgreSQL database (tenant_id: one tenant only)
     
     Automatically switches between:
     - Full Docker: queries tazama-postgres container
@@ -239,7 +248,7 @@ async def get_db_summary():
     
     db_service = create_database_service(use_local=USE_LOCAL_POSTGRES)
     
-    return db_service.get_transaction_summary()
+    return db_service.get_transaction_summary(tenant_id)
 
 
 @router.post(
@@ -255,8 +264,8 @@ async def send_transaction(payload: dict):
     Accepts pain.001, pacs.008, or pacs.002 message formats.
     """
     try:
-        # Send to TMS (synchronous call)
-        response = tms_client.send_transaction(payload)
+        # Send to TMS (blocking call, off the event loop)
+        response = await run_in_executor_with_context(tms_client.send_transaction, payload)
         
         msg_id = (payload.get("CstmrCdtTrfInitn", {}).get("GrpHdr", {}).get("MsgId") or
                   payload.get("FIToFICstmrCdtTrf", {}).get("GrpHdr", {}).get("MsgId") or
@@ -0,0 +1,132 @@
+"""
+Adaptive Concurrency Limiter - AIMD limit for TMS submissions
+
+Modelled after Netflix concurrency-limits: the limit grows additively while
+request latency stays close to the no-load baseline, and shrinks
+multiplicatively when latency inflates past the tolerance or the TMS returns
+5xx / times out. Callers block in acquire() while the limit is reached, so
+the TMS + NATS pipeline never sees more in-flight requests than it can absorb.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, Optional
+
+
+class AdaptiveConcurrencyLimiter:
+    """Thread-safe AIMD concurrency limiter"""
+
+    def __init__(self, initial_limit: int = 4, min_limit: int = 1, max_limit: int = 64,
+                 backoff_ratio: float = 0.75, latency_tolerance: float = 2.0,
+                 baseline_decay: float = 0.01, enabled: bool = True):
+        """
+        Args:
+            initial_limit: Starting concurrency limit
+            min_limit: Lower bound for the limit
+            max_limit: Upper bound for the limit (also bulk sender pool size)
+            backoff_ratio: Multiplier applied to the limit on overload
+            latency_tolerance: Latency above baseline * tolerance counts as overload
+            baseline_decay: How fast the no-load baseline drifts up towards recent samples
+            enabled: If False the limit is fixed at max_limit (no adaptation)
+        """
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff_ratio = backoff_ratio
+        self.latency_tolerance = latency_tolerance
+        self.baseline_decay = baseline_decay
+        self.enabled = enabled
+
+        self._limit = float(initial_limit if enabled else max_limit)
+        self._in_flight = 0
+        self._queued = 0
+        self._baseline_ms: Optional[float] = None
+        self._last_latency_ms: Optional[float] = None
+        self._increases = 0
+        self._decreases = 0
+        self._cond = threading.Condition()
+
+    @property
+    def limit(self) -> int:
+        return max(self.min_limit, int(self._limit))
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """Block until a slot is free. Returns False if timeout expired."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            self._queued += 1
+            try:
+                while self._in_flight >= self.limit:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        return False
+                    self._cond.wait(remaining)
+                self._in_flight += 1
+                return True
+            finally:
+                self._queued -= 1
+
+    def release(self, latency_ms: float, status_code: int = 200):
+        """
+        Release a slot and feed the sample into the limit
+
+        Args:
+            latency_ms: Observed request latency
+            status_code: HTTP status (0 = connection error / timeout)
+        """
+        with self._cond:
+            in_flight_at_send = self._in_flight
+            self._in_flight -= 1
+            self._last_latency_ms = latency_ms
+
+            if self.enabled:
+                self._update_limit(latency_ms, status_code, in_flight_at_send)
+
+            self._cond.notify_all()
+
+    def _update_limit(self, latency_ms: float, status_code: int, in_flight: int):
+        overloaded = status_code == 0 or status_code >= 500
+
+        if not overloaded:
+            if self._baseline_ms is None or latency_ms < self._baseline_ms:
+                self._baseline_ms = latency_ms
+            else:
+                # Drift slowly so a permanently slower TMS does not pin the limit at minimum
+                self._baseline_ms += (latency_ms - self._baseline_ms) * self.baseline_decay
+            overloaded = latency_ms > self._baseline_ms * self.latency_tolerance
+
+        if overloaded:
+            self._limit = max(float(self.min_limit), self._limit * self.backoff_ratio)
+            self._decreases += 1
+        elif in_flight * 2 >= self.limit:
+            # Only grow when the current limit is actually being used
+            self._limit = min(float(self.max_limit), self._limit + 1.0 / max(self._limit, 1.0))
+            self._increases += 1
+
+    @contextmanager
+    def slot(self):
+        """
+        Context manager around acquire/release. The body must set
+        sample["latency_ms"] and sample["status_code"] before exiting.
+        """
+        self.acquire()
+        sample = {"latency_ms": 0.0, "status_code": 0}
+        try:
+            yield sample
+        finally:
+            self.release(sample["latency_ms"], sample["status_code"])
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current limiter state for observability endpoints"""
+        with self._cond:
+            return {
+                "adaptive": self.enabled,
+                "limit": self.limit,
+                "min_limit": self.min_limit,
+                "max_limit": self.max_limit,
+                "in_flight": self._in_flight,
+                "queued": self._queued,
+                "baseline_latency_ms": round(self._baseline_ms, 2) if self._baseline_ms is not None else None,
+                "last_latency_ms": round(self._last_latency_ms, 2) if self._last_latency_ms is not None else None,
+                "limit_increases": self._increases,
+                "limit_decreases": self._decreases
+            }
@@ -3,16 +3,215 @@ Database Query Service - Strategy Pattern
 Supports switching between Full Docker and Local PostgreSQL
 """
 
+import queue
 import subprocess
+import threading
+import time
 from abc import ABC, abstractmethod
-from typing import Dict, List, Optional
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterator, List, Optional
+
+from config import EXPORT_CHUNK_SIZE, EXPORT_QUEUE_CHUNKS, USE_SUMMARY_VIEWS
+from utils.timing import stage
+from utils.metrics import record_db_query, query_name
+from utils.tenancy import sql_literal
+
+
+def _run_query(cmd: List[str], query: str, timeout: int) -> subprocess.CompletedProcess:
+    """Run a psql command, recording its stage timing and query metrics"""
+    start = time.perf_counter()
+    ok = False
+    try:
+        with stage("db_query", **{"db.system": "postgresql", "db.operation": query_name(query)}):
+            result = subprocess.run(
+                cmd,
+                capture_output=True,
+                text=True,
+                timeout=timeout
+            )
+        ok = result.returncode == 0
+        return result
+    finally:
+        record_db_query(query, time.perf_counter() - start, ok)
+
+
+def credttm_condition(op: str, value: datetime) -> str:
+    """
+    creDtTm comparison against a datetime, as ISO-8601 text (the stored format)
+
+    Repeated on transaction->>'CreDtTm', the partition key of the partitioned
+    table (see init-db/07-partition-transaction.sql), so Postgres can prune
+    partitions; the creDtTm predicate keeps using the B-tree / BRIN indexes.
+    """
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    value = value.astimezone(timezone.utc)
+    literal = sql_literal(value.strftime("%Y-%m-%dT%H:%M:%S.") + f"{value.microsecond // 1000:03d}Z")
+    return f"creDtTm {op} {literal} AND (transaction->>'CreDtTm') {op} {literal}"
+
+
+def _stream_process(cmd: List[str], query: str, chunk_size: int) -> Iterator[bytes]:
+    """Yield a psql process's stdout in chunks; raises RuntimeError (with stderr) if psql fails"""
+    start = time.perf_counter()
+    ok = False
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    try:
+        while True:
+            chunk = proc.stdout.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+        if proc.wait() != 0:
+            message = proc.stderr.read().decode(errors="replace").strip()
+            raise RuntimeError(message or f"psql exited with {proc.returncode}")
+        ok = True
+    finally:
+        # Consumer went away mid-stream: stop psql instead of draining it
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+        proc.stdout.close()
+        proc.stderr.close()
+        record_db_query(query, time.perf_counter() - start, ok)
+
+
+def _connect_evaluation_db():
+    import psycopg2
+
+    return psycopg2.connect(
+        host="localhost",
+        port=5433,
+        database="evaluation",
+        user="postgres",
+        password="postgres"
+    )
+
+
+def query_evaluation_db(query: str, params=None, commit: bool = False) -> List[tuple]:
+    """
+    Run one statement against the evaluation DB (psycopg2, localhost:5433)
+
+    Returns the fetched rows ([] for statements without a result set).
+    """
+    start = time.perf_counter()
+    ok = False
+    try:
+        with stage("db_query", **{"db.system": "postgresql", "db.operation": query_name(query)}):
+            conn = _connect_evaluation_db()
+            try:
+                cursor = conn.cursor()
+                cursor.execute(query, params)
+                rows = cursor.fetchall() if cursor.description else []
+                cursor.close()
+                if commit:
+                    conn.commit()
+            finally:
+                conn.close()
+        ok = True
+        return rows
+    finally:
+        record_db_query(query, time.perf_counter() - start, ok)
+
+
+class _CopyCancelled(Exception):
+    pass
+
+
+def copy_evaluation_db(statement: str, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    Stream a `COPY ... TO STDOUT` statement from the evaluation DB in chunks
+
+    psycopg2's copy_expert pushes rows into a file object, so it runs in a
+    producer thread feeding a bounded queue (EXPORT_QUEUE_CHUNKS): a slow
+    consumer pauses the COPY instead of the rows piling up in memory, and
+    closing the generator aborts it.
+    """
+    chunks: "queue.Queue" = queue.Queue(maxsize=EXPORT_QUEUE_CHUNKS)
+    cancelled = threading.Event()
+    done = object()
+
+    def put(item):
+        while not cancelled.is_set():
+            try:
+                chunks.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+        raise _CopyCancelled()
+
+    class ChunkWriter:
+        """File object for copy_expert; psycopg2 calls write() once per row"""
+
+        def __init__(self):
+            self.parts: List[bytes] = []
+            self.size = 0
+
+        def write(self, data: bytes):
+            self.parts.append(data)
+            self.size += len(data)
+            if self.size >= chunk_size:
+                self.flush()
+
+        def flush(self):
+            if self.parts:
+                put(b"".join(self.parts))
+                self.parts, self.size = [], 0
+
+    def produce():
+        try:
+            conn = _connect_evaluation_db()
+            try:
+                with conn.cursor() as cursor:
+                    writer = ChunkWriter()
+                    cursor.copy_expert(statement, writer)
+                    writer.flush()
+            finally:
+                conn.close()
+            put(done)
+        except _CopyCancelled:
+            pass
+        except Exception as e:
+            try:
+                put(e)
+            except _CopyCancelled:
+                pass
+
+    start = time.perf_counter()
+    ok = False
+    threading.Thread(target=produce, name="evaluation-copy", daemon=True).start()
+    try:
+        while True:
+            item = chunks.get()
+            if item is done:
+                ok = True
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        cancelled.set()
+        record_db_query(statement, time.perf_counter() - start, ok)
+
+
+_STATS_TYPES = ("pacs.008.001.10", "pacs.002.001.12", "pain.001.001.11", "pain.013.001.09")
+
+
+def _stats_row(counts: List[Dict]) -> str:
+    """transaction_type_summary rows -> the CSV row of the raw stats query (total, per type, avg amount)"""
+    by_type = {c["txtp"]: c["tx_count"] for c in counts}
+    total = sum(c["tx_count"] for c in counts)
+    # AVG(amt) ignores NULL amounts, so divide by the rows that have one, not by all rows
+    with_amount = sum(c["amount_count"] for c in counts)
+    amount = sum(c["total_amount"] for c in counts)
+    return ",".join([str(total)] + [str(by_type.get(t, 0)) for t in _STATS_TYPES] +
+                    [str(amount / with_amount) if with_amount else ""])
 
 
 class DatabaseQueryStrategy(ABC):
     """Abstract base class for database query strategies"""
     
     @abstractmethod
-    def execute_query(self, query: str, format_csv: bool = False) -> subprocess.CompletedProcess:
+    def execute_query(self, query: str, format_csv: bool = False, timeout: int = 10) -> subprocess.CompletedProcess:
         """Execute a query and return the result"""
         pass
     
@@ -20,6 +219,15 @@ class DatabaseQueryStrategy(ABC):
     def get_name(self) -> str:
         """Get strategy name for logging"""
         pass
+    
+    @abstractmethod
+    def copy_command(self, statement: str) -> List[str]:
+        """psql command that runs a COPY ... TO STDOUT statement"""
+        pass
+    
+    def stream_copy(self, statement: str, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[bytes]:
+        """Run a COPY ... TO STDOUT statement and yield its output in chunks"""
+        return _stream_process(self.copy_command(statement), statement, chunk_size)
 
 
 class FullDockerStrategy(DatabaseQueryStrategy):
@@ -30,7 +238,7 @@ class FullDockerStrategy(DatabaseQueryStrategy):
         self.container_name = container_name
         self.database = database
     
-    def execute_query(self, query: str, format_csv: bool = False) -> subprocess.CompletedProcess:
+    def execute_query(self, query: str, format_csv: bool = False, timeout: int = 10) -> subprocess.CompletedProcess:
         """Execute query via docker exec"""
         cmd = ["docker", "exec", "-i", self.container_name, 
                "psql", "-U", "postgres", "-d", self.database]
@@ -42,12 +250,11 @@ class FullDockerStrategy(DatabaseQueryStrategy):
         
         cmd.extend(["-c", query])
         
-        return subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            timeout=10
-        )
+        return _run_query(cmd, query, timeout)
+    
+    def copy_command(self, statement: str) -> List[str]:
+        return ["docker", "exec", "-i", self.container_name,
+                "psql", "-U", "postgres", "-d", self.database, "-v", "ON_ERROR_STOP=1", "-c", statement]
     
     def get_name(self) -> str:
         return f"FullDocker({self.container_name}:{self.database})"
@@ -63,7 +270,7 @@ class LocalPostgresStrategy(DatabaseQueryStrategy):
         self.user = user
         self.database = database
     
-    def execute_query(self, query: str, format_csv: bool = False) -> subprocess.CompletedProcess:
+    def execute_query(self, query: str, format_csv: bool = False, timeout: int = 10) -> subprocess.CompletedProcess:
         """Execute query via psql"""
         cmd = ["psql", "-h", self.host, "-p", str(self.port), 
                "-U", self.user, "-d", self.database]
@@ -75,12 +282,11 @@ class LocalPostgresStrategy(DatabaseQueryStrategy):
         
         cmd.extend(["-c", query])
         
-        return subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            timeout=10
-        )
+        return _run_query(cmd, query, timeout)
+    
+    def copy_command(self, statement: str) -> List[str]:
+        return ["psql", "-h", self.host, "-p", str(self.port),
+                "-U", self.user, "-d", self.database, "-v", "ON_ERROR_STOP=1", "-c", statement]
     
     def get_name(self) -> str:
         return f"LocalPostgres({self.host}:{self.port}/{self.database})"
@@ -96,41 +302,54 @@ class DatabaseQueryService:
         """Switch database query strategy at runtime"""
         self.strategy = strategy
     
-    def get_transaction_summary(self) -> Dict:
+    def get_transaction_summary(self, tenant_id: Optional[str] = None) -> Dict:
         """
-        Get transaction summary grouped by debtor and creditor
+        Get transaction summary grouped by debtor and creditor (optionally one tenant only)
         
         NOTE: Only queries pacs.008 transactions to avoid double-counting.
         Tazama stores both pacs.008 (transfer request) and pacs.002 (status report)
         with inconsistent source/destination mapping in pacs.002, causing duplicates.
         
         See: Issue with Event Director pacs.002 agent mapping
+        
+        Reads the materialized summary views when they exist (USE_SUMMARY_VIEWS,
+        see services.summary_views), otherwise aggregates the raw table.
         """
+        if USE_SUMMARY_VIEWS:
+            from services.summary_views import transaction_summary
+            summary = transaction_summary(self, tenant_id)
+            if summary is not None:
+                return summary
+        
         try:
+            tenant_filter = f"AND tenantid = {sql_literal(tenant_id)}" if tenant_id else ""
+
             # Query debtor (source) summary - ONLY pacs.008
-            debtor_query = """
+            debtor_query = f"""
             SELECT source as account, COUNT(*) as tx_count, SUM(amt) as total_amount
             FROM transaction 
             WHERE source IS NOT NULL AND source != ''
             AND txtp = 'pacs.008.001.10'
+            {tenant_filter}
             GROUP BY source 
             ORDER BY tx_count DESC 
             LIMIT 20;
             """
             
             # Query creditor (destination) summary - ONLY pacs.008
-            creditor_query = """
+            creditor_query = f"""
             SELECT destination as account, COUNT(*) as tx_count, SUM(amt) as total_amount
             FROM transaction 
             WHERE destination IS NOT NULL AND destination != ''
             AND txtp = 'pacs.008.001.10'
+            {tenant_filter}
             GROUP BY destination 
             ORDER BY tx_count DESC 
             LIMIT 20;
             """
             
             # Total count - ONLY pacs.008
-            total_query = "SELECT COUNT(*) as total FROM transaction WHERE txtp = 'pacs.008.001.10';"
+            total_query = f"SELECT COUNT(*) as total FROM transaction WHERE txtp = 'pacs.008.001.10' {tenant_filter};"
             
             # Execute queries
             result_debtor = self.strategy.execute_query(debtor_query, format_csv=True)
@@ -167,9 +386,11 @@ class DatabaseQueryService:
             
             return {
                 "status": "success",
+                "tenant_id": tenant_id,
                 "total_transactions": total,
                 "debtors": debtors,
                 "creditors": creditors,
+                "source": "transaction",
                 "strategy": self.strategy.get_name()
             }
             
@@ -186,6 +407,159 @@ class DatabaseQueryService:
                 "strategy": self.strategy.get_name()
             }
     
+    def get_dashboard_stats(self, tenant_id: Optional[str] = None) -> Dict:
+        """
+        Dashboard statistics (GET /api/stats and the live dashboard push)
+
+        Total transactions, counts per message type and average amount, from
+        the materialized transaction_type_summary when set up (USE_SUMMARY_VIEWS),
+        else aggregated from the raw table. Returns zeroed stats on error.
+        """
+        empty = {
+            "total_tests": 0,
+            "success_count": 0,
+            "failure_count": 0,
+            "success_rate": 0.0,
+            "avg_response_time_ms": 0.0,
+            "tests_by_type": {}
+        }
+        try:
+            counts = None
+            if USE_SUMMARY_VIEWS:
+                from services.summary_views import type_counts
+                counts = type_counts(self, tenant_id)
+            if counts is not None:
+                output = _stats_row(counts)
+            else:
+                # Query transaction statistics from database
+                query = """
+                SELECT
+                    COUNT(*) as total_count,
+                    COUNT(CASE WHEN txtp = 'pacs.008.001.10' THEN 1 END) as pacs008_count,
+                    COUNT(CASE WHEN txtp = 'pacs.002.001.12' THEN 1 END) as pacs002_count,
+                    COUNT(CASE WHEN txtp = 'pain.001.001.11' THEN 1 END) as pain001_count,
+                    COUNT(CASE WHEN txtp = 'pain.013.001.09' THEN 1 END) as pain013_count,
+                    AVG(amt) as avg_amount,
+                    MAX(credttm) as latest_transaction
+                FROM transaction
+                {tenant_filter};
+                """.format(tenant_filter=f"WHERE tenantid = {sql_literal(tenant_id)}" if tenant_id else "")
+
+                result = self.strategy.execute_query(query, format_csv=True)
+                if result.returncode != 0:
+                    return empty
+                output = result.stdout.strip()
+
+            # Parse CSV result
+            if not output:
+                return empty
+
+            parts = output.split(',')
+            total_count = int(parts[0]) if parts[0] else 0
+            pacs008_count = int(parts[1]) if parts[1] else 0
+            pacs002_count = int(parts[2]) if parts[2] else 0
+            pain001_count = int(parts[3]) if parts[3] else 0
+            pain013_count = int(parts[4]) if parts[4] else 0
+            avg_amount = float(parts[5]) if len(parts) > 5 and parts[5] else 0.0
+
+            # Build tests_by_type structure
+            tests_by_type = {}
+            if pacs008_count > 0:
+                tests_by_type["pacs.008"] = {"count": pacs008_count, "success": pacs008_count}
+            if pacs002_count > 0:
+                tests_by_type["pacs.002"] = {"count": pacs002_count, "success": pacs002_count}
+            if pain001_count > 0:
+                tests_by_type["pain.001"] = {"count": pain001_count, "success": pain001_count}
+            if pain013_count > 0:
+                tests_by_type["pain.013"] = {"count": pain013_count, "success": pain013_count}
+
+            # For now, assume all transactions are successful since they're in the database
+            # Future enhancement: query evaluation table for actual success/failure
+            return {
+                "total_tests": total_count,
+                "success_count": total_count,
+                "failure_count": 0,
+                "success_rate": 100.0 if total_count > 0 else 0.0,
+                "avg_response_time_ms": round(avg_amount, 2),  # Repurpose as avg amount for now
+                "tests_by_type": tests_by_type
+            }
+
+        except Exception:
+            return empty
+
+    def get_tenant_summary(self, seconds: Optional[int] = None) -> Dict:
+        """
+        Transaction counts per tenant and message type (event_history.transaction.tenantid)
+
+        Args:
+            seconds: Only transactions with creDtTm in the last N seconds (all if None)
+        """
+        window_filter = (f"WHERE {credttm_condition('>=', datetime.now(timezone.utc) - timedelta(seconds=seconds))}"
+                         if seconds else "")
+        query = f"""
+        SELECT
+            tenantid,
+            COUNT(*) as total_count,
+            COUNT(CASE WHEN txtp = 'pacs.008.001.10' THEN 1 END) as pacs008_count,
+            COUNT(CASE WHEN txtp = 'pacs.002.001.12' THEN 1 END) as pacs002_count,
+            COUNT(CASE WHEN txtp = 'pain.001.001.11' THEN 1 END) as pain001_count,
+            COUNT(CASE WHEN txtp = 'pain.013.001.09' THEN 1 END) as pain013_count,
+            SUM(CASE WHEN txtp = 'pacs.008.001.10' THEN amt END) as pacs008_amount,
+            MIN(credttm) as first_transaction,
+            MAX(credttm) as latest_transaction
+        FROM transaction
+        {window_filter}
+        GROUP BY tenantid
+        ORDER BY total_count DESC;
+        """
+        try:
+            result = self.strategy.execute_query(query, format_csv=True)
+            if result.returncode != 0:
+                return {
+                    "status": "error",
+                    "message": f"Tenant query failed: {result.stderr}",
+                    "strategy": self.strategy.get_name()
+                }
+
+            tenants = []
+            for line in result.stdout.strip().split('\n'):
+                parts = line.split(',')
+                if len(parts) < 9:
+                    continue
+                tenants.append({
+                    "tenant_id": parts[0],
+                    "total_transactions": int(parts[1] or 0),
+                    "by_type": {
+                        "pacs.008": int(parts[2] or 0),
+                        "pacs.002": int(parts[3] or 0),
+                        "pain.001": int(parts[4] or 0),
+                        "pain.013": int(parts[5] or 0)
+                    },
+                    "pacs008_amount": float(parts[6]) if parts[6] else 0.0,
+                    "first_transaction": parts[7] or None,
+                    "latest_transaction": parts[8] or None
+                })
+
+            return {
+                "status": "success",
+                "window_seconds": seconds,
+                "tenants": tenants,
+                "strategy": self.strategy.get_name()
+            }
+
+        except subprocess.TimeoutExpired:
+            return {
+                "status": "error",
+                "message": "Database query timeout (>10s)",
+                "strategy": self.strategy.get_name()
+            }
+        except Exception as e:
+            return {
+                "status": "error",
+                "message": str(e),
+                "strategy": self.strategy.get_name()
+            }
+
     def _parse_csv_result(self, csv_data: str) -> List[Dict]:
         """Parse CSV formatted query result"""
         results = []
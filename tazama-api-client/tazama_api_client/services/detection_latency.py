@@ -0,0 +1,311 @@
+"""
+Detection Latency - pacs.002 submit -> evaluation result
+
+A TMS POST returns as soon as the message is queued, long before the rule
+processors, typology processor and TADP have run. Detection latency is the
+time from submitting a pacs.002 until its evaluation is visible, either as
+
+- relay:  a relayed CMSRequest arriving in services.result_index
+          (REST relay webhook or Kafka consumer), or
+- db:     its row appearing in evaluation.evaluation (polled by MsgId via the
+          indexed messageId column)
+
+While a measurement is running, TMSClient.send_pacs002 records every
+submitted pacs.002 here. Each detected evaluation contributes one sample to
+the overall distribution and to every rule and typology it carries, so the
+report shows p50/p95/p99 per rule and per typology.
+"""
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, Iterable, List, Optional
+
+from config import (
+    DETECTION_LATENCY_TIMEOUT, DETECTION_DB_POLL_INTERVAL, DETECTION_DB_BATCH_SIZE,
+    DETECTION_MAX_SAMPLES
+)
+from services.database_query_service import query_evaluation_db
+from services.result_index import result_index, ResultIndex
+from utils.metrics import DETECTION_LATENCY
+
+SOURCES = ("relay", "db", "both")
+
+_EVALUATION_QUERY = """
+    SELECT
+        messageid as msg_id,
+        evaluation->'report'->>'status' as status,
+        evaluation->'report'->>'timestamp' as timestamp,
+        (SELECT array_agg(DISTINCT COALESCE(t->>'cfg', t->>'id'))
+           FROM jsonb_array_elements(evaluation->'report'->'tadpResult'->'typologyResult') t) as typologies,
+        (SELECT array_agg(DISTINCT r->>'id')
+           FROM jsonb_array_elements(evaluation->'report'->'tadpResult'->'typologyResult') t,
+                jsonb_array_elements(t->'ruleResults') r) as rules
+    FROM evaluation
+    WHERE messageid = ANY(%s)
+"""
+
+
+def percentiles(values: Iterable[float]) -> Optional[Dict[str, float]]:
+    """count / min / avg / p50 / p90 / p95 / p99 / max of a latency sample (ms)"""
+    ordered = sorted(values)
+    if not ordered:
+        return None
+
+    def pick(q: float) -> float:
+        return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+    return {
+        "count": len(ordered),
+        "min": ordered[0],
+        "avg": round(sum(ordered) / len(ordered), 2),
+        "p50": pick(0.5),
+        "p90": pick(0.9),
+        "p95": pick(0.95),
+        "p99": pick(0.99),
+        "max": ordered[-1]
+    }
+
+
+def _query_evaluations(msg_ids: List[str]) -> List[tuple]:
+    """Evaluation rows for the given pacs.002 MsgIds from the evaluation DB"""
+    return query_evaluation_db(_EVALUATION_QUERY, (msg_ids,))
+
+
+class DetectionLatencyTracker:
+    """Pending pacs.002 submissions and the latency samples of detected ones"""
+
+    def __init__(self, index: ResultIndex = result_index, timeout: float = DETECTION_LATENCY_TIMEOUT,
+                 max_samples: int = DETECTION_MAX_SAMPLES, poll_interval: float = DETECTION_DB_POLL_INTERVAL,
+                 query=_query_evaluations):
+        """
+        Args:
+            index: Result index whose relayed results resolve submissions
+            timeout: Seconds after which an undetected submission counts as missed
+            max_samples: Detected transactions kept for the percentiles (oldest dropped)
+            poll_interval: Seconds between evaluation DB polls (source db / both)
+            query: Function returning evaluation rows for a list of MsgIds
+        """
+        self.index = index
+        self.timeout = timeout
+        self.max_samples = max_samples
+        self.poll_interval = poll_interval
+        self.query = query
+
+        self.source: Optional[str] = None
+        self.started_at: Optional[float] = None
+        self._pending: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()  # pacs.002 MsgId -> submission
+        self._aliases: Dict[str, str] = {}  # OrgnlEndToEndId / OrgnlMsgId -> pacs.002 MsgId
+        self._samples: Deque[Dict[str, Any]] = deque(maxlen=max_samples)
+        self._submitted = 0
+        self._missed = 0
+        self._poll_errors = 0
+        self._last_poll_error: Optional[str] = None
+        self._lock = threading.Condition()
+        self._poller: Optional[threading.Thread] = None
+
+        index.add_listener(self._on_relayed)
+
+    @property
+    def active(self) -> bool:
+        return self.source is not None
+
+    # ============ MEASUREMENT MODE ============
+
+    def start(self, source: str = "relay", reset: bool = True):
+        """Start recording pacs.002 submissions; source is relay, db or both"""
+        if source not in SOURCES:
+            raise ValueError(f"source must be one of {', '.join(SOURCES)}")
+        if reset:
+            self.reset()
+        with self._lock:
+            self.source = source
+            self.started_at = time.time()
+        if source in ("db", "both") and (self._poller is None or not self._poller.is_alive()):
+            self._poller = threading.Thread(target=self._poll_loop, name="detection-latency-db", daemon=True)
+            self._poller.start()
+
+    def stop(self) -> Dict[str, Any]:
+        """Stop recording and return the final report"""
+        with self._lock:
+            self.source = None
+            self._lock.notify_all()
+        if self._poller is not None:
+            self._poller.join(timeout=self.poll_interval + 5)
+            self._poller = None
+        return self.report()
+
+    def reset(self):
+        with self._lock:
+            self._pending.clear()
+            self._aliases.clear()
+            self._samples.clear()
+            self._submitted = 0
+            self._missed = 0
+            self._poll_errors = 0
+            self._last_poll_error = None
+
+    # ============ RECORDING ============
+
+    def record_submission(self, payload: Dict[str, Any], submitted_at: Optional[float] = None):
+        """Remember a pacs.002 submit time (no-op unless a measurement is running)"""
+        if not self.active:
+            return
+        body = payload.get("FIToFIPmtSts") or {}
+        msg_id = body.get("GrpHdr", {}).get("MsgId")
+        if not msg_id:
+            return
+        tx_sts = body.get("TxInfAndSts") or {}
+        with self._lock:
+            self._pending[msg_id] = {
+                "msg_id": msg_id,
+                "end_to_end_id": tx_sts.get("OrgnlEndToEndId"),
+                "submitted_at": submitted_at or time.time()
+            }
+            for alias in (tx_sts.get("OrgnlEndToEndId"), tx_sts.get("OrgnlInstrId")):
+                if alias:
+                    self._aliases[alias] = msg_id
+            self._submitted += 1
+
+    def discard_submission(self, payload: Dict[str, Any]):
+        """Forget a pacs.002 the TMS rejected (it will never be evaluated)"""
+        msg_id = (payload.get("FIToFIPmtSts") or {}).get("GrpHdr", {}).get("MsgId")
+        with self._lock:
+            if self._pending.pop(msg_id, None) is not None:
+                self._submitted -= 1
+
+    def _resolve(self, msg_id: str, detected_at: float, source: str, status: Optional[str],
+                 rules: Iterable[str], typologies: Iterable[str]) -> bool:
+        with self._lock:
+            submission = self._pending.pop(msg_id, None)
+            if submission is None:
+                return False
+            self._aliases.pop(submission["end_to_end_id"], None)
+            latency_ms = round(max(0.0, detected_at - submission["submitted_at"]) * 1000, 2)
+            self._samples.append({
+                "msg_id": msg_id,
+                "latency_ms": latency_ms,
+                "source": source,
+                "status": status,
+                "rules": sorted({r.split("@")[0] for r in rules if r}),
+                "typologies": sorted({t for t in typologies if t})
+            })
+            self._lock.notify_all()
+        DETECTION_LATENCY.observe(source, value=latency_ms / 1000)
+        return True
+
+    def _on_relayed(self, entry: Dict[str, Any]):
+        """ResultIndex listener: resolve the pacs.002 a relayed evaluation belongs to"""
+        if self.source not in ("relay", "both") or entry.get("message_type") != "FIToFIPmtSts":
+            return
+        with self._lock:
+            msg_id = next((k for k in entry["keys"] if k in self._pending), None)
+            if msg_id is None:
+                msg_id = next((self._aliases[k] for k in entry["keys"] if k in self._aliases), None)
+        if msg_id is None:
+            return
+        self._resolve(
+            msg_id, entry.get("received_at") or time.time(), "relay", entry.get("status"),
+            (r["id"] for r in entry["rule_results"]), (t["id"] for t in entry["typologies"])
+        )
+
+    # ============ EVALUATION DB POLLING ============
+
+    def poll_once(self) -> int:
+        """Look up pending submissions in evaluation.evaluation; returns how many were detected"""
+        self._expire()
+        with self._lock:
+            msg_ids = list(self._pending)
+        detected = 0
+        for start in range(0, len(msg_ids), DETECTION_DB_BATCH_SIZE):
+            rows = self.query(msg_ids[start:start + DETECTION_DB_BATCH_SIZE])
+            seen_at = time.time()
+            for msg_id, status, _, typologies, rules in rows:
+                if self._resolve(msg_id, seen_at, "db", status, rules or [], typologies or []):
+                    detected += 1
+        return detected
+
+    def _poll_loop(self):
+        while self.source in ("db", "both"):
+            try:
+                self.poll_once()
+            except Exception as e:
+                with self._lock:
+                    self._poll_errors += 1
+                    self._last_poll_error = str(e)
+            with self._lock:
+                if self.source in ("db", "both"):
+                    self._lock.wait(self.poll_interval)
+
+    def _expire(self):
+        """Count submissions older than the timeout as missed"""
+        cutoff = time.time() - self.timeout
+        with self._lock:
+            while self._pending:
+                msg_id, submission = next(iter(self._pending.items()))
+                if submission["submitted_at"] > cutoff:
+                    break
+                self._pending.popitem(last=False)
+                self._aliases.pop(submission["end_to_end_id"], None)
+                self._missed += 1
+
+    # ============ REPORTING ============
+
+    def wait_until_settled(self, timeout: Optional[float] = None) -> bool:
+        """Block until every pending submission is detected or missed"""
+        deadline = time.monotonic() + (self.timeout if timeout is None else timeout)
+        while True:
+            self._expire()
+            with self._lock:
+                if not self._pending:
+                    return True
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._lock.wait(min(remaining, 0.5))
+
+    def report(self, include_samples: bool = False) -> Dict[str, Any]:
+        """Detection latency percentiles overall, by source, by rule and by typology"""
+        self._expire()
+        with self._lock:
+            samples = list(self._samples)
+            pending = len(self._pending)
+            report = {
+                "active": self.active,
+                "source": self.source,
+                "started_at": self.started_at,
+                "timeout_seconds": self.timeout,
+                "submitted": self._submitted,
+                "detected": len(samples),
+                "pending": pending,
+                "missed": self._missed,
+                "poll_errors": self._poll_errors,
+                "last_poll_error": self._last_poll_error
+            }
+
+        by_source: Dict[str, List[float]] = {}
+        by_status: Dict[str, List[float]] = {}
+        by_rule: Dict[str, List[float]] = {}
+        by_typology: Dict[str, List[float]] = {}
+        for sample in samples:
+            latency = sample["latency_ms"]
+            by_source.setdefault(sample["source"], []).append(latency)
+            by_status.setdefault(sample["status"] or "unknown", []).append(latency)
+            for rule in sample["rules"]:
+                by_rule.setdefault(rule, []).append(latency)
+            for typology in sample["typologies"]:
+                by_typology.setdefault(typology, []).append(latency)
+
+        report.update({
+            "detection_latency_ms": percentiles(s["latency_ms"] for s in samples),
+            "by_source": {k: percentiles(v) for k, v in sorted(by_source.items())},
+            "by_status": {k: percentiles(v) for k, v in sorted(by_status.items())},
+            "by_rule": {k: percentiles(v) for k, v in sorted(by_rule.items())},
+            "by_typology": {k: percentiles(v) for k, v in sorted(by_typology.items())}
+        })
+        if include_samples:
+            report["samples"] = samples
+        return report
+
+
+# Singleton instance fed by TMSClient.send_pacs002 and the result index
+detection_tracker = DetectionLatencyTracker()
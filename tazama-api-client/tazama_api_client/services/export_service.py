@@ -0,0 +1,125 @@
+"""
+Bulk Export - stream transactions and evaluations with COPY ... TO STDOUT
+
+Extracts can be many GB, so nothing is fetched into Python rows: the
+statement runs server-side as COPY and its output is relayed chunk by chunk
+(psql stdout for event_history, psycopg2 copy_expert for the evaluation DB),
+never holding more than a few chunks in memory.
+
+- csv:    COPY (...) TO STDOUT WITH (FORMAT csv, HEADER)
+- ndjson: row_to_json per row, copied in CSV mode with quote and delimiter
+          bytes that never occur in JSON text, so Postgres writes each line
+          verbatim (text mode would double every backslash)
+
+Rows are exported in table order (no ORDER BY), so a multi-GB extract never
+waits for a sort.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Iterator, Optional
+
+from config import USE_LOCAL_POSTGRES
+from services.database_query_service import copy_evaluation_db, create_database_service, credttm_condition
+from utils.tenancy import sql_literal
+
+MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+# kind -> (database, SELECT, time column, time column is ISO text); transactions filter
+# through credttm_condition so a partitioned transaction table is pruned
+_EXPORTS = {
+    "transactions": (
+        "event_history",
+        "SELECT tenantId, msgId, endToEndId, txTp, txSts, source, destination, amt, ccy, creDtTm "
+        "FROM transaction",
+        None, True
+    ),
+    "evaluations": (
+        "evaluation",
+        "SELECT messageId, tenantId, "
+        "evaluation->'report'->>'evaluationID' as evaluationId, "
+        "evaluation->'report'->>'status' as status, "
+        "evaluation->'report'->>'timestamp' as evaluatedAt, "
+        "evaluation->'transaction'->>'TxTp' as txTp, "
+        "evaluation->'report'->'tadpResult'->>'prcgTm' as tadpPrcgTm, "
+        "jsonb_array_length(COALESCE(evaluation->'report'->'tadpResult'->'typologyResult', '[]'::jsonb)) "
+        "as typologies "
+        "FROM evaluation",
+        "evaluation->'report'->>'timestamp'", True
+    ),
+    "rule_results": (
+        "evaluation",
+        "SELECT messageId, tenantId, evaluationId, evaluatedAt, status, ruleId, ruleCfg, subRuleRef, prcgTm "
+        "FROM evaluation_rule_result",
+        "evaluatedAt", False
+    ),
+    "typology_results": (
+        "evaluation",
+        "SELECT messageId, tenantId, evaluationId, evaluatedAt, status, typologyId, processor, result, review, "
+        "prcgTm, ruleCount, errorCount FROM evaluation_typology_result",
+        "evaluatedAt", False
+    )
+}
+
+
+def _time_literal(value: datetime, iso_text: bool) -> str:
+    """Bound for the time filter; ISO text columns (creDtTm) compare as toISOString() strings"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    value = value.astimezone(timezone.utc)
+    if iso_text:
+        return sql_literal(value.strftime("%Y-%m-%dT%H:%M:%S.") + f"{value.microsecond // 1000:03d}Z")
+    return sql_literal(value.isoformat()) + "::timestamptz"
+
+
+def build_select(kind: str, since: Optional[datetime] = None, until: Optional[datetime] = None,
+                 tenant_id: Optional[str] = None, limit: Optional[int] = None) -> str:
+    """SELECT for an export kind with time-window [since, until) and tenant filters"""
+    _, select, time_column, iso_text = _EXPORTS[kind]
+    conditions = []
+    for op, bound in ((">=", since), ("<", until)):
+        if bound is None:
+            continue
+        if time_column is None:
+            conditions.append(credttm_condition(op, bound))
+        else:
+            conditions.append(f"{time_column} {op} {_time_literal(bound, iso_text)}")
+    if tenant_id:
+        conditions.append(f"tenantId = {sql_literal(tenant_id)}")
+    if conditions:
+        select += " WHERE " + " AND ".join(conditions)
+    if limit:
+        select += f" LIMIT {int(limit)}"
+    return select
+
+
+def copy_statement(select: str, fmt: str = "csv") -> str:
+    if fmt == "ndjson":
+        return (f"COPY (SELECT row_to_json(r) FROM ({select}) r) TO STDOUT "
+                f"WITH (FORMAT csv, QUOTE E'\\x01', DELIMITER E'\\x02')")
+    return f"COPY ({select}) TO STDOUT WITH (FORMAT csv, HEADER)"
+
+
+def stream_export(kind: str, fmt: str = "csv", since: Optional[datetime] = None,
+                  until: Optional[datetime] = None, seconds: Optional[int] = None,
+                  tenant_id: Optional[str] = None, limit: Optional[int] = None) -> Iterator[bytes]:
+    """
+    Chunks of an export, as produced by COPY
+
+    Args:
+        kind: transactions, evaluations, rule_results or typology_results
+        fmt: csv or ndjson
+        since / until: Time window (naive datetimes are UTC)
+        seconds: Shortcut for since = now - seconds (ignored when since is given)
+        tenant_id: Only this tenant's rows
+        limit: Stop after this many rows
+    """
+    if kind not in _EXPORTS:
+        raise ValueError(f"kind must be one of {', '.join(_EXPORTS)}")
+    if fmt not in MEDIA_TYPES:
+        raise ValueError(f"format must be one of {', '.join(MEDIA_TYPES)}")
+    if since is None and seconds:
+        since = datetime.now(timezone.utc) - timedelta(seconds=seconds)
+
+    statement = copy_statement(build_select(kind, since, until, tenant_id, limit), fmt)
+    if _EXPORTS[kind][0] == "event_history":
+        return create_database_service(use_local=USE_LOCAL_POSTGRES).strategy.stream_copy(statement)
+    return copy_evaluation_db(statement)
@@ -0,0 +1,226 @@
+"""
+Flow Load - full ISO 20022 payment chains under concurrency
+
+One chain is the E2E flow for a single payment:
+
+    pain.001 -> pain.013 -> pacs.008 -> pacs.002
+
+Steps within a chain run in order with a think time between them; chains
+run concurrently (bounded by `concurrency`), so all four TMS endpoints see a
+production-like mix instead of one message type at a time. Sends go through
+the shared TMSClient (adaptive limiter, retries, circuit breaker) on a small
+thread pool; think time is an asyncio sleep, so thousands of waiting chains
+hold no threads.
+
+pain.001 / pain.013 are optional in Tazama: a 404 marks the step skipped and
+the chain continues. Any other non-200 stops the chain (failed_at_<step>).
+Per-step latency also goes to tazama_client_flow_step_duration_seconds.
+"""
+import asyncio
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from config import METRICS_LATENCY_BUCKETS, TMS_CONCURRENCY_MAX
+from services.detection_latency import percentiles
+from utils.metrics import FLOW_STEP_LATENCY
+from utils.payload_generator import generate_pain001, generate_pain013, generate_pacs008, generate_pacs002
+from utils.tenancy import run_in_executor_with_context
+
+FLOW_STEPS = [
+    {"type": "pain.001", "name": "Customer Credit Transfer Initiation", "optional": True},
+    {"type": "pain.013", "name": "Creditor Payment Activation Request", "optional": True},
+    {"type": "pacs.008", "name": "FI to FI Customer Credit Transfer", "optional": False},
+    {"type": "pacs.002", "name": "Payment Status Report", "optional": False},
+]
+
+
+def _send_step(client, step_type: str, chain: Dict[str, Any]):
+    """Build and send one step's message; returns (TMSResult, message_id)"""
+    accounts = {"debtor_account": chain["debtor_account"], "creditor_account": chain["creditor_account"],
+                "amount": chain["amount"]}
+    if step_type == "pain.001":
+        payload, message_id, _ = generate_pain001(**accounts)
+        return client.send_pain001(payload), message_id
+    if step_type == "pain.013":
+        payload, message_id, _ = generate_pain013(**accounts)
+        return client.send_pain013(payload), message_id
+    if step_type == "pacs.008":
+        payload = generate_pacs008(**accounts)
+        header = payload.get("FIToFICstmrCdtTrf", {})
+        chain["pacs008_msg_id"] = header.get("GrpHdr", {}).get("MsgId")
+        chain["pacs008_e2e_id"] = header.get("CdtTrfTxInf", {}).get("PmtId", {}).get("EndToEndId")
+        return client.send_pacs008(payload), chain["pacs008_msg_id"]
+    payload = generate_pacs002(chain["pacs008_msg_id"], chain["pacs008_e2e_id"], chain["final_status"])
+    return client.send_pacs002(payload), payload.get("FIToFIPmtSts", {}).get("GrpHdr", {}).get("MsgId")
+
+
+async def run_flow(client, debtor_account: str, creditor_account: str, amount: Optional[float],
+                   final_status: str = "ACCC", think_time_ms: float = 300, think_jitter: float = 0.0,
+                   executor: Optional[ThreadPoolExecutor] = None) -> Dict[str, Any]:
+    """
+    Run one pain.001 -> pain.013 -> pacs.008 -> pacs.002 chain
+
+    Returns the /api/test/e2e-flow result: overall_status, steps (status,
+    success, skipped, response_time_ms, message_id) and total_time_ms.
+    """
+    chain = {"debtor_account": debtor_account, "creditor_account": creditor_account, "amount": amount,
+             "final_status": final_status}
+    results = {
+        "overall_status": "pending",
+        "steps": [],
+        "total_time_ms": 0,
+        "debtor_account": debtor_account,
+        "creditor_account": creditor_account,
+        "amount": amount
+    }
+    started = time.perf_counter()
+
+    try:
+        for number, step in enumerate(FLOW_STEPS, start=1):
+            if results["steps"] and not results["steps"][-1].get("skipped") and think_time_ms > 0:
+                jitter = random.uniform(-think_jitter, think_jitter) if think_jitter else 0.0
+                await asyncio.sleep(think_time_ms * (1 + jitter) / 1000)
+
+            # Copied context: X-Tenant-Id tenant, stage timings and trace parent reach the send
+            result, message_id = await run_in_executor_with_context(_send_step, client, step["type"], chain,
+                                                                    executor=executor)
+            status_code, response_time, _ = result
+            skipped = step["optional"] and status_code == 404
+            entry = {
+                "step": number,
+                "type": step["type"],
+                "name": step["name"],
+                "status": status_code,
+                "success": status_code == 200,
+                "response_time_ms": response_time,
+                "message_id": message_id,
+                "error_class": getattr(result, "error_class", None)
+            }
+            if step["optional"]:
+                entry["skipped"] = skipped
+                entry["note"] = "Skipped - endpoint not available in TMS" if skipped else None
+            if step["type"] == "pacs.002":
+                entry["final_status"] = final_status
+            results["steps"].append(entry)
+            FLOW_STEP_LATENCY.observe(step["type"], "skipped" if skipped else "success" if status_code == 200
+                                      else "failed", value=response_time / 1000)
+
+            if status_code != 200 and not skipped:
+                results["overall_status"] = f"failed_at_{step['type'].replace('.', '')}"
+                break
+        else:
+            results["overall_status"] = "completed"
+    except Exception as e:
+        results["overall_status"] = "error"
+        results["error"] = str(e)
+
+    results["total_time_ms"] = (time.perf_counter() - started) * 1000
+    return results
+
+
+def _histogram(values_ms: List[float]) -> Dict[str, int]:
+    """Counts per METRICS_LATENCY_BUCKETS bucket, keyed by upper bound in ms ("+Inf" last)"""
+    bounds = [b * 1000 for b in METRICS_LATENCY_BUCKETS]
+    counts = {f"{b:g}": 0 for b in bounds}
+    counts["+Inf"] = 0
+    for value in values_ms:
+        for bound in bounds:
+            if value <= bound:
+                counts[f"{bound:g}"] += 1
+                break
+        else:
+            counts["+Inf"] += 1
+    return counts
+
+
+def summarize_steps(flows: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Per step: attempted / success / skipped / failed, success rate, error classes, latency"""
+    summary = {}
+    for step in FLOW_STEPS:
+        entries = [s for flow in flows for s in flow["steps"] if s["type"] == step["type"]]
+        success = [s for s in entries if s["success"]]
+        skipped = [s for s in entries if s.get("skipped")]
+        error_classes: Dict[str, int] = {}
+        for s in entries:
+            if not s["success"] and not s.get("skipped"):
+                key = s.get("error_class") or str(s["status"])
+                error_classes[key] = error_classes.get(key, 0) + 1
+        sent = len(entries) - len(skipped)
+        latencies = [s["response_time_ms"] for s in success]
+        summary[step["type"]] = {
+            "attempted": len(entries),
+            "success": len(success),
+            "skipped": len(skipped),
+            "failed": sent - len(success),
+            "success_rate": round(len(success) / sent, 4) if sent else None,
+            "error_classes": error_classes,
+            "latency_ms": percentiles(latencies),
+            "histogram_ms": _histogram(latencies)
+        }
+    return summary
+
+
+async def run_flow_load(client, chains: int, concurrency: int, think_time_ms: float = 300,
+                        think_jitter: float = 0.2, ramp_up_seconds: float = 0, account_pool: int = 1000,
+                        final_status: str = "ACCC") -> Dict[str, Any]:
+    """
+    Run `chains` E2E flows with at most `concurrency` in flight
+
+    Args:
+        think_time_ms: Pause between the steps of a chain
+        think_jitter: Think time varies uniformly by +/- this fraction
+        ramp_up_seconds: Chain starts are spread evenly over this period
+        account_pool: Debtor / creditor pairs the chains draw from (repeats feed the velocity rules)
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    workers = max(1, min(concurrency, getattr(getattr(client, "limiter", None), "max_limit", TMS_CONCURRENCY_MAX)))
+    in_flight = 0
+    peak_in_flight = 0
+
+    async def one(index: int) -> Dict[str, Any]:
+        nonlocal in_flight, peak_in_flight
+        if ramp_up_seconds:
+            await asyncio.sleep(ramp_up_seconds * index / chains)
+        pair = random.randrange(account_pool)
+        async with semaphore:
+            in_flight += 1
+            peak_in_flight = max(peak_in_flight, in_flight)
+            try:
+                return await run_flow(
+                    client, f"FLOW_DEBTOR_{pair:05d}", f"FLOW_CREDITOR_{pair:05d}",
+                    round(random.uniform(100, 10000), 2), final_status, think_time_ms, think_jitter, executor
+                )
+            finally:
+                in_flight -= 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="flow-load") as executor:
+        flows = await asyncio.gather(*(one(i) for i in range(chains)))
+    wall_seconds = time.perf_counter() - started
+
+    outcomes: Dict[str, int] = {}
+    for flow in flows:
+        outcomes[flow["overall_status"]] = outcomes.get(flow["overall_status"], 0) + 1
+    completed = [f for f in flows if f["overall_status"] == "completed"]
+    messages = sum(1 for f in flows for s in f["steps"] if not s.get("skipped"))
+
+    return {
+        "status": "success" if completed else "error",
+        "chains": chains,
+        "concurrency": concurrency,
+        "peak_in_flight": peak_in_flight,
+        "worker_threads": workers,
+        "think_time_ms": think_time_ms,
+        "think_jitter": think_jitter,
+        "ramp_up_seconds": ramp_up_seconds,
+        "account_pool": account_pool,
+        "completed": len(completed),
+        "outcomes": outcomes,
+        "wall_time_ms": round(wall_seconds * 1000, 2),
+        "chains_per_sec": round(len(completed) / wall_seconds, 2) if wall_seconds else None,
+        "messages_per_sec": round(messages / wall_seconds, 2) if wall_seconds else None,
+        "chain_latency_ms": percentiles(f["total_time_ms"] for f in completed),
+        "steps": summarize_steps(flows)
+    }
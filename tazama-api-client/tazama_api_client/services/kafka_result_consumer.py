@@ -0,0 +1,224 @@
+"""
+Kafka Result Consumer - Feed relayed evaluation results into the result index
+
+relay-service-kafka publishes every TADP result (CMSRequest, JSON with
+OUTPUT_TO_JSON=true) to KAFKA_RESULT_TOPIC. For soak tests this consumer is far
+cheaper than querying the evaluation DB per transaction: it polls records in
+batches, decodes them, ingests the batch into services.result_index and then
+commits one offset per partition for the whole batch (at-least-once; a replay
+after a crash only re-indexes results, which is idempotent).
+
+Backends:
+- confluent-kafka (pip install confluent-kafka) against a real broker
+- InMemoryKafkaBroker, a local stand-in with the same poll/commit semantics,
+  for tests and soak runs without the Kafka + Zookeeper containers
+"""
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import (
+    KAFKA_BOOTSTRAP_SERVERS, KAFKA_RESULT_TOPIC, KAFKA_RESULT_GROUP_ID,
+    KAFKA_RESULT_BATCH_SIZE, KAFKA_RESULT_POLL_TIMEOUT
+)
+from services.result_index import ResultIndex, result_index, load_decoder
+
+# (partition, offset, value)
+Record = Tuple[int, int, bytes]
+
+
+# ============ BACKENDS ============
+
+class ConfluentKafkaBackend:
+    """Batch poll / manual commit on a real broker via confluent-kafka"""
+
+    def __init__(self, bootstrap_servers: str, topic: str, group_id: str):
+        from confluent_kafka import Consumer  # Optional dependency
+        self.topic = topic
+        self._consumer = Consumer({
+            "bootstrap.servers": bootstrap_servers,
+            "group.id": group_id,
+            "enable.auto.commit": False,
+            "auto.offset.reset": "latest"
+        })
+        self._consumer.subscribe([topic])
+
+    def poll_batch(self, max_records: int, timeout: float) -> List[Record]:
+        records = []
+        for message in self._consumer.consume(num_messages=max_records, timeout=timeout):
+            if message.error():
+                continue
+            records.append((message.partition(), message.offset(), message.value()))
+        return records
+
+    def commit(self, offsets: Dict[int, int]):
+        from confluent_kafka import TopicPartition
+        self._consumer.commit(
+            offsets=[TopicPartition(self.topic, p, o) for p, o in offsets.items()],
+            asynchronous=False
+        )
+
+    def close(self):
+        self._consumer.close()
+
+
+class InMemoryKafkaBroker:
+    """Local broker stand-in: partitioned topics plus committed offsets per group"""
+
+    def __init__(self, partitions: int = 3):
+        self.partitions = partitions
+        self._logs: Dict[str, List[List[bytes]]] = {}
+        self._committed: Dict[Tuple[str, str], Dict[int, int]] = defaultdict(dict)
+        self._cond = threading.Condition()
+
+    def produce(self, topic: str, value: bytes, key: Optional[str] = None):
+        """Append a record (partitioned by key like the default Kafka partitioner)"""
+        with self._cond:
+            log = self._logs.setdefault(topic, [[] for _ in range(self.partitions)])
+            partition = hash(key) % self.partitions if key is not None else \
+                min(range(self.partitions), key=lambda p: len(log[p]))
+            log[partition].append(value)
+            self._cond.notify_all()
+
+    def committed(self, topic: str, group_id: str) -> Dict[int, int]:
+        with self._cond:
+            return dict(self._committed[(topic, group_id)])
+
+    def lag(self, topic: str, group_id: str) -> int:
+        with self._cond:
+            log = self._logs.get(topic, [])
+            committed = self._committed[(topic, group_id)]
+            return sum(len(records) - committed.get(p, 0) for p, records in enumerate(log))
+
+    def consumer(self, topic: str, group_id: str) -> "InMemoryKafkaBackend":
+        return InMemoryKafkaBackend(self, topic, group_id)
+
+
+class InMemoryKafkaBackend:
+    """Consumer view of InMemoryKafkaBroker, resuming from the group's committed offsets"""
+
+    def __init__(self, broker: InMemoryKafkaBroker, topic: str, group_id: str):
+        self.broker = broker
+        self.topic = topic
+        self.group_id = group_id
+        self._positions = broker.committed(topic, group_id)
+
+    def poll_batch(self, max_records: int, timeout: float) -> List[Record]:
+        deadline = time.monotonic() + timeout
+        with self.broker._cond:
+            while True:
+                records = []
+                for partition, log in enumerate(self.broker._logs.get(self.topic, [])):
+                    position = self._positions.get(partition, 0)
+                    taken = log[position:position + max_records - len(records)]
+                    records.extend((partition, position + i, value) for i, value in enumerate(taken))
+                    self._positions[partition] = position + len(taken)
+                    if len(records) >= max_records:
+                        break
+                remaining = deadline - time.monotonic()
+                if records or remaining <= 0:
+                    return records
+                self.broker._cond.wait(remaining)
+
+    def commit(self, offsets: Dict[int, int]):
+        with self.broker._cond:
+            self.broker._committed[(self.topic, self.group_id)].update(offsets)
+
+    def close(self):
+        pass
+
+
+# ============ CONSUMER ============
+
+class KafkaResultConsumer:
+    """Background batch consumer that indexes relayed results"""
+
+    def __init__(self, backend=None, index: ResultIndex = result_index,
+                 batch_size: int = KAFKA_RESULT_BATCH_SIZE,
+                 poll_timeout: float = KAFKA_RESULT_POLL_TIMEOUT):
+        """
+        Args:
+            backend: ConfluentKafkaBackend / InMemoryKafkaBackend (default: confluent-kafka on KAFKA_BOOTSTRAP_SERVERS)
+            index: Result index to feed
+            batch_size: Max records per poll (and per offset commit)
+            poll_timeout: Seconds to wait for a batch before looping
+        """
+        self.backend = backend or ConfluentKafkaBackend(
+            KAFKA_BOOTSTRAP_SERVERS, KAFKA_RESULT_TOPIC, KAFKA_RESULT_GROUP_ID
+        )
+        self.index = index
+        self.batch_size = batch_size
+        self.poll_timeout = poll_timeout
+        self._decode = load_decoder()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+        self._batches = 0
+        self._records = 0
+        self._indexed = 0
+        self._decode_errors = 0
+        self._commits = 0
+        self._last_error: Optional[str] = None
+
+    def run_once(self) -> int:
+        """Poll, decode and index one batch, then commit its offsets. Returns records consumed."""
+        records = self.backend.poll_batch(self.batch_size, self.poll_timeout)
+        if not records:
+            return 0
+
+        decoded = []
+        next_offsets: Dict[int, int] = {}
+        for partition, offset, value in records:
+            next_offsets[partition] = max(next_offsets.get(partition, 0), offset + 1)
+            try:
+                decoded.append(self._decode(value))
+            except Exception:
+                self._decode_errors += 1
+
+        self._indexed += self.index.ingest_many(decoded, source="kafka")
+        self.backend.commit(next_offsets)
+
+        self._batches += 1
+        self._records += len(records)
+        self._commits += 1
+        return len(records)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                self._last_error = str(e)
+                self._stop.wait(self.poll_timeout)
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="kafka-result-consumer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._thread = None
+        self.backend.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "backend": type(self.backend).__name__,
+            "batches": self._batches,
+            "records": self._records,
+            "indexed": self._indexed,
+            "decode_errors": self._decode_errors,
+            "offset_commits": self._commits,
+            "avg_batch_size": round(self._records / self._batches, 1) if self._batches else 0,
+            "last_error": self._last_error
+        }
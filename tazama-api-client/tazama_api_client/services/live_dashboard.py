@@ -0,0 +1,354 @@
+"""
+Live Dashboard - one server-side aggregator pushing to every open dashboard
+
+The UI used to poll /api/stats and /api/test/db-summary and shell out to
+`docker logs` per tab, so database and docker load grew with the number of
+open browser tabs. DashboardHub runs a single loop (only while at least one
+client is connected) every DASHBOARD_PUSH_INTERVAL seconds:
+
+- stats       get_dashboard_stats(), pushed as a delta of the changed keys
+- db_summary  top debtors / creditors every DASHBOARD_SUMMARY_INTERVAL seconds, when changed
+- throughput  TMS requests / errors and relayed results per second (in-process counters, no DB)
+- alerts      new ALRT evaluations from the relay (result_index) and, once
+              rule-performance is set up, from evaluation_typology_result
+- logs        one shared `docker logs --follow` per container, for the clients following it
+
+Each client has a bounded queue; a slow client loses its oldest messages
+instead of slowing the loop. New clients get a "snapshot" of the last state.
+Transports: WebSocket /ws/dashboard and Server-Sent Events /api/dashboard/stream.
+"""
+import asyncio
+import itertools
+import time
+from collections import OrderedDict, deque
+from datetime import datetime, timezone
+from typing import Any, Callable, Deque, Dict, List, Optional, Set
+
+from config import (
+    USE_LOCAL_POSTGRES, DASHBOARD_PUSH_INTERVAL, DASHBOARD_SUMMARY_INTERVAL, DASHBOARD_QUEUE_SIZE,
+    DASHBOARD_LOG_LINES, DASHBOARD_DB_ALERTS
+)
+from services.database_query_service import create_database_service, query_evaluation_db
+from services.result_index import result_index
+from utils.metrics import TMS_REQUESTS, HTTP_IN_FLIGHT
+
+_DB_ALERTS_QUERY = """
+    SELECT messageId, tenantId, max(evaluatedAt), array_agg(typologyId ORDER BY typologyId)
+    FROM evaluation_typology_result
+    WHERE status = 'ALRT' AND evaluatedAt > %s
+    GROUP BY messageId, tenantId
+    ORDER BY max(evaluatedAt)
+    LIMIT 50
+"""
+_DB_ALERTS_RETRY = 60  # Seconds before retrying after a failed alert query (e.g. tables not set up)
+
+
+class LogFollower:
+    """One `docker logs --follow` process shared by every client following the container"""
+
+    def __init__(self, container: str, max_lines: int = DASHBOARD_LOG_LINES):
+        self.container = container
+        self.buffer: Deque[str] = deque(maxlen=max_lines)
+        self._pending: List[str] = []
+        self._process: Optional[asyncio.subprocess.Process] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        self._process = await asyncio.create_subprocess_exec(
+            "docker", "logs", self.container, "--follow", "--tail", str(self.buffer.maxlen),
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT
+        )
+        self._task = asyncio.create_task(self._read())
+
+    async def _read(self):
+        while True:
+            line = await self._process.stdout.readline()
+            if not line:
+                break
+            text = line.decode("utf-8", errors="replace").rstrip()
+            self.buffer.append(text)
+            self._pending.append(text)
+            if len(self._pending) > self.buffer.maxlen:
+                del self._pending[:-self.buffer.maxlen]
+
+    def tail(self) -> List[str]:
+        """Buffered lines already delivered (pending ones go out with the next tick)"""
+        delivered = len(self.buffer) - len(self._pending)
+        return list(self.buffer)[:max(delivered, 0)]
+
+    def drain(self) -> List[str]:
+        lines, self._pending = self._pending, []
+        return lines
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+        if self._process and self._process.returncode is None:
+            self._process.terminate()
+
+
+class _Subscriber:
+    def __init__(self, queue_size: int):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.logs: Set[str] = set()
+
+
+class DashboardHub:
+    """Fixed-cadence aggregator fanning dashboard updates out to subscriber queues"""
+
+    def __init__(self, interval: float = DASHBOARD_PUSH_INTERVAL,
+                 summary_interval: float = DASHBOARD_SUMMARY_INTERVAL,
+                 queue_size: int = DASHBOARD_QUEUE_SIZE,
+                 db_alerts: bool = DASHBOARD_DB_ALERTS,
+                 db_service_factory: Optional[Callable[[], Any]] = None):
+        """
+        Args:
+            interval: Seconds between pushes (stats, throughput, alerts, logs)
+            summary_interval: Seconds between top debtor / creditor queries
+            queue_size: Messages buffered per client before the oldest are dropped
+            db_alerts: Also poll evaluation_typology_result for new alerts
+        """
+        self.interval = interval
+        self.summary_interval = summary_interval
+        self.queue_size = queue_size
+        self.db_alerts = db_alerts
+        self._db_service_factory = db_service_factory or (lambda: create_database_service(use_local=USE_LOCAL_POSTGRES))
+        self._ids = itertools.count(1)
+        self._subscribers: Dict[int, _Subscriber] = {}
+        self._followers: Dict[str, LogFollower] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._stats: Optional[Dict[str, Any]] = None
+        self._summary: Optional[Dict[str, Any]] = None
+        self._throughput: Optional[Dict[str, Any]] = None
+        self._recent_alerts: Deque[Dict[str, Any]] = deque(maxlen=20)
+        self._pending_alerts: Deque[Dict[str, Any]] = deque(maxlen=500)  # Appended from relay threads
+        self._seen_alerts: "OrderedDict[str, None]" = OrderedDict()
+        self._alert_watermark: Optional[datetime] = None
+        self._db_alerts_retry_at = 0.0
+        self._counters: Optional[Dict[str, float]] = None
+        self._counters_at = 0.0
+        self._state: Dict[str, Any] = {
+            "ticks": 0,
+            "last_tick_ms": None,
+            "db_queries": 0,
+            "messages_sent": 0,
+            "dropped_messages": 0,
+            "last_error": None
+        }
+        result_index.add_listener(self._on_result)
+
+    # ============ SUBSCRIPTIONS ============
+
+    def subscribe(self) -> int:
+        """Register a client (call from the event loop); its queue starts with a snapshot"""
+        sub_id = next(self._ids)
+        subscriber = _Subscriber(self.queue_size)
+        self._subscribers[sub_id] = subscriber
+        subscriber.queue.put_nowait({
+            "type": "snapshot",
+            "interval": self.interval,
+            "stats": self._stats,
+            "db_summary": self._summary,
+            "throughput": self._throughput,
+            "alerts": list(self._recent_alerts)
+        })
+        if self._task is None or self._task.done():
+            if self._alert_watermark is None:
+                self._alert_watermark = datetime.now(timezone.utc)
+            self._task = asyncio.create_task(self._run())
+        return sub_id
+
+    def unsubscribe(self, sub_id: int):
+        subscriber = self._subscribers.pop(sub_id, None)
+        if subscriber:
+            for container in list(subscriber.logs):
+                self.unfollow_logs(sub_id, container, subscriber)
+
+    def queue(self, sub_id: int) -> asyncio.Queue:
+        return self._subscribers[sub_id].queue
+
+    async def follow_logs(self, sub_id: int, container: str):
+        """Stream a container's logs to this client (starts the shared follower if needed)"""
+        subscriber = self._subscribers.get(sub_id)
+        if subscriber is None:
+            return
+        if not container.startswith("tazama-"):
+            self._send(subscriber, {"type": "logs", "container": container, "error": "Invalid container name"})
+            return
+        follower = self._followers.get(container)
+        if follower is None:
+            follower = self._followers[container] = LogFollower(container)
+            try:
+                await follower.start()
+            except Exception as e:
+                self._followers.pop(container, None)
+                self._send(subscriber, {"type": "logs", "container": container, "error": str(e)})
+                return
+        subscriber.logs.add(container)
+        self._send(subscriber, {"type": "logs", "container": container, "lines": follower.tail(), "snapshot": True})
+
+    def unfollow_logs(self, sub_id: int, container: str, subscriber: Optional[_Subscriber] = None):
+        subscriber = subscriber or self._subscribers.get(sub_id)
+        if subscriber:
+            subscriber.logs.discard(container)
+        if not any(container in s.logs for s in self._subscribers.values()):
+            follower = self._followers.pop(container, None)
+            if follower:
+                follower.stop()
+
+    def _send(self, subscriber: _Subscriber, message: Dict[str, Any]):
+        """Queue a message, dropping the client's oldest one when it is not keeping up"""
+        if subscriber.queue.full():
+            subscriber.queue.get_nowait()
+            self._state["dropped_messages"] += 1
+        subscriber.queue.put_nowait(message)
+        self._state["messages_sent"] += 1
+
+    def _publish(self, message: Dict[str, Any]):
+        for subscriber in list(self._subscribers.values()):
+            self._send(subscriber, message)
+
+    # ============ AGGREGATION ============
+
+    def _on_result(self, entry: Dict[str, Any]):
+        if entry.get("status") == "ALRT" and entry.get("keys"):
+            self._pending_alerts.append({
+                "message_id": entry["keys"][0],
+                "tenant_id": entry.get("tenant_id"),
+                "evaluated_at": entry.get("timestamp"),
+                "typologies": [t["id"] for t in entry.get("typologies") or []],
+                "source": entry.get("source", "relay")
+            })
+
+    def _query_db_alerts(self) -> List[Dict[str, Any]]:
+        rows = query_evaluation_db(_DB_ALERTS_QUERY, (self._alert_watermark,))
+        if rows:
+            self._alert_watermark = rows[-1][2]
+        return [
+            {"message_id": message_id, "tenant_id": tenant_id or None, "evaluated_at": evaluated_at.isoformat(),
+             "typologies": list(typologies or []), "source": "db"}
+            for message_id, tenant_id, evaluated_at, typologies in rows
+        ]
+
+    def _new_alerts(self, alerts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Drop alerts already pushed (relay and DB report the same evaluation)"""
+        fresh = []
+        for alert in alerts:
+            if alert["message_id"] in self._seen_alerts:
+                continue
+            self._seen_alerts[alert["message_id"]] = None
+            fresh.append(alert)
+        while len(self._seen_alerts) > 5000:
+            self._seen_alerts.popitem(last=False)
+        return fresh
+
+    def _measure_throughput(self) -> Dict[str, Any]:
+        """Per-second rates since the previous tick from the in-process counters"""
+        now = time.monotonic()
+        counters: Dict[str, float] = {"results": float(result_index.stats()["results_received"]), "errors": 0.0}
+        for (message_type, status, _tenant), value in TMS_REQUESTS.totals().items():
+            counters[message_type] = counters.get(message_type, 0.0) + value
+            if not status.startswith("2"):
+                counters["errors"] += value
+        previous, elapsed = self._counters, now - self._counters_at
+        self._counters, self._counters_at = counters, now
+        if previous is None or elapsed <= 0:
+            return {"window_s": None, "tms_per_sec": {}, "tms_total_per_sec": 0.0, "tms_errors_per_sec": 0.0,
+                    "results_per_sec": 0.0, "in_flight": int(HTTP_IN_FLIGHT.value())}
+
+        def rate(key: str) -> float:
+            return round((counters.get(key, 0.0) - previous.get(key, 0.0)) / elapsed, 2)
+
+        per_type = {key: rate(key) for key in counters if key not in ("results", "errors")}
+        return {
+            "window_s": round(elapsed, 2),
+            "tms_per_sec": per_type,
+            "tms_total_per_sec": round(sum(per_type.values()), 2),
+            "tms_errors_per_sec": rate("errors"),
+            "results_per_sec": rate("results"),
+            "in_flight": int(HTTP_IN_FLIGHT.value())
+        }
+
+    async def _tick(self, include_summary: bool):
+        loop = asyncio.get_running_loop()
+        db_service = self._db_service_factory()
+
+        stats = await loop.run_in_executor(None, db_service.get_dashboard_stats)
+        self._state["db_queries"] += 1
+        delta = {k: v for k, v in stats.items() if self._stats is None or self._stats.get(k) != v}
+        if delta:
+            self._stats = stats
+            self._publish({"type": "stats", "delta": delta})
+
+        if include_summary:
+            summary = await loop.run_in_executor(None, db_service.get_transaction_summary)
+            self._state["db_queries"] += 1
+            if summary.get("status") == "success":
+                key = ("total_transactions", "debtors", "creditors")
+                if self._summary is None or any(self._summary.get(k) != summary.get(k) for k in key):
+                    self._summary = summary
+                    self._publish({"type": "db_summary", "data": summary})
+
+        self._throughput = self._measure_throughput()
+        self._publish({"type": "throughput", **self._throughput})
+
+        alerts = [self._pending_alerts.popleft() for _ in range(len(self._pending_alerts))]
+        if self.db_alerts and time.monotonic() >= self._db_alerts_retry_at:
+            try:
+                alerts += await loop.run_in_executor(None, self._query_db_alerts)
+                self._state["db_queries"] += 1
+            except Exception as e:
+                self._state["last_error"] = f"alerts: {e}"
+                self._db_alerts_retry_at = time.monotonic() + _DB_ALERTS_RETRY
+        alerts = self._new_alerts(alerts)
+        if alerts:
+            self._recent_alerts.extend(alerts)
+            self._publish({"type": "alerts", "alerts": alerts})
+
+        for container, follower in list(self._followers.items()):
+            lines = follower.drain()
+            if lines:
+                message = {"type": "logs", "container": container, "lines": lines}
+                for subscriber in list(self._subscribers.values()):
+                    if container in subscriber.logs:
+                        self._send(subscriber, message)
+
+    async def _run(self):
+        next_summary = 0.0
+        while self._subscribers:
+            start = time.monotonic()
+            include_summary = start >= next_summary
+            if include_summary:
+                next_summary = start + self.summary_interval
+            try:
+                await self._tick(include_summary)
+            except Exception as e:
+                self._state["last_error"] = str(e)
+            self._state["ticks"] += 1
+            elapsed = time.monotonic() - start
+            self._state["last_tick_ms"] = round(elapsed * 1000, 1)
+            await asyncio.sleep(max(0.0, self.interval - elapsed))
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "subscribers": len(self._subscribers),
+            "interval_seconds": self.interval,
+            "summary_interval_seconds": self.summary_interval,
+            "log_followers": sorted(self._followers),
+            "db_alerts": self.db_alerts,
+            **self._state
+        }
+
+    def stop(self):
+        """Stop the loop and log followers (application shutdown)"""
+        for follower in self._followers.values():
+            follower.stop()
+        self._followers.clear()
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+
+dashboard_hub = DashboardHub()
@@ -0,0 +1,374 @@
+"""
+NATS Injection Transport - Publish directly to the event director subject
+
+Bypasses the TMS HTTP hop (Fastify parsing, schema validation, DB writes) so
+benchmarks measure the rule pipeline in isolation. Messages are wrapped in
+the same envelope the TMS hands to the event director:
+
+    {"transaction": {...payload, "TenantId", "DataCache"}, "DataCache": {...},
+     "metaData": {"prcgTmDP": 0, "traceParent": null}}
+
+NOTE: The TMS also writes event_history (transaction, account, entity rows)
+and the pacs.008 DataCache to Redis. Injected messages skip those writes, so
+history-based rules (901/902/006/018) only see history that went through the
+TMS. Use this transport for pipeline throughput/latency, not rule accuracy.
+
+Encoding: the event director in this stack is fed by frms-coe-startup-lib.
+Builds that expect protobuf FRMSMessage buffers need NATS_INJECT_ENCODING=protobuf
+and NATS_PROTO_MODULE pointing at a Python module generated with protoc from
+frms-coe-lib's message.proto (not vendored here). Default is JSON.
+
+The publisher speaks the plain NATS text protocol over a socket (no extra
+dependency). A single send is flushed (PING/PONG) before it reports 200;
+inside run_bulk messages are only written and the batch is flushed once at
+the end, so the round-trip is not paid per message. Messages still unflushed
+when the socket is replaced are not resent (the server may already have
+some of them); the next flush() fails instead, so the batch is reported as
+unconfirmed. InProcessNatsServer is a minimal stand-in for tests and
+benchmarks without a nats-server.
+"""
+import contextvars
+import importlib
+import json
+import socket
+import socketserver
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from config import (
+    NATS_SERVER_URL, NATS_INJECT_SUBJECT, NATS_INJECT_ENCODING, NATS_PROTO_MODULE, REQUEST_TIMEOUT
+)
+from services.tms_client import TMSClient, TMSResult
+from utils.tenancy import current_tenant
+
+# True inside NatsTMSClient.run_bulk: publishes skip the flush, the batch flushes once
+_batch_flush = contextvars.ContextVar("nats_batch_flush", default=False)
+
+
+# ============ DATA CACHE (mirrors tms-service logic.service.ts) ============
+
+def _othr(node: dict) -> dict:
+    return ((node or {}).get("Id", {}).get("PrvtId", {}).get("Othr") or [{}])[0]
+
+
+def _acct(acct: dict, agent: dict) -> str:
+    othr = (acct or {}).get("Id", {}).get("Othr", [{}])[0]
+    mmb_id = (agent or {}).get("FinInstnId", {}).get("ClrSysMmbId", {}).get("MmbId", "")
+    return f"{othr.get('Id', '')}{othr.get('SchmeNm', {}).get('Prtry', '')}{mmb_id}"
+
+
+def _party(node: dict) -> str:
+    othr = _othr(node)
+    return f"{othr.get('Id', '')}{othr.get('SchmeNm', {}).get('Prtry', '')}"
+
+
+def build_data_cache(message_type: str, payload: dict) -> Optional[Dict[str, Any]]:
+    """Build the DataCache the TMS would attach for this message (pacs.002 returns None)"""
+    if message_type == "pacs008":
+        tx = payload["FIToFICstmrCdtTrf"]["CdtTrfTxInf"]
+        return {
+            "cdtrId": _party(tx.get("Cdtr")),
+            "dbtrId": _party(tx.get("Dbtr")),
+            "cdtrAcctId": _acct(tx.get("CdtrAcct"), tx.get("CdtrAgt")),
+            "dbtrAcctId": _acct(tx.get("DbtrAcct"), tx.get("DbtrAgt")),
+            "creDtTm": payload["FIToFICstmrCdtTrf"]["GrpHdr"].get("CreDtTm"),
+            "instdAmt": {"amt": tx.get("InstdAmt", {}).get("Amt", {}).get("Amt"),
+                         "ccy": tx.get("InstdAmt", {}).get("Amt", {}).get("Ccy")},
+            "intrBkSttlmAmt": {"amt": tx.get("IntrBkSttlmAmt", {}).get("Amt", {}).get("Amt"),
+                               "ccy": tx.get("IntrBkSttlmAmt", {}).get("Amt", {}).get("Ccy")},
+            "xchgRate": tx.get("XchgRate")
+        }
+    if message_type in ("pain001", "pain013"):
+        root = payload["CstmrCdtTrfInitn" if message_type == "pain001" else "CdtrPmtActvtnReq"]["PmtInf"]
+        tx = root["CdtTrfTxInf"]
+        return {
+            "cdtrId": _party(tx.get("Cdtr")),
+            "dbtrId": _party(root.get("Dbtr")),
+            "cdtrAcctId": _acct(tx.get("CdtrAcct"), tx.get("CdtrAgt")),
+            "dbtrAcctId": _acct(root.get("DbtrAcct"), root.get("DbtrAgt"))
+        }
+    return None
+
+
+def _end_to_end_id(message_type: str, payload: dict) -> Optional[str]:
+    if message_type == "pacs008":
+        return payload["FIToFICstmrCdtTrf"]["CdtTrfTxInf"]["PmtId"].get("EndToEndId")
+    if message_type == "pacs002":
+        return payload["FIToFIPmtSts"]["TxInfAndSts"].get("OrgnlEndToEndId")
+    return None
+
+
+def build_envelope(payload: dict, data_cache: Optional[dict], tenant_id: str) -> Dict[str, Any]:
+    """Wrap a message in the TMS -> event director envelope"""
+    transaction = {**payload, "TenantId": tenant_id}
+    if data_cache is not None:
+        transaction["DataCache"] = data_cache
+    return {
+        "transaction": transaction,
+        "DataCache": data_cache,
+        "metaData": {"prcgTmDP": 0, "traceParent": None}
+    }
+
+
+def load_encoder(encoding: str = NATS_INJECT_ENCODING,
+                 proto_module: str = NATS_PROTO_MODULE) -> Callable[[dict], bytes]:
+    """Return a function that serialises an envelope to bytes"""
+    if encoding == "json":
+        return lambda envelope: json.dumps(envelope, separators=(",", ":")).encode("utf-8")
+    if encoding == "protobuf":
+        if not proto_module:
+            raise ValueError("NATS_INJECT_ENCODING=protobuf requires NATS_PROTO_MODULE")
+        from google.protobuf.json_format import ParseDict
+        module = importlib.import_module(proto_module)
+
+        def encode(envelope: dict) -> bytes:
+            message = ParseDict(envelope, module.FRMSMessage(), ignore_unknown_fields=True)
+            return message.SerializeToString()
+        return encode
+    raise ValueError(f"Unknown NATS encoding: {encoding}")
+
+
+# ============ NATS PROTOCOL CLIENT ============
+
+class NatsPublisher:
+    """Minimal synchronous NATS publisher (core NATS text protocol)"""
+
+    def __init__(self, url: str = NATS_SERVER_URL, timeout: float = REQUEST_TIMEOUT):
+        parsed = urlparse(url if "://" in url else f"nats://{url}")
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 4222
+        self.timeout = timeout
+        self._sock: Optional[socket.socket] = None
+        self._reader = None
+        self._lock = threading.Lock()
+        self._unflushed = 0  # Written on the current socket since the last PONG
+        self._lost = 0       # Unflushed when their socket was dropped, reported by flush()
+
+    def _connect(self):
+        self._sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        self._reader = self._sock.makefile("rb")
+        info = self._reader.readline()
+        if not info.startswith(b"INFO"):
+            raise ConnectionError(f"Unexpected NATS greeting: {info[:80]!r}")
+        connect = {"verbose": False, "pedantic": False, "name": "tazama-api-client",
+                   "lang": "python", "version": "1.0", "protocol": 0}
+        self._sock.sendall(b"CONNECT " + json.dumps(connect).encode() + b"\r\n")
+        self._flush_locked()
+
+    def _flush_locked(self):
+        """Round-trip PING/PONG so the server has processed everything sent so far"""
+        self._sock.sendall(b"PING\r\n")
+        while True:
+            line = self._reader.readline()
+            if not line:
+                raise ConnectionError("NATS connection closed")
+            if line.startswith(b"PONG"):
+                self._unflushed = 0
+                return
+            if line.startswith(b"PING"):
+                self._sock.sendall(b"PONG\r\n")
+            elif line.startswith(b"-ERR"):
+                raise ConnectionError(line.decode(errors="replace").strip())
+
+    def publish(self, subject: str, data: bytes, flush: bool = False):
+        """
+        Publish one message; reconnects once if the connection dropped.
+        Without flush the message is only written to the socket (see flush()).
+        """
+        with self._lock:
+            for attempt in (1, 2):
+                try:
+                    if self._sock is None:
+                        self._connect()
+                    self._sock.sendall(b"PUB %s %d\r\n%s\r\n" % (subject.encode(), len(data), data))
+                    self._unflushed += 1
+                    if flush:
+                        self._flush_locked()
+                    return
+                except (OSError, ConnectionError):
+                    self._close_locked()
+                    if attempt == 2:
+                        raise
+
+    def flush(self):
+        """
+        PING/PONG round-trip: returns once the server has processed every publish
+        since the last flush. Raises ConnectionError if some of them went out on
+        a socket that was dropped before being flushed.
+        """
+        with self._lock:
+            try:
+                if self._sock is None:
+                    raise ConnectionError("NATS connection closed")
+                self._flush_locked()
+            except (OSError, ConnectionError):
+                self._close_locked()
+                self._lost = 0
+                raise
+            lost, self._lost = self._lost, 0
+            if lost:
+                raise ConnectionError(f"NATS connection dropped with {lost} unflushed message(s); delivery unconfirmed")
+
+    def _close_locked(self):
+        self._lost += self._unflushed
+        self._unflushed = 0
+        try:
+            if self._sock is not None:
+                self._sock.close()
+        except OSError:
+            pass
+        self._sock, self._reader = None, None
+
+    def close(self):
+        with self._lock:
+            self._close_locked()
+
+
+# ============ TRANSPORT ============
+
+class NatsTMSClient(TMSClient):
+    """
+    TMSClient variant that publishes to the event director subject instead of
+    POSTing to the TMS. Inherits send_*, retries, circuit breaker and the
+    adaptive limiter; only the single-attempt send is replaced.
+    """
+
+    def __init__(self, publisher: Optional[NatsPublisher] = None, subject: str = NATS_INJECT_SUBJECT,
+                 encoder: Optional[Callable[[dict], bytes]] = None, cache_size: int = 100000):
+        super().__init__()
+        self.publisher = publisher or NatsPublisher()
+        self.subject = subject
+        self.encoder = encoder or load_encoder()
+        self.cache_size = cache_size
+        # EndToEndId -> DataCache of injected pacs.008 (the TMS keeps this in Redis)
+        self._data_cache: "OrderedDict[str, dict]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+    def _data_cache_for(self, message_type: str, payload: dict) -> Optional[dict]:
+        e2e_id = _end_to_end_id(message_type, payload)
+        with self._cache_lock:
+            if message_type == "pacs002":
+                return self._data_cache.get(e2e_id)
+            data_cache = build_data_cache(message_type, payload)
+            if message_type == "pacs008" and e2e_id:
+                self._data_cache[e2e_id] = data_cache
+                while len(self._data_cache) > self.cache_size:
+                    self._data_cache.popitem(last=False)
+            return data_cache
+
+    def _send_once(self, message_type: str, payload: dict) -> TMSResult:
+        with self.limiter.slot() as sample:
+            start_time = datetime.now()
+            try:
+                envelope = build_envelope(payload, self._data_cache_for(message_type, payload),
+                                          current_tenant(self.tenant_id))
+                self.publisher.publish(self.subject, self.encoder(envelope), flush=not _batch_flush.get())
+                response_time = (datetime.now() - start_time).total_seconds() * 1000
+                sample["latency_ms"] = response_time
+                sample["status_code"] = 200
+                return TMSResult(200, response_time, {
+                    "message": "Published to NATS",
+                    "transport": "nats",
+                    "subject": self.subject
+                })
+            except (OSError, ConnectionError) as e:
+                response_time = (datetime.now() - start_time).total_seconds() * 1000
+                sample["latency_ms"] = response_time
+                return TMSResult(0, response_time, str(e), error_class="connect")
+            except Exception as e:
+                response_time = (datetime.now() - start_time).total_seconds() * 1000
+                sample["latency_ms"] = response_time
+                return TMSResult(0, response_time, str(e), error_class="error")
+
+    def run_bulk(self, tasks: Iterable[Callable[[], Any]]) -> List[Any]:
+        """
+        TMSClient.run_bulk with one flush for the whole batch instead of one per
+        message. If that flush fails, delivery of the batch is unconfirmed and
+        every result is replaced by the ConnectionError.
+        """
+        token = _batch_flush.set(True)
+        try:
+            results = super().run_bulk(tasks)
+        finally:
+            _batch_flush.reset(token)
+        if not results:
+            return results
+        try:
+            self.publisher.flush()
+        except (OSError, ConnectionError) as e:
+            error = e if isinstance(e, ConnectionError) else ConnectionError(str(e))
+            return [r if isinstance(r, Exception) else error for r in results]
+        return results
+
+
+# ============ IN-PROCESS STAND-IN ============
+
+class _StandInTCPServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+class InProcessNatsServer:
+    """
+    Tiny NATS stand-in (INFO / CONNECT / PUB / PING) that records published
+    messages. Usage:
+
+        server = InProcessNatsServer().start()
+        client = NatsTMSClient(NatsPublisher(server.url))
+        ...
+        server.messages  # [(subject, bytes), ...]
+        server.stop()
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self.messages: List[Tuple[str, bytes]] = []
+        self.pings = 0
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+        self._address = (host, port)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"nats://{host}:{port}"
+
+    def start(self) -> "InProcessNatsServer":
+        stand_in = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                self.wfile.write(b'INFO {"server_id":"in-process","version":"0.0.0","max_payload":8388608}\r\n')
+                while True:
+                    line = self.rfile.readline()
+                    if not line:
+                        return
+                    op = line.split(b" ", 1)[0].strip().upper()
+                    if op == b"PING":
+                        with stand_in._lock:
+                            stand_in.pings += 1
+                        self.wfile.write(b"PONG\r\n")
+                    elif op == b"PUB":
+                        parts = line.split()
+                        size = int(parts[-1])
+                        data = self.rfile.read(size + 2)[:size]
+                        with stand_in._lock:
+                            stand_in.messages.append((parts[1].decode(), data))
+
+        self._server = _StandInTCPServer(self._address, Handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def decoded(self) -> List[Tuple[str, Any]]:
+        """Published messages with JSON payloads decoded"""
+        with self._lock:
+            return [(subject, json.loads(data)) for subject, data in self.messages]
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
@@ -0,0 +1,237 @@
+"""
+Transaction Partitioning - time-partitioned event_history.transaction
+
+The partitioning logic lives in the database as plpgsql functions
+(init-db/07-partition-transaction.sql); this module installs them on
+existing databases, runs the migration and keeps partitions rolling:
+
+- migrate()   copies transaction into a table range-partitioned on CreDtTm
+              (old table kept as transaction_unpartitioned unless drop_old).
+              Opt-in (partition_migrate.py), never run by init-db
+- maintain()  creates partitions PARTITION_PREMAKE periods ahead and drops
+              those older than PARTITION_RETENTION periods (0 keeps all)
+- PartitionMaintainer runs maintain() every PARTITION_MAINTENANCE_INTERVAL seconds
+
+The materialized summary views (services.summary_views) read transaction,
+so migrate() drops and rebuilds them around the table swap (also when the
+swap fails).
+
+The partition key is the expression (transaction->>'CreDtTm'): Postgres
+does not accept the generated creDtTm column as a key. Only queries that
+repeat the expression (credttm_condition in the API queries) are pruned;
+Tazama's rule history lookups filter on the creDtTm column and still scan
+every partition. They only gain smaller per-partition indexes, while
+retention drops whole partitions instead of running large DELETEs.
+
+Rows outside every partition land in transaction_default; the functions move
+them into a partition when one is created for their range, and status()
+reports how many are left there.
+
+A partitioned table cannot hold the old primary key (endToEndId, txTp,
+tenantId) or unique (msgId, tenantId) without the partition key, so the
+migration moves them to transaction_key, filled by a trigger on
+transaction: duplicates are still rejected with unique_violation.
+"""
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from config import (
+    USE_LOCAL_POSTGRES, PARTITION_INTERVAL, PARTITION_PREMAKE, PARTITION_RETENTION,
+    PARTITION_MAINTENANCE_INTERVAL, PARTITION_SQL_PATH, PARTITION_MIGRATION_TIMEOUT
+)
+from services.database_query_service import DatabaseQueryService, create_database_service
+from services import summary_views
+
+INTERVALS = ("day", "month")
+
+_STATUS_SQL = """
+SELECT
+    to_regclass('transaction') IS NOT NULL,
+    EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass('transaction')),
+    to_regproc('ensure_transaction_partitions') IS NOT NULL,
+    to_regclass('transaction_unpartitioned') IS NOT NULL,
+    to_regclass('transaction_key') IS NOT NULL,
+    to_regclass('transaction_default') IS NOT NULL;
+"""
+
+_DEFAULT_ROWS_SQL = "SELECT count(*) FROM transaction_default;"
+
+_PARTITIONS_SQL = """
+SELECT c.relname, pg_get_expr(c.relpartbound, c.oid), c.reltuples::bigint, pg_total_relation_size(c.oid)
+FROM pg_inherits i
+JOIN pg_class c ON c.oid = i.inhrelid
+WHERE i.inhparent = 'transaction'::regclass
+ORDER BY c.relname;
+"""
+
+_state: Dict[str, Any] = {
+    "last_maintenance": None,
+    "last_created": [],
+    "last_dropped": [],
+    "last_error": None
+}
+
+
+def _service(db_service: Optional[DatabaseQueryService] = None) -> DatabaseQueryService:
+    return db_service or create_database_service(use_local=USE_LOCAL_POSTGRES)
+
+
+def _execute(db_service: DatabaseQueryService, query: str, timeout: int = 10, format_csv: bool = False) -> str:
+    result = db_service.strategy.execute_query(query, format_csv=format_csv, timeout=timeout)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip())
+    return result.stdout
+
+
+def _lines(output: str) -> List[str]:
+    return [line for line in output.strip().split('\n') if line]
+
+
+def _check_interval(interval: str):
+    if interval not in INTERVALS:
+        raise ValueError(f"interval must be one of {', '.join(INTERVALS)}")
+
+
+def functions_sql(path: str = PARTITION_SQL_PATH) -> str:
+    """The init-db partition functions without psql meta-commands (\\connect), for psql -c"""
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"{path} not found (set PARTITION_SQL_PATH)")
+    with open(path) as f:
+        return "".join(line for line in f if not line.lstrip().startswith("\\"))
+
+
+def install(db_service: Optional[DatabaseQueryService] = None):
+    """Create / replace the partition functions in event_history"""
+    _execute(_service(db_service), functions_sql())
+
+
+def status(db_service: Optional[DatabaseQueryService] = None) -> Dict[str, Any]:
+    """Whether transaction is partitioned, and its partitions with bounds, estimated rows and size"""
+    db_service = _service(db_service)
+    flags = _execute(db_service, _STATUS_SQL, format_csv=True).strip().split(',')
+    exists, partitioned, installed, old_table, keys, default = (flag == "t" for flag in flags)
+    partitions = []
+    default_rows = None
+    if partitioned:
+        if default:
+            default_rows = int(_execute(db_service, _DEFAULT_ROWS_SQL).strip() or 0)
+        for line in _lines(_execute(db_service, _PARTITIONS_SQL, format_csv=True)):
+            name, bound, rows, size = line.split(',')
+            partitions.append({
+                "name": name,
+                "bound": bound,
+                "estimated_rows": max(0, int(rows or 0)),
+                "size_bytes": int(size or 0)
+            })
+    return {
+        "table_exists": exists,
+        "partitioned": partitioned,
+        "functions_installed": installed,
+        "unpartitioned_copy": old_table,
+        "unique_keys_enforced": keys,
+        "default_partition_rows": default_rows,
+        "interval": PARTITION_INTERVAL,
+        "premake": PARTITION_PREMAKE,
+        "retention": PARTITION_RETENTION,
+        "partitions": partitions,
+        **_state
+    }
+
+
+def migrate(interval: str = PARTITION_INTERVAL, ahead: int = PARTITION_PREMAKE, drop_old: bool = False,
+            db_service: Optional[DatabaseQueryService] = None) -> Dict[str, Any]:
+    """
+    Swap transaction for a partitioned copy (no-op if already partitioned)
+
+    Runs in one database transaction, so writers block on the table for the
+    duration of the copy: schedule it while Tazama is idle.
+    """
+    _check_interval(interval)
+    db_service = _service(db_service)
+    start = time.perf_counter()
+    install(db_service)
+
+    try:
+        rebuild_views = summary_views.check_ready(db_service)
+    except Exception:
+        rebuild_views = False
+    if rebuild_views:
+        _execute(db_service, "DROP MATERIALIZED VIEW IF EXISTS "
+                             + ", ".join(reversed(summary_views.VIEWS)) + ";")
+        summary_views.mark_dropped()
+
+    try:
+        copied = int(_execute(
+            db_service, f"SELECT partition_transaction_table('{interval}', {int(ahead)});",
+            timeout=PARTITION_MIGRATION_TIMEOUT
+        ).strip() or 0)
+    finally:
+        # On failure the migration rolled back, so the views go back on the original table
+        if rebuild_views:
+            summary_views.setup(db_service)
+    if drop_old:
+        _execute(db_service, "DROP TABLE IF EXISTS transaction_unpartitioned;", timeout=PARTITION_MIGRATION_TIMEOUT)
+
+    return {
+        "interval": interval,
+        "rows_copied": copied,
+        "summary_views_rebuilt": rebuild_views,
+        "unpartitioned_copy_dropped": drop_old,
+        "migration_ms": round((time.perf_counter() - start) * 1000, 1)
+    }
+
+
+def maintain(interval: str = PARTITION_INTERVAL, ahead: int = PARTITION_PREMAKE,
+             retention: int = PARTITION_RETENTION,
+             db_service: Optional[DatabaseQueryService] = None) -> Dict[str, Any]:
+    """Create upcoming partitions and drop expired ones (skipped unless transaction is partitioned)"""
+    _check_interval(interval)
+    db_service = _service(db_service)
+    flags = _execute(db_service, _STATUS_SQL, format_csv=True).strip().split(',')
+    if len(flags) < 3 or flags[1] != "t":
+        return {"status": "skipped", "message": "transaction is not partitioned (run partition_migrate.py)"}
+    if flags[2] != "t":
+        install(db_service)
+
+    created = _lines(_execute(db_service, f"SELECT ensure_transaction_partitions('{interval}', {int(ahead)});"))
+    dropped = []
+    if retention > 0:
+        dropped = _lines(_execute(
+            db_service, f"SELECT drop_transaction_partitions('{interval}', {int(retention)});",
+            timeout=PARTITION_MIGRATION_TIMEOUT
+        ))
+    _state.update(last_maintenance=datetime.now().isoformat(), last_created=created, last_dropped=dropped,
+                  last_error=None)
+    return {"status": "success", "created": created, "dropped": dropped}
+
+
+class PartitionMaintainer:
+    """Daemon thread running maintain() every `interval` seconds"""
+
+    def __init__(self, interval: float = PARTITION_MAINTENANCE_INTERVAL):
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                maintain()
+            except Exception as e:
+                _state["last_error"] = str(e)
+
+    def start(self):
+        if self.interval > 0 and (self._thread is None or not self._thread.is_alive()):
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="partition-maintenance", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread = None
+
+
+partition_maintainer = PartitionMaintainer()
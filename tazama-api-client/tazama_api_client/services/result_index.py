@@ -0,0 +1,255 @@
+"""
+Result Index - In-memory store of relayed Tazama evaluation results
+
+The TADP hands every completed evaluation (CMSRequest) to the relay services:
+
+    {"message": "...", "report": {"evaluationID", "status": "ALRT" | "NALT",
+     "timestamp", "tadpResult": {"typologyResult": [{"ruleResults": [...]}]}},
+     "transaction": {...pacs.008 / pacs.002}, "networkMap": {...}}
+
+relay-service-integration-rest POSTs it to our webhook and the Kafka relay puts
+it on a topic. Either way the result lands here, indexed by MsgId, OrgnlMsgId
+and EndToEndId, so simulation routes can wait for exactly the transactions they
+sent instead of sleeping and scraping docker logs / polling the evaluation DB.
+
+Send helpers call expect() before submitting a pacs.008, which lets the index
+report detection latency (submit -> result received) per transaction.
+"""
+import asyncio
+import importlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from config import RELAY_RESULT_INDEX_SIZE, NATS_PROTO_MODULE
+
+
+# ============ RESULT PARSING ============
+
+def _transaction_body(transaction: Dict[str, Any]):
+    """Return (message root name, body) of a relayed transaction"""
+    for root in ("FIToFIPmtSts", "FIToFICstmrCdtTrf", "CstmrCdtTrfInitn", "CdtrPmtActvtnReq"):
+        if isinstance(transaction.get(root), dict):
+            return root, transaction[root]
+    return None, {}
+
+
+def extract_result_keys(result: Dict[str, Any]) -> List[str]:
+    """MsgId / OrgnlMsgId / EndToEndId values that identify a relayed result"""
+    _, body = _transaction_body(result.get("transaction") or {})
+    keys = [body.get("GrpHdr", {}).get("MsgId")]
+
+    tx_sts = body.get("TxInfAndSts")
+    if isinstance(tx_sts, dict):
+        keys += [tx_sts.get("OrgnlInstrId"), tx_sts.get("OrgnlEndToEndId")]
+
+    cdt_trf = body.get("CdtTrfTxInf")
+    if isinstance(cdt_trf, dict):
+        keys.append(cdt_trf.get("PmtId", {}).get("EndToEndId"))
+
+    return [k for k in dict.fromkeys(keys) if k]
+
+
+def summarize_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Flatten a CMSRequest into the fields simulation routes care about"""
+    report = result.get("report") or {}
+    tadp = report.get("tadpResult") or {}
+    root, body = _transaction_body(result.get("transaction") or {})
+
+    typologies = []
+    rule_results = []
+    for typology in tadp.get("typologyResult") or []:
+        typologies.append({
+            "id": typology.get("cfg") or typology.get("id"),
+            "result": typology.get("result"),
+            "review": typology.get("review")
+        })
+        for rule in typology.get("ruleResults") or []:
+            rule_ref = rule.get("id") or ""
+            rule_results.append({
+                "rule_id": rule_ref.split("@")[0],
+                "id": rule_ref,
+                "sub_rule_ref": rule.get("subRuleRef"),
+                "reason": rule.get("reason"),
+                "weight": rule.get("wght"),
+                "indpdnt_varbl": rule.get("indpdntVarbl"),
+                "prcg_tm": rule.get("prcgTm")
+            })
+
+    return {
+        "evaluation_id": report.get("evaluationID"),
+        "status": report.get("status"),
+        "timestamp": report.get("timestamp"),
+        "message_type": root,
+        "tenant_id": (result.get("transaction") or {}).get("TenantId"),
+        "keys": extract_result_keys(result),
+        "tadp_prcg_tm": tadp.get("prcgTm"),
+        "typologies": typologies,
+        "rule_results": rule_results
+    }
+
+
+def load_decoder(proto_module: str = NATS_PROTO_MODULE) -> Callable[[bytes], Dict[str, Any]]:
+    """
+    Return a function that turns a relayed body into a CMSRequest dict
+
+    Relays started with OUTPUT_TO_JSON send JSON; otherwise the body is a
+    protobuf FRMSMessage, which needs NATS_PROTO_MODULE (see nats_transport).
+    """
+    message_cls = None
+    if proto_module:
+        message_cls = importlib.import_module(proto_module).FRMSMessage
+
+    def decode(body: bytes) -> Dict[str, Any]:
+        try:
+            return json.loads(body)
+        except (UnicodeDecodeError, json.JSONDecodeError):
+            if message_cls is None:
+                raise ValueError("Relayed body is not JSON; set OUTPUT_TO_JSON on the relay "
+                                 "or NATS_PROTO_MODULE for protobuf results")
+        from google.protobuf.json_format import MessageToDict
+        message = message_cls()
+        message.ParseFromString(body)
+        return MessageToDict(message, preserving_proto_field_name=True)
+    return decode
+
+
+# ============ INDEX ============
+
+class ResultIndex:
+    """Thread-safe, size-bounded index of relayed results keyed by message id"""
+
+    def __init__(self, max_entries: int = RELAY_RESULT_INDEX_SIZE):
+        """
+        Args:
+            max_entries: Results (and pending submissions) kept before the oldest are evicted
+        """
+        self.max_entries = max_entries
+        self._results: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._submitted: "OrderedDict[str, float]" = OrderedDict()
+        self._received = 0
+        self._duplicates = 0
+        self._cond = threading.Condition()
+        self._listeners: List[Callable[[Dict[str, Any]], None]] = []
+
+    def add_listener(self, callback: Callable[[Dict[str, Any]], None]):
+        """Call callback(entry) for every indexed result (e.g. detection latency tracking)"""
+        self._listeners.append(callback)
+
+    def expect(self, *keys: Optional[str], submitted_at: Optional[float] = None):
+        """Record the submit time of a transaction we are about to send"""
+        submitted_at = submitted_at or time.time()
+        with self._cond:
+            for key in keys:
+                if not key:
+                    continue
+                self._submitted[key] = submitted_at
+                self._submitted.move_to_end(key)
+            while len(self._submitted) > self.max_entries:
+                self._submitted.popitem(last=False)
+
+    def ingest(self, result: Dict[str, Any], source: str = "webhook") -> Optional[Dict[str, Any]]:
+        """
+        Store a relayed CMSRequest and wake up routes waiting for it
+
+        Returns:
+            The indexed entry, or None if the result carries no usable id
+        """
+        received_at = time.time()
+        entry = summarize_result(result)
+        keys = entry["keys"]
+        if not keys:
+            return None
+
+        with self._cond:
+            submitted_at = next((self._submitted[k] for k in keys if k in self._submitted), None)
+            entry["source"] = source
+            entry["received_at"] = received_at
+            entry["detection_latency_ms"] = (
+                round((received_at - submitted_at) * 1000, 2) if submitted_at else None
+            )
+
+            if any(k in self._results for k in keys):
+                self._duplicates += 1
+            for key in keys:
+                self._results[key] = entry
+                self._results.move_to_end(key)
+            while len(self._results) > self.max_entries:
+                self._results.popitem(last=False)
+
+            self._received += 1
+            self._cond.notify_all()
+
+        for callback in self._listeners:
+            callback(entry)
+        return entry
+
+    def ingest_many(self, results: Iterable[Dict[str, Any]], source: str) -> int:
+        """Ingest a batch of results; returns how many were indexed"""
+        return sum(1 for result in results if self.ingest(result, source) is not None)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._cond:
+            return self._results.get(key)
+
+    def wait_for(self, keys: Iterable[str], timeout: float) -> Dict[str, Dict[str, Any]]:
+        """Block until every key has a result or timeout expires; returns what arrived"""
+        keys = [k for k in keys if k]
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while True:
+                found = {k: self._results[k] for k in keys if k in self._results}
+                remaining = deadline - time.monotonic()
+                if len(found) == len(keys) or remaining <= 0:
+                    return found
+                self._cond.wait(remaining)
+
+    async def wait_for_async(self, keys: Iterable[str], timeout: float) -> Dict[str, Dict[str, Any]]:
+        """wait_for() off the event loop, so the webhook route can keep ingesting"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.wait_for, list(keys), timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "indexed_keys": len(self._results),
+                "pending_submissions": len(self._submitted),
+                "results_received": self._received,
+                "duplicate_results": self._duplicates,
+                "max_entries": self.max_entries
+            }
+
+    def clear(self):
+        with self._cond:
+            self._results.clear()
+            self._submitted.clear()
+            self._received = 0
+            self._duplicates = 0
+
+
+def summarize_detection(keys: List[str], found: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Aggregate awaited results: counts, alert status and detection latency"""
+    latencies = sorted(
+        e["detection_latency_ms"] for e in found.values() if e.get("detection_latency_ms") is not None
+    )
+    latency = None
+    if latencies:
+        latency = {
+            "min": latencies[0],
+            "avg": round(sum(latencies) / len(latencies), 2),
+            "p95": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+            "max": latencies[-1]
+        }
+    return {
+        "expected": len(keys),
+        "received": len(found),
+        "missing": [k for k in keys if k not in found],
+        "alerts": sum(1 for e in found.values() if e.get("status") == "ALRT"),
+        "detection_latency_ms": latency
+    }
+
+
+# Singleton instance shared by the webhook, Kafka consumer and simulation routes
+result_index = ResultIndex()
@@ -0,0 +1,233 @@
+"""
+Rule Analytics - processing time, throughput and error rates per rule / typology
+
+Every rule result in evaluation.evaluation carries prcgTm (nanoseconds,
+process.hrtime in the rule executer) and subRuleRef (".err" when the rule
+failed), but digging them out of the JSONB per query does not scale. setup()
+creates two flattened tables in the evaluation DB:
+
+    evaluation_rule_result      one row per (evaluation, rule)
+    evaluation_typology_result  one row per (evaluation, typology cfg)
+
+kept current by an AFTER INSERT trigger on evaluation and backfilled from the
+existing rows. Indexes on evaluatedAt that INCLUDE every aggregated column let
+the window queries run as index-only range scans. The trigger swallows its own errors
+(RAISE WARNING) so it can never block the TADP from writing evaluations.
+"""
+from typing import Any, Dict, List, Optional
+
+from services.database_query_service import query_evaluation_db
+
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS evaluation_rule_result (
+    messageId text NOT NULL,
+    tenantId text NOT NULL DEFAULT '',
+    evaluationId text,
+    evaluatedAt timestamptz NOT NULL DEFAULT now(),
+    status text,
+    ruleId text NOT NULL,
+    ruleCfg text NOT NULL DEFAULT '',
+    subRuleRef text,
+    prcgTm bigint,
+    PRIMARY KEY (messageId, tenantId, ruleId, ruleCfg)
+);
+CREATE INDEX IF NOT EXISTS idx_evaluation_rule_result_time
+    ON evaluation_rule_result (evaluatedAt) INCLUDE (ruleId, ruleCfg, subRuleRef, prcgTm, tenantId);
+
+CREATE TABLE IF NOT EXISTS evaluation_typology_result (
+    messageId text NOT NULL,
+    tenantId text NOT NULL DEFAULT '',
+    evaluationId text,
+    evaluatedAt timestamptz NOT NULL DEFAULT now(),
+    status text,
+    typologyId text NOT NULL,
+    processor text,
+    result numeric,
+    review boolean,
+    prcgTm bigint,
+    ruleCount int,
+    errorCount int,
+    PRIMARY KEY (messageId, tenantId, typologyId)
+);
+CREATE INDEX IF NOT EXISTS idx_evaluation_typology_result_time
+    ON evaluation_typology_result (evaluatedAt) INCLUDE (typologyId, errorCount, review, prcgTm, tenantId);
+
+CREATE OR REPLACE FUNCTION try_timestamptz(value text) RETURNS timestamptz AS $$
+BEGIN
+    RETURN value::timestamptz;
+EXCEPTION WHEN others THEN
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+CREATE OR REPLACE FUNCTION try_bigint(value text) RETURNS bigint AS $$
+BEGIN
+    RETURN value::numeric::bigint;
+EXCEPTION WHEN others THEN
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql IMMUTABLE;
+
+CREATE OR REPLACE FUNCTION flatten_evaluation(doc jsonb, evaluated_at timestamptz) RETURNS void AS $$
+DECLARE
+    message_id text := COALESCE(
+        doc->'transaction'->'FIToFIPmtSts'->'GrpHdr'->>'MsgId',
+        doc->'transaction'->'FIToFICstmrCdtTrf'->'GrpHdr'->>'MsgId',
+        doc->'report'->>'evaluationID'
+    );
+    tenant_id text := COALESCE(doc->'transaction'->>'TenantId', '');
+BEGIN
+    IF message_id IS NULL THEN
+        RETURN;
+    END IF;
+
+    -- A rule shared by several typologies ran once; keep one row per rule
+    INSERT INTO evaluation_rule_result
+        (messageId, tenantId, evaluationId, evaluatedAt, status, ruleId, ruleCfg, subRuleRef, prcgTm)
+    SELECT DISTINCT ON (r->>'id', COALESCE(r->>'cfg', ''))
+        message_id, tenant_id, doc->'report'->>'evaluationID', evaluated_at, doc->'report'->>'status',
+        r->>'id', COALESCE(r->>'cfg', ''), r->>'subRuleRef', try_bigint(r->>'prcgTm')
+    FROM jsonb_array_elements(COALESCE(doc->'report'->'tadpResult'->'typologyResult', '[]'::jsonb)) t,
+         jsonb_array_elements(COALESCE(t->'ruleResults', '[]'::jsonb)) r
+    WHERE r->>'id' IS NOT NULL
+    ON CONFLICT DO NOTHING;
+
+    INSERT INTO evaluation_typology_result
+        (messageId, tenantId, evaluationId, evaluatedAt, status, typologyId, processor,
+         result, review, prcgTm, ruleCount, errorCount)
+    SELECT DISTINCT ON (COALESCE(t->>'cfg', t->>'id'))
+        message_id, tenant_id, doc->'report'->>'evaluationID', evaluated_at, doc->'report'->>'status',
+        COALESCE(t->>'cfg', t->>'id'), t->>'id',
+        CASE WHEN jsonb_typeof(t->'result') = 'number' THEN (t->>'result')::numeric END,
+        CASE WHEN jsonb_typeof(t->'review') = 'boolean' THEN (t->>'review')::boolean END,
+        try_bigint(t->>'prcgTm'),
+        jsonb_array_length(COALESCE(t->'ruleResults', '[]'::jsonb)),
+        (SELECT count(*) FROM jsonb_array_elements(COALESCE(t->'ruleResults', '[]'::jsonb)) r
+          WHERE r->>'subRuleRef' = '.err')
+    FROM jsonb_array_elements(COALESCE(doc->'report'->'tadpResult'->'typologyResult', '[]'::jsonb)) t
+    WHERE COALESCE(t->>'cfg', t->>'id') IS NOT NULL
+    ON CONFLICT DO NOTHING;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION flatten_evaluation_trigger() RETURNS trigger AS $$
+BEGIN
+    PERFORM flatten_evaluation(NEW.evaluation, now());
+    RETURN NEW;
+EXCEPTION WHEN others THEN
+    RAISE WARNING 'flatten_evaluation failed: %', SQLERRM;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_flatten_evaluation ON evaluation;
+CREATE TRIGGER trg_flatten_evaluation
+    AFTER INSERT ON evaluation
+    FOR EACH ROW EXECUTE FUNCTION flatten_evaluation_trigger();
+"""
+
+# Existing evaluations: use the report timestamp (falls back to now() if unparsable)
+BACKFILL_SQL = """
+SELECT count(*) FROM (
+    SELECT flatten_evaluation(
+        evaluation,
+        COALESCE(try_timestamptz(evaluation->'report'->>'timestamp'), now())
+    )
+    FROM evaluation
+) flattened
+"""
+
+_GROUPS = {
+    "rule": {
+        "table": "evaluation_rule_result",
+        "key": "ruleId",
+        "errors": "count(*) FILTER (WHERE subRuleRef = '.err')",
+        "extra": "count(DISTINCT ruleCfg)"
+    },
+    "typology": {
+        "table": "evaluation_typology_result",
+        "key": "typologyId",
+        "errors": "count(*) FILTER (WHERE errorCount > 0)",
+        "extra": "count(*) FILTER (WHERE review)"
+    }
+}
+
+_PERFORMANCE_SQL = """
+SELECT
+    {key} as id,
+    count(*) as evaluations,
+    {errors} as errors,
+    {extra} as extra,
+    percentile_cont(ARRAY[0.5, 0.9, 0.95, 0.99]) WITHIN GROUP (ORDER BY prcgTm)
+        FILTER (WHERE prcgTm >= 0) as pct_ns,
+    avg(prcgTm) FILTER (WHERE prcgTm >= 0) as avg_ns,
+    max(prcgTm) as max_ns,
+    min(evaluatedAt) as first_at,
+    max(evaluatedAt) as last_at
+FROM {table}
+WHERE evaluatedAt >= now() - make_interval(secs => %s)
+  {tenant_filter}
+GROUP BY {key}
+"""
+
+
+# prcgTm is nanoseconds; report milliseconds
+def _ms(value_ns) -> Optional[float]:
+    return round(float(value_ns) / 1e6, 3) if value_ns is not None else None
+
+
+def setup(backfill: bool = True) -> Dict[str, Any]:
+    """Create (or update) the flattened tables and trigger; optionally backfill existing evaluations"""
+    query_evaluation_db(SCHEMA_SQL, commit=True)
+    result = {"tables": [g["table"] for g in _GROUPS.values()], "trigger": "trg_flatten_evaluation"}
+    if backfill:
+        rows = query_evaluation_db(BACKFILL_SQL, commit=True)
+        result["backfilled_evaluations"] = rows[0][0] if rows else 0
+    return result
+
+
+def processing_time_stats(group_by: str = "rule", seconds: int = 3600,
+                          tenant_id: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Processing-time percentiles, throughput and error rate per rule or typology
+
+    Args:
+        group_by: "rule" or "typology"
+        seconds: Window length (evaluations written in the last N seconds)
+        tenant_id: Only this tenant's evaluations
+
+    Returns:
+        One dict per rule / typology, slowest p95 first
+    """
+    group = _GROUPS[group_by]
+    query = _PERFORMANCE_SQL.format(
+        tenant_filter="AND tenantId = %s" if tenant_id else "",
+        **group
+    )
+    params = (seconds, tenant_id) if tenant_id else (seconds,)
+
+    stats = []
+    for row_id, evaluations, errors, extra, pct_ns, avg_ns, max_ns, first_at, last_at in \
+            query_evaluation_db(query, params):
+        p50, p90, p95, p99 = pct_ns or (None, None, None, None)
+        entry = {
+            "id": row_id,
+            "evaluations": evaluations,
+            "throughput_per_sec": round(evaluations / seconds, 3),
+            "errors": errors,
+            "error_rate": round(errors / evaluations, 4) if evaluations else 0.0,
+            "prcg_tm_ms": {
+                "avg": _ms(avg_ns), "p50": _ms(p50), "p90": _ms(p90),
+                "p95": _ms(p95), "p99": _ms(p99), "max": _ms(max_ns)
+            },
+            "first_at": first_at.isoformat() if first_at else None,
+            "last_at": last_at.isoformat() if last_at else None
+        }
+        if group_by == "rule":
+            entry["configs"] = extra
+        else:
+            entry["reviews"] = extra
+        stats.append(entry)
+
+    stats.sort(key=lambda s: s["prcg_tm_ms"]["p95"] or 0, reverse=True)
+    return stats
@@ -0,0 +1,452 @@
+"""
+Offline Rule Evaluator - Vectorised expected outcomes for rules 901/902/006/018/903
+
+Replays the rule processors' semantics over columnar transaction arrays with
+NumPy, so millions of historical rows can be checked against Tazama's output
+in seconds instead of being re-sent through the pipeline.
+
+Semantics (per pacs.008, evaluated when its pacs.002 confirmation arrives):
+- 901: debtor transactions within maxQueryRange (incl. current)        -> bands
+- 902: creditor transactions within maxQueryRange (incl. current)      -> bands
+- 006: of the debtor's last maxQueryLimit transactions in range, how many are
+       within tolerance of the current amount (incl. current)          -> bands
+- 018: current amount / average of the debtor's earlier amounts in range -> bands
+- 903: city (or lat/long bounding box) against riskZones               -> .01 / .02 / .03
+
+Bands follow frms-coe-lib determineOutcome(): first band where
+(!lowerLimit || value >= lowerLimit) && (!upperLimit || value < upperLimit).
+
+Thresholds default to the rule configs shipped in init-db (and the RULE_*
+constants in config.py); fetch_rule_configs() reads the live configuration.rule
+table instead.
+
+Usage:
+    columns = load_transaction_columns(create_database_service(USE_LOCAL_POSTGRES))
+    evaluation = evaluate_rules(columns, thresholds_from_rule_configs(fetch_rule_configs()))
+    alerts = expected_alerts(columns, evaluation)
+"""
+import csv
+import io
+import json
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from config import (
+    RULE_006_WINDOW_HOURS, RULE_006_MIN_TRANSACTIONS, RULE_006_SIMILARITY, RULE_018_MULTIPLIER,
+    USE_LOCAL_POSTGRES
+)
+from utils.geo_index import geo_index, DEFAULT_RISK_ZONES
+from utils.tenancy import sql_literal
+
+DAY_MS = 86400000
+
+# Rule configs as loaded by init-db (03-rule-config.sql, 05-setup-extra-rules.sql, 06-setup-rule-903.sql)
+DEFAULT_RULE_THRESHOLDS: Dict[str, Dict[str, Any]] = {
+    "901": {
+        "parameters": {"maxQueryRange": DAY_MS},
+        "bands": [
+            {"subRuleRef": ".01", "upperLimit": 2},
+            {"subRuleRef": ".02", "lowerLimit": 2, "upperLimit": 3},
+            {"subRuleRef": ".03", "lowerLimit": 3},
+        ],
+        "alert": ".03"
+    },
+    "902": {
+        "parameters": {"maxQueryRange": DAY_MS},
+        "bands": [
+            {"subRuleRef": ".01", "upperLimit": 2},
+            {"subRuleRef": ".02", "lowerLimit": 2, "upperLimit": 3},
+            {"subRuleRef": ".03", "lowerLimit": 3},
+        ],
+        "alert": ".03"
+    },
+    "006": {
+        "parameters": {
+            "maxQueryLimit": 5,
+            "tolerance": round(1 - RULE_006_SIMILARITY, 4),
+            "maxQueryRange": RULE_006_WINDOW_HOURS * 3600000
+        },
+        "bands": [
+            {"subRuleRef": ".01", "upperLimit": 5},
+            {"subRuleRef": ".02", "lowerLimit": 5},
+        ],
+        "alert": ".02"
+    },
+    "018": {
+        "parameters": {"maxQueryRange": 30 * DAY_MS},
+        "bands": [
+            {"subRuleRef": ".01", "upperLimit": RULE_018_MULTIPLIER},
+            {"subRuleRef": ".02", "lowerLimit": RULE_018_MULTIPLIER},
+        ],
+        "alert": ".02"
+    },
+    "903": {
+        "parameters": {
+            "riskZones": DEFAULT_RISK_ZONES
+        },
+        "alert": ".01"
+    },
+}
+
+RULE_IDS = ("901", "902", "006", "018", "903")
+
+
+# ============ THRESHOLDS ============
+
+def thresholds_from_rule_configs(configs: Iterable[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Overlay configuration.rule rows (rule JSON documents) on the defaults"""
+    thresholds = {rule: dict(cfg) for rule, cfg in DEFAULT_RULE_THRESHOLDS.items()}
+    for cfg in configs:
+        rule = str(cfg.get("id", "")).split("@")[0]
+        if rule not in thresholds:
+            continue
+        rule_config = cfg.get("config", {})
+        if rule_config.get("parameters"):
+            thresholds[rule]["parameters"] = rule_config["parameters"]
+        if rule_config.get("bands") and rule != "903":
+            thresholds[rule]["bands"] = rule_config["bands"]
+    return thresholds
+
+
+def fetch_rule_configs(use_local: bool = USE_LOCAL_POSTGRES, tenant_id: str = "DEFAULT") -> List[Dict[str, Any]]:
+    """Read rule configs from the configuration database (configuration.rule)"""
+    from services.database_query_service import FullDockerStrategy, LocalPostgresStrategy
+
+    strategy = LocalPostgresStrategy(database="configuration") if use_local \
+        else FullDockerStrategy(database="configuration")
+    result = strategy.execute_query(
+        f"SELECT configuration FROM rule WHERE tenantid = {sql_literal(tenant_id)};"
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip())
+    return [json.loads(line) for line in result.stdout.splitlines() if line.strip()]
+
+
+# ============ COLUMNS ============
+
+def columns_from_records(records: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    """
+    Build columnar arrays from row dicts
+
+    Required keys: end_to_end_id, debtor, creditor, amount, timestamp_ms
+    Optional keys: status (pacs.002 TxSts), city, region, lat, long
+    """
+    columns = {
+        "end_to_end_id": np.array([r["end_to_end_id"] for r in records], dtype=object),
+        "debtor": np.array([r["debtor"] for r in records], dtype=object),
+        "creditor": np.array([r["creditor"] for r in records], dtype=object),
+        "amount": np.array([r["amount"] for r in records], dtype=np.float64),
+        "timestamp_ms": np.array([r["timestamp_ms"] for r in records], dtype=np.int64),
+    }
+    for key in ("status", "city", "region"):
+        if any(key in r for r in records):
+            columns[key] = np.array([r.get(key) for r in records], dtype=object)
+    for key in ("lat", "long"):
+        if any(key in r for r in records):
+            columns[key] = np.array(
+                [float(r[key]) if r.get(key) not in (None, "") else np.nan for r in records], dtype=np.float64
+            )
+    return columns
+
+
+def columns_from_payloads(payloads: List[Dict[str, Any]], status: str = "ACCC") -> Dict[str, np.ndarray]:
+    """Build columns from generated pacs.008 payloads (e.g. an attack plan)"""
+    records = []
+    for payload in payloads:
+        root = payload["FIToFICstmrCdtTrf"]
+        tx = root["CdtTrfTxInf"]
+        glctn = root.get("SplmtryData", {}).get("Envlp", {}).get("Doc", {}).get("InitgPty", {}).get("Glctn", {})
+        records.append({
+            "end_to_end_id": tx["PmtId"]["EndToEndId"],
+            "debtor": tx["DbtrAcct"]["Id"]["Othr"][0]["Id"],
+            "creditor": tx["CdtrAcct"]["Id"]["Othr"][0]["Id"],
+            "amount": float(tx["IntrBkSttlmAmt"]["Amt"]["Amt"]),
+            "timestamp_ms": int(np.datetime64(root["GrpHdr"]["CreDtTm"].rstrip("Z"), "ms").astype(np.int64)),
+            "status": status,
+            "city": glctn.get("City"),
+            "region": glctn.get("Region"),
+            "lat": glctn.get("Lat"),
+            "long": glctn.get("Long"),
+        })
+    return columns_from_records(records)
+
+
+def load_transaction_columns(db_service, limit: Optional[int] = None, timeout: int = 300) -> Dict[str, np.ndarray]:
+    """
+    Load pacs.008 rows from event_history.transaction as columns
+
+    Confirmation status comes from the matching pacs.002 row (missing = not confirmed).
+    Geo-location is not stored in event_history, so rule 903 yields .x00 for these rows.
+    """
+    # COPY CSV (as export_service): account ids may contain commas or quotes, psql -A output doesn't escape them
+    query = f"""
+    COPY (
+        SELECT t.endtoendid, t.source, t.destination, t.amt,
+               (extract(epoch from t.credttm::timestamptz) * 1000)::bigint,
+               COALESCE(s.txsts, '')
+        FROM transaction t
+        LEFT JOIN transaction s ON s.endtoendid = t.endtoendid AND s.txtp = 'pacs.002.001.12'
+        WHERE t.txtp = 'pacs.008.001.10'
+        ORDER BY t.credttm
+        {f'LIMIT {int(limit)}' if limit else ''}
+    ) TO STDOUT WITH (FORMAT csv);
+    """
+    result = db_service.strategy.execute_query(query, timeout=timeout)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip())
+
+    rows = [row for row in csv.reader(io.StringIO(result.stdout)) if len(row) >= 6]
+    if not rows:
+        return columns_from_records([])
+    e2e, debtor, creditor, amount, ts, status = zip(*(row[:6] for row in rows))
+    return {
+        "end_to_end_id": np.array(e2e, dtype=object),
+        "debtor": np.array(debtor, dtype=object),
+        "creditor": np.array(creditor, dtype=object),
+        "amount": np.array(amount, dtype=np.float64),
+        "timestamp_ms": np.array(ts, dtype=np.int64),
+        "status": np.array([s or None for s in status], dtype=object),
+    }
+
+
+# ============ VECTORISED HELPERS ============
+
+def _apply_bands(values: np.ndarray, bands: List[Dict[str, Any]], pending: np.ndarray, out: np.ndarray):
+    """determineOutcome() over arrays; writes subRuleRefs into out where pending"""
+    for band in bands:
+        match = pending.copy()
+        if band.get("lowerLimit"):
+            match &= values >= band["lowerLimit"]
+        if band.get("upperLimit"):
+            match &= values < band["upperLimit"]
+        out[match] = band["subRuleRef"]
+        pending &= ~match
+
+
+class _GroupWindows:
+    """Rows sorted by (account, timestamp) with the start index of each row's time window"""
+
+    def __init__(self, accounts: np.ndarray, timestamps: np.ndarray):
+        _, codes = np.unique(accounts.astype(str), return_inverse=True)
+        self.order = np.lexsort((timestamps, codes))
+        self.codes = codes[self.order].astype(np.int64)
+        self.ts = timestamps[self.order] - (timestamps.min() if len(timestamps) else 0)
+        self.group_start = np.searchsorted(self.codes, self.codes, side="left")
+        self._starts: Dict[int, np.ndarray] = {}
+
+    def window_start(self, range_ms: int) -> np.ndarray:
+        if range_ms not in self._starts:
+            span = int(self.ts.max()) + int(range_ms) + 1 if len(self.ts) else 1
+            if len(self.codes) and int(self.codes.max()) + 1 > np.iinfo(np.int64).max // span:
+                raise ValueError("Too many accounts x time span for int64 window keys")
+            key = self.codes * span + self.ts
+            self._starts[range_ms] = np.searchsorted(key, key - range_ms, side="left")
+        return self._starts[range_ms]
+
+    def unsort(self, values: np.ndarray) -> np.ndarray:
+        out = np.empty_like(values)
+        out[self.order] = values
+        return out
+
+
+# ============ RULES ============
+
+def _evaluate_count(groups: _GroupWindows, cfg: Dict[str, Any], confirmed: np.ndarray):
+    idx = np.arange(len(groups.order))
+    count = (idx - groups.window_start(int(cfg["parameters"]["maxQueryRange"])) + 1).astype(np.float64)
+    count = groups.unsort(count)
+
+    refs = np.full(len(count), ".x00", dtype="<U5")
+    _apply_bands(count, cfg["bands"], confirmed.copy(), refs)
+    return refs, count
+
+
+def _evaluate_006(groups: _GroupWindows, amount: np.ndarray, cfg: Dict[str, Any], confirmed: np.ndarray):
+    params = cfg["parameters"]
+    limit = int(params.get("maxQueryLimit", RULE_006_MIN_TRANSACTIONS))
+    tolerance = float(params.get("tolerance", 1 - RULE_006_SIMILARITY))
+    start = groups.window_start(int(params.get("maxQueryRange", DAY_MS)))
+
+    amt = amount[groups.order]
+    idx = np.arange(len(amt))
+    similar = np.ones(len(amt))
+    for back in range(1, limit):
+        prev = idx - back
+        valid = prev >= start
+        prev_amt = amt[np.maximum(prev, 0)]
+        similar += valid & (np.abs(prev_amt - amt) <= amt * tolerance)
+    has_history = groups.unsort(idx - start >= 1)
+    similar = groups.unsort(similar)
+
+    refs = np.full(len(amt), ".x00", dtype="<U5")
+    refs[confirmed & ~has_history] = ".x01"
+    _apply_bands(similar, cfg["bands"], confirmed & has_history, refs)
+    return refs, similar
+
+
+def _evaluate_018(groups: _GroupWindows, amount: np.ndarray, cfg: Dict[str, Any], confirmed: np.ndarray):
+    start = groups.window_start(int(cfg["parameters"]["maxQueryRange"]))
+    amt = amount[groups.order]
+    cumulative = np.concatenate(([0.0], np.cumsum(amt)))
+    idx = np.arange(len(amt))
+    prev_count = idx - start
+    prev_sum = cumulative[idx] - cumulative[start]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = np.where(prev_count > 0, amt / (prev_sum / np.maximum(prev_count, 1)), np.nan)
+    ratio = groups.unsort(ratio)
+    has_history = groups.unsort(prev_count > 0)
+
+    refs = np.full(len(amt), ".x00", dtype="<U5")
+    refs[confirmed & ~has_history] = ".x01"
+    _apply_bands(ratio, cfg["bands"], confirmed & has_history, refs)
+    return refs, ratio
+
+
+def _zone_list(zones: Any, key: str) -> List[str]:
+    # rule-903 reads riskZones.<level>.cities / .regions. init-db ships plain lists, which the
+    # executor source ignores (everything becomes .03); we treat a list as cities, as intended
+    if isinstance(zones, dict):
+        return [z.lower() for z in zones.get(key, [])]
+    return [z.lower() for z in zones or []] if key == "cities" else []
+
+
+def resolve_cities(columns: Dict[str, np.ndarray]) -> np.ndarray:
+    """City per row: the City field, else the first matching utils.geo_index zone box"""
+    n = len(columns["amount"])
+    city = columns.get("city", np.full(n, None, dtype=object)).astype(object).copy()
+    missing = np.array([not c for c in city], dtype=bool)
+    if "lat" in columns and "long" in columns and missing.any():
+        city[missing] = geo_index.cities(columns["lat"][missing], columns["long"][missing])
+    return city
+
+
+def _evaluate_903(columns: Dict[str, np.ndarray], cfg: Dict[str, Any]):
+    n = len(columns["amount"])
+    zones = cfg["parameters"].get("riskZones", {})
+    city = np.array([(c or "").lower() for c in resolve_cities(columns)], dtype=object)
+    region = np.array([(r or "").lower() for r in columns.get("region", np.full(n, None, dtype=object))],
+                      dtype=object)
+    # .x00 only without City, Region, Lat and Long; coordinates outside every zone are .03
+    has_geo = (city != "") | (region != "")
+    for key in ("lat", "long"):
+        if key in columns:
+            has_geo |= ~np.isnan(columns[key])
+
+    level = np.full(n, 2, dtype=np.int8)
+    for lvl, name in ((1, "medium"), (0, "high")):
+        hit = np.isin(city, _zone_list(zones.get(name), "cities")) | \
+            np.isin(region, _zone_list(zones.get(name), "regions"))
+        level[hit & has_geo] = lvl
+
+    refs = np.array([".01", ".02", ".03"], dtype="<U5")[level]
+    refs[~has_geo] = ".x00"
+    return refs, level.astype(np.float64)
+
+
+def evaluate_rules(columns: Dict[str, np.ndarray], thresholds: Optional[Dict[str, Dict[str, Any]]] = None,
+                   rules: Iterable[str] = RULE_IDS) -> Dict[str, Dict[str, np.ndarray]]:
+    """
+    Evaluate rules over columnar transactions
+
+    Returns:
+        {rule_id: {"sub_rule_ref": str array, "value": independent variable, "alert": bool array}}
+    """
+    thresholds = thresholds or DEFAULT_RULE_THRESHOLDS
+    n = len(columns["amount"])
+    status = columns.get("status")
+    confirmed = np.ones(n, dtype=bool) if status is None else (status == "ACCC")
+
+    debtor_groups = creditor_groups = None
+    evaluation = {}
+    for rule in rules:
+        cfg = thresholds[rule]
+        if rule in ("901", "006", "018"):
+            debtor_groups = debtor_groups or _GroupWindows(columns["debtor"], columns["timestamp_ms"])
+        if rule == "901":
+            refs, value = _evaluate_count(debtor_groups, cfg, confirmed)
+        elif rule == "902":
+            creditor_groups = creditor_groups or _GroupWindows(columns["creditor"], columns["timestamp_ms"])
+            refs, value = _evaluate_count(creditor_groups, cfg, confirmed)
+        elif rule == "006":
+            refs, value = _evaluate_006(debtor_groups, columns["amount"], cfg, confirmed)
+        elif rule == "018":
+            refs, value = _evaluate_018(debtor_groups, columns["amount"], cfg, confirmed)
+        elif rule == "903":
+            refs, value = _evaluate_903(columns, cfg)
+        else:
+            raise ValueError(f"Unsupported rule: {rule}")
+        evaluation[rule] = {"sub_rule_ref": refs, "value": value, "alert": refs == cfg["alert"]}
+    return evaluation
+
+
+# ============ REPORTING ============
+
+def expected_alerts(columns: Dict[str, np.ndarray], evaluation: Dict[str, Dict[str, np.ndarray]]) -> List[Dict[str, Any]]:
+    """Transactions with at least one alerting rule, with the rules that should fire"""
+    any_alert = np.zeros(len(columns["amount"]), dtype=bool)
+    for result in evaluation.values():
+        any_alert |= result["alert"]
+
+    alerts = []
+    for i in np.flatnonzero(any_alert):
+        alerts.append({
+            "end_to_end_id": columns["end_to_end_id"][i],
+            "debtor": columns["debtor"][i],
+            "creditor": columns["creditor"][i],
+            "amount": float(columns["amount"][i]),
+            "rules": {
+                rule: str(result["sub_rule_ref"][i]) for rule, result in evaluation.items() if result["alert"][i]
+            }
+        })
+    return alerts
+
+
+def summarize_evaluation(evaluation: Dict[str, Dict[str, np.ndarray]]) -> Dict[str, Any]:
+    """subRuleRef histogram and alert count per rule"""
+    summary = {}
+    for rule, result in evaluation.items():
+        refs, counts = np.unique(result["sub_rule_ref"], return_counts=True)
+        summary[rule] = {
+            "alerts": int(result["alert"].sum()),
+            "sub_rule_refs": {str(r): int(c) for r, c in zip(refs, counts)}
+        }
+    return summary
+
+
+def compare_with_actual(columns: Dict[str, np.ndarray], evaluation: Dict[str, Dict[str, np.ndarray]],
+                        actual: Dict[str, Dict[str, str]]) -> Dict[str, Any]:
+    """
+    Compare expected subRuleRefs with Tazama's
+
+    Args:
+        actual: {end_to_end_id: {rule_id: subRuleRef}} (e.g. from relayed results)
+    """
+    mismatches = []
+    checked = 0
+    for i, e2e_id in enumerate(columns["end_to_end_id"]):
+        observed = actual.get(e2e_id)
+        if not observed:
+            continue
+        checked += 1
+        for rule, result in evaluation.items():
+            expected_ref = result["sub_rule_ref"][i]
+            if rule in observed and observed[rule] != expected_ref:
+                mismatches.append({"end_to_end_id": e2e_id, "rule_id": rule,
+                                   "expected": str(expected_ref), "actual": observed[rule]})
+    return {"checked": checked, "mismatches": len(mismatches), "details": mismatches[:100]}
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+    from services.database_query_service import create_database_service
+
+    limit = int(sys.argv[1]) if len(sys.argv) > 1 else None
+    started = time.perf_counter()
+    columns = load_transaction_columns(create_database_service(USE_LOCAL_POSTGRES), limit)
+    loaded = time.perf_counter()
+    evaluation = evaluate_rules(columns, thresholds_from_rule_configs(fetch_rule_configs()))
+    done = time.perf_counter()
+    print(json.dumps(summarize_evaluation(evaluation), indent=2))
+    print(f"{len(columns['amount'])} rows: load {loaded - started:.2f}s, evaluate {done - loaded:.2f}s")
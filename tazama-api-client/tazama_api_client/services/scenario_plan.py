@@ -0,0 +1,362 @@
+"""
+Scenario Plans - declarative attack scenarios compiled ahead of time
+
+A scenario (JSON, or YAML if PyYAML is installed) describes an attack as
+parameters plus ordered phases of pacs.008 transactions:
+
+    {
+      "name": "rule_018",
+      "target_rule": "018",
+      "container": "tazama-rule-018",
+      "params": {"count": {"default": 6, "min": 6}, "amount": 500000000.0,
+                 "debtor": "WHALE_{digits:4}", "actor": "Scenario Actor", "status": "ACCC"},
+      "phases": [
+        {"name": "history", "count": "$count-1", "debtor": "{debtor}", "creditor": "CRED_{digits:6}",
+         "amount": {"base": 500000, "step": 300000, "jitter": [50000, 150000]}},
+        {"name": "trigger", "count": 1, "debtor": "{debtor}", "creditor": "CRED_{digits:6}", "amount": "$amount"}
+      ]
+    }
+
+- params: default values (or {"default", "min", "max"}); string params are
+  templates resolved once per plan, so "{debtor}" is the same account in every phase
+- "$name" / "$name-1": a param value (plus an offset) for count / amount
+- Templates in debtor / creditor / actor: "{param}", "{i}" (index within the
+  phase) and "{digits:N}" (fresh random digits per transaction)
+- amount: number, "$param" or {"base", "step", "jitter": [lo, hi]} ->
+  base + i * step + randint(lo, hi)
+
+compile_plan() makes every random decision and builds every message up
+front: each transaction carries its pacs.008 and pacs.002 as PreparedPayload
+(serialised once). Dependency edges are fixed by the plan: a pacs.002 goes
+out only after its pacs.008 was accepted, and a phase starts only after the
+previous phase has been sent (e.g. rule 018 history before the huge
+transaction). Replaying the plan (routers.attacks.send_plan_with_confirmation)
+is then pure I/O.
+"""
+import json
+import os
+import random
+import re
+import string
+import threading
+from typing import Any, Dict, List, Optional
+
+from config import SCENARIO_DIR, SCENARIO_MAX_MESSAGES
+from services.tms_client import PreparedPayload
+from utils.payload_generator import generate_pacs008, generate_pacs002
+
+try:
+    import yaml  # Optional: pip install pyyaml
+except ImportError:  # pragma: no cover - JSON scenarios only
+    yaml = None
+
+_REF = re.compile(r"^\$(\w+)([+-]\d+)?$")
+_PLACEHOLDER = re.compile(r"\{(\w+)(?::(\d+))?\}")
+
+
+def _param_spec(value) -> Dict[str, Any]:
+    return value if isinstance(value, dict) else {"default": value}
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _coerce(name: str, value, default):
+    """Convert an override to the type of the param's default (form and JSON input is often strings)"""
+    if default is None:
+        return value
+    try:
+        if isinstance(default, bool):
+            if isinstance(value, bool):
+                return value
+            if isinstance(value, str) and value.lower() in ("true", "false", "1", "0"):
+                return value.lower() in ("true", "1")
+        elif isinstance(default, int):
+            if isinstance(value, float) and value.is_integer():
+                return int(value)
+            if isinstance(value, (int, str)) and not isinstance(value, bool):
+                return int(value)
+        elif isinstance(default, float):
+            if isinstance(value, (int, float, str)) and not isinstance(value, bool):
+                return float(value)
+        elif isinstance(default, str):
+            if isinstance(value, str) or _is_number(value):
+                return str(value)
+    except ValueError:
+        pass
+    raise ValueError(f"Parameter {name} must be {type(default).__name__}, got {value!r}")
+
+
+def _resolve(value, params: Dict[str, Any]):
+    """Resolve "$name" / "$name+N" references; other values pass through"""
+    if isinstance(value, str):
+        match = _REF.match(value)
+        if match:
+            if match.group(1) not in params:
+                raise ValueError(f"Unknown parameter ${match.group(1)}")
+            value = params[match.group(1)]
+            if match.group(2):
+                if not _is_number(value):
+                    raise ValueError(f"${match.group(1)}{match.group(2)}: parameter is not a number")
+                return value + int(match.group(2))
+    return value
+
+
+def _render(template: str, params: Dict[str, Any], index: int = 0) -> str:
+    """Fill {param}, {i} and {digits:N} placeholders"""
+    def replace(match):
+        name, size = match.groups()
+        if name == "digits":
+            return "".join(random.choices(string.digits, k=int(size or 4)))
+        if name == "i":
+            return str(index)
+        if name not in params:
+            raise ValueError(f"Unknown placeholder {{{name}}}")
+        return str(params[name])
+    return _PLACEHOLDER.sub(replace, template)
+
+
+def _amount(spec, params: Dict[str, Any], index: int) -> float:
+    if isinstance(spec, dict):
+        amount = float(_resolve(spec.get("base", "$amount"), params))
+        amount += index * float(_resolve(spec.get("step", 0), params))
+        if spec.get("jitter"):
+            low, high = spec["jitter"]
+            amount += random.randint(int(low), int(high))
+        return amount
+    return float(_resolve(spec, params))
+
+
+def validate_scenario(spec) -> Dict[str, Any]:
+    """Check a scenario's structure; ValueError names the first problem"""
+    if not isinstance(spec, dict) or not isinstance(spec.get("name"), str) or not spec["name"]:
+        raise ValueError("Scenario needs a name")
+    params = spec.get("params") or {}
+    if not isinstance(params, dict):
+        raise ValueError("params must be an object")
+    for name, param in params.items():
+        param = _param_spec(param)
+        if "default" not in param:
+            raise ValueError(f"Parameter {name} needs a default")
+        for bound in ("min", "max"):
+            if bound in param and not (_is_number(param[bound]) and _is_number(param["default"])):
+                raise ValueError(f"Parameter {name}: {bound} needs a numeric default and bound")
+
+    phases = spec.get("phases")
+    if not isinstance(phases, list) or not phases:
+        raise ValueError("Scenario needs at least one phase")
+    for number, phase in enumerate(phases, start=1):
+        if not isinstance(phase, dict):
+            raise ValueError(f"Phase {number} must be an object")
+        for key in ("name", "debtor", "creditor", "actor", "status"):
+            if key in phase and not isinstance(phase[key], str):
+                raise ValueError(f"Phase {number}: {key} must be a string")
+        count = phase.get("count", 1)
+        if not (isinstance(count, str) or (_is_number(count) and float(count).is_integer())):
+            raise ValueError(f"Phase {number}: count must be an integer or a $param reference")
+        amount = phase.get("amount", "$amount")
+        if isinstance(amount, dict):
+            for key in ("base", "step"):
+                if key in amount and not (_is_number(amount[key]) or isinstance(amount[key], str)):
+                    raise ValueError(f"Phase {number}: amount.{key} must be a number or a $param reference")
+            jitter = amount.get("jitter")
+            if jitter is not None and not (isinstance(jitter, list) and len(jitter) == 2
+                                           and all(_is_number(j) for j in jitter) and jitter[0] <= jitter[1]):
+                raise ValueError(f"Phase {number}: amount.jitter must be [low, high]")
+        elif not (_is_number(amount) or isinstance(amount, str)):
+            raise ValueError(f"Phase {number}: amount must be a number, a $param reference or an object")
+    return spec
+
+
+def parse_scenario(text: str) -> Dict[str, Any]:
+    """Parse a scenario document (JSON, or YAML when PyYAML is installed)"""
+    try:
+        spec = json.loads(text)
+    except ValueError:
+        if yaml is None:
+            raise ValueError("Scenario is not valid JSON (install pyyaml for YAML scenarios)")
+        try:
+            spec = yaml.safe_load(text)
+        except yaml.YAMLError as e:
+            raise ValueError(f"Scenario is neither valid JSON nor YAML: {e}")
+    return validate_scenario(spec)
+
+
+class PlannedTransaction:
+    """One attack transaction: pacs.008 and its pacs.002, both ready to send"""
+
+    __slots__ = ("phase", "index", "debtor", "creditor", "amount", "status", "pacs008", "pacs002")
+
+    def __init__(self, phase: str, index: int, debtor: str, creditor: str, amount: float, status: str,
+                 pacs008: PreparedPayload, pacs002: PreparedPayload):
+        self.phase = phase
+        self.index = index
+        self.debtor = debtor
+        self.creditor = creditor
+        self.amount = amount
+        self.status = status
+        self.pacs008 = pacs008
+        self.pacs002 = pacs002
+
+
+class ScenarioPlan:
+    """A compiled scenario: resolved params and phases of PlannedTransaction"""
+
+    def __init__(self, spec: Dict[str, Any], params: Dict[str, Any], phases: List[Dict[str, Any]]):
+        self.name = spec["name"]
+        self.target_rule = spec.get("target_rule")
+        self.container = spec.get("container")
+        self.params = params
+        self.phases = phases  # [{"name", "transactions": [PlannedTransaction]}]
+
+    @property
+    def transactions(self) -> List[PlannedTransaction]:
+        return [tx for phase in self.phases for tx in phase["transactions"]]
+
+    def edges(self) -> List[Dict[str, str]]:
+        """Dependency edges: pacs.008 -> its pacs.002, and phase -> next phase"""
+        edges = []
+        for number, phase in enumerate(self.phases):
+            if number:
+                edges.append({"from": f"phase:{self.phases[number - 1]['name']}", "to": f"phase:{phase['name']}"})
+            for tx in phase["transactions"]:
+                msg_id = tx.pacs008["FIToFICstmrCdtTrf"]["GrpHdr"]["MsgId"]
+                edges.append({"from": f"pacs.008:{msg_id}",
+                              "to": f"pacs.002:{tx.pacs002['FIToFIPmtSts']['GrpHdr']['MsgId']}"})
+        return edges
+
+    def summary(self, include_messages: bool = False) -> Dict[str, Any]:
+        """Plan overview (and optionally the serialised messages) for the compile endpoint"""
+        transactions = self.transactions
+        summary = {
+            "name": self.name,
+            "target_rule": self.target_rule,
+            "container": self.container,
+            "params": self.params,
+            "phases": [{"name": p["name"], "transactions": len(p["transactions"])} for p in self.phases],
+            "transactions": len(transactions),
+            "messages": len(transactions) * 2,
+            "bytes": sum(len(tx.pacs008.body) + len(tx.pacs002.body) for tx in transactions),
+            "edges": len(self.edges())
+        }
+        if include_messages:
+            summary["plan"] = [
+                {"phase": tx.phase, "index": tx.index, "debtor": tx.debtor, "creditor": tx.creditor,
+                 "amount": tx.amount, "status": tx.status,
+                 "pacs008": tx.pacs008.body.decode("utf-8"), "pacs002": tx.pacs002.body.decode("utf-8")}
+                for tx in transactions
+            ]
+        return summary
+
+
+def resolve_params(spec: Dict[str, Any], overrides: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Defaults, overrides (None = keep default), min / max clamps, then templates"""
+    specs = {name: _param_spec(value) for name, value in (spec.get("params") or {}).items()}
+    unknown = set(overrides or {}) - set(specs)
+    if unknown:
+        raise ValueError(f"Unknown parameter(s) for {spec['name']}: {', '.join(sorted(unknown))}")
+
+    params = {}
+    for name, param in specs.items():
+        value = (overrides or {}).get(name)
+        value = param.get("default") if value is None else _coerce(name, value, param.get("default"))
+        if "min" in param:
+            value = max(value, param["min"])
+        if "max" in param:
+            value = min(value, param["max"])
+        params[name] = value
+    for name, value in params.items():
+        if isinstance(value, str):
+            params[name] = _render(value, params)
+    return params
+
+
+def compile_plan(spec: Dict[str, Any], overrides: Optional[Dict[str, Any]] = None) -> ScenarioPlan:
+    """Make every random choice and build every message of the scenario now"""
+    params = resolve_params(validate_scenario(spec), overrides)
+    counts = []
+    for phase in spec["phases"]:
+        count = _resolve(phase.get("count", 1), params)
+        if not (_is_number(count) and float(count).is_integer()):
+            raise ValueError(f"Phase count {phase.get('count')!r} is not an integer")
+        counts.append(int(count))
+    if sum(counts) > SCENARIO_MAX_MESSAGES:
+        raise ValueError(f"Plan has {sum(counts)} transactions (limit SCENARIO_MAX_MESSAGES={SCENARIO_MAX_MESSAGES})")
+
+    phases = []
+    for number, (phase, count) in enumerate(zip(spec["phases"], counts)):
+        name = phase.get("name") or f"phase_{number + 1}"
+        status = _resolve(phase.get("status", "$status" if "status" in params else "ACCC"), params)
+        transactions = []
+        for i in range(max(count, 0)):
+            debtor = _render(phase.get("debtor", "{debtor}"), params, i)
+            creditor = _render(phase.get("creditor", "{creditor}"), params, i)
+            amount = _amount(phase.get("amount", "$amount"), params, i)
+            pacs008 = generate_pacs008(
+                debtor_account=debtor,
+                amount=amount,
+                debtor_name=_render(phase.get("actor", "{actor}" if "actor" in params else "Scenario Actor"),
+                                    params, i),
+                creditor_account=creditor
+            )
+            header = pacs008["FIToFICstmrCdtTrf"]
+            pacs002 = generate_pacs002(header["GrpHdr"]["MsgId"], header["CdtTrfTxInf"]["PmtId"]["EndToEndId"],
+                                       status)
+            transactions.append(PlannedTransaction(name, i, debtor, creditor, amount, status,
+                                                   PreparedPayload(pacs008), PreparedPayload(pacs002)))
+        phases.append({"name": name, "transactions": transactions})
+    return ScenarioPlan(spec, params, phases)
+
+
+class ScenarioLibrary:
+    """Scenarios from SCENARIO_DIR (*.json, *.yaml, *.yml), keyed by name"""
+
+    def __init__(self, directory: str = SCENARIO_DIR):
+        self.directory = directory
+        self._scenarios: Optional[Dict[str, Dict[str, Any]]] = None
+        self._lock = threading.Lock()
+
+    def load(self) -> Dict[str, str]:
+        """(Re)read the scenario directory; returns {file: error} for files that failed"""
+        scenarios, errors = {}, {}
+        names = sorted(os.listdir(self.directory)) if os.path.isdir(self.directory) else []
+        for file_name in names:
+            if not file_name.endswith((".json", ".yaml", ".yml")):
+                continue
+            try:
+                with open(os.path.join(self.directory, file_name), encoding="utf-8") as f:
+                    spec = parse_scenario(f.read())
+                scenarios[spec["name"]] = spec
+            except Exception as e:
+                errors[file_name] = str(e)
+        with self._lock:
+            self._scenarios = scenarios
+        return errors
+
+    def _all(self) -> Dict[str, Dict[str, Any]]:
+        if self._scenarios is None:
+            self.load()
+        return self._scenarios
+
+    def get(self, name: str) -> Dict[str, Any]:
+        scenarios = self._all()
+        if name not in scenarios:
+            raise KeyError(name)
+        return scenarios[name]
+
+    def list(self) -> List[Dict[str, Any]]:
+        return [
+            {"name": spec["name"], "title": spec.get("title"), "description": spec.get("description"),
+             "target_rule": spec.get("target_rule"), "params": {k: _param_spec(v) for k, v in
+                                                                (spec.get("params") or {}).items()},
+             "phases": [p.get("name") for p in spec["phases"]]}
+            for spec in self._all().values()
+        ]
+
+    def compile(self, name: str, **overrides) -> ScenarioPlan:
+        return compile_plan(self.get(name), overrides)
+
+
+# Singleton instance
+scenario_library = ScenarioLibrary()
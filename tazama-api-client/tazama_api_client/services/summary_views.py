@@ -0,0 +1,268 @@
+"""
+Summary Views - materialised per-account aggregates of event_history.transaction
+
+The dashboard's top-20 debtors / creditors and message-type counts used to
+GROUP BY the raw transaction table on every call. setup() creates
+
+    account_daily_summary     (tenant, role, account, txTp, day) -> count, sum
+    account_summary           (tenant, role, account, txTp)      -> count, sum, first / last day
+    transaction_type_summary  (tenant, txTp)                     -> count, count(amt), sum, first / last creDtTm
+
+each with the unique index REFRESH ... CONCURRENTLY needs (readers are never
+blocked during a refresh), plus (role, txTp, tx_count DESC) indexes so a
+top-N read walks N index entries. SummaryRefresher refreshes them every
+SUMMARY_REFRESH_INTERVAL seconds; account_summary is rebuilt from the daily
+view, not from raw rows.
+
+DatabaseQueryService.get_transaction_summary and /api/stats read the views
+when USE_SUMMARY_VIEWS is on and they exist, falling back to the raw queries
+otherwise. Views lag the table by up to one refresh interval.
+"""
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from config import USE_LOCAL_POSTGRES, SUMMARY_REFRESH_INTERVAL, SUMMARY_REFRESH_TIMEOUT
+from services.database_query_service import DatabaseQueryService, create_database_service
+from utils.tenancy import sql_literal
+
+PACS008 = "pacs.008.001.10"
+
+# Refresh order matters: account_summary is built from account_daily_summary
+VIEWS = ("account_daily_summary", "account_summary", "transaction_type_summary")
+
+SCHEMA_SQL = """
+CREATE MATERIALIZED VIEW IF NOT EXISTS account_daily_summary AS
+SELECT COALESCE(tenantId, '') as tenantId, 'debtor'::text as role, source as account, txTp,
+       left(creDtTm, 10)::date as day, count(*) as tx_count, sum(amt) as total_amount
+FROM transaction
+GROUP BY 1, 3, 4, 5
+UNION ALL
+SELECT COALESCE(tenantId, ''), 'creditor'::text, destination, txTp,
+       left(creDtTm, 10)::date, count(*), sum(amt)
+FROM transaction
+GROUP BY 1, 3, 4, 5;
+CREATE UNIQUE INDEX IF NOT EXISTS ux_account_daily_summary
+    ON account_daily_summary (tenantId, role, account, txTp, day);
+CREATE INDEX IF NOT EXISTS idx_account_daily_summary_day
+    ON account_daily_summary (day, role, txTp);
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS account_summary AS
+SELECT tenantId, role, account, txTp, sum(tx_count)::bigint as tx_count, sum(total_amount) as total_amount,
+       min(day) as first_day, max(day) as last_day
+FROM account_daily_summary
+GROUP BY tenantId, role, account, txTp;
+CREATE UNIQUE INDEX IF NOT EXISTS ux_account_summary
+    ON account_summary (tenantId, role, account, txTp);
+CREATE INDEX IF NOT EXISTS idx_account_summary_top
+    ON account_summary (role, txTp, tx_count DESC);
+CREATE INDEX IF NOT EXISTS idx_account_summary_tenant_top
+    ON account_summary (tenantId, role, txTp, tx_count DESC);
+
+-- Views built before amount_count existed are rebuilt
+DO $$ BEGIN
+    IF to_regclass('transaction_type_summary') IS NOT NULL AND NOT EXISTS (
+        SELECT 1 FROM pg_attribute
+        WHERE attrelid = to_regclass('transaction_type_summary') AND attname = 'amount_count'
+    ) THEN
+        DROP MATERIALIZED VIEW transaction_type_summary;
+    END IF;
+END $$;
+
+-- amount_count (rows with amt) is the AVG(amt) divisor; tx_count also counts NULL amounts
+CREATE MATERIALIZED VIEW IF NOT EXISTS transaction_type_summary AS
+SELECT COALESCE(tenantId, '') as tenantId, txTp, count(*) as tx_count, count(amt) as amount_count,
+       sum(amt) as total_amount, min(creDtTm) as first_credttm, max(creDtTm) as latest_credttm
+FROM transaction
+GROUP BY 1, 2;
+CREATE UNIQUE INDEX IF NOT EXISTS ux_transaction_type_summary
+    ON transaction_type_summary (tenantId, txTp);
+"""
+
+_READY_QUERY = "SELECT " + " AND ".join(f"to_regclass('{v}') IS NOT NULL" for v in VIEWS) + ";"
+
+_state: Dict[str, Any] = {
+    "ready": None,          # None = not checked yet
+    "refreshed_at": None,
+    "refresh_ms": None,
+    "refreshes": 0,
+    "refresh_errors": 0,
+    "last_error": None
+}
+_refresh_lock = threading.Lock()
+
+
+def _service(db_service: Optional[DatabaseQueryService] = None) -> DatabaseQueryService:
+    return db_service or create_database_service(use_local=USE_LOCAL_POSTGRES)
+
+
+def _execute(db_service: DatabaseQueryService, query: str, timeout: int = 10, format_csv: bool = False) -> str:
+    result = db_service.strategy.execute_query(query, format_csv=format_csv, timeout=timeout)
+    if result.returncode != 0:
+        if "does not exist" in result.stderr:
+            _state["ready"] = False
+        raise RuntimeError(result.stderr.strip())
+    return result.stdout
+
+
+def status() -> Dict[str, Any]:
+    return {"views": list(VIEWS), "refresh_interval_seconds": SUMMARY_REFRESH_INTERVAL, **_state}
+
+
+def check_ready(db_service: Optional[DatabaseQueryService] = None) -> bool:
+    """Whether all summary views exist (cached until setup() or a failed read)"""
+    if _state["ready"] is None:
+        _state["ready"] = _execute(_service(db_service), _READY_QUERY).strip() == "t"
+    return _state["ready"]
+
+
+def mark_dropped():
+    """The views were dropped outside setup() (e.g. around the partition migration)"""
+    _state["ready"] = False
+
+
+def setup(db_service: Optional[DatabaseQueryService] = None) -> Dict[str, Any]:
+    """Create the views and their indexes (idempotent; the first build scans the whole table)"""
+    db_service = _service(db_service)
+    start = time.perf_counter()
+    _execute(db_service, SCHEMA_SQL, timeout=SUMMARY_REFRESH_TIMEOUT)
+    _state["ready"] = True
+    _state["refreshed_at"] = datetime.now().isoformat()
+    return {"views": list(VIEWS), "build_ms": round((time.perf_counter() - start) * 1000, 1)}
+
+
+def refresh(db_service: Optional[DatabaseQueryService] = None, concurrently: bool = True) -> Dict[str, Any]:
+    """
+    Refresh every view in dependency order
+
+    concurrently=True keeps the views readable during the refresh (slower than
+    a plain refresh, which takes an exclusive lock).
+    """
+    db_service = _service(db_service)
+    mode = "CONCURRENTLY " if concurrently else ""
+    timings = {}
+    with _refresh_lock:
+        start = time.perf_counter()
+        try:
+            for view in VIEWS:
+                view_start = time.perf_counter()
+                _execute(db_service, f"REFRESH MATERIALIZED VIEW {mode}{view};", timeout=SUMMARY_REFRESH_TIMEOUT)
+                timings[view] = round((time.perf_counter() - view_start) * 1000, 1)
+        except Exception as e:
+            _state["refresh_errors"] += 1
+            _state["last_error"] = str(e)
+            raise
+        _state["refreshes"] += 1
+        _state["refreshed_at"] = datetime.now().isoformat()
+        _state["refresh_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    return {"concurrently": concurrently, "refresh_ms": _state["refresh_ms"], "views_ms": timings}
+
+
+# ============ READS ============
+
+def transaction_summary(db_service: DatabaseQueryService, tenant_id: Optional[str] = None,
+                        limit: int = 20) -> Optional[Dict]:
+    """
+    get_transaction_summary() from the views (None if they are not available)
+
+    Same shape as the raw version; accounts are per tenant, so without a
+    tenant_id the same account id in two tenants is listed twice.
+    """
+    try:
+        if not check_ready(db_service):
+            return None
+        tenant_filter = f"AND tenantId = {sql_literal(tenant_id)}" if tenant_id else ""
+        top = """
+            SELECT account, tx_count, total_amount FROM account_summary
+            WHERE role = '{role}' AND txTp = '{txtp}' {tenant_filter}
+            ORDER BY tx_count DESC LIMIT {limit};
+        """
+        debtors = db_service._parse_csv_result(_execute(
+            db_service, top.format(role="debtor", txtp=PACS008, tenant_filter=tenant_filter, limit=int(limit)),
+            format_csv=True
+        ))
+        creditors = db_service._parse_csv_result(_execute(
+            db_service, top.format(role="creditor", txtp=PACS008, tenant_filter=tenant_filter, limit=int(limit)),
+            format_csv=True
+        ))
+        total = _execute(
+            db_service,
+            f"SELECT COALESCE(sum(tx_count), 0) FROM transaction_type_summary WHERE txTp = '{PACS008}' {tenant_filter};"
+        ).strip()
+    except Exception:
+        return None
+
+    return {
+        "status": "success",
+        "tenant_id": tenant_id,
+        "total_transactions": int(total or 0),
+        "debtors": debtors,
+        "creditors": creditors,
+        "source": "summary_views",
+        "refreshed_at": _state["refreshed_at"],
+        "strategy": db_service.strategy.get_name()
+    }
+
+
+def type_counts(db_service: DatabaseQueryService, tenant_id: Optional[str] = None) -> Optional[List[Dict]]:
+    """Count, amount count / sum and latest creDtTm per message type from transaction_type_summary (None if unavailable)"""
+    try:
+        if not check_ready(db_service):
+            return None
+        tenant_filter = f"WHERE tenantId = {sql_literal(tenant_id)}" if tenant_id else ""
+        output = _execute(db_service, f"""
+            SELECT txTp, sum(tx_count), sum(amount_count), sum(total_amount), max(latest_credttm)
+            FROM transaction_type_summary {tenant_filter}
+            GROUP BY txTp;
+        """, format_csv=True)
+    except Exception:
+        return None
+
+    counts = []
+    for line in output.strip().split('\n'):
+        parts = line.split(',')
+        if len(parts) < 5:
+            continue
+        counts.append({
+            "txtp": parts[0],
+            "tx_count": int(parts[1] or 0),
+            "amount_count": int(parts[2] or 0),
+            "total_amount": float(parts[3]) if parts[3] else 0.0,
+            "latest_credttm": parts[4] or None
+        })
+    return counts
+
+
+# ============ SCHEDULED REFRESH ============
+
+class SummaryRefresher:
+    """Daemon thread refreshing the views every `interval` seconds once they exist"""
+
+    def __init__(self, interval: float = SUMMARY_REFRESH_INTERVAL):
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                if check_ready():
+                    refresh()
+            except Exception as e:
+                _state["last_error"] = str(e)
+                # Re-check existence next time (views may have been dropped or the DB restarted)
+                _state["ready"] = None
+
+    def start(self):
+        if self.interval > 0 and (self._thread is None or not self._thread.is_alive()):
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="summary-refresh", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread = None
+
+
+summary_refresher = SummaryRefresher()
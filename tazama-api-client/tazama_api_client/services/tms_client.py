@@ -1,10 +1,86 @@
 """
 TMS Client - Centralized API calls to Tazama TMS Service
 """
+import contextvars
+import json
+import random
+import time
 import requests
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from datetime import datetime
-from typing import Optional, Dict, Any, Tuple
-from config  import TMS_BASE_URL, TMS_ENDPOINTS, SOURCE_TENANT_ID, REQUEST_TIMEOUT
+from typing import Optional, Dict, Any, List, Iterable, Callable
+from config  import (
+    TMS_BASE_URL, TMS_ENDPOINTS, SOURCE_TENANT_ID, REQUEST_TIMEOUT,
+    TMS_ADAPTIVE_CONCURRENCY, TMS_CONCURRENCY_INITIAL, TMS_CONCURRENCY_MIN,
+    TMS_CONCURRENCY_MAX, TMS_LATENCY_TOLERANCE,
+    TMS_RETRY_MAX_ATTEMPTS, TMS_RETRY_BASE_DELAY_MS, TMS_RETRY_MAX_DELAY_MS, TMS_RETRY_ON,
+    TMS_BREAKER_FAILURE_THRESHOLD, TMS_BREAKER_RESET_SECONDS, TMS_HEDGE_AFTER_MS
+)
+from services.concurrency_limiter import AdaptiveConcurrencyLimiter
+from services.circuit_breaker import CircuitBreaker
+from services.detection_latency import detection_tracker
+from utils.timing import stage
+from utils.metrics import record_tms_request
+from utils.tracing import inject_trace_headers, set_attributes
+from utils.tenancy import current_tenant, tenant_token
+
+# Failure classes that count against the circuit breaker (4xx means the TMS is up)
+BREAKER_FAILURE_CLASSES = {"connect", "timeout", "5xx"}
+
+
+def classify_status(status_code: int) -> Optional[str]:
+    """Map a non-200 HTTP status to a failure class"""
+    if 500 <= status_code < 600:
+        return "5xx"
+    if 400 <= status_code < 500:
+        return "4xx"
+    return None
+
+
+def classify_exception(exc: Exception) -> str:
+    """Map a requests exception to a failure class"""
+    # ConnectTimeout is both; the request never reached the TMS so treat as connect
+    if isinstance(exc, requests.exceptions.ConnectTimeout):
+        return "connect"
+    if isinstance(exc, requests.exceptions.Timeout):
+        return "timeout"
+    if isinstance(exc, requests.exceptions.ConnectionError):
+        return "connect"
+    return "error"
+
+
+class TMSResult(tuple):
+    """
+    (status_code, response_time_ms, response_data) with failure metadata.
+    Unpacks like the plain 3-tuple the send_* methods always returned.
+    
+    Attributes:
+        error_class: None on success, else connect / timeout / 4xx / 5xx / circuit_open / error
+        attempts: Number of HTTP attempts made (0 if rejected by the breaker)
+        hedged: True if the hedge request won
+    """
+    
+    def __new__(cls, status_code: int, response_time_ms: float, data: Any,
+                error_class: Optional[str] = None, attempts: int = 1, hedged: bool = False):
+        result = super().__new__(cls, (status_code, response_time_ms, data))
+        result.error_class = error_class
+        result.attempts = attempts
+        result.hedged = hedged
+        return result
+
+
+class PreparedPayload(dict):
+    """
+    Message payload serialised ahead of time (see services.scenario_plan).
+    Still a dict for everything that reads fields (NATS envelope, detection
+    tracker, velocity counters); the HTTP send posts `body` as-is instead of
+    encoding the dict again. Treat as read-only once built.
+    """
+    
+    def __init__(self, payload: dict):
+        super().__init__(payload)
+        self.body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+
 
 class TMSClient:
     """Client for interacting with Tazama TMS Service"""
@@ -14,20 +90,46 @@ class TMSClient:
         self.endpoints = TMS_ENDPOINTS
         self.tenant_id = SOURCE_TENANT_ID
         self.timeout = REQUEST_TIMEOUT
+        self.limiter = AdaptiveConcurrencyLimiter(
+            initial_limit=TMS_CONCURRENCY_INITIAL,
+            min_limit=TMS_CONCURRENCY_MIN,
+            max_limit=TMS_CONCURRENCY_MAX,
+            latency_tolerance=TMS_LATENCY_TOLERANCE,
+            enabled=TMS_ADAPTIVE_CONCURRENCY
+        )
+        self.breaker = CircuitBreaker(
+            failure_threshold=TMS_BREAKER_FAILURE_THRESHOLD,
+            reset_timeout=TMS_BREAKER_RESET_SECONDS
+        )
+        self.retry_max_attempts = max(1, TMS_RETRY_MAX_ATTEMPTS)
+        self.retry_base_delay_ms = TMS_RETRY_BASE_DELAY_MS
+        self.retry_max_delay_ms = TMS_RETRY_MAX_DELAY_MS
+        self.retry_on = set(TMS_RETRY_ON)
+        self.hedge_after_ms = TMS_HEDGE_AFTER_MS
+        self._hedge_pool = None
+        self._transports = {}
     
     def _get_headers(self) -> Dict[str, str]:
-        return {
+        # Tenant of the current tenant_scope (utils.tenancy), else SOURCE_TENANT_ID
+        tenant_id = current_tenant(self.tenant_id)
+        headers = {
             "Content-Type": "application/json",
-            "SourceTenantId": self.tenant_id
+            "SourceTenantId": tenant_id
         }
+        token = tenant_token(tenant_id)
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        # traceparent ties the TMS (and downstream rule) traces to the calling span
+        return inject_trace_headers(headers)
     
     def check_health(self) -> Dict[str, Any]:
         """Check TMS service health"""
         try:
-            response = requests.get(
-                f"{self.base_url}{self.endpoints['health']}",
-                timeout=5
-            )
+            with stage("tms_health"):
+                response = requests.get(
+                    f"{self.base_url}{self.endpoints['health']}",
+                    timeout=5
+                )
             return {
                 "status": "success",
                 "tms_status": response.json(),
@@ -43,97 +145,196 @@ class TMSClient:
         except Exception as e:
             return {"status": "error", "message": str(e)}
     
-    def send_pacs008(self, payload: dict) -> Tuple[int, float, Any]:
+    def _send_once(self, message_type: str, payload: dict) -> TMSResult:
+        """Single HTTP attempt, gated by the adaptive concurrency limiter"""
+        with self.limiter.slot() as sample:
+            start_time = datetime.now()
+            try:
+                response = requests.post(
+                    f"{self.base_url}{self.endpoints[message_type]}",
+                    # PreparedPayload: already-serialised bytes, no json.dumps per attempt
+                    data=getattr(payload, "body", None),
+                    json=None if isinstance(payload, PreparedPayload) else payload,
+                    headers=self._get_headers(),
+                    timeout=self.timeout
+                )
+                response_time = (datetime.now() - start_time).total_seconds() * 1000
+                sample["latency_ms"] = response_time
+                sample["status_code"] = response.status_code
+                
+                if response.status_code == 200:
+                    return TMSResult(response.status_code, response_time, response.json())
+                else:
+                    return TMSResult(response.status_code, response_time, response.text,
+                                     error_class=classify_status(response.status_code))
+            except Exception as e:
+                response_time = (datetime.now() - start_time).total_seconds() * 1000
+                sample["latency_ms"] = response_time
+                return TMSResult(0, response_time, str(e), error_class=classify_exception(e))
+    
+    def _send_hedged(self, message_type: str, payload: dict) -> TMSResult:
         """
-        Send pacs.008 payment request
-        Returns: (status_code, response_time_ms, response_data)
+        Send once; if no answer within hedge_after_ms, send a duplicate and
+        return whichever finishes first (the loser completes in the background)
+
+        Like retries, this is not idempotent: both POSTs carry the same
+        MsgId / EndToEndId, so the TMS may store the first and reject the
+        second with a unique-key error. See TMS_HEDGE_AFTER_MS.
         """
-        start_time = datetime.now()
-        try:
-            response = requests.post(
-                f"{self.base_url}{self.endpoints['pacs008']}",
-                json=payload,
-                headers=self._get_headers(),
-                timeout=self.timeout
-            )
-            response_time = (datetime.now() - start_time).total_seconds() * 1000
+        if self._hedge_pool is None:
+            self._hedge_pool = ThreadPoolExecutor(max_workers=self.limiter.max_limit * 2,
+                                                  thread_name_prefix="tms-hedge")
+        primary = self._hedge_pool.submit(contextvars.copy_context().run, self._send_once, message_type, payload)
+        done, _ = wait([primary], timeout=self.hedge_after_ms / 1000)
+        if done:
+            return primary.result()
+        
+        hedge = self._hedge_pool.submit(contextvars.copy_context().run, self._send_once, message_type, payload)
+        done, _ = wait([primary, hedge], return_when=FIRST_COMPLETED)
+        winner = primary if primary in done else hedge
+        result = winner.result()
+        result.hedged = winner is hedge
+        return result
+    
+    def _backoff_seconds(self, attempt: int) -> float:
+        """Full-jitter exponential backoff for the given (1-based) attempt"""
+        ceiling = min(self.retry_max_delay_ms, self.retry_base_delay_ms * (2 ** (attempt - 1)))
+        return random.uniform(0, ceiling) / 1000
+    
+    def _post(self, message_type: str, payload: dict) -> TMSResult:
+        """
+        POST a message to the TMS endpoint for message_type
+        
+        - Fails fast with error_class "circuit_open" while the breaker is open
+        - Retries failure classes in retry_on with jittered exponential backoff
+        - Hedges slow requests when hedge_after_ms > 0
+        
+        Blocking (HTTP and backoff sleeps): async routes call it through
+        utils.tenancy.run_in_executor_with_context, never on the event loop.
+        
+        Returns: TMSResult (unpacks as status_code, response_time_ms, response_data)
+        """
+        start = time.perf_counter()
+        with stage(f"tms_{message_type}", **{"tms.message_type": message_type}):
+            result = self._post_with_retries(message_type, payload)
+            set_attributes(**{"http.status_code": result[0], "tms.error_class": result.error_class,
+                              "tms.attempts": result.attempts})
+        record_tms_request(message_type, result, time.perf_counter() - start, current_tenant(self.tenant_id))
+        return result
+    
+    def _post_with_retries(self, message_type: str, payload: dict) -> TMSResult:
+        total_time = 0.0
+        
+        for attempt in range(1, self.retry_max_attempts + 1):
+            if not self.breaker.allow_request():
+                return TMSResult(0, total_time, "Circuit open: TMS marked unavailable, request not sent",
+                                 error_class="circuit_open", attempts=attempt - 1)
             
-            if response.status_code == 200:
-                return response.status_code, response_time, response.json()
+            if self.hedge_after_ms > 0:
+                result = self._send_hedged(message_type, payload)
             else:
-                return response.status_code, response_time, response.text
-        except Exception as e:
-            response_time = (datetime.now() - start_time).total_seconds() * 1000
-            return 0, response_time, str(e)
+                result = self._send_once(message_type, payload)
+            total_time += result[1]
+            
+            if result.error_class in BREAKER_FAILURE_CLASSES:
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+            
+            if result.error_class not in self.retry_on or attempt == self.retry_max_attempts:
+                # Report time across all attempts (backoff sleeps excluded)
+                return TMSResult(result[0], total_time, result[2], error_class=result.error_class,
+                                 attempts=attempt, hedged=result.hedged)
+            
+            time.sleep(self._backoff_seconds(attempt))
+    
+    def send_pacs008(self, payload: dict) -> TMSResult:
+        """
+        Send pacs.008 payment request
+        Returns: TMSResult (status_code, response_time_ms, response_data)
+        """
+        return self._post("pacs008", payload)
     
-    def send_pacs002(self, payload: dict) -> Tuple[int, float, Any]:
+    def send_pacs002(self, payload: dict) -> TMSResult:
         """
         Send pacs.002 confirmation
-        Returns: (status_code, response_time_ms, response_data)
+        Returns: TMSResult (status_code, response_time_ms, response_data)
         """
-        start_time = datetime.now()
-        try:
-            response = requests.post(
-                f"{self.base_url}{self.endpoints['pacs002']}",
-                json=payload,
-                headers=self._get_headers(),
-                timeout=self.timeout
-            )
-            response_time = (datetime.now() - start_time).total_seconds() * 1000
-            
-            if response.status_code == 200:
-                return response.status_code, response_time, response.json()
-            else:
-                return response.status_code, response_time, response.text
-        except Exception as e:
-            response_time = (datetime.now() - start_time).total_seconds() * 1000
-            return 0, response_time, str(e)
+        # Detection latency runs from submit, so record before the POST
+        detection_tracker.record_submission(payload)
+        result = self._post("pacs002", payload)
+        if result[0] != 200:
+            detection_tracker.discard_submission(payload)
+        return result
     
-    def send_pain001(self, payload: dict) -> Tuple[int, float, Any]:
+    def send_pain001(self, payload: dict) -> TMSResult:
         """
         Send pain.001 Customer Credit Transfer Initiation
-        Returns: (status_code, response_time_ms, response_data)
+        Returns: TMSResult (status_code, response_time_ms, response_data)
         """
-        start_time = datetime.now()
-        try:
-            response = requests.post(
-                f"{self.base_url}{self.endpoints['pain001']}",
-                json=payload,
-                headers=self._get_headers(),
-                timeout=self.timeout
-            )
-            response_time = (datetime.now() - start_time).total_seconds() * 1000
-            
-            if response.status_code == 200:
-                return response.status_code, response_time, response.json()
-            else:
-                return response.status_code, response_time, response.text
-        except Exception as e:
-            response_time = (datetime.now() - start_time).total_seconds() * 1000
-            return 0, response_time, str(e)
+        return self._post("pain001", payload)
     
-    def send_pain013(self, payload: dict) -> Tuple[int, float, Any]:
+    def send_pain013(self, payload: dict) -> TMSResult:
         """
         Send pain.013 Creditor Payment Activation Request
-        Returns: (status_code, response_time_ms, response_data)
+        Returns: TMSResult (status_code, response_time_ms, response_data)
         """
-        start_time = datetime.now()
-        try:
-            response = requests.post(
-                f"{self.base_url}{self.endpoints['pain013']}",
-                json=payload,
-                headers=self._get_headers(),
-                timeout=self.timeout
-            )
-            response_time = (datetime.now() - start_time).total_seconds() * 1000
-            
-            if response.status_code == 200:
-                return response.status_code, response_time, response.json()
-            else:
-                return response.status_code, response_time, response.text
-        except Exception as e:
-            response_time = (datetime.now() - start_time).total_seconds() * 1000
-            return 0, response_time, str(e)
+        return self._post("pain013", payload)
+    
+    def run_bulk(self, tasks: Iterable[Callable[[], Any]]) -> List[Any]:
+        """
+        Run independent send tasks concurrently, bounded by the adaptive limiter.
+        Each task is a zero-arg callable that uses send_*; results are returned
+        in submission order. Exceptions are returned in place of the result.
+        """
+        tasks = list(tasks)
+        if not tasks:
+            return []
+        
+        def _run(task, context):
+            try:
+                # Each worker runs in a copy of the request context so stage timings attach to it
+                return context.run(task)
+            except Exception as e:
+                return e
+        
+        # Pool is sized to the ceiling; the limiter decides how many actually run
+        workers = min(len(tasks), self.limiter.max_limit)
+        with stage("tms_bulk"):
+            contexts = [contextvars.copy_context() for _ in tasks]
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="tms-bulk") as pool:
+                return list(pool.map(_run, tasks, contexts))
+    
+    def for_transport(self, transport: str = "http") -> "TMSClient":
+        """
+        Client for the given transport: "http" (TMS REST, this client) or
+        "nats" (publish straight to the event director subject)
+        """
+        if transport == "http":
+            return self
+        if transport == "nats":
+            if "nats" not in self._transports:
+                from services.nats_transport import NatsTMSClient
+                self._transports["nats"] = NatsTMSClient()
+            return self._transports["nats"]
+        raise ValueError(f"Unknown transport: {transport}")
+    
+    def concurrency_stats(self) -> Dict[str, Any]:
+        """Current adaptive concurrency state (limit, in-flight, queued)"""
+        return self.limiter.snapshot()
+    
+    def resilience_stats(self) -> Dict[str, Any]:
+        """Circuit breaker state plus the active retry / hedging policy"""
+        return {
+            "circuit_breaker": self.breaker.snapshot(),
+            "retry": {
+                "max_attempts": self.retry_max_attempts,
+                "base_delay_ms": self.retry_base_delay_ms,
+                "max_delay_ms": self.retry_max_delay_ms,
+                "retry_on": sorted(self.retry_on)
+            },
+            "hedge_after_ms": self.hedge_after_ms or None
+        }
     
     def send_transaction(self, payload: dict) -> Dict[str, Any]:
         """
@@ -145,28 +346,31 @@ class TMSClient:
         
         # Route to appropriate endpoint based on TxTp
         if "pain.001" in tx_type:
-            status_code, response_time, data = self.send_pain001(payload)
+            result = self.send_pain001(payload)
         elif "pacs.008" in tx_type:
-            status_code, response_time, data = self.send_pacs008(payload)
+            result = self.send_pacs008(payload)
         elif "pacs.002" in tx_type:
-            status_code, response_time, data = self.send_pacs002(payload)
+            result = self.send_pacs002(payload)
         elif "pain.013" in tx_type:
-            status_code, response_time, data = self.send_pain013(payload)
+            result = self.send_pain013(payload)
         else:
             # Check if it has CstmrCdtTrfInitn (pain.001 structure)
             if "CstmrCdtTrfInitn" in payload:
-                status_code, response_time, data = self.send_pain001(payload)
+                result = self.send_pain001(payload)
             elif "FIToFICstmrCdtTrf" in payload:
-                status_code, response_time, data = self.send_pacs008(payload)
+                result = self.send_pacs008(payload)
             else:
                 # Default to pacs.008
-                status_code, response_time, data = self.send_pacs008(payload)
+                result = self.send_pacs008(payload)
         
+        status_code, response_time, data = result
         return {
             "status_code": status_code,
             "response_time_ms": response_time,
             "data": data,
-            "tx_type": tx_type or "auto-detected"
+            "tx_type": tx_type or "auto-detected",
+            "error_class": result.error_class,
+            "attempts": result.attempts
         }
 
 
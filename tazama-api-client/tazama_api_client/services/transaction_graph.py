@@ -0,0 +1,504 @@
+"""
+Transaction Graph - in-memory money-flow network for mule analysis
+
+Rule 902 only counts fan-in to one creditor within 24h. This graph holds
+every debtor -> creditor edge of event_history.transaction (pacs.008 rows,
+aggregated per account pair: transaction count, amount, last creDtTm) plus
+the account_holder links, so an investigator can expand a flagged account's
+network without recursive SQL:
+
+- account_summary(): fan-in / fan-out, volumes and top counterparties
+- reachable():       accounts within k hops (out, in or both), per hop
+- cycles():          money returning to the account within max_length hops
+- network():         the k-hop subgraph (nodes + edges) for visualisation
+- top_fan_in():      accounts with the most distinct senders
+
+Storage is compressed sparse row: for outgoing edges out_ptr[v]:out_ptr[v+1]
+indexes out_dst and the edge attribute arrays; incoming edges have their own
+CSR pointing back into the same attributes. Accounts are interned to int32
+ids. update() and add_edges() write into a small delta (dicts), merged into
+the arrays once it exceeds GRAPH_COMPACT_THRESHOLD edges, so incremental
+loads never rebuild the CSR per row; load() builds it in one pass.
+
+Edges are aggregated server-side and streamed with COPY, so loading costs
+one pass over the table and memory is proportional to distinct account pairs.
+"""
+import codecs
+import csv
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from config import USE_LOCAL_POSTGRES, GRAPH_COMPACT_THRESHOLD, GRAPH_MAX_NODES
+from services.database_query_service import create_database_service, credttm_condition
+from utils.tenancy import sql_literal
+
+DIRECTIONS = ("out", "in", "both")
+
+_EDGES_SQL = """
+COPY (
+    SELECT source, destination, count(*), COALESCE(sum(amt), 0),
+           (extract(epoch from max(creDtTm)::timestamptz) * 1000)::bigint, max(creDtTm)
+    FROM transaction
+    WHERE txtp = 'pacs.008.001.10' {filters}
+    GROUP BY source, destination
+) TO STDOUT WITH (FORMAT csv)
+"""
+
+_HOLDERS_SQL = """
+COPY (SELECT destination, source FROM account_holder {filters}) TO STDOUT WITH (FORMAT csv)
+"""
+
+
+def _csv_rows(chunks: Iterable[bytes]) -> Iterator[List[str]]:
+    """CSV rows from a COPY byte stream, decoded incrementally"""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    pending = ""
+    for chunk in chunks:
+        pending += decoder.decode(chunk)
+        lines = pending.split("\n")
+        pending = lines.pop()
+        yield from csv.reader(lines)
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield from csv.reader([pending])
+
+
+def _gather(ptr: np.ndarray, values: np.ndarray, nodes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """CSR rows of `nodes` concatenated: (positions into values, owning node per position)"""
+    nodes = nodes[nodes < len(ptr) - 1]
+    starts = ptr[nodes]
+    lengths = ptr[nodes + 1] - starts
+    total = int(lengths.sum())
+    if total == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    offsets = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+    return offsets + np.arange(total, dtype=np.int64), np.repeat(nodes, lengths)
+
+
+class TransactionGraph:
+    """Debtor -> creditor account graph in CSR form with an incremental delta"""
+
+    def __init__(self, compact_threshold: int = GRAPH_COMPACT_THRESHOLD):
+        self.compact_threshold = compact_threshold
+        self._lock = threading.RLock()
+        self._clear()
+
+    def _clear(self):
+        self._index: Dict[str, int] = {}
+        self._names: List[str] = []
+        # Compacted CSR (covers node ids < len(out_ptr) - 1)
+        self._out_ptr = np.zeros(1, dtype=np.int64)
+        self._out_dst = np.empty(0, dtype=np.int32)
+        self._count = np.empty(0, dtype=np.int64)
+        self._amount = np.empty(0, dtype=np.float64)
+        self._last_ms = np.empty(0, dtype=np.int64)
+        self._in_ptr = np.zeros(1, dtype=np.int64)
+        self._in_src = np.empty(0, dtype=np.int32)
+        self._in_edge = np.empty(0, dtype=np.int64)
+        # Delta: src -> dst -> [count, amount, last_ms] (same list in both directions)
+        self._delta_out: Dict[int, Dict[int, list]] = {}
+        self._delta_in: Dict[int, Dict[int, list]] = {}
+        self._delta_edges = 0
+        # account_holder: account -> entities, entity -> accounts
+        self._holders: Dict[str, List[str]] = {}
+        self._holder_accounts: Dict[str, List[str]] = {}
+        self.tenant_id: Optional[str] = None
+        self.since: Optional[datetime] = None
+        self.watermark: Optional[str] = None  # Latest creDtTm loaded
+        self.loaded_at: Optional[float] = None
+        self.load_ms: Optional[float] = None
+
+    # ============ BUILDING ============
+
+    def _intern(self, account: str) -> int:
+        node = self._index.get(account)
+        if node is None:
+            node = len(self._names)
+            self._index[account] = node
+            self._names.append(account)
+        return node
+
+    def add_edges(self, edges: Iterable[Tuple[str, str, int, float, int]]) -> int:
+        """Add (debtor, creditor, count, amount, last_ms) edges to the delta; returns edges added"""
+        added = 0
+        with self._lock:
+            for source, destination, count, amount, last_ms in edges:
+                src, dst = self._intern(source), self._intern(destination)
+                entry = self._delta_out.setdefault(src, {}).get(dst)
+                if entry is None:
+                    entry = [0, 0.0, 0]
+                    self._delta_out[src][dst] = entry
+                    self._delta_in.setdefault(dst, {})[src] = entry
+                    self._delta_edges += 1
+                entry[0] += int(count)
+                entry[1] += float(amount)
+                entry[2] = max(entry[2], int(last_ms))
+                added += 1
+            if self._delta_edges >= self.compact_threshold:
+                self.compact()
+        return added
+
+    def add_edges_bulk(self, edges: Iterable[Tuple[str, str, int, float, int]]) -> int:
+        """Like add_edges(), but merges straight into the CSR (one rebuild; for full loads)"""
+        src, dst, count, amount, last_ms = [], [], [], [], []
+        with self._lock:
+            intern = self._intern
+            for source, destination, c, a, l in edges:
+                src.append(intern(source))
+                dst.append(intern(destination))
+                count.append(c)
+                amount.append(a)
+                last_ms.append(l)
+            self._merge(np.array(src, dtype=np.int64), np.array(dst, dtype=np.int64),
+                        np.array(count, dtype=np.int64), np.array(amount, dtype=np.float64),
+                        np.array(last_ms, dtype=np.int64))
+        return len(src)
+
+    def compact(self):
+        """Merge the delta into the CSR arrays (duplicate pairs are summed)"""
+        with self._lock:
+            if not self._delta_edges and len(self._out_ptr) - 1 == len(self._names):
+                return
+            delta = [(s, d, e) for s, targets in self._delta_out.items() for d, e in targets.items()]
+            self._merge(np.array([s for s, _, _ in delta], dtype=np.int64),
+                        np.array([d for _, d, _ in delta], dtype=np.int64),
+                        np.array([e[0] for _, _, e in delta], dtype=np.int64),
+                        np.array([e[1] for _, _, e in delta], dtype=np.float64),
+                        np.array([e[2] for _, _, e in delta], dtype=np.int64))
+
+    def _merge(self, src: np.ndarray, dst: np.ndarray, count: np.ndarray, amount: np.ndarray, last_ms: np.ndarray):
+        """Rebuild the CSR from its current edges plus the given ones (the delta must be in them or empty)"""
+        n = len(self._names)
+        csr_nodes = len(self._out_ptr) - 1
+        src = np.concatenate([np.repeat(np.arange(csr_nodes, dtype=np.int64), np.diff(self._out_ptr)), src])
+        dst = np.concatenate([self._out_dst.astype(np.int64), dst])
+        count = np.concatenate([self._count, count])
+        amount = np.concatenate([self._amount, amount])
+        last_ms = np.concatenate([self._last_ms, last_ms])
+
+        order = np.argsort(src * max(n, 1) + dst, kind="stable")
+        src, dst, count, amount, last_ms = src[order], dst[order], count[order], amount[order], last_ms[order]
+        if len(src):
+            first = np.ones(len(src), dtype=bool)
+            first[1:] = (src[1:] != src[:-1]) | (dst[1:] != dst[:-1])
+            starts = np.flatnonzero(first)
+            src, dst = src[starts], dst[starts]
+            count = np.add.reduceat(count, starts)
+            amount = np.add.reduceat(amount, starts)
+            last_ms = np.maximum.reduceat(last_ms, starts)
+
+        out_ptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(src, minlength=n), out=out_ptr[1:])
+        in_order = np.lexsort((src, dst))
+        in_ptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(dst, minlength=n), out=in_ptr[1:])
+
+        self._out_ptr, self._out_dst = out_ptr, dst.astype(np.int32)
+        self._count, self._amount, self._last_ms = count, amount, last_ms
+        self._in_ptr, self._in_src, self._in_edge = in_ptr, src[in_order].astype(np.int32), in_order
+        self._delta_out, self._delta_in, self._delta_edges = {}, {}, 0
+
+    def set_holders(self, links: Iterable[Tuple[str, str]]):
+        """Replace the account -> holder (entity) links"""
+        holders: Dict[str, List[str]] = {}
+        accounts: Dict[str, List[str]] = {}
+        for account, entity in links:
+            holders.setdefault(account, []).append(entity)
+            accounts.setdefault(entity, []).append(account)
+        with self._lock:
+            self._holders, self._holder_accounts = holders, accounts
+
+    # ============ LOADING FROM EVENT_HISTORY ============
+
+    def _filters(self, since: Optional[datetime], tenant_id: Optional[str]) -> str:
+        filters = ""
+        if since is not None:
+            filters += f" AND {credttm_condition('>', since)}"
+        if tenant_id:
+            filters += f" AND tenantId = {sql_literal(tenant_id)}"
+        return filters
+
+    def _load_edges(self, db_service, since: Optional[datetime], tenant_id: Optional[str],
+                    bulk: bool = False) -> Tuple[int, Optional[str]]:
+        watermark = None
+        rows = 0
+
+        def edges():
+            nonlocal watermark, rows
+            statement = _EDGES_SQL.format(filters=self._filters(since, tenant_id))
+            for source, destination, count, amount, last_ms, last_credttm in \
+                    _csv_rows(db_service.strategy.stream_copy(statement)):
+                rows += 1
+                if watermark is None or last_credttm > watermark:
+                    watermark = last_credttm
+                yield source, destination, int(count), float(amount or 0), int(last_ms or 0)
+
+        (self.add_edges_bulk if bulk else self.add_edges)(edges())
+        return rows, watermark
+
+    def load(self, seconds: Optional[int] = None, tenant_id: Optional[str] = None, db_service=None) -> Dict[str, Any]:
+        """
+        (Re)build the graph from event_history
+
+        Args:
+            seconds: Only transactions from the last N seconds (all if None)
+            tenant_id: Only this tenant's transactions and holders
+        """
+        db_service = db_service or create_database_service(use_local=USE_LOCAL_POSTGRES)
+        start = time.perf_counter()
+        since = datetime.fromtimestamp(time.time() - seconds).astimezone() if seconds else None
+        fresh = TransactionGraph(self.compact_threshold)
+        rows, watermark = fresh._load_edges(db_service, since, tenant_id, bulk=True)
+        holder_filter = f"WHERE tenantId = {sql_literal(tenant_id)}" if tenant_id else ""
+        fresh.set_holders(
+            (account, entity) for account, entity in
+            _csv_rows(db_service.strategy.stream_copy(_HOLDERS_SQL.format(filters=holder_filter)))
+        )
+        with self._lock:
+            self.__dict__.update({k: v for k, v in fresh.__dict__.items() if k not in ("_lock", "compact_threshold")})
+            self.tenant_id, self.since, self.watermark = tenant_id, since, watermark
+            self.loaded_at = time.time()
+            self.load_ms = round((time.perf_counter() - start) * 1000, 1)
+        return {"edge_rows": rows, **self.stats()}
+
+    def update(self, db_service=None) -> Dict[str, Any]:
+        """Add transactions newer than the watermark (the latest creDtTm already loaded)"""
+        if self.loaded_at is None:
+            return self.load(db_service=db_service)
+        db_service = db_service or create_database_service(use_local=USE_LOCAL_POSTGRES)
+        start = time.perf_counter()
+        since = datetime.fromisoformat(self.watermark.replace("Z", "+00:00")) if self.watermark else self.since
+        rows, watermark = self._load_edges(db_service, since, self.tenant_id)
+        with self._lock:
+            if watermark and (self.watermark is None or watermark > self.watermark):
+                self.watermark = watermark
+        return {"edge_rows": rows, "update_ms": round((time.perf_counter() - start) * 1000, 1), **self.stats()}
+
+    # ============ QUERIES ============
+
+    def _node(self, account: str) -> int:
+        node = self._index.get(account)
+        if node is None:
+            raise KeyError(account)
+        return node
+
+    def _edges_of(self, node: int, outgoing: bool) -> Dict[int, Tuple[int, float, int]]:
+        """Neighbour -> (count, amount, last_ms) for one node, CSR and delta merged"""
+        ptr, ids = (self._out_ptr, self._out_dst) if outgoing else (self._in_ptr, self._in_src)
+        neighbours: Dict[int, Tuple[int, float, int]] = {}
+        if node < len(ptr) - 1:
+            start, end = ptr[node], ptr[node + 1]
+            edges = np.arange(start, end) if outgoing else self._in_edge[start:end]
+            for other, count, amount, last_ms in zip(ids[start:end].tolist(), self._count[edges].tolist(),
+                                                     self._amount[edges].tolist(), self._last_ms[edges].tolist()):
+                neighbours[other] = (count, amount, last_ms)
+        for other, (count, amount, last_ms) in (self._delta_out if outgoing else self._delta_in).get(node, {}).items():
+            if other in neighbours:
+                c, a, l = neighbours[other]
+                neighbours[other] = (c + count, a + amount, max(l, last_ms))
+            else:
+                neighbours[other] = (count, amount, last_ms)
+        return neighbours
+
+    def _expand(self, frontier: np.ndarray, direction: str) -> np.ndarray:
+        """All neighbours of the frontier nodes (with repeats)"""
+        parts = []
+        for outgoing in ((True,) if direction == "out" else (False,) if direction == "in" else (True, False)):
+            ptr, ids = (self._out_ptr, self._out_dst) if outgoing else (self._in_ptr, self._in_src)
+            positions, _ = _gather(ptr, ids, frontier)
+            parts.append(ids[positions].astype(np.int64))
+            delta = self._delta_out if outgoing else self._delta_in
+            if delta:
+                hits = set(delta).intersection(frontier.tolist())
+                parts.append(np.array([d for node in hits for d in delta[node]], dtype=np.int64))
+        return np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+
+    def _bfs(self, node: int, hops: int, direction: str) -> List[np.ndarray]:
+        """Nodes first reached at hop 1..hops"""
+        visited = np.zeros(len(self._names), dtype=bool)
+        visited[node] = True
+        frontier = np.array([node], dtype=np.int64)
+        levels = []
+        for _ in range(hops):
+            reached = np.unique(self._expand(frontier, direction))
+            reached = reached[~visited[reached]]
+            if not len(reached):
+                break
+            visited[reached] = True
+            levels.append(reached)
+            frontier = reached
+        return levels
+
+    def account_summary(self, account: str, top: int = 10) -> Dict[str, Any]:
+        """Fan-in / fan-out (distinct counterparties), volumes and top counterparties by count"""
+        with self._lock:
+            node = self._node(account)
+            result = {"account": account, "holders": self._holders.get(account, [])}
+            for name, outgoing in (("outgoing", True), ("incoming", False)):
+                edges = self._edges_of(node, outgoing)
+                ranked = sorted(edges.items(), key=lambda kv: kv[1][0], reverse=True)[:top]
+                result[name] = {
+                    "counterparties": len(edges),
+                    "transactions": sum(e[0] for e in edges.values()),
+                    "amount": round(sum(e[1] for e in edges.values()), 2),
+                    "last_ms": max((e[2] for e in edges.values()), default=None),
+                    "top": [
+                        {"account": self._names[other], "transactions": c, "amount": round(a, 2), "last_ms": l}
+                        for other, (c, a, l) in ranked
+                    ]
+                }
+            result["fan_in"] = result["incoming"]["counterparties"]
+            result["fan_out"] = result["outgoing"]["counterparties"]
+            return result
+
+    def reachable(self, account: str, hops: int = 2, direction: str = "out",
+                  max_nodes: int = GRAPH_MAX_NODES) -> Dict[str, Any]:
+        """Accounts within `hops` hops, grouped by hop (each hop's list truncated to max_nodes)"""
+        if direction not in DIRECTIONS:
+            raise ValueError(f"direction must be one of {', '.join(DIRECTIONS)}")
+        with self._lock:
+            levels = self._bfs(self._node(account), hops, direction)
+            return {
+                "account": account,
+                "direction": direction,
+                "hops": hops,
+                "total": int(sum(len(level) for level in levels)),
+                "by_hop": [
+                    {"hop": i + 1, "count": len(level), "accounts": [self._names[n] for n in level[:max_nodes].tolist()]}
+                    for i, level in enumerate(levels)
+                ]
+            }
+
+    def cycles(self, account: str, max_length: int = 4, limit: int = 50, max_steps: int = 200000) -> Dict[str, Any]:
+        """
+        Simple cycles through the account (money flowing back to it), shortest first
+
+        The DFS only steps to nodes that can still return within the
+        remaining hops (reverse BFS distances), and stops after `limit`
+        cycles or `max_steps` expansions.
+        """
+        with self._lock:
+            node = self._node(account)
+            distance = np.full(len(self._names), max_length + 1, dtype=np.int64)
+            distance[node] = 0
+            for hop, level in enumerate(self._bfs(node, max_length - 1, "in"), start=1):
+                distance[level] = hop
+
+            found: List[List[int]] = []
+            steps = 0
+            truncated = False
+            path = [node]
+            on_path = {node}
+
+            def dfs(current: int):
+                nonlocal steps, truncated
+                remaining = max_length - len(path)
+                for other in self._edges_of(current, True):
+                    steps += 1
+                    if len(found) >= limit or steps >= max_steps:
+                        truncated = True
+                        return
+                    if other == node and len(path) > 1:
+                        found.append(list(path))
+                    elif other not in on_path and distance[other] <= remaining:
+                        path.append(other)
+                        on_path.add(other)
+                        dfs(other)
+                        on_path.discard(path.pop())
+
+            if max_length >= 2:
+                dfs(node)
+            found.sort(key=len)
+            return {
+                "account": account,
+                "max_length": max_length,
+                "count": len(found),
+                "truncated": truncated,
+                "cycles": [[self._names[n] for n in cycle] + [account] for cycle in found]
+            }
+
+    def network(self, account: str, hops: int = 2, direction: str = "both",
+                max_nodes: int = GRAPH_MAX_NODES) -> Dict[str, Any]:
+        """The k-hop neighbourhood as nodes (with hop and holders) and the edges between them"""
+        if direction not in DIRECTIONS:
+            raise ValueError(f"direction must be one of {', '.join(DIRECTIONS)}")
+        with self._lock:
+            node = self._node(account)
+            hop_of = {node: 0}
+            truncated = False
+            for hop, level in enumerate(self._bfs(node, hops, direction), start=1):
+                for other in level.tolist():
+                    if len(hop_of) >= max_nodes:
+                        truncated = True
+                        break
+                    hop_of[other] = hop
+
+            edges = []
+            for src in hop_of:
+                for dst, (count, amount, last_ms) in self._edges_of(src, True).items():
+                    if dst in hop_of:
+                        edges.append({"source": self._names[src], "destination": self._names[dst],
+                                      "transactions": count, "amount": round(amount, 2), "last_ms": last_ms})
+
+            nodes = []
+            for other, hop in sorted(hop_of.items(), key=lambda kv: kv[1]):
+                name = self._names[other]
+                holders = self._holders.get(name, [])
+                siblings = sorted({a for h in holders for a in self._holder_accounts.get(h, []) if a != name})
+                nodes.append({"account": name, "hop": hop, "holders": holders, "shared_holder_accounts": siblings})
+            return {
+                "account": account,
+                "direction": direction,
+                "hops": hops,
+                "truncated": truncated,
+                "node_count": len(nodes),
+                "edge_count": len(edges),
+                "nodes": nodes,
+                "edges": edges
+            }
+
+    def top_fan_in(self, limit: int = 20, prefix: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Accounts with the most distinct senders (compacts the delta first)"""
+        with self._lock:
+            self.compact()
+            fan_in = np.diff(self._in_ptr)
+            if prefix:
+                candidates = np.array([i for i, name in enumerate(self._names) if name.startswith(prefix)],
+                                      dtype=np.int64)
+            else:
+                candidates = np.arange(len(self._names), dtype=np.int64)
+            if not len(candidates):
+                return []
+            ranked = candidates[np.argsort(-fan_in[candidates], kind="stable")][:limit]
+            received = np.bincount(self._out_dst, weights=self._count, minlength=len(self._names))
+            return [
+                {"account": self._names[n], "fan_in": int(fan_in[n]), "fan_out": int(self._out_ptr[n + 1] - self._out_ptr[n]),
+                 "transactions_received": int(received[n])}
+                for n in ranked.tolist()
+            ]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            arrays = (self._out_ptr, self._out_dst, self._count, self._amount, self._last_ms,
+                      self._in_ptr, self._in_src, self._in_edge)
+            return {
+                "loaded": self.loaded_at is not None,
+                "accounts": len(self._names),
+                "edges": int(len(self._out_dst)),
+                "delta_edges": self._delta_edges,  # Not yet compacted (may repeat CSR pairs)
+                "holder_links": sum(len(v) for v in self._holders.values()),
+                "array_bytes": int(sum(a.nbytes for a in arrays)),
+                "tenant_id": self.tenant_id,
+                "since": self.since.isoformat() if self.since else None,
+                "watermark": self.watermark,
+                "loaded_at": datetime.fromtimestamp(self.loaded_at).isoformat() if self.loaded_at else None,
+                "load_ms": self.load_ms
+            }
+
+
+# Singleton instance (empty until load())
+transaction_graph = TransactionGraph()
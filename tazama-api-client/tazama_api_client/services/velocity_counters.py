@@ -0,0 +1,161 @@
+"""
+Velocity Counters - Sliding-window per-account counts as the client submits
+
+Mirrors rules 901 (debtor) and 902 (creditor): both count confirmed
+transactions within maxQueryRange (24h) and alert from 3. Keeping the same
+counts client-side lets routes tell instantly whether an alert should have
+fired, and lets attack generators send exactly enough transactions to cross
+the threshold.
+
+Each account holds a small ring of time buckets (only non-empty ones), so
+record() and lookups are O(1) amortised. Memory is bounded by max_accounts
+(least recently used accounts are dropped) times the buckets per window.
+"""
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Dict, Optional
+
+from config import (
+    VELOCITY_WINDOW_MS, VELOCITY_BUCKET_MS, VELOCITY_MAX_ACCOUNTS,
+    RULE_901_THRESHOLD, RULE_902_THRESHOLD
+)
+
+
+class _AccountWindow:
+    """Non-empty buckets [bucket_id, count, amount] plus running totals"""
+    __slots__ = ("buckets", "count", "amount")
+
+    def __init__(self):
+        self.buckets = deque()
+        self.count = 0
+        self.amount = 0.0
+
+    def expire(self, oldest_bucket: int):
+        while self.buckets and self.buckets[0][0] < oldest_bucket:
+            _, count, amount = self.buckets.popleft()
+            self.count -= count
+            self.amount -= amount
+
+    def add(self, bucket: int, amount: float):
+        if self.buckets and self.buckets[-1][0] == bucket:
+            self.buckets[-1][1] += 1
+            self.buckets[-1][2] += amount
+        else:
+            self.buckets.append([bucket, 1, amount])
+        self.count += 1
+        self.amount += amount
+
+
+class SlidingWindowCounter:
+    """Bucketed sliding-window count / amount per key"""
+
+    def __init__(self, window_ms: int = VELOCITY_WINDOW_MS, bucket_ms: int = VELOCITY_BUCKET_MS,
+                 max_accounts: int = VELOCITY_MAX_ACCOUNTS):
+        """
+        Args:
+            window_ms: Window length (rule maxQueryRange)
+            bucket_ms: Bucket granularity; the window edge is accurate to one bucket
+            max_accounts: Accounts tracked before the least recently used is evicted
+        """
+        self.window_ms = window_ms
+        self.bucket_ms = bucket_ms
+        self.max_accounts = max_accounts
+        self._buckets_per_window = -(-window_ms // bucket_ms)
+        self._accounts: "OrderedDict[str, _AccountWindow]" = OrderedDict()
+        self._evicted = 0
+        self._lock = threading.Lock()
+
+    def _oldest_bucket(self, now_ms: int) -> int:
+        return now_ms // self.bucket_ms - self._buckets_per_window + 1
+
+    def add(self, key: str, amount: float = 0.0, timestamp_ms: Optional[int] = None) -> Dict[str, Any]:
+        """Record one event and return the key's window stats (including it)"""
+        now_ms = int(timestamp_ms if timestamp_ms is not None else time.time() * 1000)
+        with self._lock:
+            window = self._accounts.get(key)
+            if window is None:
+                window = self._accounts[key] = _AccountWindow()
+                if len(self._accounts) > self.max_accounts:
+                    self._accounts.popitem(last=False)
+                    self._evicted += 1
+            else:
+                self._accounts.move_to_end(key)
+            window.expire(self._oldest_bucket(now_ms))
+            window.add(now_ms // self.bucket_ms, amount)
+            return self._stats(window)
+
+    def get(self, key: str, timestamp_ms: Optional[int] = None) -> Dict[str, Any]:
+        """Window stats for a key without recording anything"""
+        now_ms = int(timestamp_ms if timestamp_ms is not None else time.time() * 1000)
+        with self._lock:
+            window = self._accounts.get(key)
+            if window is None:
+                return {"count": 0, "total_amount": 0.0, "avg_amount": 0.0}
+            window.expire(self._oldest_bucket(now_ms))
+            return self._stats(window)
+
+    @staticmethod
+    def _stats(window: _AccountWindow) -> Dict[str, Any]:
+        return {
+            "count": window.count,
+            "total_amount": round(window.amount, 2),
+            "avg_amount": round(window.amount / window.count, 2) if window.count else 0.0
+        }
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "accounts": len(self._accounts),
+                "max_accounts": self.max_accounts,
+                "evicted_accounts": self._evicted,
+                "window_ms": self.window_ms,
+                "bucket_ms": self.bucket_ms
+            }
+
+    def clear(self):
+        with self._lock:
+            self._accounts.clear()
+            self._evicted = 0
+
+
+class VelocityCounterService:
+    """Debtor (Rule 901) and creditor (Rule 902) sliding-window counters"""
+
+    def __init__(self, debtor_threshold: int = RULE_901_THRESHOLD,
+                 creditor_threshold: int = RULE_902_THRESHOLD):
+        self.debtor_threshold = debtor_threshold
+        self.creditor_threshold = creditor_threshold
+        self.debtors = SlidingWindowCounter()
+        self.creditors = SlidingWindowCounter()
+
+    def record(self, debtor: Optional[str], creditor: Optional[str], amount: float = 0.0,
+               timestamp_ms: Optional[int] = None) -> Dict[str, Any]:
+        """Record a confirmed transaction; returns whether 901 / 902 should fire for it"""
+        result = {}
+        if debtor:
+            stats = self.debtors.add(debtor, amount, timestamp_ms)
+            result["debtor"] = {**stats, "rule_901_expected": stats["count"] >= self.debtor_threshold}
+        if creditor:
+            stats = self.creditors.add(creditor, amount, timestamp_ms)
+            result["creditor"] = {**stats, "rule_902_expected": stats["count"] >= self.creditor_threshold}
+        return result
+
+    def debtor(self, account: str) -> Dict[str, Any]:
+        stats = self.debtors.get(account)
+        return {**stats, "threshold": self.debtor_threshold,
+                "rule_901_expected": stats["count"] >= self.debtor_threshold,
+                "remaining_to_threshold": max(0, self.debtor_threshold - stats["count"])}
+
+    def creditor(self, account: str) -> Dict[str, Any]:
+        stats = self.creditors.get(account)
+        return {**stats, "threshold": self.creditor_threshold,
+                "rule_902_expected": stats["count"] >= self.creditor_threshold,
+                "remaining_to_threshold": max(0, self.creditor_threshold - stats["count"])}
+
+    def stats(self) -> Dict[str, Any]:
+        return {"debtors": self.debtors.snapshot(), "creditors": self.creditors.snapshot()}
+
+
+# Singleton instance fed by send_pacs008_with_confirmation()
+velocity_counters = VelocityCounterService()
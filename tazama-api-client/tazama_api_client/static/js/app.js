@@ -10,11 +10,12 @@ document.addEventListener('DOMContentLoaded', async () => {
     }
 
     try {
-        console.log('[INIT] Calling loadStats()...');
-        await loadStats();
-        console.log('[INIT] loadStats() completed');
+        console.log('[INIT] Calling connectLiveDashboard()...');
+        connectLiveDashboard();
+        console.log('[INIT] connectLiveDashboard() completed');
     } catch (e) {
-        console.error('[INIT] loadStats() error:', e);
+        console.error('[INIT] connectLiveDashboard() error:', e);
+        await loadStats();
     }
 
     try {
@@ -50,7 +51,9 @@ const API = {
     dbSummary: '/api/test/db-summary',
     logs: (container) => `/api/logs/${container}`,
     fraudAlerts: '/api/fraud-alerts',
-    history: '/api/history'
+    history: '/api/history',
+    liveSocket: '/ws/dashboard',
+    liveStream: '/api/dashboard/stream'
 };
 
 function setupEventListeners() {
@@ -170,53 +173,58 @@ async function loadDbSummary() {
 
     try {
         const response = await fetch(API.dbSummary);
-        const data = await response.json();
-
-        if (data.status === 'success') {
-            let html = `<div style="margin-bottom: 0.75rem; color: #fff;"><strong>Total Transaksi: ${data.total_transactions}</strong></div>`;
-
-            // Debtors table
-            html += `<div style="display: grid; grid-template-columns: 1fr 1fr; gap: 1rem;">`;
-            html += `<div>`;
-            html += `<div style="font-weight: 600; margin-bottom: 0.5rem; color: #f87171;">👤 Debtor (Pengirim)</div>`;
-            if (data.debtors && data.debtors.length > 0) {
-                html += `<table style="width: 100%; font-size: 0.85rem; border-collapse: collapse;">`;
-                html += `<tr style="background: rgba(255,255,255,0.1);"><th style="padding: 6px; text-align: left; color: #e2e8f0;">Account</th><th style="padding: 6px; text-align: right; color: #e2e8f0;">Tx</th></tr>`;
-                data.debtors.forEach(d => {
-                    const bgColor = d.tx_count >= 3 ? 'rgba(239, 68, 68, 0.2)' : 'transparent';
-                    html += `<tr style="background: ${bgColor};"><td style="padding: 5px; border-bottom: 1px solid rgba(255,255,255,0.1); color: #cbd5e1;">${d.account}</td><td style="padding: 5px; text-align: right; border-bottom: 1px solid rgba(255,255,255,0.1); color: #cbd5e1; font-weight: ${d.tx_count >= 3 ? '700' : '400'};">${d.tx_count}</td></tr>`;
-                });
-                html += `</table>`;
-            } else {
-                html += `<em style="color: #94a3b8;">Tidak ada data</em>`;
-            }
-            html += `</div>`;
-
-            // Creditors table
-            html += `<div>`;
-            html += `<div style="font-weight: 600; margin-bottom: 0.5rem; color: #34d399;">🏦 Creditor (Penerima)</div>`;
-            if (data.creditors && data.creditors.length > 0) {
-                html += `<table style="width: 100%; font-size: 0.85rem; border-collapse: collapse;">`;
-                html += `<tr style="background: rgba(255,255,255,0.1);"><th style="padding: 6px; text-align: left; color: #e2e8f0;">Account</th><th style="padding: 6px; text-align: right; color: #e2e8f0;">Tx</th></tr>`;
-                data.creditors.forEach(c => {
-                    const bgColor = c.tx_count >= 3 ? 'rgba(239, 68, 68, 0.2)' : 'transparent';
-                    html += `<tr style="background: ${bgColor};"><td style="padding: 5px; border-bottom: 1px solid rgba(255,255,255,0.1); color: #cbd5e1;">${c.account}</td><td style="padding: 5px; text-align: right; border-bottom: 1px solid rgba(255,255,255,0.1); color: #cbd5e1; font-weight: ${c.tx_count >= 3 ? '700' : '400'};">${c.tx_count}</td></tr>`;
-                });
-                html += `</table>`;
-            } else {
-                html += `<em style="color: #94a3b8;">Tidak ada data</em>`;
-            }
-            html += `</div></div>`;
-
-            // Add hint
-            html += `<div style="margin-top: 0.75rem; padding: 0.5rem; background: rgba(251, 191, 36, 0.1); border-radius: 6px; font-size: 0.8rem; color: #fbbf24;">💡 Highlight merah = sudah ≥3 transaksi (potensi trigger Rule 901/902)</div>`;
+        renderDbSummary(await response.json());
+    } catch (error) {
+        content.innerHTML = `<span style="color: #f87171;">Error: ${error.message}</span>`;
+    }
+}
 
-            content.innerHTML = html;
+function renderDbSummary(data) {
+    const content = document.getElementById('dbSummaryContent');
+    if (!content) return;
+
+    if (data.status === 'success') {
+        let html = `<div style="margin-bottom: 0.75rem; color: #fff;"><strong>Total Transaksi: ${data.total_transactions}</strong></div>`;
+
+        // Debtors table
+        html += `<div style="display: grid; grid-template-columns: 1fr 1fr; gap: 1rem;">`;
+        html += `<div>`;
+        html += `<div style="font-weight: 600; margin-bottom: 0.5rem; color: #f87171;">👤 Debtor (Pengirim)</div>`;
+        if (data.debtors && data.debtors.length > 0) {
+            html += `<table style="width: 100%; font-size: 0.85rem; border-collapse: collapse;">`;
+            html += `<tr style="background: rgba(255,255,255,0.1);"><th style="padding: 6px; text-align: left; color: #e2e8f0;">Account</th><th style="padding: 6px; text-align: right; color: #e2e8f0;">Tx</th></tr>`;
+            data.debtors.forEach(d => {
+                const bgColor = d.tx_count >= 3 ? 'rgba(239, 68, 68, 0.2)' : 'transparent';
+                html += `<tr style="background: ${bgColor};"><td style="padding: 5px; border-bottom: 1px solid rgba(255,255,255,0.1); color: #cbd5e1;">${d.account}</td><td style="padding: 5px; text-align: right; border-bottom: 1px solid rgba(255,255,255,0.1); color: #cbd5e1; font-weight: ${d.tx_count >= 3 ? '700' : '400'};">${d.tx_count}</td></tr>`;
+            });
+            html += `</table>`;
         } else {
-            content.innerHTML = `<span style="color: #f87171;">Error: ${data.message}</span>`;
+            html += `<em style="color: #94a3b8;">Tidak ada data</em>`;
         }
-    } catch (error) {
-        content.innerHTML = `<span style="color: #f87171;">Error: ${error.message}</span>`;
+        html += `</div>`;
+
+        // Creditors table
+        html += `<div>`;
+        html += `<div style="font-weight: 600; margin-bottom: 0.5rem; color: #34d399;">🏦 Creditor (Penerima)</div>`;
+        if (data.creditors && data.creditors.length > 0) {
+            html += `<table style="width: 100%; font-size: 0.85rem; border-collapse: collapse;">`;
+            html += `<tr style="background: rgba(255,255,255,0.1);"><th style="padding: 6px; text-align: left; color: #e2e8f0;">Account</th><th style="padding: 6px; text-align: right; color: #e2e8f0;">Tx</th></tr>`;
+            data.creditors.forEach(c => {
+                const bgColor = c.tx_count >= 3 ? 'rgba(239, 68, 68, 0.2)' : 'transparent';
+                html += `<tr style="background: ${bgColor};"><td style="padding: 5px; border-bottom: 1px solid rgba(255,255,255,0.1); color: #cbd5e1;">${c.account}</td><td style="padding: 5px; text-align: right; border-bottom: 1px solid rgba(255,255,255,0.1); color: #cbd5e1; font-weight: ${c.tx_count >= 3 ? '700' : '400'};">${c.tx_count}</td></tr>`;
+            });
+            html += `</table>`;
+        } else {
+            html += `<em style="color: #94a3b8;">Tidak ada data</em>`;
+        }
+        html += `</div></div>`;
+
+        // Add hint
+        html += `<div style="margin-top: 0.75rem; padding: 0.5rem; background: rgba(251, 191, 36, 0.1); border-radius: 6px; font-size: 0.8rem; color: #fbbf24;">💡 Highlight merah = sudah ≥3 transaksi (potensi trigger Rule 901/902)</div>`;
+
+        content.innerHTML = html;
+    } else {
+        content.innerHTML = `<span style="color: #f87171;">Error: ${data.message}</span>`;
     }
 }
 
@@ -711,6 +719,14 @@ async function checkInternalLogs(container, boxId, textId) {
     const text = document.getElementById(textId);
 
     box.style.display = 'block';
+
+    // Live channel: follow the shared log stream instead of fetching a snapshot
+    if (liveDashboard.connected) {
+        text.textContent = 'Following logs...';
+        followLiveLogs(container, textId);
+        return;
+    }
+
     text.textContent = 'Fetching logs...';
 
     try {
@@ -903,26 +919,29 @@ async function loadStats() {
         console.log('[loadStats] Response received, status:', response.status);
         const data = await response.json();
         console.log('[loadStats] Data:', data);
+        renderStats(data);
+    } catch (e) {
+        console.error('Failed to load stats', e);
+    }
+}
 
-        // Update total transactions
-        document.getElementById('statTotal').textContent = data.total_tests || 0;
+function renderStats(data) {
+    // Update total transactions
+    document.getElementById('statTotal').textContent = data.total_tests || 0;
 
-        // Update processed count
-        document.getElementById('statSuccess').textContent = data.success_count || 0;
+    // Update processed count
+    document.getElementById('statSuccess').textContent = data.success_count || 0;
 
-        // Update message type counts from tests_by_type
-        const pacs008Count = data.tests_by_type?.['pacs.008']?.count || 0;
-        const pacs002Count = data.tests_by_type?.['pacs.002']?.count || 0;
+    // Update message type counts from tests_by_type
+    const pacs008Count = data.tests_by_type?.['pacs.008']?.count || 0;
+    const pacs002Count = data.tests_by_type?.['pacs.002']?.count || 0;
 
-        document.getElementById('statPacs008').textContent = pacs008Count;
-        document.getElementById('statPacs002').textContent = pacs002Count;
+    document.getElementById('statPacs008').textContent = pacs008Count;
+    document.getElementById('statPacs002').textContent = pacs002Count;
 
-        // Update average amount (stored in avg_response_time_ms field)
-        const avgAmount = data.avg_response_time_ms || 0;
-        document.getElementById('statAvgTime').textContent = formatCurrency(avgAmount);
-    } catch (e) {
-        console.error('Failed to load stats', e);
-    }
+    // Update average amount (stored in avg_response_time_ms field)
+    const avgAmount = data.avg_response_time_ms || 0;
+    document.getElementById('statAvgTime').textContent = formatCurrency(avgAmount);
 }
 
 // Helper function to format currency
@@ -964,7 +983,7 @@ async function runBatchTest() {
         const data = await response.json();
 
         resultsBox.querySelector('pre').textContent = JSON.stringify(data, null, 2);
-        loadStats();
+        if (!liveDashboard.connected) loadStats();
     } catch (e) {
         resultsBox.querySelector('pre').textContent = 'Error: ' + e.message;
     } finally {
@@ -1004,6 +1023,168 @@ function stopFraudAlertPolling() {
     }
 }
 
+// --- Live Dashboard (push) ---
+// One server-side aggregator pushes stats deltas, top debtors/creditors,
+// throughput, new alerts and followed container logs to every open tab
+// (/ws/dashboard, SSE fallback), so database load does not grow with tabs.
+
+const liveDashboard = {
+    socket: null,
+    source: null,
+    connected: false,
+    opened: false,
+    retryMs: 1000,
+    stats: {},
+    logs: {}  // container -> { textId, lines }
+};
+
+function connectLiveDashboard() {
+    if (!('WebSocket' in window)) {
+        connectLiveStream();
+        return;
+    }
+
+    const protocol = location.protocol === 'https:' ? 'wss' : 'ws';
+    const socket = new WebSocket(`${protocol}://${location.host}${API.liveSocket}`);
+    liveDashboard.socket = socket;
+
+    socket.onopen = () => {
+        liveDashboard.connected = true;
+        liveDashboard.opened = true;
+        liveDashboard.retryMs = 1000;
+        setLiveIndicator(true);
+        // Re-follow logs after a reconnect
+        Object.keys(liveDashboard.logs).forEach(container => {
+            socket.send(JSON.stringify({ action: 'logs', container }));
+        });
+    };
+    socket.onmessage = (event) => handleLiveMessage(JSON.parse(event.data));
+    socket.onclose = () => {
+        liveDashboard.connected = false;
+        liveDashboard.socket = null;
+        setLiveIndicator(false);
+
+        // WebSocket never worked (e.g. blocked by a proxy): switch to Server-Sent Events
+        if (!liveDashboard.opened && 'EventSource' in window) {
+            connectLiveStream();
+            return;
+        }
+        setTimeout(connectLiveDashboard, liveDashboard.retryMs);
+        liveDashboard.retryMs = Math.min(liveDashboard.retryMs * 2, 30000);
+    };
+}
+
+function connectLiveStream() {
+    if (liveDashboard.source) liveDashboard.source.close();
+
+    const containers = Object.keys(liveDashboard.logs).join(',');
+    const url = API.liveStream + (containers ? `?logs=${encodeURIComponent(containers)}` : '');
+    const source = new EventSource(url);
+    liveDashboard.source = source;
+
+    ['snapshot', 'stats', 'db_summary', 'throughput', 'alerts', 'logs'].forEach(type => {
+        source.addEventListener(type, (event) => handleLiveMessage(JSON.parse(event.data)));
+    });
+    source.onopen = () => {
+        liveDashboard.connected = true;
+        setLiveIndicator(true);
+    };
+    // EventSource reconnects by itself
+    source.onerror = () => {
+        liveDashboard.connected = false;
+        setLiveIndicator(false);
+    };
+}
+
+function handleLiveMessage(message) {
+    switch (message.type) {
+        case 'snapshot':
+            if (message.stats) {
+                liveDashboard.stats = message.stats;
+                renderStats(message.stats);
+            }
+            if (message.db_summary) renderDbSummary(message.db_summary);
+            if (message.throughput) renderThroughput(message.throughput);
+            if (message.alerts && message.alerts.length > 0) renderLiveAlerts(message.alerts);
+            break;
+        case 'stats':
+            Object.assign(liveDashboard.stats, message.delta);
+            renderStats(liveDashboard.stats);
+            break;
+        case 'db_summary':
+            renderDbSummary(message.data);
+            break;
+        case 'throughput':
+            renderThroughput(message);
+            break;
+        case 'alerts':
+            renderLiveAlerts(message.alerts);
+            break;
+        case 'logs':
+            appendLiveLogs(message);
+            break;
+    }
+}
+
+function setLiveIndicator(online) {
+    const indicator = document.getElementById('liveIndicator');
+    if (!indicator) return;
+    indicator.textContent = online ? '● Live' : '○ Offline (Refresh Stats manual)';
+    indicator.style.color = online ? '#34d399' : '#94a3b8';
+}
+
+function renderThroughput(data) {
+    const elem = document.getElementById('liveThroughput');
+    if (!elem) return;
+    elem.textContent = `⚡ ${data.tms_total_per_sec || 0} req/s ke TMS • ${data.results_per_sec || 0} hasil/s • ` +
+        `${data.tms_errors_per_sec || 0} error/s • ${data.in_flight || 0} request aktif`;
+}
+
+function renderLiveAlerts(alerts) {
+    const list = document.getElementById('liveAlerts');
+    if (!list) return;
+    list.style.display = 'block';
+
+    alerts.forEach(alert => {
+        const item = document.createElement('div');
+        item.style.cssText = 'padding: 4px 0; border-bottom: 1px solid rgba(255,255,255,0.1); color: #fca5a5;';
+        const typologies = alert.typologies && alert.typologies.length > 0 ? alert.typologies.join(', ') : '-';
+        const time = alert.evaluated_at ? new Date(alert.evaluated_at).toLocaleTimeString() : '';
+        item.textContent = `🚨 ${time} ${alert.message_id} • ${typologies}${alert.tenant_id ? ' • ' + alert.tenant_id : ''}`;
+        list.insertBefore(item, list.firstChild);
+    });
+
+    // Keep the 10 most recent
+    while (list.children.length > 10) list.removeChild(list.lastChild);
+}
+
+function followLiveLogs(container, textId) {
+    liveDashboard.logs[container] = { textId, lines: [] };
+
+    if (liveDashboard.socket) {
+        liveDashboard.socket.send(JSON.stringify({ action: 'logs', container }));
+    } else {
+        // SSE: the followed containers are part of the stream URL
+        connectLiveStream();
+    }
+}
+
+function appendLiveLogs(message) {
+    const follow = liveDashboard.logs[message.container];
+    if (!follow) return;
+    const text = document.getElementById(follow.textId);
+
+    if (message.error) {
+        text.textContent = `Error: ${message.error}`;
+        return;
+    }
+
+    follow.lines = message.snapshot ? message.lines : follow.lines.concat(message.lines);
+    if (follow.lines.length > 200) follow.lines = follow.lines.slice(-200);
+    text.textContent = follow.lines.join('\n') || 'Waiting for logs...';
+    text.scrollTop = text.scrollHeight;
+}
+
 // ============================================================================
 // Rule 903: Geographic Risk Testing
 // ============================================================================
@@ -0,0 +1,57 @@
+"""
+Test setup: the app uses flat imports (from config import ...), so the
+tazama_api_client directory goes on sys.path like it does under uvicorn.
+"""
+import os
+import subprocess
+import sys
+
+import pytest
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+
+@pytest.fixture
+def app(monkeypatch):
+    """main.app, imported from the app directory like the Dockerfile WORKDIR (static/ is relative)"""
+    monkeypatch.chdir(APP_DIR)
+    import main
+    return main.app
+
+
+class ScriptedStrategy:
+    """
+    Database strategy stand-in: answers each query with the first matching
+    (substring, stdout) rule, or fails with `fail_on` substrings, and records
+    every query it was asked to run
+    """
+
+    def __init__(self, rules=(), fail_on=()):
+        self.rules = list(rules)
+        self.fail_on = list(fail_on)
+        self.queries = []
+
+    def execute_query(self, query, format_csv=False, timeout=10):
+        self.queries.append(query)
+        for needle in self.fail_on:
+            if needle in query:
+                return subprocess.CompletedProcess([], 1, "", f"ERROR: {needle} failed")
+        stdout = next((out for needle, out in self.rules if needle in query), "")
+        return subprocess.CompletedProcess([], 0, stdout, "")
+
+    def get_name(self):
+        return "scripted"
+
+    def ran(self, needle):
+        return [q for q in self.queries if needle in q]
+
+
+@pytest.fixture
+def scripted_db():
+    """Build a DatabaseQueryService over a ScriptedStrategy: scripted_db(rules, fail_on)"""
+    from services.database_query_service import DatabaseQueryService
+
+    def build(rules=(), fail_on=()):
+        return DatabaseQueryService(ScriptedStrategy(rules, fail_on))
+    return build
@@ -0,0 +1,97 @@
+"""Benchmark suite: case statistics, synthetic corpora and the baseline comparison / exit code"""
+import importlib
+import itertools
+import json
+import os
+
+import pytest
+
+
+@pytest.fixture(scope="module")
+def benchmark():
+    """benchmark.py points TMS_BASE_URL / MOCK_TMS_LOG_DIR at the mock on import; keep that out of other tests"""
+    importlib.import_module("config")  # reads the environment before benchmark rewrites it
+    saved = dict(os.environ)
+    try:
+        import benchmark
+    finally:
+        os.environ.clear()
+        os.environ.update(saved)
+    return benchmark
+
+
+def run_of(**medians):
+    return {"results": {name: {"median_ms": value, "p95_ms": value * 2} for name, value in medians.items()}}
+
+
+def test_case_statistics(benchmark, monkeypatch):
+    # Each timed call takes 1, 2, ... 10 ms on a fake clock
+    ticks = itertools.chain.from_iterable((0.0, n / 1000) for n in range(1, 11))
+    monkeypatch.setattr(benchmark.time, "perf_counter", lambda: next(ticks))
+    calls = []
+    case = benchmark.Case("csv.parse", "csv", lambda: calls.append(1), iterations=20, warmup=2, items=100)
+
+    result = case.run(scale=0.5)
+    assert len(calls) == 12 and result["iterations"] == 10
+    assert (result["min_ms"], result["median_ms"], result["mean_ms"], result["max_ms"]) == (1.0, 5.5, 5.5, 10.0)
+    assert result["p95_ms"] == 10.0
+    assert result["items_per_second"] == round(100 / 0.0055, 1)
+
+
+def test_case_runs_at_least_once(benchmark):
+    assert benchmark.Case("x", "payload", lambda: None, iterations=3, warmup=0).run(scale=0.01)["iterations"] == 1
+
+
+def test_synthetic_corpora_are_deterministic(benchmark):
+    logs = benchmark.synthetic_log_corpus(200)
+    assert logs == benchmark.synthetic_log_corpus(200) and len(logs.splitlines()) == 200
+    assert "id: 'bench-199'" in logs.splitlines()[-1]
+
+    from services.database_query_service import DatabaseQueryService
+    rows = DatabaseQueryService(None)._parse_csv_result(benchmark.synthetic_csv_corpus(1000))
+    assert len(rows) == 1000 and rows[1] == {"account": "ACC00000001", "tx_count": 2, "total_amount": 1250.5}
+
+
+def test_compare_with_baseline(benchmark):
+    baseline = run_of(same=10.0, slower=10.0, faster=10.0, edge=10.0)
+    current = run_of(same=11.0, slower=13.0, faster=7.0, edge=12.5, added=1.0)
+    rows, regressed = benchmark.compare_with_baseline(current, baseline, threshold=0.25)
+
+    by_case = {row["case"]: row for row in rows}
+    assert {name: row["status"] for name, row in by_case.items()} == {
+        "same": "ok", "slower": "regression", "faster": "improved", "edge": "ok", "added": "new"
+    }
+    assert by_case["slower"]["change_pct"] == 30.0 and regressed
+
+
+def test_compare_on_another_metric(benchmark):
+    rows, regressed = benchmark.compare_with_baseline(run_of(a=10.0), run_of(a=10.0), metric="p95_ms")
+    assert rows[0]["baseline"] == 20.0 and not regressed
+
+
+def test_main_exit_code_follows_the_comparison(benchmark, monkeypatch, tmp_path):
+    baseline = tmp_path / "baseline.json"
+    baseline.write_text(json.dumps(run_of(**{"csv.parse_1k": 10.0})))
+    output = tmp_path / "results.json"
+    current = {"meta": {}, **run_of(**{"csv.parse_1k": 20.0})}
+    monkeypatch.setattr(benchmark, "run_benchmarks", lambda groups, scale: current)
+    args = ["--only", "csv", "--baseline", str(baseline), "--output", str(output)]
+
+    assert benchmark.main(args) == 1
+    assert json.loads(output.read_text())["comparison"]["regressed"] is True
+    assert benchmark.main(args + ["--threshold", "1.5"]) == 0
+    assert benchmark.main(["--only", "csv", "--no-baseline", "--output", str(output)]) == 0
+    assert benchmark.main(["--only", "csv", "--baseline", str(tmp_path / "missing.json"),
+                           "--output", str(output)]) == 1
+
+
+def test_main_fails_over_the_cold_start_budget(benchmark, monkeypatch, tmp_path):
+    import config
+    current = {"meta": {}, **run_of(**{"startup.import_main": config.COLD_START_BUDGET_MS + 1})}
+    monkeypatch.setattr(benchmark, "run_benchmarks", lambda groups, scale: current)
+    assert benchmark.main(["--only", "startup", "--no-baseline", "--output", str(tmp_path / "r.json")]) == 1
+
+
+def test_unknown_group_is_rejected(benchmark):
+    with pytest.raises(SystemExit):
+        benchmark.main(["--only", "gpu"])
@@ -0,0 +1,101 @@
+"""Response compression middleware and verbosity projection"""
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from models.schemas import Verbosity
+from utils.compression import CompressionMiddleware, select_encoding
+from utils.response_projection import project_response
+from utils.timing import TimingMiddleware
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+
+    @app.get("/small")
+    def small():
+        return {"status": "success"}
+
+    @app.get("/big")
+    def big():
+        return {"rows": [{"id": i, "name": f"ACCOUNT_{i}"} for i in range(500)]}
+
+    @app.get("/stream")
+    def stream():
+        return StreamingResponse((b"x" * 2048 for _ in range(3)), media_type="text/plain")
+
+    # Same order as main.py: compression wraps timing and sees the final body
+    app.add_middleware(TimingMiddleware)
+    app.add_middleware(CompressionMiddleware, minimum_size=1024)
+    return TestClient(app)
+
+
+def test_large_json_is_gzipped_with_timings(client):
+    response = client.get("/big", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert "server-timing" in response.headers
+    body = response.json()  # The test client decodes the gzip body
+    assert len(body["rows"]) == 500 and "timings" in body
+
+
+def test_compressed_length_is_the_encoded_size(client):
+    response = client.get("/big", headers={"Accept-Encoding": "gzip"})
+    # content-length describes the gzip body; .content is the decoded JSON
+    assert int(response.headers["content-length"]) < len(response.content) / 4
+
+
+@pytest.mark.parametrize("path, headers", [
+    ("/small", {"Accept-Encoding": "gzip"}),       # Below minimum_size
+    ("/big", {"Accept-Encoding": "identity"}),     # Client accepts no supported coding
+    ("/stream", {"Accept-Encoding": "gzip"}),      # Multi-chunk bodies stream through
+])
+def test_responses_left_uncompressed(client, path, headers):
+    response = client.get(path, headers=headers)
+    assert "content-encoding" not in response.headers
+
+
+def test_select_encoding():
+    assert select_encoding({"gzip", "deflate"}) == "gzip"
+    assert select_encoding({"deflate"}) is None
+    assert select_encoding({"br", "gzip"}) in ("br", "gzip")
+
+
+def test_app_compresses(app):
+    response = TestClient(app).get("/openapi.json", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+
+
+RESPONSE = {
+    "status": "success",
+    "payload_sent": {"big": "payload"},
+    "tms_response": {"ok": True},
+    "results": [{"iteration": 1, "status": 200, "response": {"x": 1}},
+                {"iteration": 2, "status": 500, "response": "boom"}],
+    "fraud_alerts": [{"rule_id": "901", "title": "Velocity", "risk_level": "HIGH",
+                      "request_context": {"debtor": "D"},
+                      "rule_detail": {"why_triggered": "3 in 24h", "config": {"bands": []}}}],
+}
+
+
+def test_full_is_unchanged():
+    assert project_response(RESPONSE, Verbosity.FULL) is RESPONSE
+
+
+def test_standard_drops_echoes():
+    projected = project_response(RESPONSE, Verbosity.STANDARD)
+    assert "payload_sent" not in projected and projected["tms_response"] == {"ok": True}
+    assert projected["results"][0] == {"iteration": 1, "status": 200}
+    alert = projected["fraud_alerts"][0]
+    assert "request_context" not in alert
+    assert alert["rule_detail"] == {"why_triggered": "3 in 24h"}
+    assert "payload_sent" in RESPONSE  # Input untouched
+
+
+def test_summary_counts_results():
+    projected = project_response(RESPONSE, "summary")
+    assert projected["results_summary"] == {"total": 2, "success": 1, "failed": 1}
+    assert "results" not in projected and "tms_response" not in projected
+    assert projected["fraud_alerts"] == [{"rule_id": "901", "title": "Velocity", "risk_level": "HIGH"}]
@@ -0,0 +1,97 @@
+"""AIMD concurrency limiter: growth on healthy samples, cuts on overload, min / max bounds"""
+import threading
+
+from services.concurrency_limiter import AdaptiveConcurrencyLimiter
+
+
+def fill(limiter):
+    """Take every free slot so the limit counts as in use"""
+    for _ in range(limiter.limit):
+        assert limiter.acquire(timeout=0)
+
+
+def healthy_round(limiter, latency_ms=10.0):
+    fill(limiter)
+    for _ in range(limiter._in_flight):
+        limiter.release(latency_ms, 200)
+
+
+def test_limit_grows_while_latency_stays_at_baseline():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=2, max_limit=8)
+    for _ in range(10):
+        healthy_round(limiter)
+    snapshot = limiter.snapshot()
+    assert snapshot["limit"] > 2 and snapshot["limit_increases"] > 0
+    assert snapshot["baseline_latency_ms"] == 10.0 and snapshot["limit_decreases"] == 0
+
+
+def test_limit_only_grows_when_in_use():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=8, max_limit=16)
+    for _ in range(20):
+        limiter.acquire()
+        limiter.release(10.0, 200)
+    assert limiter.limit == 8 and limiter.snapshot()["limit_increases"] == 0
+
+
+def test_errors_and_timeouts_cut_the_limit():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=8, backoff_ratio=0.5)
+    limiter.acquire()
+    limiter.release(10.0, 503)
+    assert limiter.limit == 4
+    limiter.acquire()
+    limiter.release(10.0, 0)
+    assert limiter.limit == 2 and limiter.snapshot()["limit_decreases"] == 2
+
+
+def test_latency_past_tolerance_counts_as_overload():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=8, backoff_ratio=0.5, latency_tolerance=2.0)
+    limiter.acquire()
+    limiter.release(10.0, 200)
+    limiter.acquire()
+    limiter.release(19.0, 200)
+    assert limiter.limit == 8
+    limiter.acquire()
+    limiter.release(50.0, 200)
+    assert limiter.limit == 4
+
+
+def test_limit_stays_within_bounds():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=3, min_limit=2, max_limit=4, backoff_ratio=0.1)
+    for _ in range(200):
+        healthy_round(limiter)
+    assert limiter.limit == 4
+
+    for _ in range(10):
+        limiter.acquire()
+        limiter.release(10.0, 500)
+    assert limiter.limit == 2
+
+
+def test_disabled_limiter_is_fixed_at_max():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=2, max_limit=6, enabled=False)
+    limiter.acquire()
+    limiter.release(10.0, 500)
+    assert limiter.limit == 6 and not limiter.snapshot()["adaptive"]
+
+
+def test_acquire_blocks_at_the_limit_until_a_release():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=1, max_limit=1)
+    assert limiter.acquire(timeout=0)
+    assert not limiter.acquire(timeout=0.01)
+
+    acquired = threading.Event()
+    waiter = threading.Thread(target=lambda: limiter.acquire() and acquired.set())
+    waiter.start()
+    assert not acquired.wait(0.05)
+    limiter.release(5.0, 200)
+    assert acquired.wait(1)
+    waiter.join()
+
+
+def test_slot_releases_with_the_recorded_sample():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=4, backoff_ratio=0.5)
+    with limiter.slot() as sample:
+        assert limiter.snapshot()["in_flight"] == 1
+        sample.update(latency_ms=12.0, status_code=502)
+    snapshot = limiter.snapshot()
+    assert snapshot["in_flight"] == 0 and snapshot["limit"] == 2 and snapshot["last_latency_ms"] == 12.0
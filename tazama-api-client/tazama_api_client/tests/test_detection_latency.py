@@ -0,0 +1,111 @@
+"""Detection latency: relay and evaluation DB resolution, timeouts and the percentile report"""
+import pytest
+
+from services.detection_latency import DetectionLatencyTracker, percentiles
+from services.result_index import ResultIndex
+
+
+def pacs002(n):
+    return {"FIToFIPmtSts": {"GrpHdr": {"MsgId": f"M{n}"},
+                             "TxInfAndSts": {"OrgnlEndToEndId": f"E{n}", "OrgnlInstrId": f"I{n}"}}}
+
+
+def relayed(n, status="ALRT", rules=("901@1.0.0", "902@1.0.0"), typology="typology-processor@1.0.0"):
+    return {
+        "report": {"evaluationID": f"EVAL-{n}", "status": status, "tadpResult": {"typologyResult": [
+            {"cfg": typology, "ruleResults": [{"id": r} for r in rules]}
+        ]}},
+        # Keyed by the original EndToEndId only, so resolution goes through the alias
+        "transaction": {"FIToFIPmtSts": {"TxInfAndSts": {"OrgnlEndToEndId": f"E{n}"}}}
+    }
+
+
+@pytest.fixture
+def tracker():
+    index = ResultIndex()
+    tracker = DetectionLatencyTracker(index=index, timeout=60, query=lambda msg_ids: [])
+    tracker.start("relay")
+    yield tracker
+    tracker.stop()
+
+
+def test_percentiles():
+    stats = percentiles([40, 10, 30, 20, 50, 60, 70, 80, 90, 100])
+    assert (stats["count"], stats["min"], stats["max"], stats["avg"]) == (10, 10, 100, 55.0)
+    assert (stats["p50"], stats["p90"], stats["p99"]) == (60, 100, 100)
+    assert percentiles([]) is None
+
+
+def test_relayed_result_resolves_submission(tracker):
+    tracker.record_submission(pacs002(1), submitted_at=1000.0)
+    entry = tracker.index.ingest(relayed(1))
+    entry_latency = round((entry["received_at"] - 1000.0) * 1000, 2)
+
+    report = tracker.report(include_samples=True)
+    assert (report["submitted"], report["detected"], report["pending"]) == (1, 1, 0)
+    sample = report["samples"][0]
+    assert sample["msg_id"] == "M1" and sample["latency_ms"] == entry_latency
+    assert sample["rules"] == ["901", "902"] and sample["status"] == "ALRT"
+    assert set(report["by_rule"]) == {"901", "902"}
+    assert report["by_typology"]["typology-processor@1.0.0"]["count"] == 1
+    assert report["by_source"]["relay"]["count"] == 1
+
+
+def test_report_groups_by_rule_and_status(tracker):
+    for n, latency in ((1, 0.1), (2, 0.3)):
+        tracker.record_submission(pacs002(n), submitted_at=100.0)
+        tracker._resolve(f"M{n}", 100.0 + latency, "relay", "ALRT" if n == 1 else "NALT",
+                         ["901@1.0.0"] if n == 1 else ["901@1.0.0", "006@1.0.0"], [])
+
+    report = tracker.report()
+    assert report["detection_latency_ms"]["min"] == 100.0 and report["detection_latency_ms"]["max"] == 300.0
+    assert report["by_rule"]["901"]["count"] == 2 and report["by_rule"]["006"]["count"] == 1
+    assert set(report["by_status"]) == {"ALRT", "NALT"}
+
+
+def test_results_of_other_messages_are_ignored(tracker):
+    tracker.record_submission(pacs002(1))
+    tracker.index.ingest(relayed(2))
+    assert tracker.report()["pending"] == 1
+
+
+def test_nothing_is_recorded_while_stopped():
+    tracker = DetectionLatencyTracker(index=ResultIndex(), query=lambda msg_ids: [])
+    tracker.record_submission(pacs002(1))
+    assert tracker.report()["submitted"] == 0
+
+
+def test_rejected_submission_is_discarded(tracker):
+    tracker.record_submission(pacs002(1))
+    tracker.discard_submission(pacs002(1))
+    assert (tracker.report()["submitted"], tracker.report()["pending"]) == (0, 0)
+
+
+def test_db_poll_resolves_pending_submissions():
+    rows = {"M1": ("M1", "NALT", None, ["typology-1"], ["018@1.0.0"])}
+    tracker = DetectionLatencyTracker(index=ResultIndex(), poll_interval=3600,
+                                      query=lambda msg_ids: [rows[m] for m in msg_ids if m in rows])
+    tracker.source = "db"
+    tracker.record_submission(pacs002(1))
+    tracker.record_submission(pacs002(2))
+
+    assert tracker.poll_once() == 1
+    report = tracker.report()
+    assert (report["detected"], report["pending"]) == (1, 1)
+    assert report["by_source"]["db"]["count"] == 1 and "018" in report["by_rule"]
+
+
+def test_submissions_past_the_timeout_count_as_missed(tracker):
+    tracker.record_submission(pacs002(1), submitted_at=1.0)
+    tracker.record_submission(pacs002(2))
+    report = tracker.report()
+    assert (report["missed"], report["pending"]) == (1, 1)
+
+    # A late result for a missed submission is not counted
+    tracker.index.ingest(relayed(1))
+    assert tracker.report()["detected"] == 0
+
+
+def test_unknown_source_is_rejected():
+    with pytest.raises(ValueError):
+        DetectionLatencyTracker(index=ResultIndex()).start("kafka")
@@ -0,0 +1,95 @@
+"""Bulk export: filters, COPY statements, streamed output and the error response"""
+import sys
+from datetime import datetime, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+
+from services import export_service
+from services.database_query_service import DatabaseQueryService, DatabaseQueryStrategy
+
+CSV = "tenantId,msgId\nDEFAULT,M1\nDEFAULT,M2\n"
+
+
+class CommandStrategy(DatabaseQueryStrategy):
+    """Runs a local command in place of psql, capturing the COPY statement it was given"""
+
+    def __init__(self, script: str):
+        self.script = script
+        self.statements = []
+
+    def execute_query(self, query, format_csv=False, timeout=10):
+        raise NotImplementedError
+
+    def get_name(self):
+        return "command"
+
+    def copy_command(self, statement):
+        self.statements.append(statement)
+        return [sys.executable, "-c", self.script]
+
+
+@pytest.fixture
+def event_history(monkeypatch):
+    def use(script):
+        strategy = CommandStrategy(script)
+        monkeypatch.setattr(export_service, "create_database_service",
+                            lambda use_local=False: DatabaseQueryService(strategy))
+        return strategy
+    return use
+
+
+def test_transaction_filters_prune_on_the_partition_key():
+    since = datetime(2026, 10, 1, 12, 30, 0, 123456, tzinfo=timezone.utc)
+    select = export_service.build_select("transactions", since=since, tenant_id="t'1", limit=10)
+    assert "creDtTm >= '2026-10-01T12:30:00.123Z'" in select
+    assert "(transaction->>'CreDtTm') >= '2026-10-01T12:30:00.123Z'" in select
+    assert "tenantId = 't''1'" in select and select.endswith(" LIMIT 10")
+
+
+def test_evaluation_tables_filter_on_timestamptz():
+    until = datetime(2026, 10, 1, 8, 0)
+    select = export_service.build_select("rule_results", until=until)
+    assert select.endswith("WHERE evaluatedAt < '2026-10-01T08:00:00+00:00'::timestamptz")
+    assert "WHERE" not in export_service.build_select("typology_results")
+
+
+def test_copy_statements():
+    assert export_service.copy_statement("SELECT 1") == "COPY (SELECT 1) TO STDOUT WITH (FORMAT csv, HEADER)"
+    ndjson = export_service.copy_statement("SELECT 1", "ndjson")
+    assert ndjson.startswith("COPY (SELECT row_to_json(r) FROM (SELECT 1) r) TO STDOUT")
+    assert "QUOTE E'\\x01', DELIMITER E'\\x02'" in ndjson
+
+
+@pytest.mark.parametrize("kind, fmt", [("accounts", "csv"), ("transactions", "xml")])
+def test_unknown_kind_or_format_is_rejected(kind, fmt):
+    with pytest.raises(ValueError):
+        export_service.stream_export(kind, fmt)
+
+
+def test_stream_yields_the_copy_output(event_history):
+    strategy = event_history(f"import sys; sys.stdout.write({CSV!r})")
+    chunks = list(export_service.stream_export("transactions", seconds=60))
+    assert b"".join(chunks) == CSV.encode()
+    assert strategy.statements[0].startswith("COPY (SELECT tenantId, msgId")
+    assert "creDtTm >= " in strategy.statements[0]
+
+
+def test_failed_copy_raises_with_stderr(event_history):
+    event_history("import sys; sys.stderr.write('relation \"transaction\" does not exist'); sys.exit(1)")
+    with pytest.raises(RuntimeError, match="does not exist"):
+        list(export_service.stream_export("transactions"))
+
+
+def test_route_streams_csv(app, event_history):
+    event_history(f"import sys; sys.stdout.write({CSV!r})")
+    response = TestClient(app).get("/api/export/transactions", params={"tenant_id": "DEFAULT"})
+    assert response.status_code == 200 and response.text == CSV
+    assert response.headers["content-type"].startswith("text/csv")
+    assert 'filename="transactions-' in response.headers["content-disposition"]
+
+
+def test_route_reports_a_failed_copy(app, event_history):
+    event_history("import sys; sys.stderr.write('connection refused'); sys.exit(2)")
+    body = TestClient(app).get("/api/export/transactions").json()
+    assert body["status"] == "error" and body["message"] == "connection refused"
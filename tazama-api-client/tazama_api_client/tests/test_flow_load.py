@@ -0,0 +1,101 @@
+"""E2E flow load: chain outcomes, skipped optional steps and the load-run summary"""
+import asyncio
+import threading
+
+from services.flow_load import _histogram, run_flow, run_flow_load, summarize_steps
+from services.tms_client import TMSResult
+
+
+class FakeTMS:
+    """send_* methods answering with a fixed status per message type; records what was sent"""
+
+    def __init__(self, statuses=None, latency_ms=5.0):
+        self.statuses = statuses or {}
+        self.latency_ms = latency_ms
+        self.sent = []
+        self._lock = threading.Lock()
+
+    def _send(self, message_type, payload):
+        with self._lock:
+            self.sent.append(message_type)
+        status = self.statuses.get(message_type, 200)
+        error_class = None if status == 200 else "5xx" if status >= 500 else str(status)
+        return TMSResult(status, self.latency_ms, {}, error_class=error_class)
+
+    def send_pain001(self, payload):
+        return self._send("pain.001", payload)
+
+    def send_pain013(self, payload):
+        return self._send("pain.013", payload)
+
+    def send_pacs008(self, payload):
+        return self._send("pacs.008", payload)
+
+    def send_pacs002(self, payload):
+        return self._send("pacs.002", payload)
+
+
+def flow(client, **kwargs):
+    return asyncio.run(run_flow(client, "DEBTOR_1", "CREDITOR_1", 250.0, think_time_ms=0, **kwargs))
+
+
+def test_chain_sends_all_four_steps_in_order():
+    client = FakeTMS()
+    result = flow(client, final_status="RJCT")
+
+    assert result["overall_status"] == "completed"
+    assert client.sent == ["pain.001", "pain.013", "pacs.008", "pacs.002"]
+    assert all(step["success"] and step["message_id"] for step in result["steps"])
+    assert result["steps"][-1]["final_status"] == "RJCT"
+
+
+def test_missing_optional_endpoint_is_skipped():
+    result = flow(FakeTMS({"pain.001": 404, "pain.013": 404}))
+    assert result["overall_status"] == "completed"
+    assert [s.get("skipped") for s in result["steps"]] == [True, True, None, None]
+
+
+def test_failed_step_stops_the_chain():
+    client = FakeTMS({"pacs.008": 503})
+    result = flow(client)
+    assert result["overall_status"] == "failed_at_pacs008"
+    assert "pacs.002" not in client.sent
+    assert result["steps"][-1]["error_class"] == "5xx"
+
+
+def test_histogram_buckets_by_upper_bound():
+    counts = _histogram([5, 5.1, 250, 60_000])
+    assert (counts["5"], counts["10"], counts["250"], counts["+Inf"]) == (1, 1, 1, 1)
+    assert sum(counts.values()) == 4
+
+
+def test_step_summary_rates_and_error_classes():
+    flows = [flow(FakeTMS()), flow(FakeTMS({"pain.001": 404, "pacs.002": 500})), flow(FakeTMS({"pacs.008": 400}))]
+    summary = summarize_steps(flows)
+
+    pain001 = summary["pain.001"]
+    assert (pain001["attempted"], pain001["success"], pain001["skipped"], pain001["failed"]) == (3, 2, 1, 0)
+    assert summary["pacs.008"]["success_rate"] == round(2 / 3, 4)
+    assert summary["pacs.008"]["error_classes"] == {"400": 1}
+    assert summary["pacs.002"]["attempted"] == 2 and summary["pacs.002"]["error_classes"] == {"5xx": 1}
+    assert summary["pacs.002"]["latency_ms"]["count"] == 1
+
+
+def test_load_run_bounds_concurrency_and_counts_outcomes():
+    client = FakeTMS({"pain.013": 404})
+    result = asyncio.run(run_flow_load(client, chains=8, concurrency=3, think_time_ms=1, think_jitter=0.5,
+                                       account_pool=2))
+
+    assert result["status"] == "success" and result["completed"] == 8
+    assert result["outcomes"] == {"completed": 8}
+    assert 1 <= result["peak_in_flight"] <= 3 and result["worker_threads"] <= 3
+    assert len(client.sent) == 8 * 4
+    assert result["steps"]["pacs.002"]["success"] == 8 and result["steps"]["pain.013"]["skipped"] == 8
+    assert result["chain_latency_ms"]["count"] == 8
+    assert result["messages_per_sec"] > 0
+
+
+def test_load_run_without_completed_chains_is_an_error():
+    result = asyncio.run(run_flow_load(FakeTMS({"pacs.008": 500}), chains=2, concurrency=2, think_time_ms=0))
+    assert result["status"] == "error" and result["outcomes"] == {"failed_at_pacs008": 2}
+    assert result["chain_latency_ms"] is None
@@ -0,0 +1,68 @@
+"""Rule 903 zone lookup and classification levels"""
+import numpy as np
+import pytest
+
+from utils.geo_index import GeoIndex, REFERENCE_LOCATIONS, sample_coordinates, zone_center
+
+NAN = np.nan
+
+
+@pytest.fixture(scope="module")
+def index():
+    return GeoIndex()
+
+
+def test_locate_zone_boxes(index):
+    lat = [-6.2, -6.92, -7.25, 3.59, NAN]
+    lon = [106.85, 107.62, 112.7, 98.67, NAN]
+    assert index.cities(lat, lon).tolist() == ["Jakarta", "Bandung", "Surabaya", None, None]
+
+
+def test_overlapping_boxes_follow_rule_order(index):
+    # Jakarta and Tangerang overlap around 106.75; Jakarta is checked first
+    assert index.cities([-6.2], [106.75]).tolist() == ["Jakarta"]
+    assert index.cities([-6.2], [106.65]).tolist() == ["Tangerang"]
+
+
+def test_classify_levels(index):
+    result = index.classify(
+        lat=[-6.2, -6.92, 3.59, NAN, NAN, NAN, NAN],
+        lon=[106.85, 107.62, 98.67, NAN, NAN, NAN, NAN],
+        city=[None, None, None, "Surabaya", "semarang", "Medan", None],
+    )
+    assert result["sub_rule_ref"].tolist() == [".01", ".02", ".03", ".01", ".02", ".03", ".x00"]
+    assert result["risk_level"].tolist() == ["HIGH", "MEDIUM", "LOW", "HIGH", "MEDIUM", "LOW", None]
+    assert result["city"].tolist()[:3] == ["Jakarta", "Bandung", None]
+
+
+def test_city_field_wins_over_coordinates(index):
+    result = index.classify(lat=[-6.2], lon=[106.85], city=["Bandung"])
+    assert result["sub_rule_ref"].tolist() == [".02"]
+
+
+def test_region_only_counts_as_location(index):
+    result = index.classify(lat=[NAN, NAN], lon=[NAN, NAN], region=["Bali", None])
+    # A plain riskZones list holds cities, so Region Bali is LOW but still a location
+    assert result["sub_rule_ref"].tolist() == [".03", ".x00"]
+
+
+def test_risk_zone_regions():
+    index = GeoIndex(risk_zones={"high": {"cities": ["Medan"], "regions": ["Bali"]}, "medium": {}})
+    result = index.classify(lat=[NAN, NAN, -6.2], lon=[NAN, NAN, 106.85], city=["Medan", None, None],
+                            region=[None, "BALI", None])
+    assert result["sub_rule_ref"].tolist() == [".01", ".01", ".03"]
+
+
+def test_sampled_coordinates_stay_in_zone(index):
+    points = sample_coordinates("Bandung", n=50, rng=np.random.default_rng(7))
+    assert points.shape == (50, 2)
+    assert set(index.cities(points[:, 0], points[:, 1]).tolist()) == {"Bandung"}
+
+
+def test_zone_center_and_nearest(index):
+    assert zone_center("jakarta") == (-6.195062, 106.803215)
+    assert zone_center("Medan") == REFERENCE_LOCATIONS["Medan"]
+    names, distance = index.nearest_zone([-6.9], [107.6])
+    assert names.tolist() == ["Bandung"] and distance[0] < 5
+    with pytest.raises(KeyError):
+        zone_center("Atlantis")
@@ -0,0 +1,111 @@
+"""Kafka result consumer against the in-memory broker stand-in"""
+import json
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import routers.relay as relay
+from config import KAFKA_RESULT_TOPIC, KAFKA_RESULT_GROUP_ID
+from services.kafka_result_consumer import InMemoryKafkaBroker, KafkaResultConsumer
+from services.result_index import ResultIndex
+
+TOPIC, GROUP = "results", "client"
+
+
+def cms_result(n, status="NALT"):
+    return {"report": {"evaluationID": f"EVAL-{n}", "status": status},
+            "transaction": {"FIToFIPmtSts": {"GrpHdr": {"MsgId": f"M{n}"},
+                                             "TxInfAndSts": {"OrgnlEndToEndId": f"E{n}"}}}}
+
+
+def produce(broker, numbers, topic=TOPIC):
+    for n in numbers:
+        broker.produce(topic, json.dumps(cms_result(n)).encode(), key=f"E{n}")
+
+
+def test_batches_index_and_commit_offsets():
+    broker, index = InMemoryKafkaBroker(partitions=3), ResultIndex()
+    produce(broker, range(10))
+    consumer = KafkaResultConsumer(backend=broker.consumer(TOPIC, GROUP), index=index, batch_size=4, poll_timeout=0)
+
+    assert [consumer.run_once() for _ in range(4)] == [4, 4, 2, 0]
+    assert all(index.get(f"E{n}") is not None for n in range(10))
+    assert sum(broker.committed(TOPIC, GROUP).values()) == 10
+    assert broker.lag(TOPIC, GROUP) == 0
+    stats = consumer.stats()
+    assert (stats["batches"], stats["offset_commits"], stats["indexed"]) == (3, 3, 10)
+
+
+def test_decode_errors_are_skipped_but_committed():
+    broker, index = InMemoryKafkaBroker(partitions=1), ResultIndex()
+    broker.produce(TOPIC, b"not json")
+    produce(broker, [1])
+    consumer = KafkaResultConsumer(backend=broker.consumer(TOPIC, GROUP), index=index, poll_timeout=0)
+    assert consumer.run_once() == 2
+    assert consumer.stats()["decode_errors"] == 1 and index.get("E1") is not None
+    assert broker.committed(TOPIC, GROUP) == {0: 2}
+
+
+def test_new_consumer_resumes_from_committed_offsets():
+    broker = InMemoryKafkaBroker(partitions=2)
+    produce(broker, range(4))
+    first = KafkaResultConsumer(backend=broker.consumer(TOPIC, GROUP), index=ResultIndex(), poll_timeout=0)
+    first.run_once()
+
+    # Polled but never committed (crash before commit): the next consumer reads it again
+    produce(broker, range(4, 6))
+    broker.consumer(TOPIC, GROUP).poll_batch(10, 0)
+
+    index = ResultIndex()
+    second = KafkaResultConsumer(backend=broker.consumer(TOPIC, GROUP), index=index, poll_timeout=0)
+    assert second.run_once() == 2
+    assert index.get("E0") is None and index.get("E5") is not None
+
+
+def test_lag_counts_uncommitted_records():
+    broker = InMemoryKafkaBroker(partitions=2)
+    produce(broker, range(5))
+    assert broker.lag(TOPIC, GROUP) == 5
+    assert broker.lag(TOPIC, "other-group") == 5
+
+
+@pytest.fixture
+def client(monkeypatch):
+    index = ResultIndex()
+    monkeypatch.setattr(relay, "result_index", index)
+    monkeypatch.setattr(relay, "kafka_stand_in", InMemoryKafkaBroker())
+    app = FastAPI()
+    app.include_router(relay.router)
+    yield TestClient(app), index
+    relay.stop_kafka_consumer()
+
+
+def _wait(predicate, timeout=3.0):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return predicate()
+
+
+def test_stand_in_route_consumes_produced_results(client):
+    client, index = client
+    started = client.post("/api/relay/kafka/start", data={"stand_in": "true"}).json()
+    assert started["status"] == "success" and started["backend"] == "InMemoryKafkaBackend"
+
+    produced = client.post("/api/relay/kafka/produce", json=[cms_result(n, "ALRT") for n in range(20)]).json()
+    assert produced["produced"] == 20
+    assert _wait(lambda: index.stats()["results_received"] == 20)
+    assert index.get("E7")["status"] == "ALRT"
+
+    assert _wait(lambda: client.get("/api/relay/kafka/stats").json()["lag"] == 0)
+    stats = client.get("/api/relay/kafka/stats").json()
+    assert stats["records"] == 20 and stats["offset_commits"] >= 1
+    assert sum(relay.kafka_stand_in.committed(KAFKA_RESULT_TOPIC, KAFKA_RESULT_GROUP_ID).values()) == 20
+
+
+def test_produce_rejects_bad_bodies(client):
+    client, _ = client
+    assert client.post("/api/relay/kafka/produce", content=b"nope").status_code == 400
+    assert client.post("/api/relay/kafka/produce", json=[1, 2]).status_code == 400
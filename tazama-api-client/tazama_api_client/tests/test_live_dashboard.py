@@ -0,0 +1,147 @@
+"""Live dashboard hub: snapshot, pushed deltas, relay alerts and slow-client queues"""
+import asyncio
+
+from services.live_dashboard import DashboardHub
+
+SUMMARY = {"status": "success", "total_transactions": 3, "debtors": [{"account": "D1"}], "creditors": []}
+
+
+class FakeDatabase:
+    """get_dashboard_stats / get_transaction_summary answering from queued values"""
+
+    def __init__(self, stats, summaries=()):
+        self.stats = list(stats)
+        self.summaries = list(summaries)
+
+    def get_dashboard_stats(self):
+        return self.stats.pop(0)
+
+    def get_transaction_summary(self):
+        return self.summaries.pop(0)
+
+
+def hub_for(db, **kwargs):
+    return DashboardHub(interval=3600, db_alerts=False, db_service_factory=lambda: db, **kwargs)
+
+
+def drain(queue):
+    messages = []
+    while not queue.empty():
+        messages.append(queue.get_nowait())
+    return messages
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def subscribe_paused(hub):
+    """Subscribe without letting the background loop tick (ticks are driven by the test)"""
+    sub_id = hub.subscribe()
+    hub._task.cancel()
+    return sub_id
+
+
+def test_stats_are_pushed_as_deltas():
+    db = FakeDatabase([{"total_tests": 1, "success_rate": 100.0},
+                       {"total_tests": 2, "success_rate": 100.0},
+                       {"total_tests": 2, "success_rate": 100.0}])
+    hub = hub_for(db)
+
+    async def scenario():
+        sub_id = subscribe_paused(hub)
+        queue = hub.queue(sub_id)
+        assert drain(queue)[0]["type"] == "snapshot"
+        pushed = []
+        for _ in range(3):
+            await hub._tick(include_summary=False)
+            pushed.append([m for m in drain(queue) if m["type"] == "stats"])
+        return pushed
+
+    first, second, third = run(scenario())
+    assert first[0]["delta"] == {"total_tests": 1, "success_rate": 100.0}
+    assert second[0]["delta"] == {"total_tests": 2}
+    assert third == []
+
+
+def test_summary_is_pushed_only_when_it_changes():
+    db = FakeDatabase([{}] * 3, [SUMMARY, dict(SUMMARY), {**SUMMARY, "total_transactions": 4}])
+    hub = hub_for(db)
+
+    async def scenario():
+        queue = hub.queue(subscribe_paused(hub))
+        drain(queue)
+        totals = []
+        for _ in range(3):
+            await hub._tick(include_summary=True)
+            totals += [m["data"]["total_transactions"] for m in drain(queue) if m["type"] == "db_summary"]
+        return totals
+
+    assert run(scenario()) == [3, 4]
+
+
+def test_new_subscriber_snapshot_carries_the_last_state():
+    db = FakeDatabase([{"total_tests": 5}], [SUMMARY])
+    hub = hub_for(db)
+
+    async def scenario():
+        subscribe_paused(hub)
+        await hub._tick(include_summary=True)
+        return drain(hub.queue(hub.subscribe()))[0]
+
+    snapshot = run(scenario())
+    assert snapshot["stats"] == {"total_tests": 5} and snapshot["db_summary"] == SUMMARY
+    assert snapshot["throughput"] is not None
+
+
+def test_relayed_alerts_are_pushed_once():
+    db = FakeDatabase([{}, {}])
+    hub = hub_for(db)
+    alert = {"status": "ALRT", "keys": ["M1", "E1"], "tenant_id": "DEFAULT", "timestamp": "2026-10-01T08:00:00Z",
+             "typologies": [{"id": "typology-processor@1.0.0"}]}
+
+    async def scenario():
+        queue = hub.queue(subscribe_paused(hub))
+        drain(queue)
+        pushed = []
+        for _ in range(2):
+            hub._on_result(alert)
+            hub._on_result({**alert, "status": "NALT", "keys": ["M2"]})
+            await hub._tick(include_summary=False)
+            pushed.append([m["alerts"] for m in drain(queue) if m["type"] == "alerts"])
+        return pushed
+
+    first, second = run(scenario())
+    assert [a["message_id"] for a in first[0]] == ["M1"]
+    assert first[0][0]["typologies"] == ["typology-processor@1.0.0"]
+    assert second == []
+
+
+def test_slow_client_loses_its_oldest_messages():
+    hub = hub_for(FakeDatabase([]), queue_size=3)
+
+    async def scenario():
+        slow, fast = subscribe_paused(hub), hub.subscribe()
+        drain(hub.queue(fast))
+        for n in range(5):
+            hub._publish({"type": "stats", "delta": {"n": n}})
+            hub.queue(fast).get_nowait()
+        return drain(hub.queue(slow))
+
+    kept = run(scenario())
+    assert [m["delta"]["n"] for m in kept] == [2, 3, 4]
+    # snapshot plus the first two pushes were dropped for the slow client only
+    assert hub.status()["dropped_messages"] == 3
+
+
+def test_unsubscribe_stops_delivery():
+    hub = hub_for(FakeDatabase([]))
+
+    async def scenario():
+        sub_id = subscribe_paused(hub)
+        hub.unsubscribe(sub_id)
+        hub._publish({"type": "stats", "delta": {}})
+        return hub.status()
+
+    status = run(scenario())
+    assert status["subscribers"] == 0 and status["messages_sent"] == 0
@@ -0,0 +1,129 @@
+"""Prometheus metrics: exposition format, recorded client metrics, middleware and event-loop lag"""
+import asyncio
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from services.tms_client import TMSResult
+from utils import metrics
+from utils.metrics import Counter, Gauge, Histogram, MetricsMiddleware, query_name
+
+
+def test_counter_and_gauge_exposition():
+    counter = Counter("test_total", "Test counter", ("kind",))
+    counter.inc("a")
+    counter.inc("a", amount=2)
+    counter.inc('quo"te\n')
+    assert counter.value("a") == 3.0
+    assert counter.expose() == [
+        "# HELP test_total Test counter", "# TYPE test_total counter",
+        'test_total{kind="a"} 3.0', 'test_total{kind="quo\\"te\\n"} 1.0'
+    ]
+
+    gauge = Gauge("test_in_flight", "Test gauge")
+    gauge.inc()
+    gauge.inc()
+    gauge.dec()
+    assert gauge.expose()[1:] == ["# TYPE test_in_flight gauge", "test_in_flight 1.0"]
+    gauge.set(value=0.25)
+    assert gauge.value() == 0.25
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("test_seconds", "Test histogram", ("route",), buckets=[0.1, 1])
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe("/x", value=value)
+
+    assert histogram.count("/x") == 4 and histogram.count("/other") == 0
+    assert histogram.expose()[2:] == [
+        'test_seconds_bucket{route="/x",le="0.1"} 2',
+        'test_seconds_bucket{route="/x",le="1"} 3',
+        'test_seconds_bucket{route="/x",le="+Inf"} 4',
+        'test_seconds_count{route="/x"} 4',
+        'test_seconds_sum{route="/x"} 3.65',
+    ]
+
+
+@pytest.mark.parametrize("query, name", [
+    ("SELECT count(*) FROM transaction WHERE txtp = 'x'", "select_transaction"),
+    ("INSERT INTO evaluation_rule_result VALUES (1)", "insert_evaluation_rule_result"),
+    ("CREATE TABLE IF NOT EXISTS transaction_key (k text)", "create_transaction_key"),
+    ("SELECT (SELECT count(*) FROM jsonb_array_elements(x)) FROM evaluation", "select_evaluation"),
+    ('COPY (SELECT 1 FROM "evaluation") TO STDOUT', "copy_evaluation"),
+    ("REFRESH MATERIALIZED VIEW account_summary;", "refresh"),
+    ("", "unknown"),
+])
+def test_query_names(query, name):
+    assert query_name(query) == name
+
+
+def test_tms_requests_are_labelled_by_status_or_failure_class():
+    before_ok = metrics.TMS_REQUESTS.value("test.type", "200", "t1")
+    before_timeout = metrics.TMS_REQUESTS.value("test.type", "timeout", "t1")
+    latency_count = metrics.TMS_LATENCY.count("test.type", "t1")
+
+    metrics.record_tms_request("test.type", TMSResult(200, 5.0, {}), 0.005, "t1")
+    metrics.record_tms_request("test.type", TMSResult(0, 5.0, "", error_class="timeout"), 10.0, "t1")
+
+    assert metrics.TMS_REQUESTS.value("test.type", "200", "t1") == before_ok + 1
+    assert metrics.TMS_REQUESTS.value("test.type", "timeout", "t1") == before_timeout + 1
+    assert metrics.TMS_LATENCY.count("test.type", "t1") == latency_count + 2
+
+
+def test_db_queries_and_alerts_are_recorded():
+    before = metrics.DB_QUERIES.value("select_test_metrics_table", "error")
+    metrics.record_db_query("SELECT 1 FROM test_metrics_table", 0.01, ok=False)
+    assert metrics.DB_QUERIES.value("select_test_metrics_table", "error") == before + 1
+    assert metrics.DB_LATENCY.count("select_test_metrics_table") >= 1
+
+    before = metrics.FRAUD_ALERTS.value("test-rule", "relay")
+    metrics.record_fraud_alerts([{"rule_id": "test-rule"}, {"rule_id": "test-rule"}], source="relay")
+    assert metrics.FRAUD_ALERTS.value("test-rule", "relay") == before + 2
+
+
+def test_middleware_counts_requests_by_route_template():
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def item(item_id: int):
+        return {"in_flight": metrics.HTTP_IN_FLIGHT.value()}
+
+    client = TestClient(MetricsMiddleware(app))
+    before = metrics.HTTP_REQUESTS.value("GET /items/{item_id}", "200")
+    in_flight = metrics.HTTP_IN_FLIGHT.value()
+
+    assert client.get("/items/1").json()["in_flight"] == in_flight + 1
+    client.get("/items/2")
+    client.get("/missing")
+    assert metrics.HTTP_REQUESTS.value("GET /items/{item_id}", "200") == before + 2
+    assert metrics.HTTP_IN_FLIGHT.value() == in_flight
+    assert not any(route.endswith("/missing") for route, _ in metrics.HTTP_REQUESTS.totals())
+
+
+def test_event_loop_lag_monitor_records_blocking():
+    monitor = metrics.EventLoopLagMonitor(interval=0.01)
+    def lag_sum():
+        series = metrics.EVENT_LOOP_LAG_HIST._series.get(())
+        return series[-1] if series else 0.0
+    before_count, before_sum = metrics.EVENT_LOOP_LAG_HIST.count(), lag_sum()
+
+    async def scenario():
+        monitor.start()
+        await asyncio.sleep(0.005)
+        time.sleep(0.05)  # blocks the loop past the monitor's wake-up
+        await asyncio.sleep(0.03)
+        monitor.stop()
+
+    asyncio.run(scenario())
+    assert metrics.EVENT_LOOP_LAG_HIST.count() > before_count
+    assert lag_sum() - before_sum >= 0.03
+
+
+def test_render_includes_client_metrics_and_concurrency():
+    text = metrics.render_metrics()
+    assert text.endswith("\n")
+    assert "# TYPE tazama_client_tms_requests_total counter" in text
+    assert "# TYPE tazama_client_tms_concurrency_limit gauge" in text
+    assert "# TYPE tazama_client_route_stage_duration_seconds histogram" in text
@@ -0,0 +1,68 @@
+"""Mock TMS fake rule state: rule logs written off the event loop, bounded pending pacs.008"""
+import pytest
+from fastapi.testclient import TestClient
+
+import mock_tms
+from config import TMS_ENDPOINTS
+
+
+def pacs008(e2e_id, amount=100.0, debtor="D1", creditor="C1"):
+    return {"FIToFICstmrCdtTrf": {"CdtTrfTxInf": {
+        "PmtId": {"EndToEndId": e2e_id},
+        "DbtrAcct": {"Id": {"Othr": [{"Id": debtor}]}},
+        "CdtrAcct": {"Id": {"Othr": [{"Id": creditor}]}},
+        "IntrBkSttlmAmt": {"Amt": {"Amt": amount}}
+    }}}
+
+
+def pacs002(e2e_id, msg_id, status="ACCC"):
+    return {"FIToFIPmtSts": {"GrpHdr": {"MsgId": msg_id},
+                             "TxInfAndSts": {"OrgnlEndToEndId": e2e_id, "TxSts": status}}}
+
+
+@pytest.fixture
+def client(monkeypatch, tmp_path):
+    monkeypatch.setattr(mock_tms, "state", mock_tms.MockTMSState(max_pending=3))
+    monkeypatch.setattr(mock_tms, "rule_log_writer", mock_tms.RuleLogWriter(str(tmp_path)))
+    return TestClient(mock_tms.app)
+
+
+def test_confirmed_pacs008_writes_one_line_per_rule(client, tmp_path):
+    for n in range(3):
+        client.post(TMS_ENDPOINTS["pacs008"], json=pacs008(f"E{n}"))
+        client.post(TMS_ENDPOINTS["pacs002"], json=pacs002(f"E{n}", f"M{n}"))
+    mock_tms.rule_log_writer.flush()
+
+    lines_901 = (tmp_path / "tazama-rule-901.log").read_text().splitlines()
+    assert len(lines_901) == 3 and "id: 'M2'" in lines_901[-1]
+    assert "three or more transactions" in lines_901[-1]
+    assert "Insufficient transaction history" in (tmp_path / "tazama-rule-018.log").read_text().splitlines()[0]
+    assert not mock_tms.state.pending
+
+
+def test_rejected_status_logs_unsuccessful(client, tmp_path):
+    client.post(TMS_ENDPOINTS["pacs008"], json=pacs008("E1"))
+    client.post(TMS_ENDPOINTS["pacs002"], json=pacs002("E1", "M1", status="RJCT"))
+    mock_tms.rule_log_writer.flush()
+    assert "Incoming transaction is unsuccessful" in (tmp_path / "tazama-rule-006.log").read_text()
+
+
+def test_unconfirmed_pacs008_are_evicted_oldest_first(client, tmp_path):
+    for n in range(5):
+        client.post(TMS_ENDPOINTS["pacs008"], json=pacs008(f"E{n}"))
+
+    assert list(mock_tms.state.pending) == ["E2", "E3", "E4"]
+    stats = client.get("/mock/stats").json()
+    assert (stats["pending_pacs008"], stats["evicted_pending"]) == (3, 2)
+
+    # A pacs.002 for an evicted pacs.008 is answered but evaluates nothing
+    assert client.post(TMS_ENDPOINTS["pacs002"], json=pacs002("E0", "M0")).status_code == 200
+    mock_tms.rule_log_writer.flush()
+    assert not (tmp_path / "tazama-rule-901.log").exists()
+
+
+def test_no_log_dir_writes_nothing(monkeypatch):
+    writer = mock_tms.RuleLogWriter("")
+    monkeypatch.setattr(mock_tms, "rule_log_writer", writer)
+    mock_tms._log_rule("tazama-rule-901", "reason", "M1")
+    assert writer._thread is None
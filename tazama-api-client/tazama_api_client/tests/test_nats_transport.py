@@ -0,0 +1,123 @@
+"""NATS injection transport against the in-process NATS stand-in"""
+import socket
+import socketserver
+
+import pytest
+
+from services.nats_transport import InProcessNatsServer, NatsPublisher, NatsTMSClient, build_data_cache
+from utils.payload_generator import generate_pacs002, generate_pacs008
+from utils.tenancy import tenant_scope
+
+
+@pytest.fixture
+def server():
+    server = InProcessNatsServer().start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def publisher(server):
+    publisher = NatsPublisher(server.url, timeout=2)
+    yield publisher
+    publisher.close()
+
+
+@pytest.fixture
+def client(publisher):
+    client = NatsTMSClient(publisher=publisher, subject="event-director")
+    client.retry_base_delay_ms = 0
+    return client
+
+
+def _drop_socket(publisher):
+    """Kill the publisher's socket under it, as a network drop would"""
+    publisher._sock.shutdown(socket.SHUT_RDWR)
+
+
+def test_stand_in_leaves_stdlib_server_alone(server):
+    assert socketserver.ThreadingTCPServer.allow_reuse_address is False
+
+
+def test_publish_and_flush(server, publisher):
+    publisher.publish("subject.a", b"one", flush=True)
+    publisher.publish("subject.b", b"two")
+    publisher.flush()
+    assert server.messages == [("subject.a", b"one"), ("subject.b", b"two")]
+
+
+def test_send_wraps_messages_in_the_tms_envelope(server, client):
+    pacs008 = generate_pacs008("DEBTOR_1", 1500.0)
+    header = pacs008["FIToFICstmrCdtTrf"]
+    pacs002 = generate_pacs002(header["GrpHdr"]["MsgId"], header["CdtTrfTxInf"]["PmtId"]["EndToEndId"], "ACCC")
+
+    with tenant_scope("tenant-007"):
+        assert client.send_pacs008(pacs008)[0] == 200
+        status, _, data = client.send_pacs002(pacs002)
+    assert status == 200 and data["transport"] == "nats"
+
+    (subject, first), (_, second) = server.decoded()
+    assert subject == "event-director"
+    assert first["transaction"]["TenantId"] == "tenant-007"
+    assert first["DataCache"] == build_data_cache("pacs008", pacs008)
+    # pacs.002 carries the DataCache of its pacs.008, as the TMS takes it from Redis
+    assert second["DataCache"] == first["DataCache"]
+
+
+def test_bulk_flushes_once(server, client):
+    pings_before = server.pings
+    results = client.run_bulk([lambda i=i: client.send_pacs008(generate_pacs008(f"D{i}", 100.0))
+                               for i in range(50)])
+    assert [r[0] for r in results] == [200] * 50
+    assert len(server.messages) == 50
+    assert server.pings - pings_before == 2  # CONNECT handshake + the batch flush
+
+
+def test_single_send_reconnects(server, client, publisher):
+    assert client.send_pacs008(generate_pacs008("D1", 100.0))[0] == 200
+    _drop_socket(publisher)
+    assert client.send_pacs008(generate_pacs008("D2", 100.0))[0] == 200
+    assert len(server.messages) == 2
+
+
+def test_reconnect_with_unflushed_messages_fails_flush(server, publisher):
+    publisher.publish("s", b"1")
+    publisher.publish("s", b"2")
+    _drop_socket(publisher)
+    publisher.publish("s", b"3")  # Reconnects; 1 and 2 were never confirmed
+    with pytest.raises(ConnectionError, match="2 unflushed"):
+        publisher.flush()
+
+    # Reported once: the next batch starts clean
+    publisher.publish("s", b"4")
+    publisher.flush()
+    assert (b"3", b"4") == tuple(data for _, data in server.messages[-2:])
+
+
+def test_bulk_reports_unconfirmed_batch_after_reconnect(server, client, publisher):
+    client.send_pacs008(generate_pacs008("D0", 100.0))
+
+    def send(i):
+        if i == 5:
+            _drop_socket(publisher)
+        return client.send_pacs008(generate_pacs008(f"D{i}", 100.0))
+
+    client.limiter.max_limit = 1  # Serial, so the drop lands mid-batch
+    results = client.run_bulk([lambda i=i: send(i) for i in range(10)])
+    assert all(isinstance(r, ConnectionError) for r in results)
+
+    results = client.run_bulk([lambda i=i: send(i + 100) for i in range(3)])
+    assert [r[0] for r in results] == [200] * 3
+
+
+def test_flush_without_connection_fails(publisher):
+    with pytest.raises(ConnectionError):
+        publisher.flush()
+
+
+def test_unreachable_server_is_a_connect_error(server):
+    server.stop()
+    client = NatsTMSClient(publisher=NatsPublisher(server.url, timeout=0.5))
+    client.retry_max_attempts = 1
+    result = client.send_pacs008(generate_pacs008("D1", 100.0))
+    assert result[0] == 0 and result.error_class == "connect"
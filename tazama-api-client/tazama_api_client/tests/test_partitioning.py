@@ -0,0 +1,63 @@
+"""Partition migration: summary views around the table swap, and status reporting"""
+import pytest
+
+from services import partitioning, summary_views
+
+VIEWS_READY = ("to_regclass('account_daily_summary')", "t")
+
+
+@pytest.fixture(autouse=True)
+def reset_views_state(monkeypatch):
+    monkeypatch.setitem(summary_views._state, "ready", None)
+
+
+def test_migrate_rebuilds_views_after_the_swap(scripted_db):
+    db = scripted_db([VIEWS_READY, ("partition_transaction_table", "42\n")])
+    result = partitioning.migrate(interval="month", ahead=2, db_service=db)
+
+    assert result["rows_copied"] == 42 and result["summary_views_rebuilt"]
+    dropped = db.strategy.ran("DROP MATERIALIZED VIEW")[0]
+    assert dropped.index("transaction_type_summary") < dropped.index("account_daily_summary")
+    assert db.strategy.ran("CREATE MATERIALIZED VIEW")
+    assert summary_views._state["ready"] is True
+
+
+def test_migrate_restores_views_when_the_swap_fails(scripted_db):
+    db = scripted_db([VIEWS_READY], fail_on=["SELECT partition_transaction_table("])
+    with pytest.raises(RuntimeError):
+        partitioning.migrate(db_service=db)
+
+    queries = db.strategy.queries
+    swap = next(i for i, q in enumerate(queries) if "SELECT partition_transaction_table(" in q)
+    assert any("CREATE MATERIALIZED VIEW" in q for q in queries[swap + 1:])
+    assert summary_views._state["ready"] is True
+
+
+def test_migrate_without_views_leaves_them_alone(scripted_db):
+    db = scripted_db([("to_regclass('account_daily_summary')", "f"), ("partition_transaction_table", "0")])
+    assert not partitioning.migrate(db_service=db)["summary_views_rebuilt"]
+    assert not db.strategy.ran("MATERIALIZED VIEW")
+
+
+def test_status_reports_rows_left_in_the_default_partition(scripted_db):
+    db = scripted_db([
+        ("pg_partitioned_table", "t,t,t,f,t,t"),
+        ("FROM pg_inherits", "transaction_2026_10,FOR VALUES FROM ('2026-10-01') TO ('2026-11-01'),10,8192\n"),
+        ("FROM transaction_default", "3\n")
+    ])
+    status = partitioning.status(db_service=db)
+    assert status["default_partition_rows"] == 3
+    assert status["partitions"][0]["name"] == "transaction_2026_10"
+
+
+def test_status_of_an_unpartitioned_table(scripted_db):
+    db = scripted_db([("pg_partitioned_table", "t,f,t,f,f,f")])
+    status = partitioning.status(db_service=db)
+    assert not status["partitioned"] and status["default_partition_rows"] is None
+    assert not db.strategy.ran("transaction_default;")
+
+
+def test_maintain_skips_unpartitioned_tables(scripted_db):
+    db = scripted_db([("pg_partitioned_table", "t,f,t,f,f,f")])
+    assert partitioning.maintain(db_service=db)["status"] == "skipped"
+    assert not db.strategy.ran("ensure_transaction_partitions('")
@@ -0,0 +1,139 @@
+"""Relayed result index and the relay webhook / token endpoints"""
+import json
+import threading
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import routers.relay as relay
+from services.result_index import ResultIndex, extract_result_keys, load_decoder, summarize_detection
+
+
+def cms_result(msg_id, end_to_end_id, status="ALRT"):
+    """CMSRequest as relayed for a pacs.002"""
+    return {
+        "report": {"evaluationID": f"EVAL-{msg_id}", "status": status, "timestamp": "2026-01-01T00:00:00Z",
+                   "tadpResult": {"prcgTm": 1200, "typologyResult": [{
+                       "cfg": "typology-processor@1.0.0", "result": 400, "review": True,
+                       "ruleResults": [{"id": "901@1.0.0", "subRuleRef": ".03", "wght": 400, "prcgTm": 300}]}]}},
+        "transaction": {"TenantId": "tenant-001", "FIToFIPmtSts": {
+            "GrpHdr": {"MsgId": msg_id},
+            "TxInfAndSts": {"OrgnlInstrId": f"I-{msg_id}", "OrgnlEndToEndId": end_to_end_id}}}
+    }
+
+
+def test_keys_and_summary():
+    assert extract_result_keys(cms_result("M1", "E1")) == ["M1", "I-M1", "E1"]
+    assert extract_result_keys({"transaction": {}}) == []
+
+    entry = ResultIndex().ingest(cms_result("M1", "E1"))
+    assert entry["status"] == "ALRT" and entry["message_type"] == "FIToFIPmtSts"
+    assert entry["tenant_id"] == "tenant-001"
+    assert entry["rule_results"][0]["rule_id"] == "901" and entry["rule_results"][0]["sub_rule_ref"] == ".03"
+
+
+def test_insert_and_lookup_by_every_key():
+    index = ResultIndex()
+    index.expect("E1", submitted_at=1.0)
+    entry = index.ingest(cms_result("M1", "E1"), source="kafka")
+    for key in ("M1", "I-M1", "E1"):
+        assert index.get(key) is entry
+    assert entry["source"] == "kafka" and entry["detection_latency_ms"] > 0
+    assert index.get("unknown") is None
+    assert index.ingest({"report": {}}) is None
+
+    index.ingest(cms_result("M1", "E1"))
+    assert index.stats()["duplicate_results"] == 1 and index.stats()["results_received"] == 2
+
+
+def test_size_bound_evicts_oldest():
+    index = ResultIndex(max_entries=3)
+    index.ingest(cms_result("M1", "E1"))
+    index.ingest(cms_result("M2", "E2"))
+    assert index.get("M1") is None and index.get("E2") is not None
+    assert index.stats()["indexed_keys"] == 3
+
+
+def test_wait_for_wakes_on_ingest():
+    index = ResultIndex()
+    threading.Timer(0.05, index.ingest, args=(cms_result("M1", "E1"),)).start()
+    found = index.wait_for(["E1", "MISSING"], timeout=0.3)
+    assert list(found) == ["E1"]
+
+    summary = summarize_detection(["E1", "MISSING"], found)
+    assert (summary["received"], summary["missing"], summary["alerts"]) == (1, ["MISSING"], 1)
+
+
+def test_listeners_see_entries():
+    index = ResultIndex()
+    seen = []
+    index.add_listener(seen.append)
+    index.ingest(cms_result("M1", "E1"))
+    assert [e["evaluation_id"] for e in seen] == ["EVAL-M1"]
+
+
+def test_decoder_rejects_non_json_without_proto_module():
+    decode = load_decoder("")
+    assert decode(b'{"a": 1}') == {"a": 1}
+    with pytest.raises(ValueError, match="OUTPUT_TO_JSON"):
+        decode(b"\x08\x01")
+
+
+# ============ WEBHOOK / TOKEN ============
+
+@pytest.fixture
+def index(monkeypatch):
+    index = ResultIndex()
+    monkeypatch.setattr(relay, "result_index", index)
+    return index
+
+
+@pytest.fixture
+def secured(monkeypatch):
+    monkeypatch.setattr(relay, "RELAY_WEBHOOK_TOKEN", "s3cret-token")
+    monkeypatch.setattr(relay, "RELAY_AUTH_USERNAME", "relay-service")
+    monkeypatch.setattr(relay, "RELAY_AUTH_PASSWORD", "relay-password")
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(relay.router)
+    return TestClient(app)
+
+
+def test_token_requires_relay_credentials(client, secured):
+    assert client.get("/api/relay/health").status_code == 200
+    good = client.post("/api/relay/token", json={"username": "relay-service", "password": "relay-password"})
+    assert good.status_code == 200 and good.json() == "s3cret-token"
+
+    for body in ({"username": "relay-service", "password": "wrong"}, {"username": "x"}, None):
+        response = client.post("/api/relay/token", json=body)
+        assert response.status_code == 401 and "s3cret-token" not in response.text
+    assert client.post("/api/relay/token", content=b"not json").status_code == 401
+
+
+def test_token_refused_when_credentials_unset(client, secured, monkeypatch):
+    monkeypatch.setattr(relay, "RELAY_AUTH_PASSWORD", "")
+    assert client.post("/api/relay/token", json={"username": "relay-service", "password": ""}).status_code == 401
+
+
+def test_webhook_rejects_missing_or_wrong_token(client, secured, index):
+    body = json.dumps(cms_result("M1", "E1"))
+    assert client.post("/api/relay/webhook", content=body).status_code == 401
+    assert client.post("/api/relay/webhook", content=body,
+                       headers={"Authorization": "Bearer guessed"}).status_code == 401
+    assert index.get("E1") is None
+
+    response = client.post("/api/relay/webhook", content=body, headers={"Authorization": "Bearer s3cret-token"})
+    assert response.json()["status"] == "indexed"
+    assert client.get("/api/relay/results/E1").json()["evaluation_id"] == "EVAL-M1"
+
+
+def test_webhook_without_token_configured(client, index, monkeypatch):
+    monkeypatch.setattr(relay, "RELAY_WEBHOOK_TOKEN", "")
+    assert client.post("/api/relay/token", json={}).json() == "no-auth"
+    assert client.post("/api/relay/webhook", content=b"\x00garbage").status_code == 400
+    assert client.post("/api/relay/webhook", json={"report": {}}).json()["status"] == "ignored"
+    assert client.get("/api/relay/results/E9").json()["status"] == "pending"
@@ -0,0 +1,73 @@
+"""Rule / typology analytics: query shape and the processing-time stats built from its rows"""
+from datetime import datetime, timezone
+
+import pytest
+
+from services import rule_analytics
+
+FIRST = datetime(2026, 10, 1, 8, 0, tzinfo=timezone.utc)
+LAST = datetime(2026, 10, 1, 9, 0, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def evaluation_db(monkeypatch):
+    """Replace the evaluation DB with canned rows; records (query, params, commit)"""
+    calls = []
+    responses = {}
+
+    def query(sql, params=None, commit=False):
+        calls.append((sql, params, commit))
+        return next((rows for needle, rows in responses.items() if needle in sql), [])
+
+    monkeypatch.setattr(rule_analytics, "query_evaluation_db", query)
+    return calls, responses
+
+
+def test_rule_stats_convert_nanoseconds_and_sort_by_p95(evaluation_db):
+    calls, responses = evaluation_db
+    responses["evaluation_rule_result"] = [
+        ("901@1.0.0", 100, 5, 1, [1_000_000, 2_000_000, 3_000_000, 4_000_000], 1_500_000, 9_000_000, FIRST, LAST),
+        ("018@1.0.0", 50, 0, 2, [5_000_000, 6_000_000, 7_000_000, 8_000_000], 5_500_000, 9_500_000, FIRST, LAST),
+        ("006@1.0.0", 10, 10, 1, None, None, None, None, None),
+    ]
+    stats = rule_analytics.processing_time_stats("rule", seconds=100)
+
+    assert [s["id"] for s in stats] == ["018@1.0.0", "901@1.0.0", "006@1.0.0"]
+    rule_901 = stats[1]
+    assert rule_901["prcg_tm_ms"] == {"avg": 1.5, "p50": 1.0, "p90": 2.0, "p95": 3.0, "p99": 4.0, "max": 9.0}
+    assert (rule_901["throughput_per_sec"], rule_901["error_rate"], rule_901["configs"]) == (1.0, 0.05, 1)
+    assert rule_901["first_at"] == FIRST.isoformat()
+    assert stats[2]["error_rate"] == 1.0 and stats[2]["prcg_tm_ms"]["p95"] is None
+
+    sql, params, _ = calls[0]
+    assert "GROUP BY ruleId" in sql and "tenantId = %s" not in sql and params == (100,)
+
+
+def test_typology_stats_report_reviews_for_one_tenant(evaluation_db):
+    calls, responses = evaluation_db
+    responses["evaluation_typology_result"] = [
+        ("typology-processor@1.0.0", 20, 2, 7, [1e6, 1e6, 1e6, 1e6], 1e6, 1e6, FIRST, LAST)
+    ]
+    stats = rule_analytics.processing_time_stats("typology", seconds=3600, tenant_id="tenant-001")
+
+    assert stats[0]["reviews"] == 7 and "configs" not in stats[0]
+    sql, params, _ = calls[0]
+    assert "GROUP BY typologyId" in sql and "AND tenantId = %s" in sql
+    assert params == (3600, "tenant-001")
+
+
+def test_setup_creates_tables_and_backfills(evaluation_db):
+    calls, responses = evaluation_db
+    responses["SELECT count(*) FROM ("] = [(42,)]
+    result = rule_analytics.setup()
+
+    assert result["backfilled_evaluations"] == 42
+    assert result["tables"] == ["evaluation_rule_result", "evaluation_typology_result"]
+    assert [commit for _, _, commit in calls] == [True, True]
+    assert "CREATE TRIGGER trg_flatten_evaluation" in calls[0][0]
+
+
+def test_setup_without_backfill(evaluation_db):
+    calls, _ = evaluation_db
+    assert "backfilled_evaluations" not in rule_analytics.setup(backfill=False)
+    assert len(calls) == 1
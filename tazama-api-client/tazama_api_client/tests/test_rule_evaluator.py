@@ -0,0 +1,117 @@
+"""Rule evaluator outcomes for 901 / 902 / 006 / 018 / 903"""
+from services.rule_evaluator import columns_from_records, evaluate_rules, expected_alerts, DAY_MS
+
+T0 = 1_700_000_000_000
+MINUTE = 60_000
+
+
+def _records(rows):
+    return [
+        {"end_to_end_id": f"E2E{i}", "timestamp_ms": T0 + i * MINUTE, **row}
+        for i, row in enumerate(rows)
+    ]
+
+
+def _refs(rows, rule, **kwargs):
+    evaluation = evaluate_rules(columns_from_records(_records(rows)), rules=(rule,), **kwargs)
+    return evaluation[rule]["sub_rule_ref"].tolist(), evaluation[rule]["alert"].tolist()
+
+
+def test_901_counts_debtor_transactions_in_window():
+    rows = [{"debtor": "D1", "creditor": f"C{i}", "amount": 100.0 + i} for i in range(4)]
+    refs, alerts = _refs(rows, "901")
+    assert refs == [".01", ".02", ".03", ".03"]
+    assert alerts == [False, False, True, True]
+
+
+def test_901_window_excludes_old_transactions():
+    records = _records([{"debtor": "D1", "creditor": f"C{i}", "amount": 100.0} for i in range(3)])
+    records[2]["timestamp_ms"] = T0 + DAY_MS + MINUTE // 2  # First transaction just left the window
+    evaluation = evaluate_rules(columns_from_records(records), rules=("901",))
+    assert evaluation["901"]["sub_rule_ref"].tolist() == [".01", ".02", ".02"]
+
+
+def test_901_counts_per_debtor_regardless_of_row_order():
+    rows = [{"debtor": d, "creditor": "C", "amount": 1.0} for d in ("A", "B", "A", "B", "A")]
+    refs, _ = _refs(rows, "901")
+    assert refs == [".01", ".01", ".02", ".02", ".03"]
+
+
+def test_902_counts_creditor_transactions():
+    rows = [{"debtor": f"D{i}", "creditor": "MULE", "amount": 50.0} for i in range(3)]
+    rows.append({"debtor": "D9", "creditor": "OTHER", "amount": 50.0})
+    refs, alerts = _refs(rows, "902")
+    assert refs == [".01", ".02", ".03", ".01"]
+    assert alerts == [False, False, True, False]
+
+
+def test_unconfirmed_transactions_are_x00_but_still_counted():
+    rows = [{"debtor": "D1", "creditor": "C", "amount": 1.0, "status": status}
+            for status in ("ACCC", "RJCT", "ACCC")]
+    refs, _ = _refs(rows, "901")
+    assert refs == [".01", ".x00", ".03"]
+
+
+def test_006_structuring_needs_five_similar_amounts():
+    rows = [{"debtor": "S", "creditor": f"C{i}", "amount": 1_000_000.0 + i * 10_000} for i in range(5)]
+    refs, alerts = _refs(rows, "006")
+    assert refs == [".x01", ".01", ".01", ".01", ".02"]
+    assert alerts[-1] and not any(alerts[:-1])
+
+
+def test_006_dissimilar_amounts_do_not_alert():
+    rows = [{"debtor": "S", "creditor": "C", "amount": amount}
+            for amount in (100.0, 1_000.0, 10_000.0, 100_000.0, 1_000_000.0)]
+    refs, alerts = _refs(rows, "006")
+    assert refs == [".x01", ".01", ".01", ".01", ".01"]
+    assert not any(alerts)
+
+
+def test_018_large_transaction_against_history():
+    rows = [{"debtor": "W", "creditor": f"C{i}", "amount": 1_000.0} for i in range(3)]
+    rows.append({"debtor": "W", "creditor": "C9", "amount": 10_000.0})
+    refs, alerts = _refs(rows, "018")
+    assert refs == [".x01", ".01", ".01", ".02"]
+    assert alerts == [False, False, False, True]
+
+
+def test_903_levels_from_city_region_and_coordinates():
+    rows = [
+        {"debtor": "G", "creditor": "C", "amount": 1.0, "city": "Jakarta"},
+        {"debtor": "G", "creditor": "C", "amount": 1.0, "city": "Bandung"},
+        {"debtor": "G", "creditor": "C", "amount": 1.0, "city": "Denpasar", "region": "Bali"},
+        {"debtor": "G", "creditor": "C", "amount": 1.0, "region": "Bali"},  # Plain riskZones lists are cities
+        {"debtor": "G", "creditor": "C", "amount": 1.0, "lat": -6.2, "long": 106.85},
+        {"debtor": "G", "creditor": "C", "amount": 1.0, "lat": 3.59, "long": 98.67},
+        {"debtor": "G", "creditor": "C", "amount": 1.0},
+    ]
+    refs, alerts = _refs(rows, "903")
+    assert refs == [".01", ".02", ".02", ".03", ".01", ".03", ".x00"]
+    assert alerts == [True, False, False, False, True, False, False]
+
+
+def test_903_zone_regions():
+    thresholds = {"903": {"parameters": {"riskZones": {"high": {"cities": [], "regions": ["Bali"]}}},
+                          "alert": ".01"}}
+    rows = [{"debtor": "G", "creditor": "C", "amount": 1.0, "region": "bali"}]
+    assert _refs(rows, "903", thresholds=thresholds) == ([".01"], [True])
+
+
+def test_thresholds_override_bands():
+    thresholds = {"901": {"parameters": {"maxQueryRange": DAY_MS},
+                          "bands": [{"subRuleRef": ".01", "upperLimit": 2}, {"subRuleRef": ".02", "lowerLimit": 2}],
+                          "alert": ".02"}}
+    rows = [{"debtor": "D", "creditor": "C", "amount": 1.0} for _ in range(2)]
+    refs, alerts = _refs(rows, "901", thresholds=thresholds)
+    assert refs == [".01", ".02"]
+    assert alerts == [False, True]
+
+
+def test_expected_alerts_lists_firing_rules():
+    columns = columns_from_records(_records(
+        [{"debtor": "D1", "creditor": f"C{i}", "amount": 100.0, "city": "Medan"} for i in range(3)]
+    ))
+    alerts = expected_alerts(columns, evaluate_rules(columns))
+    assert [a["end_to_end_id"] for a in alerts] == ["E2E2"]
+    assert alerts[0]["rules"] == {"901": ".03"}
+    assert alerts[0]["amount"] == 100.0
@@ -0,0 +1,120 @@
+"""Scenario validation, parameter resolution and plan compilation"""
+import json
+
+import pytest
+
+from config import SCENARIO_MAX_MESSAGES
+from services.scenario_plan import ScenarioLibrary, compile_plan, parse_scenario, resolve_params, validate_scenario
+from services.tms_client import PreparedPayload
+
+SPEC = {
+    "name": "two_phase",
+    "target_rule": "018",
+    "params": {"count": {"default": 3, "min": 2, "max": 10}, "amount": 1000.0,
+               "debtor": "WHALE_{digits:4}", "status": "ACCC"},
+    "phases": [
+        {"name": "history", "count": "$count-1", "debtor": "{debtor}", "creditor": "CRED_{i}",
+         "amount": {"base": "$amount", "step": 100}},
+        {"name": "trigger", "count": 1, "debtor": "{debtor}", "creditor": "BIG_{i}", "amount": 99999}
+    ]
+}
+
+
+def test_resolve_params_coerces_and_clamps():
+    params = resolve_params(SPEC, {"count": "50", "amount": "2500"})
+    assert params["count"] == 10 and params["amount"] == 2500.0
+    assert resolve_params(SPEC, {"count": 1})["count"] == 2
+    assert resolve_params(SPEC, {"count": None})["count"] == 3
+
+
+def test_resolve_params_renders_templates_once():
+    debtor = resolve_params(SPEC)["debtor"]
+    assert debtor.startswith("WHALE_") and len(debtor) == 10 and debtor[6:].isdigit()
+
+
+@pytest.mark.parametrize("overrides, message", [
+    ({"bogus": 1}, "Unknown parameter"),
+    ({"count": "many"}, "must be int"),
+])
+def test_resolve_params_rejects_bad_overrides(overrides, message):
+    with pytest.raises(ValueError, match=message):
+        resolve_params(SPEC, overrides)
+
+
+def test_compile_plan_phases_and_messages():
+    plan = compile_plan(SPEC, {"count": 4})
+    assert [(p["name"], len(p["transactions"])) for p in plan.phases] == [("history", 3), ("trigger", 1)]
+
+    history, trigger = plan.phases[0]["transactions"], plan.phases[1]["transactions"]
+    assert [tx.amount for tx in history] == [1000.0, 1100.0, 1200.0]
+    assert [tx.creditor for tx in history] == ["CRED_0", "CRED_1", "CRED_2"]
+    assert trigger[0].amount == 99999.0
+    assert len({tx.debtor for tx in plan.transactions}) == 1
+
+    tx = plan.transactions[0]
+    assert isinstance(tx.pacs008, PreparedPayload) and isinstance(tx.pacs002, PreparedPayload)
+    assert json.loads(tx.pacs008.body) == dict(tx.pacs008)
+    header = tx.pacs008["FIToFICstmrCdtTrf"]
+    status = tx.pacs002["FIToFIPmtSts"]["TxInfAndSts"]
+    assert status["OrgnlEndToEndId"] == header["CdtTrfTxInf"]["PmtId"]["EndToEndId"]
+    assert status["TxSts"] == "ACCC"
+
+
+def test_plan_edges_and_summary():
+    plan = compile_plan(SPEC)
+    edges = plan.edges()
+    # One pacs.008 -> pacs.002 edge per transaction plus history -> trigger
+    assert len(edges) == 3 + 1
+    assert {"from": "phase:history", "to": "phase:trigger"} in edges
+
+    summary = plan.summary(include_messages=True)
+    assert (summary["transactions"], summary["messages"], summary["edges"]) == (3, 6, 4)
+    assert summary["phases"] == [{"name": "history", "transactions": 2}, {"name": "trigger", "transactions": 1}]
+    assert summary["bytes"] == sum(len(p["pacs008"]) + len(p["pacs002"]) for p in summary["plan"])
+
+
+def test_plan_size_limit():
+    spec = {**SPEC, "params": {**SPEC["params"], "count": SCENARIO_MAX_MESSAGES + 1}}
+    with pytest.raises(ValueError, match="SCENARIO_MAX_MESSAGES"):
+        compile_plan(spec)
+
+
+@pytest.mark.parametrize("spec, message", [
+    ({"phases": [{}]}, "needs a name"),
+    ({"name": "x", "phases": []}, "at least one phase"),
+    ({"name": "x", "params": {"n": {"min": 1}}, "phases": [{}]}, "needs a default"),
+    ({"name": "x", "phases": [{"count": 1.5}]}, "count must be an integer"),
+    ({"name": "x", "phases": [{"amount": {"jitter": [5, 1]}}]}, "jitter"),
+])
+def test_validate_scenario_errors(spec, message):
+    with pytest.raises(ValueError, match=message):
+        validate_scenario(spec)
+
+
+def test_parse_scenario_rejects_invalid_text():
+    with pytest.raises(ValueError):
+        parse_scenario("{not json")
+
+
+def test_shipped_scenarios_compile():
+    library = ScenarioLibrary()
+    assert library.load() == {}
+    names = {s["name"] for s in library.list()}
+    assert {"rule_006", "rule_018", "rule_901", "rule_902"} <= names
+
+    plan = library.compile("rule_901")
+    assert plan.target_rule == "901"
+    assert len(plan.transactions) == 5
+    assert len({tx.creditor for tx in plan.transactions}) == 5
+    assert len(library.compile("rule_901", count=2).transactions) == 5  # min 5
+    with pytest.raises(KeyError):
+        library.compile("rule_404")
+
+
+def test_library_reports_broken_files(tmp_path):
+    (tmp_path / "good.json").write_text(json.dumps(SPEC))
+    (tmp_path / "bad.json").write_text(json.dumps({"name": "bad"}))
+    (tmp_path / "notes.txt").write_text("ignored")
+    library = ScenarioLibrary(str(tmp_path))
+    assert list(library.load()) == ["bad.json"]
+    assert [s["name"] for s in library.list()] == ["two_phase"]
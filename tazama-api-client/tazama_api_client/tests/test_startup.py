@@ -0,0 +1,79 @@
+"""Cold start: deferred imports, background warm-up, startup marks and the import-time report"""
+import subprocess
+import sys
+
+import pytest
+
+from utils import startup
+
+IMPORTTIME_STDERR = """\
+import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   _io
+import time:      2500 |       4000 |     fastapi.routing
+import time:      1500 |       9000 |   fastapi
+import time:       300 |      12000 | main
+not an import line
+"""
+
+
+@pytest.fixture
+def marks(monkeypatch):
+    marks = {}
+    monkeypatch.setattr(startup, "_marks", marks)
+    return marks
+
+
+def test_main_import_leaves_deferred_modules_unloaded():
+    script = ("import sys, main; from utils.startup import DEFERRED_MODULES; "
+              "print(','.join(m for m in DEFERRED_MODULES if m in sys.modules))")
+    proc = subprocess.run([sys.executable, "-c", script], cwd=startup.CLIENT_DIR, capture_output=True, text=True,
+                          timeout=60)
+    assert proc.returncode == 0, proc.stderr
+    assert proc.stdout.strip() == ""
+
+
+def test_warm_up_imports_deferred_modules_and_runs_initialisers(marks):
+    ran = []
+    startup.warm_up([lambda: ran.append("faker"), lambda: ran.append("templates")]).join(30)
+
+    assert ran == ["faker", "templates"] and "warmup_done" in marks
+    assert "utils.geo_index" in sys.modules and "services.transaction_graph" in sys.modules
+    deferred = startup.startup_report()["deferred_modules"]
+    assert deferred["utils.geo_index"] and deferred["services.transaction_graph"]
+
+
+def test_marks_keep_the_first_time(marks):
+    first = startup.mark("imports_done")
+    startup.mark("imports_done")
+    assert marks == {"imports_done": first} and first >= 0
+
+
+def test_report_checks_cold_start_against_the_budget(marks, monkeypatch):
+    monkeypatch.setattr(startup, "_INTERPRETER_MS", 100.0)
+    assert startup.startup_report()["cold_start_ms"] is None
+
+    marks["app_ready"] = startup.COLD_START_BUDGET_MS - 100.0
+    report = startup.startup_report()
+    assert report["cold_start_ms"] == startup.COLD_START_BUDGET_MS and report["within_budget"]
+
+    marks["app_ready"] += 1
+    assert startup.startup_report()["within_budget"] is False
+
+
+def test_parse_importtime():
+    modules = startup.parse_importtime(IMPORTTIME_STDERR)
+    assert [m["module"] for m in modules] == ["_io", "fastapi.routing", "fastapi", "main"]
+    assert modules[1] == {"module": "fastapi.routing", "self_ms": 2.5, "cumulative_ms": 4.0, "depth": 2}
+    assert modules[3]["depth"] == 0
+
+
+def test_importtime_report_of_a_fresh_interpreter():
+    report = startup.importtime_report("config", top=5)
+    assert report["status"] == "success" and report["import_ms"] > 0
+    assert len(report["top_self"]) <= 5 and all(m["module"] != "config" for m in report["top_cumulative"])
+    assert report["modules_imported"] >= 1
+
+
+def test_importtime_report_of_a_broken_import():
+    report = startup.importtime_report("no_such_module_for_startup_test")
+    assert report["status"] == "error" and "ModuleNotFoundError" in report["message"]
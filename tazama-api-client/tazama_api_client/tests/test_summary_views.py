@@ -0,0 +1,105 @@
+"""Summary views: setup, refresh, reads from the views and the fallback to raw queries"""
+import subprocess
+
+import pytest
+
+from services import database_query_service, summary_views
+
+READY = ("to_regclass('account_daily_summary')", "t")
+NOT_READY = ("to_regclass('account_daily_summary')", "f")
+VIEW_ROWS = [
+    ("role = 'debtor'", "D1,5,500.0\nD2,2,80.5\n"),
+    ("role = 'creditor'", "C1,4,400.0\n"),
+    ("FROM transaction_type_summary WHERE txTp", "7\n"),
+    ("FROM transaction_type_summary", "pacs.008.001.10,7,6,700.0,2026-10-01T08:00:00.000Z\n"
+                                      "pacs.002.001.12,7,0,,2026-10-01T08:00:01.000Z\n"),
+]
+RAW_ROWS = [
+    ("GROUP BY source", "D9,1,10.0\n"),
+    ("GROUP BY destination", "C9,1,10.0\n"),
+    ("as total FROM transaction", "1\n"),
+    ("as pacs008_count", "2,1,1,0,0,10.0,2026-10-01T08:00:00.000Z\n"),
+]
+
+
+@pytest.fixture(autouse=True)
+def fresh_state(monkeypatch):
+    monkeypatch.setattr(summary_views, "_state", {
+        "ready": None, "refreshed_at": None, "refresh_ms": None,
+        "refreshes": 0, "refresh_errors": 0, "last_error": None
+    })
+    monkeypatch.setattr(database_query_service, "USE_SUMMARY_VIEWS", True)
+
+
+def test_setup_creates_views_and_marks_ready(scripted_db):
+    db = scripted_db()
+    result = summary_views.setup(db)
+    assert result["views"] == list(summary_views.VIEWS)
+    assert "CREATE UNIQUE INDEX IF NOT EXISTS ux_account_summary" in db.strategy.queries[0]
+    assert summary_views.status()["ready"] is True and summary_views.status()["refreshed_at"]
+
+
+def test_refresh_runs_views_in_dependency_order(scripted_db):
+    db = scripted_db()
+    result = summary_views.refresh(db)
+    assert db.strategy.queries == [f"REFRESH MATERIALIZED VIEW CONCURRENTLY {v};" for v in summary_views.VIEWS]
+    assert set(result["views_ms"]) == set(summary_views.VIEWS) and summary_views.status()["refreshes"] == 1
+
+    summary_views.refresh(db, concurrently=False)
+    assert db.strategy.queries[-1] == "REFRESH MATERIALIZED VIEW transaction_type_summary;"
+
+
+def test_failed_refresh_is_counted_and_raised(scripted_db):
+    db = scripted_db(fail_on=["account_summary;"])
+    with pytest.raises(RuntimeError):
+        summary_views.refresh(db)
+    status = summary_views.status()
+    assert (status["refreshes"], status["refresh_errors"]) == (0, 1) and "account_summary" in status["last_error"]
+    assert not db.strategy.ran("transaction_type_summary")
+
+
+def test_summary_reads_the_views_when_ready(scripted_db):
+    db = scripted_db([READY] + VIEW_ROWS)
+    summary = db.get_transaction_summary(tenant_id="DEFAULT")
+
+    assert summary["source"] == "summary_views" and summary["total_transactions"] == 7
+    assert [d["account"] for d in summary["debtors"]] == ["D1", "D2"]
+    assert summary["creditors"] == [{"account": "C1", "tx_count": 4, "total_amount": 400.0}]
+    assert all("tenantId = 'DEFAULT'" in q for q in db.strategy.ran("FROM account_summary"))
+    assert not db.strategy.ran("GROUP BY source")
+
+
+def test_summary_falls_back_to_raw_queries(scripted_db):
+    db = scripted_db([NOT_READY] + RAW_ROWS)
+    summary = db.get_transaction_summary()
+    assert summary["source"] == "transaction" and summary["debtors"][0]["account"] == "D9"
+    assert not db.strategy.ran("FROM account_summary")
+
+
+def test_views_dropped_after_the_ready_check_fall_back(scripted_db):
+    db = scripted_db([READY] + RAW_ROWS)
+    assert summary_views.check_ready(db)
+    run = db.strategy.execute_query
+
+    def dropped(query, format_csv=False, timeout=10):
+        if "FROM account_summary" in query:
+            return subprocess.CompletedProcess([], 1, "", 'ERROR: relation "account_summary" does not exist')
+        return run(query, format_csv, timeout)
+
+    db.strategy.execute_query = dropped
+    assert db.get_transaction_summary()["source"] == "transaction"
+    assert summary_views.status()["ready"] is False
+
+
+def test_dashboard_stats_from_the_type_summary(scripted_db):
+    db = scripted_db([READY] + VIEW_ROWS)
+    stats = db.get_dashboard_stats()
+    assert stats["total_tests"] == 14
+    assert stats["tests_by_type"]["pacs.008"]["count"] == 7
+    assert not db.strategy.ran("as pacs008_count")
+
+
+def test_dashboard_stats_fall_back_to_raw_query(scripted_db):
+    db = scripted_db([NOT_READY] + RAW_ROWS)
+    stats = db.get_dashboard_stats()
+    assert stats["total_tests"] == 2 and db.strategy.ran("as pacs008_count")
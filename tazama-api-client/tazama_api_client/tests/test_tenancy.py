@@ -0,0 +1,96 @@
+"""X-Tenant-Id reaching the TMS through executor offloads and bulk sends"""
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import services.tms_client as tms_client
+import utils.tenancy as tenancy
+from config import SOURCE_TENANT_ID
+from services.tms_client import TMSClient
+from utils.tenancy import TenantMiddleware, current_tenant, run_in_executor_with_context, tenant_scope
+
+
+class FakeResponse:
+    status_code = 200
+    text = "{}"
+
+    def json(self):
+        return {"result": "ok"}
+
+
+@pytest.fixture
+def sent_headers(monkeypatch):
+    """Headers of every TMS POST (requests.post is replaced)"""
+    sent = []
+
+    def fake_post(url, headers=None, **kwargs):
+        sent.append(headers)
+        return FakeResponse()
+
+    monkeypatch.setattr(tms_client.requests, "post", fake_post)
+    return sent
+
+
+def test_tenant_scope():
+    assert current_tenant() == SOURCE_TENANT_ID
+    with tenant_scope("tenant-001") as tenant:
+        assert tenant == "tenant-001" and current_tenant() == "tenant-001"
+        with tenant_scope(None):
+            assert current_tenant() == "tenant-001"
+    assert current_tenant() == SOURCE_TENANT_ID
+
+
+def test_executor_offload_keeps_tenant():
+    async def offload():
+        with tenant_scope("tenant-002"):
+            loop = asyncio.get_running_loop()
+            return await run_in_executor_with_context(current_tenant), await loop.run_in_executor(None, current_tenant)
+
+    with_context, plain = asyncio.run(offload())
+    assert with_context == "tenant-002"
+    assert plain == SOURCE_TENANT_ID  # What run_in_executor_with_context is for
+
+
+def test_run_bulk_sends_as_scope_tenant(sent_headers, monkeypatch):
+    monkeypatch.setitem(tenancy.TENANT_TOKENS, "tenant-003", "token-3")
+    client = TMSClient()
+    with tenant_scope("tenant-003"):
+        results = client.run_bulk([lambda: client.send_pacs008({"n": i}) for i in range(8)])
+    client.send_pacs008({"n": "outside"})
+
+    assert [r[0] for r in results] == [200] * 8
+    assert [h["SourceTenantId"] for h in sent_headers] == ["tenant-003"] * 8 + [SOURCE_TENANT_ID]
+    assert {h.get("Authorization") for h in sent_headers[:8]} == {"Bearer token-3"}
+
+
+def test_header_reaches_executor_and_bulk_sends(sent_headers):
+    client = TMSClient()
+    app = FastAPI()
+
+    @app.post("/send")
+    async def send():
+        single = await run_in_executor_with_context(client.send_pacs008, {"n": 0})
+        bulk = await run_in_executor_with_context(
+            client.run_bulk, [lambda: client.send_pacs002({"n": i}) for i in range(3)]
+        )
+        return {"statuses": [single[0]] + [r[0] for r in bulk], "tenant": current_tenant()}
+
+    app.add_middleware(TenantMiddleware)
+    response = TestClient(app).post("/send", headers={"X-Tenant-Id": "tenant-004"})
+
+    assert response.json() == {"statuses": [200] * 4, "tenant": "tenant-004"}
+    assert [h["SourceTenantId"] for h in sent_headers] == ["tenant-004"] * 4
+
+    sent_headers.clear()
+    TestClient(app).post("/send")
+    assert {h["SourceTenantId"] for h in sent_headers} == {SOURCE_TENANT_ID}
+
+
+def test_transactions_route_sends_as_header_tenant(app, sent_headers):
+    response = TestClient(app).post("/api/test/pacs008", data={"amount": "1000"},
+                                         headers={"X-Tenant-Id": "tenant-005"})
+    assert response.status_code == 200
+    # pacs.008 then its pacs.002 confirmation
+    assert [h["SourceTenantId"] for h in sent_headers] == ["tenant-005"] * 2
@@ -0,0 +1,107 @@
+"""Per-request stage timings: Server-Timing header, timings body and route histograms"""
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from utils.timing import RequestTimings, StageHistogram, TimingMiddleware, TimingRegistry, server_timing_header, stage
+
+
+def _server_timing(response):
+    return {part.split(";")[0]: part for part in response.headers["server-timing"].split(", ")}
+
+
+@pytest.fixture
+def registry():
+    return TimingRegistry()
+
+
+@pytest.fixture
+def client(registry):
+    app = FastAPI()
+
+    @app.get("/work")
+    def work():
+        with stage("db_query"):
+            with stage("db_parse"):
+                pass
+        for _ in range(2):
+            with stage("tms_pacs008"):
+                pass
+        return {"status": "success"}
+
+    @app.get("/list")
+    def as_list():
+        return [1, 2, 3]
+
+    app.add_middleware(TimingMiddleware, registry=registry)
+    return TestClient(app)
+
+
+def test_server_timing_header_and_body(client):
+    response = client.get("/work")
+    metrics = _server_timing(response)
+    assert {"db_query", "db_parse", "tms_pacs008", "unattributed", "total"} <= set(metrics)
+    assert 'desc="x2"' in metrics["tms_pacs008"]
+
+    body = response.json()
+    assert body["status"] == "success"
+    assert body["timings"]["stages"]["tms_pacs008"]["count"] == 2
+    assert int(response.headers["content-length"]) == len(response.content)
+
+
+def test_nested_stages_do_not_count_towards_unattributed(client):
+    timings = client.get("/work").json()["timings"]
+    top_level = timings["stages"]["db_query"]["ms"] + timings["stages"]["tms_pacs008"]["ms"]
+    assert timings["unattributed_ms"] == pytest.approx(max(0.0, timings["total_ms"] - top_level), abs=0.01)
+
+
+def test_non_object_json_is_left_alone(client):
+    response = client.get("/list")
+    assert response.json() == [1, 2, 3]
+    assert "total" in _server_timing(response)
+
+
+def test_route_histograms(client, registry):
+    for _ in range(3):
+        client.get("/work")
+    client.get("/missing")
+    snapshot = registry.snapshot()
+    assert list(snapshot) == ["GET /work"]
+    assert snapshot["GET /work"]["requests"] == 3
+    assert snapshot["GET /work"]["stages"]["tms_pacs008"]["count"] == 3
+
+
+def test_stage_outside_request_is_a_no_op():
+    with stage("orphan"):
+        pass
+
+
+def test_request_timings_summary():
+    timings = RequestTimings()
+    timings.add("tms", 6.0)
+    timings.add("tms", 4.0)
+    timings.add("tms_parse", 3.0, top_level=False)
+    summary = timings.summary(total_ms=12.0)
+    assert summary["stages"]["tms"] == {"ms": 10.0, "count": 2}
+    assert summary["unattributed_ms"] == 2.0
+
+
+def test_server_timing_header_format():
+    summary = {"total_ms": 12.5, "unattributed_ms": 2.5,
+               "stages": {"tms": {"ms": 10.0, "count": 3}}}
+    assert server_timing_header(summary) == 'tms;dur=10.000;desc="x3", unattributed;dur=2.500, total;dur=12.500'
+
+
+def test_histogram_buckets_and_quantiles():
+    histogram = StageHistogram([10, 100])
+    for value in (1, 5, 50, 500):
+        histogram.observe(value)
+    snapshot = histogram.snapshot()
+    assert snapshot["buckets"] == {"10": 2, "100": 3, "+Inf": 4}
+    assert (snapshot["p50_ms"], snapshot["p95_ms"], snapshot["max_ms"]) == (10, 500.0, 500.0)
+
+
+def test_app_wiring(app):
+    response = TestClient(app).get("/openapi.json")
+    assert response.status_code == 200
+    assert "total" in _server_timing(response)
@@ -0,0 +1,165 @@
+"""TMS client retries and the circuit breaker state machine"""
+import pytest
+import requests
+
+import services.circuit_breaker as circuit_breaker
+import services.tms_client as tms_client
+from services.circuit_breaker import CircuitBreaker, CLOSED, OPEN, HALF_OPEN
+from services.tms_client import TMSClient, classify_exception, classify_status
+
+
+class FakeResponse:
+    def __init__(self, status_code, data=None):
+        self.status_code = status_code
+        self._data = data or {}
+        self.text = str(self._data)
+
+    def json(self):
+        return self._data
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", clock)
+    return clock
+
+
+@pytest.fixture
+def client():
+    client = TMSClient()
+    client.retry_max_attempts = 3
+    client.retry_base_delay_ms = 0
+    client.retry_on = {"connect"}
+    client.hedge_after_ms = 0
+    client.breaker = CircuitBreaker(failure_threshold=3, reset_timeout=10)
+    return client
+
+
+@pytest.fixture
+def post(monkeypatch):
+    """Replace requests.post with a script of responses / exceptions"""
+    calls = []
+    script = []
+
+    def fake_post(url, **kwargs):
+        calls.append(kwargs)
+        outcome = script.pop(0) if len(script) > 1 else script[0]
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    monkeypatch.setattr(tms_client.requests, "post", fake_post)
+    fake_post.calls, fake_post.script = calls, script
+    return fake_post
+
+
+def test_classification():
+    assert classify_status(503) == "5xx" and classify_status(422) == "4xx" and classify_status(302) is None
+    assert classify_exception(requests.exceptions.ConnectTimeout()) == "connect"
+    assert classify_exception(requests.exceptions.ReadTimeout()) == "timeout"
+    assert classify_exception(requests.exceptions.ConnectionError()) == "connect"
+    assert classify_exception(ValueError()) == "error"
+
+
+def test_retries_connect_errors_until_success(client, post):
+    post.script[:] = [requests.exceptions.ConnectionError("refused")] * 2 + [FakeResponse(200, {"ok": True})]
+    status, _, data = result = client.send_pacs008({"x": 1})
+    assert (status, data) == (200, {"ok": True})
+    assert result.attempts == 3 and result.error_class is None
+    assert client.breaker.state == CLOSED
+
+
+def test_gives_up_after_max_attempts(client, post):
+    post.script[:] = [requests.exceptions.ConnectionError("refused")]
+    result = client.send_pacs008({"x": 1})
+    assert result[0] == 0 and result.error_class == "connect" and result.attempts == 3
+    assert len(post.calls) == 3
+
+
+@pytest.mark.parametrize("response, error_class", [(FakeResponse(503), "5xx"), (FakeResponse(400), "4xx")])
+def test_http_errors_are_not_retried_by_default(client, post, response, error_class):
+    post.script[:] = [response]
+    result = client.send_pacs008({"x": 1})
+    assert result.error_class == error_class and result.attempts == 1
+    assert len(post.calls) == 1
+
+
+def test_retry_on_5xx_when_configured(client, post):
+    client.retry_on = {"connect", "5xx"}
+    post.script[:] = [FakeResponse(502), FakeResponse(200)]
+    result = client.send_pacs008({"x": 1})
+    assert result[0] == 200 and result.attempts == 2
+
+
+def test_breaker_opens_and_fails_fast(client, post, clock):
+    client.retry_max_attempts = 1
+    post.script[:] = [FakeResponse(500)]
+    for _ in range(3):
+        assert client.send_pacs008({"x": 1}).error_class == "5xx"
+    assert client.breaker.state == OPEN
+
+    result = client.send_pacs008({"x": 1})
+    assert result.error_class == "circuit_open" and result.attempts == 0
+    assert len(post.calls) == 3
+    assert client.resilience_stats()["circuit_breaker"]["rejected_requests"] == 1
+
+
+def test_4xx_does_not_count_against_breaker(client, post):
+    client.retry_max_attempts = 1
+    post.script[:] = [FakeResponse(422)]
+    for _ in range(5):
+        client.send_pacs008({"x": 1})
+    assert client.breaker.state == CLOSED
+
+
+def test_retries_stop_when_breaker_opens(client, post):
+    client.retry_max_attempts = 5
+    post.script[:] = [requests.exceptions.ConnectionError("refused")]
+    result = client.send_pacs008({"x": 1})
+    assert result.error_class == "circuit_open" and result.attempts == 3
+    assert len(post.calls) == 3
+
+
+def test_half_open_trial(clock):
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10)
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+    breaker.record_failure()
+    assert breaker.state == OPEN and not breaker.allow_request()
+    assert breaker.snapshot()["retry_in_s"] == 10
+
+    clock.now += 10
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow_request()
+    assert not breaker.allow_request()  # Only one trial in flight
+    breaker.record_failure()
+    assert breaker.state == OPEN
+
+    clock.now += 10
+    assert breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state == CLOSED and breaker.snapshot()["consecutive_failures"] == 0
+    assert breaker.allow_request()
+
+
+def test_success_resets_consecutive_failures(clock):
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+
+
+def test_backoff_is_capped(client):
+    client.retry_base_delay_ms = 100
+    client.retry_max_delay_ms = 250
+    assert all(0 <= client._backoff_seconds(attempt) <= 0.25 for attempt in range(1, 10))
@@ -0,0 +1,95 @@
+"""CSR account graph queries, with edges in the compacted arrays and the delta"""
+import pytest
+
+from services.transaction_graph import TransactionGraph
+
+# A -> B -> C -> A ring, D fans in to C, C pays E
+EDGES = [
+    ("A", "B", 2, 200.0, 1_000),
+    ("B", "C", 1, 150.0, 2_000),
+    ("C", "A", 1, 100.0, 3_000),
+    ("D", "C", 3, 300.0, 4_000),
+    ("C", "E", 1, 50.0, 5_000),
+]
+
+
+@pytest.fixture(params=["bulk", "delta", "compacted"])
+def graph(request):
+    graph = TransactionGraph(compact_threshold=1_000)
+    if request.param == "bulk":
+        graph.add_edges_bulk(EDGES)
+    else:
+        graph.add_edges(EDGES)
+        if request.param == "compacted":
+            graph.compact()
+    return graph
+
+
+def _hops(result):
+    return [sorted(level["accounts"]) for level in result["by_hop"]]
+
+
+def test_account_summary(graph):
+    summary = graph.account_summary("C")
+    assert summary["fan_in"] == 2 and summary["fan_out"] == 2
+    assert summary["incoming"]["transactions"] == 4
+    assert summary["incoming"]["amount"] == 450.0
+    assert summary["incoming"]["top"][0]["account"] == "D"
+    assert summary["outgoing"]["last_ms"] == 5_000
+
+
+def test_reachable_by_direction(graph):
+    assert _hops(graph.reachable("A", hops=3, direction="out")) == [["B"], ["C"], ["E"]]
+    assert _hops(graph.reachable("A", hops=2, direction="in")) == [["C"], ["B", "D"]]
+    assert _hops(graph.reachable("C", hops=1, direction="both")) == [["A", "B", "D", "E"]]
+    assert graph.reachable("E", hops=2)["total"] == 0
+
+
+def test_cycles(graph):
+    result = graph.cycles("A", max_length=4)
+    assert result["cycles"] == [["A", "B", "C", "A"]]
+    assert graph.cycles("A", max_length=2)["count"] == 0
+    assert graph.cycles("D")["count"] == 0
+
+
+def test_network_nodes_and_edges(graph):
+    graph.set_holders([("A", "ENT1"), ("E", "ENT1")])
+    result = graph.network("A", hops=1, direction="out")
+    assert [(n["account"], n["hop"]) for n in result["nodes"]] == [("A", 0), ("B", 1)]
+    assert result["nodes"][0]["shared_holder_accounts"] == ["E"]
+    assert [(e["source"], e["destination"], e["transactions"]) for e in result["edges"]] == [("A", "B", 2)]
+
+
+def test_top_fan_in(graph):
+    top = graph.top_fan_in(limit=1)
+    assert top == [{"account": "C", "fan_in": 2, "fan_out": 2, "transactions_received": 4}]
+
+
+def test_delta_merges_with_csr():
+    graph = TransactionGraph(compact_threshold=1_000)
+    graph.add_edges_bulk(EDGES)
+    graph.add_edges([("A", "B", 1, 10.0, 9_000), ("E", "A", 1, 5.0, 9_500)])
+    assert graph.stats()["delta_edges"] == 2
+
+    outgoing = graph.account_summary("A")["outgoing"]["top"][0]
+    assert (outgoing["account"], outgoing["transactions"], outgoing["amount"], outgoing["last_ms"]) == \
+        ("B", 3, 210.0, 9_000)
+    assert graph.cycles("A", max_length=4)["count"] == 2
+
+    graph.compact()
+    stats = graph.stats()
+    assert (stats["edges"], stats["delta_edges"], stats["accounts"]) == (6, 0, 5)
+    assert graph.account_summary("A")["outgoing"]["transactions"] == 3
+
+
+def test_compact_threshold_triggers_compaction():
+    graph = TransactionGraph(compact_threshold=2)
+    graph.add_edges(EDGES[:2])
+    assert graph.stats()["delta_edges"] == 0 and graph.stats()["edges"] == 2
+
+
+def test_errors(graph):
+    with pytest.raises(ValueError):
+        graph.reachable("A", direction="sideways")
+    with pytest.raises(KeyError):
+        graph.account_summary("UNKNOWN")
@@ -0,0 +1,61 @@
+"""Sliding-window velocity counters: window edge expiry, LRU eviction, rule 901 / 902 thresholds"""
+from services.velocity_counters import SlidingWindowCounter, VelocityCounterService
+
+MINUTE = 60_000
+
+
+def test_events_expire_at_the_window_edge():
+    counter = SlidingWindowCounter(window_ms=10 * MINUTE, bucket_ms=MINUTE)
+    counter.add("A", 100.0, timestamp_ms=0)
+    counter.add("A", 50.0, timestamp_ms=5 * MINUTE)
+
+    # Last instant the first bucket is still inside the window
+    assert counter.get("A", timestamp_ms=10 * MINUTE - 1)["count"] == 2
+    at_edge = counter.get("A", timestamp_ms=10 * MINUTE)
+    assert at_edge == {"count": 1, "total_amount": 50.0, "avg_amount": 50.0}
+    assert counter.get("A", timestamp_ms=15 * MINUTE)["count"] == 0
+
+
+def test_events_in_one_bucket_share_it():
+    counter = SlidingWindowCounter(window_ms=10 * MINUTE, bucket_ms=MINUTE)
+    for offset in (0, 10_000, 59_999):
+        stats = counter.add("A", 10.0, timestamp_ms=offset)
+    assert stats["count"] == 3 and len(counter._accounts["A"].buckets) == 1
+
+
+def test_add_expires_before_counting():
+    counter = SlidingWindowCounter(window_ms=2 * MINUTE, bucket_ms=MINUTE)
+    counter.add("A", timestamp_ms=0)
+    counter.add("A", timestamp_ms=MINUTE)
+    assert counter.add("A", timestamp_ms=2 * MINUTE)["count"] == 2
+
+
+def test_least_recently_used_account_is_evicted():
+    counter = SlidingWindowCounter(window_ms=MINUTE, bucket_ms=1000, max_accounts=2)
+    counter.add("A", timestamp_ms=0)
+    counter.add("B", timestamp_ms=0)
+    counter.add("A", timestamp_ms=1)
+    counter.add("C", timestamp_ms=2)
+
+    assert counter.get("B", timestamp_ms=3)["count"] == 0
+    assert counter.get("A", timestamp_ms=3)["count"] == 2
+    snapshot = counter.snapshot()
+    assert (snapshot["accounts"], snapshot["evicted_accounts"]) == (2, 1)
+
+
+def test_service_flags_rule_thresholds():
+    service = VelocityCounterService(debtor_threshold=3, creditor_threshold=2)
+    results = [service.record("D1", f"C{n % 2}", 10.0, timestamp_ms=n) for n in range(3)]
+
+    assert [r["debtor"]["rule_901_expected"] for r in results] == [False, False, True]
+    assert [r["creditor"]["rule_902_expected"] for r in results] == [False, False, True]
+    assert service.record(None, "C9")["creditor"]["count"] == 1
+    assert "debtor" not in service.record(None, "C9")
+
+
+def test_account_lookup_reports_remaining_to_threshold():
+    service = VelocityCounterService(debtor_threshold=3)
+    service.record("D1", None, 20.0)
+    lookup = service.debtor("D1")
+    assert lookup["remaining_to_threshold"] == 2 and not lookup["rule_901_expected"]
+    assert service.creditor("unknown")["count"] == 0
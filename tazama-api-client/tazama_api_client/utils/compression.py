@@ -0,0 +1,108 @@
+"""
+Response Compression Middleware
+Compresses large JSON/HTML bodies with brotli (if installed) or gzip,
+based on the client's Accept-Encoding header.
+
+Streaming responses (multi-chunk bodies, SSE) are passed through untouched so
+live endpoints keep flushing immediately.
+"""
+import gzip
+
+try:
+    import brotli  # Optional: pip install brotli
+except ImportError:  # pragma: no cover - gzip fallback
+    brotli = None
+
+from config import RESPONSE_COMPRESSION_MIN_SIZE, RESPONSE_COMPRESSION_LEVEL
+
+
+def _accepted_encodings(scope) -> set:
+    for key, value in scope.get("headers", []):
+        if key == b"accept-encoding":
+            return {part.split(";")[0].strip() for part in value.decode("latin-1").lower().split(",")}
+    return set()
+
+
+def select_encoding(accepted: set):
+    """Pick the best supported encoding from the client's Accept-Encoding set"""
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+def compress_body(body: bytes, encoding: str, level: int = RESPONSE_COMPRESSION_LEVEL) -> bytes:
+    """Compress a response body with the given content-coding"""
+    if encoding == "br":
+        # Brotli quality goes 0-11; map the gzip-style level onto it
+        return brotli.compress(body, quality=min(11, max(0, level)))
+    return gzip.compress(body, compresslevel=min(9, max(1, level)))
+
+
+class CompressionMiddleware:
+    """ASGI middleware that compresses single-chunk responses above a size threshold"""
+
+    def __init__(self, app, minimum_size: int = RESPONSE_COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = select_encoding(_accepted_encodings(scope))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, passthrough
+
+            if message["type"] == "http.response.start":
+                headers = {k.lower(): v for k, v in message.get("headers", [])}
+                content_type = headers.get(b"content-type", b"")
+                if b"content-encoding" in headers or content_type.startswith(b"text/event-stream"):
+                    passthrough = True
+                    await send(message)
+                else:
+                    # Hold the start message until we know the body size
+                    start_message = message
+                return
+
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if start_message is not None:
+                pending_start, start_message = start_message, None
+
+                if more_body or len(body) < self.minimum_size:
+                    # Streaming or small body: send as-is
+                    passthrough = True
+                    await send(pending_start)
+                    await send(message)
+                    return
+
+                compressed = compress_body(body, encoding)
+                headers = [
+                    (k, v) for k, v in pending_start.get("headers", [])
+                    if k.lower() not in (b"content-length", b"content-encoding")
+                ]
+                headers.append((b"content-encoding", encoding.encode()))
+                headers.append((b"content-length", str(len(compressed)).encode()))
+                headers.append((b"vary", b"Accept-Encoding"))
+                await send({**pending_start, "headers": headers})
+                await send({"type": "http.response.body", "body": compressed, "more_body": False})
+                return
+
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
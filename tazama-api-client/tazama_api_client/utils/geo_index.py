@@ -0,0 +1,225 @@
+"""
+Geo Index - Spatial index over Rule 903 risk zones
+
+Rule 903 classifies by Glctn.City / Region, falling back to approximate city
+bounding boxes when only Lat/Long is present (rule-executer/rule-903). This
+module holds those zones in one place and indexes their boxes on a uniform
+lat/long grid, so millions of points are classified with a few vectorised
+passes instead of a per-point if-chain:
+
+    cell -> candidate zone set (few distinct sets) -> exact box test in rule order
+
+It also samples realistic coordinates per zone for attack generators and
+simulations (replacing hard-coded coordinate dicts).
+"""
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# name, lat_min, lat_max, long_min, long_max, centroid (lat, long); checked in this order
+GEO_ZONES: List[Tuple[str, float, float, float, float, Tuple[float, float]]] = [
+    ("Jakarta", -6.4, -6.1, 106.7, 107.0, (-6.195062, 106.803215)),
+    ("Tangerang", -6.3, -6.1, 106.6, 106.8, (-6.178306, 106.640166)),
+    ("Surabaya", -7.4, -7.2, 112.6, 112.8, (-7.250445, 112.768845)),
+    ("Bandung", -7.0, -6.9, 107.5, 107.7, (-6.917464, 107.619125)),
+    ("Semarang", -7.1, -6.9, 110.3, 110.5, (-6.966667, 110.416664)),
+    ("Denpasar", -8.7, -8.6, 115.1, 115.3, (-8.650000, 115.216667)),
+]
+
+# Locations outside every 903 box, used to generate low-risk traffic
+REFERENCE_LOCATIONS: Dict[str, Tuple[float, float]] = {
+    "Yogyakarta": (-7.795580, 110.369490),
+    "Medan": (3.595196, 98.672226),
+    "Makassar": (-5.147665, 119.432732),
+}
+
+# Rule 903 riskZones as shipped in init-db/06-setup-rule-903.sql
+DEFAULT_RISK_ZONES: Dict[str, List[str]] = {
+    "high": ["Jakarta", "Tangerang", "Surabaya"],
+    "medium": ["Bandung", "Semarang", "Bali", "Denpasar"],
+    "low": []
+}
+
+RISK_LEVELS = ("HIGH", "MEDIUM", "LOW")
+SUB_RULE_REFS = (".01", ".02", ".03")
+
+_EARTH_RADIUS_KM = 6371.0088
+
+
+def _zone_names(zones: Any, key: str = "cities") -> List[str]:
+    # riskZones.<level> is either a list of cities or {"cities": [...], "regions": [...]}
+    # (a plain list holds cities only, as rule_evaluator._zone_list)
+    if isinstance(zones, dict):
+        return list(zones.get(key, []))
+    return list(zones or []) if key == "cities" else []
+
+
+def _lowered(values, n: int) -> np.ndarray:
+    """Lowercased strings ("" for missing) for np.isin lookups"""
+    if values is None:
+        return np.full(n, "", dtype=object)
+    return np.array([(v or "").lower() for v in values], dtype=object)
+
+
+class GeoIndex:
+    """Uniform grid index over zone bounding boxes"""
+
+    def __init__(self, zones=GEO_ZONES, risk_zones: Optional[Dict[str, Any]] = None, cell_deg: float = 0.1):
+        """
+        Args:
+            zones: Zone boxes (see GEO_ZONES); earlier zones win on overlap
+            risk_zones: Rule 903 riskZones parameter (defaults to DEFAULT_RISK_ZONES)
+            cell_deg: Grid cell size in degrees
+        """
+        self.zones = list(zones)
+        self.cell_deg = cell_deg
+        self.names = np.array([z[0] for z in self.zones] + [None], dtype=object)
+        self.centroids = np.array([z[5] for z in self.zones], dtype=np.float64).reshape(-1, 2)
+        self._ncols = int(np.ceil(360 / cell_deg)) + 1
+
+        risk_zones = risk_zones or DEFAULT_RISK_ZONES
+        self.city_levels: Dict[str, int] = {}
+        for level, key in ((1, "medium"), (0, "high")):
+            for name in _zone_names(risk_zones.get(key)):
+                self.city_levels[name.lower()] = level
+        # level -> lowercased city / region names, for np.isin (a city listed as both HIGH and MEDIUM is HIGH)
+        self.level_names = {level: [name for name, lvl in self.city_levels.items() if lvl == level]
+                            for level in (0, 1)}
+        self.level_regions = {level: [name.lower() for name in _zone_names(risk_zones.get(key), "regions")]
+                              for level, key in ((0, "high"), (1, "medium"))}
+
+        # cell key -> tuple of zone indexes (in rule order)
+        cells: Dict[int, Tuple[int, ...]] = {}
+        for zi, (_, lat_min, lat_max, long_min, long_max, _) in enumerate(self.zones):
+            for row in range(self._row(lat_min), self._row(lat_max) + 1):
+                for col in range(self._col(long_min), self._col(long_max) + 1):
+                    key = row * self._ncols + col
+                    cells[key] = cells.get(key, ()) + (zi,)
+
+        # Few distinct candidate sets; each cell points at one of them
+        self._candidate_sets = sorted(set(cells.values()))
+        set_ids = {s: i for i, s in enumerate(self._candidate_sets)}
+        self._cell_keys = np.array(sorted(cells), dtype=np.int64)
+        self._cell_sets = np.array([set_ids[cells[k]] for k in self._cell_keys], dtype=np.int32)
+
+    def _row(self, lat):
+        return np.floor((np.asarray(lat) + 90) / self.cell_deg).astype(np.int64)
+
+    def _col(self, lon):
+        return np.floor((np.asarray(lon) + 180) / self.cell_deg).astype(np.int64)
+
+    def locate(self, lat, lon) -> np.ndarray:
+        """Zone index per point (-1 = outside every zone); NaN coordinates give -1"""
+        lat = np.asarray(lat, dtype=np.float64)
+        lon = np.asarray(lon, dtype=np.float64)
+        out = np.full(lat.shape, -1, dtype=np.int32)
+        valid = ~(np.isnan(lat) | np.isnan(lon))
+        if not valid.any() or not len(self._cell_keys):
+            return out
+
+        keys = np.where(valid, self._row(np.where(valid, lat, 0)) * self._ncols + self._col(np.where(valid, lon, 0)), -1)
+        pos = np.clip(np.searchsorted(self._cell_keys, keys), 0, len(self._cell_keys) - 1)
+        hit = valid & (self._cell_keys[pos] == keys)
+        set_of_point = np.where(hit, self._cell_sets[pos], -1)
+
+        for sid, candidates in enumerate(self._candidate_sets):
+            pending = set_of_point == sid
+            for zi in candidates:
+                _, lat_min, lat_max, long_min, long_max, _ = self.zones[zi]
+                inside = pending & (lat >= lat_min) & (lat <= lat_max) & (lon >= long_min) & (lon <= long_max)
+                out[inside] = zi
+                pending &= ~inside
+        return out
+
+    def cities(self, lat, lon) -> np.ndarray:
+        """City name per point (None outside every zone)"""
+        return self.names[self.locate(lat, lon)]
+
+    def classify(self, lat, lon, city=None, region=None) -> Dict[str, np.ndarray]:
+        """
+        Rule 903 classification in batch
+
+        City comes from the City field, else from the zone box of Lat/Long (as
+        rule_evaluator.resolve_cities); a City or Region in a risk zone sets the
+        level. Outside every zone the level is LOW (.03); .x00 only when City,
+        Region, Lat and Long are all missing.
+
+        Returns:
+            {"city": names, "risk_level": HIGH/MEDIUM/LOW, "sub_rule_ref": .01/.02/.03/.x00}
+        """
+        lat = np.asarray(lat, dtype=np.float64)
+        lon = np.asarray(lon, dtype=np.float64)
+        n = len(lat)
+        resolved = np.array(city if city is not None else [None] * n, dtype=object)
+        region = _lowered(region, n)
+
+        missing = _lowered(resolved, n) == ""
+        if missing.any():
+            resolved[missing] = self.cities(lat[missing], lon[missing])
+        cities = _lowered(resolved, n)
+
+        level = np.full(n, 2, dtype=np.int8)
+        for lvl in (1, 0):
+            level[np.isin(cities, self.level_names[lvl]) | np.isin(region, self.level_regions[lvl])] = lvl
+
+        has_geo = (cities != "") | (region != "") | ~np.isnan(lat) | ~np.isnan(lon)
+        sub_rule_ref = np.array(SUB_RULE_REFS, dtype=object)[level]
+        sub_rule_ref[~has_geo] = ".x00"
+        risk_level = np.array(RISK_LEVELS, dtype=object)[level]
+        risk_level[~has_geo] = None
+        return {"city": resolved, "risk_level": risk_level, "sub_rule_ref": sub_rule_ref}
+
+    def nearest_zone(self, lat, lon) -> Tuple[np.ndarray, np.ndarray]:
+        """Nearest zone centroid and its haversine distance (km) per point"""
+        lat = np.radians(np.asarray(lat, dtype=np.float64))[:, None]
+        lon = np.radians(np.asarray(lon, dtype=np.float64))[:, None]
+        c_lat = np.radians(self.centroids[:, 0])[None, :]
+        c_lon = np.radians(self.centroids[:, 1])[None, :]
+        a = np.sin((c_lat - lat) / 2) ** 2 + np.cos(lat) * np.cos(c_lat) * np.sin((c_lon - lon) / 2) ** 2
+        distance = 2 * _EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+        nearest = distance.argmin(axis=1)
+        return self.names[nearest], distance[np.arange(len(nearest)), nearest]
+
+    def zone_summary(self) -> List[Dict[str, Any]]:
+        levels = {0: "HIGH", 1: "MEDIUM"}
+        return [{
+            "city": name,
+            "risk_level": levels.get(self.city_levels.get(name.lower(), 2), "LOW"),
+            "bounds": {"lat": [lat_min, lat_max], "long": [long_min, long_max]},
+            "centroid": {"lat": centroid[0], "long": centroid[1]}
+        } for name, lat_min, lat_max, long_min, long_max, centroid in self.zones]
+
+
+def zone_center(city: str) -> Tuple[float, float]:
+    """Centroid of a 903 zone or reference location"""
+    for name, *_, centroid in GEO_ZONES:
+        if name.lower() == city.lower():
+            return centroid
+    for name, centroid in REFERENCE_LOCATIONS.items():
+        if name.lower() == city.lower():
+            return centroid
+    raise KeyError(f"Unknown location: {city}")
+
+
+def sample_coordinates(city: str, n: int = 1, rng: Optional[np.random.Generator] = None,
+                       spread_km: float = 5.0) -> np.ndarray:
+    """
+    Realistic coordinates around a location: normal around the centroid, clipped to
+    the zone box for 903 zones. Returns an (n, 2) array of [lat, long].
+    """
+    rng = rng or np.random.default_rng()
+    center = zone_center(city)
+    spread_deg = spread_km / 111.0
+    points = np.column_stack([
+        rng.normal(center[0], spread_deg, n),
+        rng.normal(center[1], spread_deg, n),
+    ])
+    for name, lat_min, lat_max, long_min, long_max, _ in GEO_ZONES:
+        if name.lower() == city.lower():
+            points[:, 0] = np.clip(points[:, 0], lat_min, lat_max)
+            points[:, 1] = np.clip(points[:, 1], long_min, long_max)
+    return points
+
+
+# Shared index over the default zones
+geo_index = GeoIndex()
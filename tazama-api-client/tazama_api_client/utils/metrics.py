@@ -0,0 +1,284 @@
+"""
+Prometheus Metrics
+Counters, gauges and histograms for the client's own performance, exported
+in the Prometheus text format at GET /metrics (no client library needed).
+
+Fed from the existing call sites:
+- TMSClient._post            -> tms requests by message type / status / tenant, latency
+- DB strategies execute_query -> query latency by query name (verb + table)
+- fetch_logs_internal        -> log fetch latency by container
+- parse / relay fraud alerts -> alerts by rule id
+- detection latency tracker  -> pacs.002 submit -> evaluation result
+- MetricsMiddleware          -> in-flight HTTP requests
+- EventLoopLagMonitor        -> event-loop lag (blocking calls in async routes show up here)
+Route stage histograms from utils.timing are exported alongside.
+"""
+import asyncio
+import re
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from config import METRICS_LATENCY_BUCKETS, EVENT_LOOP_LAG_INTERVAL, DETECTION_LATENCY_BUCKETS
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Iterable[str], values: Iterable[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        key = tuple(str(label) for label in labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(tuple(str(label) for label in labels), 0.0)
+
+    def totals(self) -> Dict[LabelValues, float]:
+        """Copy of every series (label values -> value)"""
+        with self._lock:
+            return dict(self._values)
+
+    def expose(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return self._header() + [f"{self.name}{_labels(self.labelnames, k)} {v}" for k, v in items]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, *labels: str, value: float):
+        key = tuple(str(label) for label in labels)
+        with self._lock:
+            self._values[key] = value
+
+    def dec(self, *labels: str, amount: float = 1.0):
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Iterable[float] = METRICS_LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = sorted(buckets)
+        self._series: Dict[LabelValues, List[float]] = {}  # bucket counts..., +Inf count, sum
+
+    def observe(self, *labels: str, value: float):
+        key = tuple(str(label) for label in labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0.0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+                    break
+            else:
+                series[len(self.buckets)] += 1
+            series[-1] += value
+
+    def count(self, *labels: str) -> int:
+        series = self._series.get(tuple(str(label) for label in labels))
+        return int(sum(series[:-1])) if series else 0
+
+    def expose(self) -> List[str]:
+        lines = self._header()
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._series.items())
+        for key, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ["+Inf"], series[:-1]):
+                cumulative += count
+                le = 'le="%s"' % bound
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {int(cumulative)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {int(cumulative)}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {series[-1]}")
+        return lines
+
+
+# ============ CLIENT METRICS ============
+
+TMS_REQUESTS = Counter("tazama_client_tms_requests_total",
+                       "TMS requests by message type, outcome (HTTP status or failure class) and tenant",
+                       ("message_type", "status", "tenant"))
+TMS_LATENCY = Histogram("tazama_client_tms_request_duration_seconds",
+                        "TMS request latency including retries", ("message_type", "tenant"))
+DB_QUERIES = Counter("tazama_client_db_queries_total", "Database queries by name and outcome",
+                     ("query", "status"))
+DB_LATENCY = Histogram("tazama_client_db_query_duration_seconds", "Database query latency by name", ("query",))
+LOG_FETCH_LATENCY = Histogram("tazama_client_log_fetch_duration_seconds",
+                              "Container log fetch latency", ("container",))
+FRAUD_ALERTS = Counter("tazama_client_fraud_alerts_total", "Fraud alerts surfaced to callers by rule",
+                       ("rule_id", "source"))
+HTTP_IN_FLIGHT = Gauge("tazama_client_http_requests_in_flight", "HTTP requests currently being served")
+HTTP_REQUESTS = Counter("tazama_client_http_requests_total", "HTTP requests by route and status",
+                        ("route", "status"))
+EVENT_LOOP_LAG = Gauge("tazama_client_event_loop_lag_seconds", "Most recent event-loop scheduling lag")
+EVENT_LOOP_LAG_HIST = Histogram("tazama_client_event_loop_lag_distribution_seconds",
+                                "Event-loop scheduling lag")
+DETECTION_LATENCY = Histogram("tazama_client_detection_latency_seconds",
+                              "pacs.002 submit to evaluation result (relay or evaluation DB)", ("source",),
+                              buckets=DETECTION_LATENCY_BUCKETS)
+FLOW_STEP_LATENCY = Histogram("tazama_client_flow_step_duration_seconds",
+                              "E2E flow step latency (pain.001 / pain.013 / pacs.008 / pacs.002) by outcome",
+                              ("step", "outcome"))
+
+CLIENT_METRICS = [TMS_REQUESTS, TMS_LATENCY, DB_QUERIES, DB_LATENCY, LOG_FETCH_LATENCY, FRAUD_ALERTS,
+                  HTTP_IN_FLIGHT, HTTP_REQUESTS, EVENT_LOOP_LAG, EVENT_LOOP_LAG_HIST, DETECTION_LATENCY,
+                  FLOW_STEP_LATENCY]
+
+# First table after FROM / INTO / UPDATE / TABLE, skipping set-returning functions like jsonb_array_elements(...)
+_QUERY_NAME = re.compile(r"^\s*(\w+)\b.*?\b(?:FROM|INTO|UPDATE|TABLE)\s+(?:IF\s+(?:NOT\s+)?EXISTS\s+)?([\w.\"]+)\b(?!\()",
+                         re.IGNORECASE | re.DOTALL)
+
+
+def query_name(query: str) -> str:
+    """Low-cardinality name for a SQL statement: verb + first table (e.g. select_transaction)"""
+    match = _QUERY_NAME.search(query)
+    if not match:
+        verb = query.strip().split(None, 1)[0].lower() if query.strip() else "unknown"
+        return verb
+    return f"{match.group(1).lower()}_{match.group(2).strip(chr(34)).lower()}"
+
+
+def record_tms_request(message_type: str, result, duration_s: float, tenant: str = ""):
+    status = str(result[0]) if result[0] else (getattr(result, "error_class", None) or "error")
+    TMS_REQUESTS.inc(message_type, status, tenant)
+    TMS_LATENCY.observe(message_type, tenant, value=duration_s)
+
+
+def record_db_query(query: str, duration_s: float, ok: bool):
+    name = query_name(query)
+    DB_QUERIES.inc(name, "ok" if ok else "error")
+    DB_LATENCY.observe(name, value=duration_s)
+
+
+def record_fraud_alerts(alerts: List[Dict], source: str = "logs"):
+    for alert in alerts:
+        FRAUD_ALERTS.inc(alert.get("rule_id") or "unknown", source)
+
+
+def _route_stage_lines() -> List[str]:
+    from utils.timing import timing_registry
+    name = "tazama_client_route_stage_duration_seconds"
+    lines = [f"# HELP {name} Per-route stage latency (utils.timing)", f"# TYPE {name} histogram"]
+    for route, stages in sorted(timing_registry.histograms().items()):
+        for stage_name, histogram in sorted(stages.items()):
+            labels = ("route", "stage")
+            values = (route, stage_name)
+            cumulative = 0
+            for bound, count in zip(histogram.bounds + ["+Inf"], histogram.counts):
+                cumulative += count
+                le = 'le="%s"' % (bound / 1000 if bound != "+Inf" else bound)
+                lines.append(f"{name}_bucket{_labels(labels, values, le)} {cumulative}")
+            lines.append(f"{name}_count{_labels(labels, values)} {histogram.count}")
+            lines.append(f"{name}_sum{_labels(labels, values)} {histogram.sum_ms / 1000}")
+    return lines
+
+
+def render_metrics() -> str:
+    """All metrics in the Prometheus text exposition format"""
+    from services.tms_client import tms_client
+    lines: List[str] = []
+    for metric in CLIENT_METRICS:
+        lines.extend(metric.expose())
+
+    concurrency = tms_client.concurrency_stats()
+    for key in ("limit", "in_flight", "queued"):
+        if isinstance(concurrency.get(key), (int, float)):
+            name = f"tazama_client_tms_concurrency_{key}"
+            lines += [f"# HELP {name} Adaptive TMS concurrency {key.replace('_', ' ')}",
+                      f"# TYPE {name} gauge", f"{name} {concurrency[key]}"]
+    lines.extend(_route_stage_lines())
+    return "\n".join(lines) + "\n"
+
+
+# ============ MIDDLEWARE / MONITOR ============
+
+class MetricsMiddleware:
+    """ASGI middleware counting in-flight and completed HTTP requests"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = "500"
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            route = scope.get("route")
+            if route is not None and getattr(route, "methods", None):
+                HTTP_REQUESTS.inc(f"{scope.get('method', 'GET')} {route.path}", status)
+
+
+class EventLoopLagMonitor:
+    """Sleeps `interval` seconds in a loop and records how late it wakes up"""
+
+    def __init__(self, interval: float = EVENT_LOOP_LAG_INTERVAL):
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - start - self.interval)
+            EVENT_LOOP_LAG.set(value=lag)
+            EVENT_LOOP_LAG_HIST.observe(value=lag)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+
+event_loop_monitor = EventLoopLagMonitor()
@@ -1,11 +1,19 @@
 """
 Payload Generator untuk ISO 20022 Messages
 """
-from faker import Faker
 from datetime import datetime
 import uuid
 
-fake = Faker('id_ID')
+_fake = None
+
+
+def get_faker():
+    """Faker('id_ID'), created on first use (importing faker is a large share of cold start)"""
+    global _fake
+    if _fake is None:
+        from faker import Faker
+        _fake = Faker('id_ID')
+    return _fake
 
 
 def create_uuid():
@@ -14,7 +22,8 @@ def create_uuid():
 
 
 def generate_pain001(debtor_account=None, amount=None, debtor_name=None, 
-                     creditor_account=None, creditor_name=None, purpose="TRANSFER"):
+                     creditor_account=None, creditor_name=None, purpose="TRANSFER",
+                     latitude=None, longitude=None, city=None, region=None):
     """
     Generate pain.001.001.11 - Customer Credit Transfer Initiation
     
@@ -28,16 +37,17 @@ def generate_pain001(debtor_account=None, amount=None, debtor_name=None,
         creditor_account: Creditor's account ID (receiver)
         creditor_name: Creditor's name
         purpose: Transaction purpose (TRANSFER, BILL_PAYMENT, etc.)
+        latitude, longitude, city, region: Initiating party geolocation (defaults to Jakarta)
     """
     message_id = create_uuid()
     end_to_end_id = create_uuid()
     timestamp = datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
     
     # Generate realistic data
-    debtor_name_parts = (debtor_name or fake.name()).split()
+    debtor_name_parts = (debtor_name or get_faker().name()).split()
     if len(debtor_name_parts) < 2: debtor_name_parts.append("User")
     
-    creditor_name_parts = (creditor_name or fake.name()).split()
+    creditor_name_parts = (creditor_name or get_faker().name()).split()
     if len(creditor_name_parts) < 2: creditor_name_parts.append("Merchant")
     
     debtor_id = "+27730975224"
@@ -52,7 +62,7 @@ def generate_pain001(debtor_account=None, amount=None, debtor_name=None,
     creditor_account_id_type = "MSISDN"
     creditor_agent_id = "fsp002"
     
-    transaction_amount = amount or float(round(fake.random.uniform(100, 10000), 2))
+    transaction_amount = amount or float(round(get_faker().random.uniform(100, 10000), 2))
     debtor_dob = "1968-02-01"
     
     payload = {
@@ -283,10 +293,10 @@ def generate_pain013(debtor_account=None, amount=None, debtor_name=None,
     timestamp = datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
     
     # Generate realistic data
-    debtor_name_parts = (debtor_name or fake.name()).split()
+    debtor_name_parts = (debtor_name or get_faker().name()).split()
     if len(debtor_name_parts) < 2: debtor_name_parts.append("User")
     
-    creditor_name_parts = (creditor_name or fake.name()).split()
+    creditor_name_parts = (creditor_name or get_faker().name()).split()
     if len(creditor_name_parts) < 2: creditor_name_parts.append("Merchant")
     
     debtor_id = "+27730975224"
@@ -301,7 +311,7 @@ def generate_pain013(debtor_account=None, amount=None, debtor_name=None,
     creditor_account_id_type = "MSISDN"
     creditor_agent_id = "fsp002"
     
-    transaction_amount = amount or float(round(fake.random.uniform(100, 10000), 2))
+    transaction_amount = amount or float(round(get_faker().random.uniform(100, 10000), 2))
     debtor_dob = "1968-02-01"
     
     payload = {
@@ -517,10 +527,10 @@ def generate_pacs008(debtor_account=None, amount=None, debtor_name=None, credito
     end_to_end_id = create_uuid()  # Postman uses uuid for E2E
     
     # Generate realistic data
-    debtor_name_parts = (debtor_name or fake.name()).split()
+    debtor_name_parts = (debtor_name or get_faker().name()).split()
     if len(debtor_name_parts) < 2: debtor_name_parts.append("User")
     
-    creditor_name_parts = (creditor_name or fake.name()).split()
+    creditor_name_parts = (creditor_name or get_faker().name()).split()
     if len(creditor_name_parts) < 2: creditor_name_parts.append("Merchant")
 
     debtor_id = "+27730975224" # Fixed from Postman for stability or generated
@@ -533,7 +543,7 @@ def generate_pacs008(debtor_account=None, amount=None, debtor_name=None, credito
     creditor_account_id = creditor_account or "0987654321" 
     creditor_account_id_type = "MSISDN"
 
-    transaction_amount = amount or float(round(fake.random.uniform(100, 10000), 2))
+    transaction_amount = amount or float(round(get_faker().random.uniform(100, 10000), 2))
     timestamp = datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
     
 
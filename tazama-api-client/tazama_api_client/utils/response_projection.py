@@ -0,0 +1,90 @@
+"""
+Response Projection - Trim route responses by verbosity level
+
+Attack routes return per-iteration TMS responses, echoed payloads and a copy
+of request_context/rule_detail inside every alert. For remote analysts most of
+that is noise, so routes pass their result through project_response() with the
+requested level:
+
+- full:     unchanged (dashboard default)
+- standard: drop echoed payloads, per-iteration TMS bodies and per-alert copies
+            of request_context; rule_detail keeps only why_triggered
+- summary:  status, counts and alert titles only
+"""
+from typing import Any, Dict, List
+
+from models.schemas import Verbosity
+
+
+# Top-level keys removed per level
+_DROP_KEYS = {
+    Verbosity.STANDARD: ("payload_sent",),
+    Verbosity.SUMMARY: ("payload_sent", "tms_response", "request_summary"),
+}
+
+# Per-iteration keys removed from "results" at standard level
+_RESULT_DROP_KEYS = ("response", "pacs002_response")
+
+# Alert fields kept per level
+_ALERT_FIELDS = {
+    Verbosity.STANDARD: ("raw", "title", "desc", "rule_id", "rule_detail", "log_snippet",
+                         "risk_level", "sub_rule_ref", "weight", "typology_score", "timestamp",
+                         "detection_latency_ms", "error"),
+    Verbosity.SUMMARY: ("rule_id", "title", "risk_level", "error"),
+}
+
+
+def _project_alert(alert: Dict[str, Any], verbosity: Verbosity) -> Dict[str, Any]:
+    fields = _ALERT_FIELDS[verbosity]
+    projected = {k: alert[k] for k in fields if k in alert}
+    rule_detail = projected.get("rule_detail")
+    if isinstance(rule_detail, dict):
+        projected["rule_detail"] = {"why_triggered": rule_detail.get("why_triggered")}
+    return projected
+
+
+def _summarize_results(results: List[Any]) -> Dict[str, int]:
+    success = sum(1 for r in results if isinstance(r, dict) and r.get("status") == 200)
+    return {"total": len(results), "success": success, "failed": len(results) - success}
+
+
+def project_response(data: Dict[str, Any], verbosity: Verbosity = Verbosity.FULL) -> Dict[str, Any]:
+    """
+    Project a route response down to the requested verbosity level
+
+    Args:
+        data: Response dict built by the route
+        verbosity: Verbosity level (summary / standard / full)
+
+    Returns:
+        New dict (the input is not modified); the same dict when verbosity is full
+    """
+    verbosity = Verbosity(verbosity)
+    if verbosity == Verbosity.FULL or not isinstance(data, dict):
+        return data
+
+    projected = {k: v for k, v in data.items() if k not in _DROP_KEYS[verbosity]}
+
+    if isinstance(projected.get("results"), list):
+        if verbosity == Verbosity.SUMMARY:
+            projected["results_summary"] = _summarize_results(projected.pop("results"))
+        else:
+            projected["results"] = [
+                {k: v for k, v in r.items() if k not in _RESULT_DROP_KEYS} if isinstance(r, dict) else r
+                for r in projected["results"]
+            ]
+
+    if isinstance(projected.get("fraud_alerts"), list):
+        projected["fraud_alerts"] = [
+            _project_alert(a, verbosity) if isinstance(a, dict) else a
+            for a in projected["fraud_alerts"]
+        ]
+
+    if verbosity == Verbosity.SUMMARY and isinstance(projected.get("steps"), list):
+        projected["steps"] = [
+            {k: v for k, v in step.items() if k in ("step", "name", "success", "status")}
+            if isinstance(step, dict) else step
+            for step in projected["steps"]
+        ]
+
+    return projected
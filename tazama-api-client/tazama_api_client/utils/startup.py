@@ -0,0 +1,147 @@
+"""
+Startup Profiling - cold-start marks, import-time breakdown and budget
+
+Autoscaled client containers are only useful once main.py has imported and
+the app is serving, so startup time is tracked against COLD_START_BUDGET_MS:
+
+- mark("name") records milliseconds since this module was imported (main.py
+  imports it first) plus the interpreter start before that, when /proc is there
+- importtime_report() runs `python -X importtime -c "import main"` in a fresh
+  interpreter and returns the slowest modules (self and cumulative)
+- warm_up() imports the modules that are deliberately deferred (faker, numpy,
+  jinja2) in a background thread after startup, so readiness does not wait
+  for them and the first requests usually do not either
+"""
+import importlib
+import os
+import subprocess
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from config import COLD_START_BUDGET_MS
+
+_IMPORTED_AT = time.perf_counter()
+CLIENT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_marks: Dict[str, float] = {}
+
+# Imported on first use instead of at startup (see warm_up)
+DEFERRED_MODULES = ("faker", "numpy", "jinja2", "utils.geo_index", "services.transaction_graph")
+
+
+def _interpreter_ms() -> Optional[float]:
+    """Milliseconds between process start and this module's import (Linux /proc only)"""
+    try:
+        with open("/proc/self/stat") as f:
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        process_age = uptime - start_ticks / os.sysconf("SC_CLK_TCK")
+        return round(max(0.0, process_age - (time.perf_counter() - _IMPORTED_AT)) * 1000, 1)
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+_INTERPRETER_MS = _interpreter_ms()
+
+
+def mark(name: str) -> float:
+    """Record a startup milestone; returns ms since main.py started importing"""
+    elapsed = round((time.perf_counter() - _IMPORTED_AT) * 1000, 1)
+    _marks.setdefault(name, elapsed)
+    return elapsed
+
+
+def startup_report() -> Dict[str, Any]:
+    """Startup milestones, deferred-module state and the cold-start budget verdict"""
+    ready = _marks.get("app_ready")
+    cold_start = ready + (_INTERPRETER_MS or 0) if ready is not None else None
+    return {
+        "interpreter_ms": _INTERPRETER_MS,
+        "marks_ms": dict(_marks),
+        "cold_start_ms": round(cold_start, 1) if cold_start is not None else None,
+        "budget_ms": COLD_START_BUDGET_MS,
+        "within_budget": cold_start <= COLD_START_BUDGET_MS if cold_start is not None else None,
+        "deferred_modules": {name: name in sys.modules for name in DEFERRED_MODULES}
+    }
+
+
+def warm_up(extra: Optional[List[Callable[[], Any]]] = None) -> threading.Thread:
+    """Import deferred modules (and run extra initialisers) in a daemon thread"""
+    def run():
+        for name in DEFERRED_MODULES:
+            try:
+                importlib.import_module(name)
+            except ImportError:
+                pass
+        for init in extra or []:
+            init()
+        mark("warmup_done")
+
+    thread = threading.Thread(target=run, name="startup-warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+# ============ IMPORT TIME ============
+
+def parse_importtime(stderr: str) -> List[Dict[str, Any]]:
+    """Parse `-X importtime` lines into {module, self_ms, cumulative_ms, depth}"""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+            modules.append({
+                "module": name.strip(),
+                "self_ms": round(int(self_us) / 1000, 3),
+                "cumulative_ms": round(int(cumulative_us) / 1000, 3),
+                "depth": (len(name) - len(name.lstrip()) - 1) // 2
+            })
+        except ValueError:
+            continue
+    return modules
+
+
+def importtime_report(module: str = "main", top: int = 25, timeout: float = 60) -> Dict[str, Any]:
+    """
+    Import `module` in a fresh interpreter with -X importtime
+
+    Returns:
+        total import time, the top modules by self and by cumulative time, and
+        self time summed per top-level package
+    """
+    started = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, timeout=timeout,
+        cwd=CLIENT_DIR,
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"}
+    )
+    wall_ms = round((time.perf_counter() - started) * 1000, 1)
+    modules = parse_importtime(proc.stderr)
+    if proc.returncode != 0:
+        error = [line for line in proc.stderr.splitlines() if not line.startswith("import time:")]
+        return {"status": "error", "message": "\n".join(error[-5:]), "wall_ms": wall_ms}
+
+    by_package: Dict[str, float] = {}
+    for entry in modules:
+        package = entry["module"].split(".")[0]
+        by_package[package] = by_package.get(package, 0.0) + entry["self_ms"]
+
+    root = next((m for m in modules if m["module"] == module), None)
+    return {
+        "status": "success",
+        "module": module,
+        "import_ms": root["cumulative_ms"] if root else None,
+        "process_wall_ms": wall_ms,
+        "budget_ms": COLD_START_BUDGET_MS,
+        "modules_imported": len(modules),
+        "top_cumulative": sorted((m for m in modules if m["module"] != module),
+                                 key=lambda m: m["cumulative_ms"], reverse=True)[:top],
+        "top_self": sorted(modules, key=lambda m: m["self_ms"], reverse=True)[:top],
+        "by_package_ms": dict(sorted(((k, round(v, 3)) for k, v in by_package.items()),
+                                     key=lambda kv: kv[1], reverse=True)[:top])
+    }
@@ -0,0 +1,75 @@
+"""
+Tenant Selection
+Which Tazama tenant the current request / bulk task sends as.
+
+The TMS takes the tenant from the bearer token (AUTHENTICATED=true, see
+tms-service validateTenantMiddleware), so each tenant in TENANT_TOKENS gets
+its own token; SourceTenantId is sent as well. The NATS transport puts the
+tenant straight into the envelope's TenantId.
+
+- tenant_scope("tenant-001") selects a tenant for the enclosed sends; bulk
+  sends inherit it because run_bulk copies the context into each task
+- TenantMiddleware applies an incoming X-Tenant-Id header to the request's
+  context; work offloaded to a thread keeps it only when submitted through
+  run_in_executor_with_context (plain loop.run_in_executor starts the thread
+  in an empty context, losing the tenant, stage timings and trace parent)
+- outside any scope the client sends as SOURCE_TENANT_ID
+"""
+import asyncio
+import contextvars
+import functools
+from contextlib import contextmanager
+from typing import Any, Callable, Optional
+
+from config import SOURCE_TENANT_ID, TENANT_TOKENS
+
+_current_tenant: contextvars.ContextVar = contextvars.ContextVar("tenant_id", default=None)
+
+
+def current_tenant(default: str = SOURCE_TENANT_ID) -> str:
+    return _current_tenant.get() or default
+
+
+def tenant_token(tenant_id: str) -> Optional[str]:
+    """Bearer token configured for a tenant (TENANT_TOKENS), if any"""
+    return TENANT_TOKENS.get(tenant_id)
+
+
+@contextmanager
+def tenant_scope(tenant_id: Optional[str]):
+    """Send as tenant_id inside the block (no-op for None / empty)"""
+    if not tenant_id:
+        yield current_tenant()
+        return
+    token = _current_tenant.set(tenant_id)
+    try:
+        yield tenant_id
+    finally:
+        _current_tenant.reset(token)
+
+
+async def run_in_executor_with_context(func: Callable[..., Any], *args, executor=None) -> Any:
+    """loop.run_in_executor(executor, func, *args) in a copy of the caller's context"""
+    context = contextvars.copy_context()
+    return await asyncio.get_running_loop().run_in_executor(executor, functools.partial(context.run, func, *args))
+
+
+def sql_literal(value: str) -> str:
+    """Quote a value for the psql -c strategies, which take no bind parameters"""
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+class TenantMiddleware:
+    """ASGI middleware: X-Tenant-Id request header -> tenant_scope for the request"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        tenant_id = next((v.decode("latin-1") for k, v in scope.get("headers", []) if k.lower() == b"x-tenant-id"),
+                         None)
+        with tenant_scope(tenant_id):
+            await self.app(scope, receive, send)
@@ -0,0 +1,271 @@
+"""
+Request Stage Timing
+Breaks a request down into named stages (payload generation, TMS sends,
+waits, docker log fetches, alert parsing, DB queries) so slow routes show
+where the time goes.
+
+- stage("name") records a block into the current request (no-op outside one)
+- TimingMiddleware opens a request, adds a Server-Timing header and a
+  "timings" object to JSON bodies, and feeds per-route stage histograms
+- timing_registry holds those histograms (GET /api/timings)
+- every stage is also an OpenTelemetry span when tracing is on (utils.tracing)
+
+Nested stages are recorded too but only top-level stages count towards
+"unattributed_ms" (total minus top-level stages).
+"""
+import contextvars
+import functools
+import json
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+from config import TIMING_ENABLED, TIMING_IN_BODY, TIMING_HISTOGRAM_BUCKETS_MS
+from utils.tracing import span
+
+_current: contextvars.ContextVar = contextvars.ContextVar("request_timings", default=None)
+_depth: contextvars.ContextVar = contextvars.ContextVar("request_timing_depth", default=0)
+
+
+class RequestTimings:
+    """Stage totals for one request: name -> [total_ms, count, top_level]"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages: Dict[str, List[Any]] = {}
+        self._lock = threading.Lock()  # Bulk sends record from worker threads
+
+    def add(self, name: str, duration_ms: float, top_level: bool = True):
+        with self._lock:
+            entry = self.stages.setdefault(name, [0.0, 0, top_level])
+            entry[0] += duration_ms
+            entry[1] += 1
+
+    def summary(self, total_ms: Optional[float] = None) -> Dict[str, Any]:
+        if total_ms is None:
+            total_ms = (time.perf_counter() - self.started) * 1000
+        with self._lock:
+            stages = {name: {"ms": round(ms, 3), "count": count}
+                      for name, (ms, count, _) in self.stages.items()}
+            attributed = sum(ms for ms, _, top_level in self.stages.values() if top_level)
+        return {
+            "total_ms": round(total_ms, 3),
+            "stages": stages,
+            "unattributed_ms": round(max(0.0, total_ms - attributed), 3)
+        }
+
+
+def current_timings() -> Optional[RequestTimings]:
+    return _current.get()
+
+
+@contextmanager
+def stage(name: str, **attributes):
+    """Time a block as a stage of the current request (and trace it as a span)"""
+    with span(name, **attributes):
+        timings = _current.get()
+        if timings is None:
+            yield
+            return
+        depth = _depth.get()
+        token = _depth.set(depth + 1)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            _depth.reset(token)
+            timings.add(name, (time.perf_counter() - start) * 1000, top_level=depth == 0)
+
+
+def timed(name: str):
+    """Decorator form of stage() for functions that are always one stage"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def server_timing_header(summary: Dict[str, Any]) -> str:
+    """Server-Timing value: one metric per stage plus unattributed and total"""
+    parts = [f"{name};dur={s['ms']:.3f}" + (f';desc="x{s["count"]}"' if s["count"] > 1 else "")
+             for name, s in summary["stages"].items()]
+    parts.append(f"unattributed;dur={summary['unattributed_ms']:.3f}")
+    parts.append(f"total;dur={summary['total_ms']:.3f}")
+    return ", ".join(parts)
+
+
+# ============ HISTOGRAMS ============
+
+class StageHistogram:
+    """Fixed-bucket latency histogram (cumulative bucket counts like Prometheus)"""
+
+    def __init__(self, bounds_ms: List[float]):
+        self.bounds = sorted(bounds_ms)
+        self.counts = [0] * (len(self.bounds) + 1)  # Last bucket is +Inf
+        self.count = 0
+        self.sum_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, value_ms: float):
+        index = len(self.bounds)
+        for i, bound in enumerate(self.bounds):
+            if value_ms <= bound:
+                index = i
+                break
+        self.counts[index] += 1
+        self.count += 1
+        self.sum_ms += value_ms
+        self.max_ms = max(self.max_ms, value_ms)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-quantile (max_ms for the +Inf bucket)"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return self.bounds[i] if i < len(self.bounds) else round(self.max_ms, 3)
+        return round(self.max_ms, 3)
+
+    def snapshot(self) -> Dict[str, Any]:
+        cumulative, buckets = 0, {}
+        for bound, count in zip(self.bounds + ["+Inf"], self.counts):
+            cumulative += count
+            buckets[str(bound)] = cumulative
+        return {
+            "count": self.count,
+            "sum_ms": round(self.sum_ms, 3),
+            "avg_ms": round(self.sum_ms / self.count, 3) if self.count else 0.0,
+            "max_ms": round(self.max_ms, 3),
+            "p50_ms": self.quantile(0.5),
+            "p95_ms": self.quantile(0.95),
+            "p99_ms": self.quantile(0.99),
+            "buckets": buckets
+        }
+
+
+class TimingRegistry:
+    """Per-route, per-stage histograms (stage "total" is the whole request)"""
+
+    def __init__(self, bounds_ms: List[float] = TIMING_HISTOGRAM_BUCKETS_MS):
+        self.bounds_ms = list(bounds_ms)
+        self._routes: Dict[str, Dict[str, StageHistogram]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, route: str, summary: Dict[str, Any]):
+        values = {name: s["ms"] for name, s in summary["stages"].items()}
+        values["unattributed"] = summary["unattributed_ms"]
+        values["total"] = summary["total_ms"]
+        with self._lock:
+            histograms = self._routes.setdefault(route, {})
+            for name, value in values.items():
+                if name not in histograms:
+                    histograms[name] = StageHistogram(self.bounds_ms)
+                histograms[name].observe(value)
+
+    def histograms(self) -> Dict[str, Dict[str, StageHistogram]]:
+        with self._lock:
+            return {route: dict(stages) for route, stages in self._routes.items()}
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                route: {
+                    "requests": stages["total"].count,
+                    "stages": {name: h.snapshot() for name, h in stages.items()}
+                }
+                for route, stages in self._routes.items()
+            }
+
+    def clear(self):
+        with self._lock:
+            self._routes.clear()
+
+
+timing_registry = TimingRegistry()
+
+
+# ============ MIDDLEWARE ============
+
+def _route_name(scope) -> Optional[str]:
+    route = scope.get("route")
+    methods = getattr(route, "methods", None)
+    if route is None or not methods:
+        return None  # Unmatched paths, static files, websockets
+    return f"{scope.get('method', 'GET')} {route.path}"
+
+
+class TimingMiddleware:
+    """ASGI middleware: per-request stage timings -> Server-Timing header, JSON body, histograms"""
+
+    def __init__(self, app, in_body: bool = TIMING_IN_BODY, registry: TimingRegistry = timing_registry):
+        self.app = app
+        self.in_body = in_body
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not TIMING_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = _current.set(timings)
+        start_message = None
+        summary = None
+
+        def finish() -> Dict[str, Any]:
+            nonlocal summary
+            if summary is None:
+                summary = timings.summary()
+            return summary
+
+        def with_header(message, extra=()):
+            headers = [(k, v) for k, v in message.get("headers", [])
+                       if k.lower() not in (b"server-timing",) + tuple(extra)]
+            headers.append((b"server-timing", server_timing_header(finish()).encode()))
+            return {**message, "headers": headers}
+
+        async def send_wrapper(message):
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                headers = {k.lower(): v for k, v in message.get("headers", [])}
+                if self.in_body and headers.get(b"content-type", b"").startswith(b"application/json") \
+                        and b"content-encoding" not in headers:
+                    start_message = message  # Hold until the body is known
+                else:
+                    await send(with_header(message))
+                return
+
+            if message["type"] == "http.response.body" and start_message is not None:
+                pending_start, start_message = start_message, None
+                body = message.get("body", b"")
+                if message.get("more_body", False) or not body.startswith(b"{") or not body.rstrip().endswith(b"}"):
+                    await send(with_header(pending_start))
+                    await send(message)
+                    return
+
+                timing_json = json.dumps(finish(), separators=(",", ":")).encode()
+                body = body.rstrip()
+                separator = b"" if body == b"{}" else b","
+                body = body[:-1] + separator + b'"timings":' + timing_json + b"}"
+                start = with_header(pending_start, extra=(b"content-length",))
+                start["headers"].append((b"content-length", str(len(body)).encode()))
+                await send(start)
+                await send({"type": "http.response.body", "body": body, "more_body": False})
+                return
+
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            route = _route_name(scope)
+            if route is not None:
+                self.registry.observe(route, finish())
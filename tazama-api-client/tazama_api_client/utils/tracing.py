@@ -0,0 +1,191 @@
+"""
+OpenTelemetry Tracing
+Spans around every route (TracingMiddleware) and every timing stage
+(utils.timing.stage: TMS calls, DB queries, log fetches, alert parsing),
+plus W3C traceparent propagation into TMS requests so client spans join
+the Tazama services' own traces.
+
+Optional dependency: pip install opentelemetry-sdk
+(and opentelemetry-exporter-otlp for TRACING_EXPORTER=otlp). Without it, or
+with TRACING_ENABLED=false, every helper here is a no-op.
+
+Exporters (TRACING_EXPORTER):
+- otlp:    OTLP/HTTP to TRACING_OTLP_ENDPOINT (local collector, Jaeger, Tempo)
+- file:    one JSON span per line in TRACING_FILE
+- console: spans printed to stdout
+"""
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from config import (
+    TRACING_ENABLED, TRACING_EXPORTER, TRACING_OTLP_ENDPOINT, TRACING_FILE, TRACING_SERVICE_NAME
+)
+
+# opentelemetry is imported by setup_tracing() only, so a disabled tracer costs no startup time
+trace = None
+propagate = None
+_tracer = None
+
+
+def _load_otel() -> bool:
+    global trace, propagate
+    if trace is None:
+        try:
+            from opentelemetry import trace as otel_trace, propagate as otel_propagate  # Optional: pip install opentelemetry-sdk
+        except ImportError:  # pragma: no cover - tracing disabled
+            return False
+        trace, propagate = otel_trace, otel_propagate
+    return True
+
+
+def _file_exporter(path: str):
+    """SpanExporter appending finished spans as JSON lines"""
+    from opentelemetry.sdk.trace.export import SpanExporter, SpanExportResult
+
+    class FileSpanExporter(SpanExporter):
+        def export(self, spans) -> "SpanExportResult":
+            with open(path, "a") as f:
+                for finished in spans:
+                    f.write(finished.to_json(indent=None) + "\n")
+            return SpanExportResult.SUCCESS
+
+        def shutdown(self):
+            pass
+
+    return FileSpanExporter()
+
+
+def _build_exporter(kind: str):
+    if kind == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        return OTLPSpanExporter(endpoint=TRACING_OTLP_ENDPOINT)
+    if kind == "file":
+        return _file_exporter(TRACING_FILE)
+    if kind == "console":
+        from opentelemetry.sdk.trace.export import ConsoleSpanExporter
+        return ConsoleSpanExporter()
+    raise ValueError(f"Unknown TRACING_EXPORTER: {kind}")
+
+
+def setup_tracing(exporter: Optional[str] = None, span_exporter=None) -> bool:
+    """
+    Install the tracer provider (idempotent). Returns True when tracing is active.
+
+    Args:
+        exporter: Override TRACING_EXPORTER
+        span_exporter: Use this SpanExporter instance instead (e.g. in-memory for tests)
+    """
+    global _tracer
+    if _tracer is not None:
+        return True
+    if not (TRACING_ENABLED or exporter or span_exporter) or not _load_otel():
+        return False
+
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor
+
+    provider = TracerProvider(resource=Resource.create({"service.name": TRACING_SERVICE_NAME}))
+    provider.add_span_processor(BatchSpanProcessor(span_exporter or _build_exporter(exporter or TRACING_EXPORTER)))
+    trace.set_tracer_provider(provider)
+    _tracer = trace.get_tracer("tazama-api-client")
+    return True
+
+
+def shutdown_tracing():
+    """Flush pending spans (call on app shutdown)"""
+    if _tracer is not None:
+        provider = trace.get_tracer_provider()
+        if hasattr(provider, "shutdown"):
+            provider.shutdown()
+
+
+def tracing_enabled() -> bool:
+    return _tracer is not None
+
+
+@contextmanager
+def span(name: str, kind: Optional[str] = None, context=None, **attributes):
+    """Child span of the current one (no-op when tracing is off)"""
+    if _tracer is None:
+        yield None
+        return
+    span_kind = getattr(trace.SpanKind, kind.upper()) if kind else trace.SpanKind.INTERNAL
+    with _tracer.start_as_current_span(name, context=context, kind=span_kind,
+                                       attributes={k: v for k, v in attributes.items() if v is not None}) as current:
+        yield current
+
+
+def set_attributes(**attributes):
+    """Set attributes on the current span"""
+    if _tracer is None:
+        return
+    current = trace.get_current_span()
+    for key, value in attributes.items():
+        if value is not None:
+            current.set_attribute(key, value)
+
+
+def inject_trace_headers(headers: Dict[str, str]) -> Dict[str, str]:
+    """Add W3C traceparent / tracestate for the current span to outgoing headers"""
+    if _tracer is not None:
+        propagate.inject(headers)
+    return headers
+
+
+def current_trace_id() -> Optional[str]:
+    if _tracer is None:
+        return None
+    context = trace.get_current_span().get_span_context()
+    return format(context.trace_id, "032x") if context.is_valid else None
+
+
+def _fastapi_traces_requests() -> bool:
+    # Newer FastAPI releases open their own request spans on the global provider
+    import importlib.util
+    return importlib.util.find_spec("fastapi.telemetry") is not None
+
+
+class TracingMiddleware:
+    """ASGI middleware: one SERVER span per HTTP request, continuing an incoming traceparent"""
+
+    def __init__(self, app):
+        self.app = app
+        self.native = _fastapi_traces_requests()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or _tracer is None:
+            await self.app(scope, receive, send)
+            return
+
+        current = None
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                if current is not None:
+                    current.set_attribute("http.status_code", message["status"])
+                    if message["status"] >= 500:
+                        current.set_status(trace.Status(trace.StatusCode.ERROR))
+                trace_id = current_trace_id()
+                if trace_id:
+                    message = {**message, "headers": list(message.get("headers", [])) +
+                               [(b"x-trace-id", trace_id.encode())]}
+            await send(message)
+
+        if self.native:
+            await self.app(scope, receive, send_wrapper)
+            return
+
+        carrier = {k.decode("latin-1"): v.decode("latin-1") for k, v in scope.get("headers", [])}
+        parent = propagate.extract(carrier)
+        method = scope.get("method", "GET")
+
+        with span(f"{method} {scope.get('path', '')}", kind="server", context=parent,
+                  **{"http.method": method, "http.target": scope.get("path")}) as current:
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                route = scope.get("route")
+                if route is not None and getattr(route, "path", None):
+                    current.update_name(f"{method} {route.path}")
+                    current.set_attribute("http.route", route.path)